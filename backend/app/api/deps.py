@@ -6,10 +6,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
 from app.core.security import decode_token
-from app.models.user import User
+from app.models.user import User, UserTier
 from typing import Optional
 
-from app.db.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
 from app.db import models as db_models
 import uuid as uuid_module
 
@@ -18,7 +20,8 @@ security = HTTPBearer()
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Get current authenticated user from JWT token (Database-backed)
@@ -44,22 +47,18 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    # Get user from database
-    db = SessionLocal()
+    # Get user from database (async session - does not block the event loop)
     try:
-        try:
-            user_uuid = uuid_module.UUID(user_id_str)
-        except ValueError:
-            raise credentials_exception
-            
-        db_user = db.query(db_models.User).filter(db_models.User.id == user_uuid).first()
-        if db_user is None:
-            raise credentials_exception
+        user_uuid = uuid_module.UUID(user_id_str)
+    except ValueError:
+        raise credentials_exception
         
-        # Convert SQLAlchemy model to Pydantic model
-        return User.from_orm(db_user)
-    finally:
-        db.close()
+    db_user = await db.get(db_models.User, user_uuid)
+    if db_user is None:
+        raise credentials_exception
+    
+    # Convert SQLAlchemy model to Pydantic model
+    return User.from_orm(db_user)
 
 
 async def get_current_active_user(
@@ -71,6 +70,23 @@ async def get_current_active_user(
     return current_user
 
 
+async def require_admin(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """
+    Only allow admin-tier users (index maintenance endpoints)
+    """
+    if current_user.tier != UserTier.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "code": "ADMIN_REQUIRED",
+                "message": "Admin privileges required"
+            }
+        )
+    return current_user
+
+
 async def check_user_quota(user: User) -> bool:
     """
     Check if user has remaining quota for today (Live DB check)
@@ -0,0 +1,83 @@
+"""
+Middleware ASGI dùng chung cho API
+"""
+from typing import Iterable
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Dự phòng cho phần header/boundary của multipart
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """
+    Dừng nhận request body ngay khi vượt quá giới hạn kích thước
+
+    - Từ chối ngay nếu header Content-Length đã vượt giới hạn
+    - Với body dạng chunked, đếm số byte nhận được và ngắt ở chunk vượt ngưỡng,
+      không chờ đọc hết file
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, path_prefixes: Iterable[str]):
+        self.app = app
+        self.max_body_size = max_body_size + MULTIPART_OVERHEAD_BYTES
+        self.path_prefixes = tuple(path_prefixes)
+
+    def _too_large(self) -> JSONResponse:
+        limit_mb = (self.max_body_size - MULTIPART_OVERHEAD_BYTES) // (1024 * 1024)
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"File vượt quá giới hạn {limit_mb}MB"}
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    if int(value) > self.max_body_size:
+                        await self._too_large()(scope, receive, send)
+                        return
+                except ValueError:
+                    pass
+                break
+
+        state = {"received": 0, "exceeded": False, "replied": False}
+
+        async def limited_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > self.max_body_size:
+                    state["exceeded"] = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            if state["exceeded"]:
+                # Lỗi parse body do bị ngắt giữa chừng → thay bằng phản hồi 413
+                if message["type"] == "http.response.start" and not state["replied"]:
+                    state["replied"] = True
+                    await self._too_large()(scope, receive, send)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        except Exception:
+            if not state["exceeded"]:
+                raise
+
+        if state["exceeded"] and not state["replied"]:
+            state["replied"] = True
+            await self._too_large()(scope, receive, send)
@@ -0,0 +1,72 @@
+"""
+Phân trang keyset (cursor) và đếm xấp xỉ cho các danh sách lớn
+
+Cursor là vị trí (created_at, id) của dòng cuối trang trước, mã hóa base64url
+để client coi như chuỗi mờ. Trang kế tiếp là một lần quét index
+(created_at, id) từ vị trí đó - thời gian không phụ thuộc trang sâu bao nhiêu,
+khác với OFFSET phải đọc và bỏ qua mọi dòng phía trước. Trên bảng phân vùng
+theo created_at (check_results, migration 009), trang sau chỉ mở các phân vùng
+không mới hơn cursor.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Bảng phân vùng (relkind 'p') không có reltuples của riêng nó - cộng các phân vùng con
+_ESTIMATE_SQL = text("""
+SELECT CASE WHEN c.relkind = 'p' THEN (
+           SELECT sum(GREATEST(p.reltuples, 0))::bigint
+           FROM pg_inherits i JOIN pg_class p ON p.oid = i.inhrelid
+           WHERE i.inhparent = c.oid
+       ) ELSE c.reltuples::bigint END
+FROM pg_class c WHERE c.oid = CAST(:table AS regclass)
+""")
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """(created_at, id) của dòng cuối trang → cursor"""
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """cursor → (created_at, id); cursor không hợp lệ → HTTP 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, detail="Cursor phân trang không hợp lệ")
+
+
+def keyset_page(query, created_at_column, id_column, cursor: Optional[str], page_size: int):
+    """
+    Thêm điều kiện / thứ tự keyset (mới nhất trước) vào một câu select
+
+    Lấy page_size + 1 dòng: dòng thừa cho biết còn trang sau.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # So sánh riêng created_at: planner cắt bỏ được các phân vùng mới hơn cursor
+        query = query.where(
+            created_at_column <= created_at,
+            tuple_(created_at_column, id_column) < (created_at, row_id)
+        )
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(page_size + 1)
+
+
+async def estimate_count(db: AsyncSession, table: str) -> Optional[int]:
+    """
+    Số dòng ước lượng từ thống kê của planner (pg_class.reltuples, cập nhật bởi
+    ANALYZE / autovacuum) - O(1). None nếu bảng chưa từng được thống kê.
+    """
+    estimate = await db.scalar(_ESTIMATE_SQL, {"table": table})
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
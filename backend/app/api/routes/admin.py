@@ -0,0 +1,61 @@
+"""
+Các route API quản trị chỉ mục corpus (yêu cầu tài khoản admin)
+
+1. POST /admin/index/rebuild - Dựng lại chỉ mục (blue/green) trong nền
+2. GET /admin/index/rebuild - Tiến độ, ETA và tốc độ của lần dựng lại gần nhất
+"""
+from dataclasses import asdict
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.deps import require_admin
+from app.api.schemas import IndexRebuildRequest
+from app.services import corpus_store, index_versions
+from app.services.index_versions import IndexParams
+
+router = APIRouter(prefix="/admin", tags=["Quản trị"], dependencies=[Depends(require_admin)])
+
+
+def _get_redis():
+    redis_client = corpus_store.connect_redis()
+    if redis_client is None:
+        raise HTTPException(status_code=503, detail="Redis không khả dụng")
+    return redis_client
+
+
+@router.post("/index/rebuild", status_code=202)
+async def start_index_rebuild(request: Optional[IndexRebuildRequest] = None):
+    """
+    Dựng lại toàn bộ chữ ký với tham số mới trong Celery worker
+
+    Phiên bản hiện tại vẫn phục vụ trong lúc dựng; khi xong, mọi process tự
+    chuyển sang phiên bản mới qua luồng thay đổi corpus. resign=true ký lại toàn
+    bộ văn bản thay vì dùng chữ ký đã lưu cùng scheme (sau khi đổi bộ tách từ).
+    """
+    redis_client = _get_redis()
+    if index_versions.rebuild_status(redis_client)["running"]:
+        raise HTTPException(status_code=409, detail="Đang có một lần dựng lại chỉ mục khác")
+
+    overrides = request.model_dump(exclude_none=True) if request else {}
+    resign = overrides.pop("resign", False)
+    params = IndexParams(**{**asdict(IndexParams.from_settings()), **overrides})
+
+    from app.workers.tasks import rebuild_index
+    task = rebuild_index.delay(**asdict(params), resign=resign)
+    return {"task_id": task.id, "status": "queued", "params": asdict(params), "resign": resign}
+
+
+@router.get("/index/rebuild")
+async def get_index_rebuild_status():
+    """Phiên bản đang phục vụ, tiến độ / ETA / tốc độ và phiên bản process này đang dùng"""
+    from app.api.routes.plagiarism import get_checker
+
+    status = index_versions.rebuild_status(_get_redis())
+    checker = get_checker()
+    status["this_process"] = {
+        "index_version": checker.index_version.version,
+        "total_documents": checker.lsh_index.get_stats()["total_documents"],
+        "feed": checker.feed.status() if checker.feed else None,
+    }
+    return status
@@ -3,6 +3,9 @@ Các route liên quan đến xác thực
 Đăng ký, đăng nhập, làm mới token, đăng xuất
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.api.schemas import UserRegister, UserLogin, Token, TokenRefresh
 from app.api.deps import get_current_user
 from app.core.security import (
@@ -13,7 +16,7 @@ from app.core.security import (
     decode_token
 )
 from app.models.user import User as PydanticUser
-from app.db.database import SessionLocal
+from app.db.database import get_async_db
 from app.db.models import User as DBUser
 from jose import JWTError
 
@@ -21,74 +24,65 @@ router = APIRouter(prefix="/auth", tags=["Xác thực"])
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """
     Đăng ký người dùng mới
     
     - Tạo tài khoản người dùng
     - Trả về access token và refresh token
     """
-    db = SessionLocal()
-    try:
-        # Kiểm tra email đã tồn tại chưa
-        existing_user = db.query(DBUser).filter(DBUser.email == user_data.email).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={"code": "EMAIL_EXISTS", "message": "Email đã được đăng ký"}
-            )
-        
-        # Mã hóa mật khẩu và tạo người dùng mới
-        hashed_password = get_password_hash(user_data.password)
-        db_user = DBUser(email=user_data.email, password_hash=hashed_password)
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        
-        user_id = str(db_user.id)
-        
-        # Tạo token
-        access_token = create_access_token(data={"sub": user_id})
-        refresh_token = create_refresh_token(data={"sub": user_id})
-        
-        return Token(
-            access_token=access_token,
-            refresh_token=refresh_token
+    # Kiểm tra email đã tồn tại chưa
+    existing_user = await db.scalar(select(DBUser.id).where(DBUser.email == user_data.email))
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "EMAIL_EXISTS", "message": "Email đã được đăng ký"}
         )
-    finally:
-        db.close()
+    
+    # Mã hóa mật khẩu (bcrypt tốn CPU - chạy trong threadpool) và tạo người dùng mới
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
+    db_user = DBUser(email=user_data.email, password_hash=hashed_password)
+    db.add(db_user)
+    await db.commit()
+    
+    user_id = str(db_user.id)
+    
+    # Tạo token
+    access_token = create_access_token(data={"sub": user_id})
+    refresh_token = create_refresh_token(data={"sub": user_id})
+    
+    return Token(
+        access_token=access_token,
+        refresh_token=refresh_token
+    )
 
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Đăng nhập bằng email và mật khẩu
     
     - Kiểm tra thông tin đăng nhập
     - Trả về access token và refresh token
     """
-    db = SessionLocal()
-    try:
-        # Lấy thông tin người dùng từ cơ sở dữ liệu
-        db_user = db.query(DBUser).filter(DBUser.email == credentials.email).first()
-        if not db_user or not verify_password(credentials.password, db_user.password_hash):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail={"code": "INVALID_CREDENTIALS", "message": "Email hoặc mật khẩu không đúng"}
-            )
-        
-        user_id = str(db_user.id)
-        
-        # Tạo token
-        access_token = create_access_token(data={"sub": user_id})
-        refresh_token = create_refresh_token(data={"sub": user_id})
-        
-        return Token(
-            access_token=access_token,
-            refresh_token=refresh_token
+    # Lấy thông tin người dùng từ cơ sở dữ liệu
+    db_user = await db.scalar(select(DBUser).where(DBUser.email == credentials.email))
+    if not db_user or not await run_in_threadpool(verify_password, credentials.password, db_user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"code": "INVALID_CREDENTIALS", "message": "Email hoặc mật khẩu không đúng"}
         )
-    finally:
-        db.close()
+    
+    user_id = str(db_user.id)
+    
+    # Tạo token
+    access_token = create_access_token(data={"sub": user_id})
+    refresh_token = create_refresh_token(data={"sub": user_id})
+    
+    return Token(
+        access_token=access_token,
+        refresh_token=refresh_token
+    )
 
 
 @router.post("/refresh", response_model=Token)
@@ -3,26 +3,38 @@ Các route API phát hiện đạo văn - PHIÊN BẢN ĐƠN GIẢN (Không yêu
 Tính năng chính:
 
 1. POST /check - Kiểm tra 1 file với toàn bộ corpus
-2. GET /history - Lịch sử kiểm tra
+2. POST /check-text - Kiểm tra văn bản thô (JSON)
+3. GET /history - Lịch sử kiểm tra
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
-from typing import List, Optional
-import tempfile
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+import asyncio
 import os
+import shutil
 import redis
 import json
 import uuid
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.services.plagiarism_checker import PlagiarismChecker
+from app.services.plagiarism_checker import MatchedSegment, PlagiarismChecker, PlagiarismResult
+from app.api.pagination import encode_cursor, estimate_count, keyset_page
+from app.api.schemas import TextCheckRequest
 from app.config import settings
-from app.db.database import get_db
-from app.db.models import CheckResult, MatchDetail
+from app.db.database import engine, get_async_db
+from app.db.models import CheckResult, CheckTokens, MatchDetail, MatchSegment
+from app.services import segment_store
 from app.services.minio_storage import get_minio_storage
+from app.services.upload_ingest import SpooledUpload, spool_upload
 
 router = APIRouter(prefix="/plagiarism", tags=["Phát hiện đạo văn"])
 
+# Thư mục lưu file upload khi MinIO không khả dụng
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads')
+
 # Instance checker toàn cục
 _checker = None
 
@@ -45,10 +57,231 @@ def get_checker():
 # TÍNH NĂNG CHÍNH: Kiểm tra 1 file với toàn bộ corpus
 # ═══════════════════════════════════════════════════════════════
 
+def _persist_upload(upload: SpooledUpload, file_id: str, filename: str) -> Optional[str]:
+    """
+    Lưu file upload để tải lại từ lịch sử
+    
+    Ưu tiên MinIO (stream thẳng từ bộ đệm upload, multipart với file lớn);
+    chỉ ghi vào thư mục uploads/ khi MinIO không khả dụng.
+    
+    Returns:
+        Object key MinIO hoặc đường dẫn cục bộ, None nếu thất bại
+    """
+    minio_storage = get_minio_storage()
+    if minio_storage.is_available():
+        with upload.open() as reader:
+            minio_path = minio_storage.upload_stream(
+                reader,
+                upload.size,
+                object_name=f"checks/{file_id}/{filename}",
+                metadata={"sha256": upload.sha256}
+            )
+        if minio_path:
+            return minio_path
+    
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    local_file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{filename}")
+    with upload.open() as reader, open(local_file_path, 'wb') as f:
+        shutil.copyfileobj(reader, f)
+    return local_file_path
+
+
+def _analyse_upload(checker: PlagiarismChecker, upload: SpooledUpload, filename: str) -> PlagiarismResult:
+    """Phân tích file upload từ bộ đệm (không ghi thêm file tạm)"""
+    with upload.open() as reader:
+        return checker.check_against_corpus(reader, filename)
+
+
+def _discard_upload(file_path: str) -> None:
+    """Xóa file đã lưu khi quá trình kiểm tra thất bại"""
+    try:
+        if file_path.startswith('checks/'):
+            minio_storage = get_minio_storage()
+            if minio_storage.is_available():
+                minio_storage.delete_file(file_path)
+        elif os.path.exists(file_path):
+            os.unlink(file_path)
+    except Exception as e:
+        print(f"Lỗi dọn dẹp file upload: {e}")
+
+
+def _segment_dict(seg: MatchedSegment, include_text: bool = True) -> dict:
+    data = {
+        "query_start": seg.query_start,
+        "query_end": seg.query_end,
+        "source_start": seg.source_start,
+        "source_end": seg.source_end
+    }
+    if include_text:
+        data["query_text"] = seg.query_text
+        data["source_text"] = seg.source_text
+    return data
+
+
+def _segment_offsets(seg: dict) -> dict:
+    """Đoạn đã lưu (JSON) → chỉ còn vị trí, bỏ nội dung"""
+    return {key: seg.get(key) for key in segment_store.OFFSET_KEYS}
+
+
+def _stored_segments(md: MatchDetail) -> Tuple[List[dict], bool]:
+    """
+    Các đoạn đã lưu của một MatchDetail (cần nạp sẵn md.segments)
+    
+    Returns:
+        (danh sách đoạn, True nếu là JSON định dạng cũ - đã kèm nội dung)
+    """
+    if md.segments:
+        return [{key: getattr(seg, key) for key in segment_store.OFFSET_KEYS} for seg in md.segments], False
+    return (json.loads(md.matched_segments) if md.matched_segments else []), True
+
+
+async def _load_query_tokens(db: AsyncSession, result_id: uuid.UUID, created_at: datetime) -> Optional[List[str]]:
+    """Mảng token của văn bản đã kiểm tra (None với kết quả không lưu token)"""
+    # created_at: chỉ đọc đúng phân vùng tháng của kết quả
+    row = (await db.execute(
+        select(CheckTokens.codec, CheckTokens.dictionary_id, CheckTokens.content)
+        .where(CheckTokens.result_id == result_id, CheckTokens.created_at == created_at)
+    )).first()
+    if row is None:
+        return None
+    return await run_in_threadpool(segment_store.decode_tokens, engine, row.codec, row.dictionary_id, row.content)
+
+
+async def _save_check_result(
+    db: AsyncSession,
+    file_id: str,
+    filename: str,
+    result: PlagiarismResult,
+    file_path: Optional[str]
+) -> Optional[List[str]]:
+    """
+    Lưu CheckResult, MatchDetail và vị trí các đoạn trùng khớp vào PostgreSQL (lỗi chỉ được ghi log)
+    
+    match_details và match_segments mỗi bảng một câu INSERT nhiều dòng; nội dung
+    đoạn không được chép mà dựng lại từ token (check_tokens, document_texts).
+    Mọi dòng mang cùng created_at với CheckResult (cùng phân vùng tháng).
+    
+    Returns:
+        ID của MatchDetail theo thứ tự result.matches, None nếu lưu thất bại
+    """
+    result_id = uuid.UUID(file_id)
+    match_ids = [uuid.uuid4() for _ in result.matches]
+    try:
+        # Nén token trước khi mở transaction (có thể đọc dictionary nén)
+        query_tokens = None
+        if result.query_tokens and any(m.matched_segments for m in result.matches):
+            query_tokens = await run_in_threadpool(segment_store.compress_tokens, engine, result.query_tokens)
+        
+        # Giờ của PostgreSQL (như server_default) - khóa phân vùng của cả 4 bảng lịch sử.
+        # Kết quả lưu khi đã kiểm tra xong → completed_at cùng mốc, cùng đồng hồ
+        created_at = await db.scalar(select(func.localtimestamp()))
+        segment_rows = [
+            row
+            for match_id, m in zip(match_ids, result.matches)
+            for row in segment_store.segment_rows(match_id, created_at, m.matched_segments)
+        ]
+        
+        db.add(CheckResult(
+            id=result_id,
+            created_at=created_at,
+            query_filename=filename,
+            overall_similarity=result.overall_similarity,
+            plagiarism_level=result.plagiarism_level,
+            match_count=len(result.matches),
+            word_count=result.word_count,
+            processing_time_ms=result.processing_time_ms,
+            file_path=file_path,  # Lưu đường dẫn MinIO hoặc cục bộ
+            status='completed',
+            completed_at=created_at
+        ))
+        # CheckResult phải có trước các dòng tham chiếu tới nó
+        await db.flush()
+        
+        if result.matches:
+            await db.execute(insert(MatchDetail), [
+                {
+                    "id": match_id,
+                    "result_id": result_id,
+                    "created_at": created_at,
+                    "source_doc_id": uuid.UUID(m.pg_id) if m.pg_id else None,
+                    "similarity_score": m.similarity,
+                    "source_title": m.title,
+                    "source_author": m.author,
+                    "source_university": m.university,
+                    "source_year": m.year,
+                    "tokenizer_version": segment_store.TOKENIZER_VERSION,
+                }
+                for match_id, m in zip(match_ids, result.matches)
+            ])
+        if segment_rows:
+            await db.execute(insert(MatchSegment), segment_rows)
+        if query_tokens is not None:
+            db.add(CheckTokens(
+                result_id=result_id,
+                created_at=created_at,
+                codec=query_tokens.codec,
+                dictionary_id=query_tokens.dictionary_id,
+                raw_size=query_tokens.raw_size,
+                content=query_tokens.content
+            ))
+        
+        await db.commit()
+        return [str(match_id) for match_id in match_ids]
+    except Exception as db_error:
+        await db.rollback()
+        print(f"Lỗi lưu database: {db_error}")
+        return None
+
+
+def _build_check_response(
+    file_id: str,
+    filename: str,
+    result: PlagiarismResult,
+    checker: PlagiarismChecker,
+    match_ids: Optional[List[str]],
+    include_text: bool = False
+) -> dict:
+    """
+    Tạo response JSON cho các endpoint kiểm tra
+    
+    Mặc định chỉ trả điểm số và vị trí các đoạn trùng khớp; nội dung đoạn được
+    tải theo từng match qua GET /history/{id}/matches/{match_id}/segments.
+    Nếu lưu database thất bại (match_ids = None) thì trả nội dung kèm theo luôn.
+    """
+    include_text = include_text or match_ids is None
+    return {
+        "id": file_id,  # Trả về ID để frontend tham chiếu
+        "filename": filename,
+        "is_plagiarized": result.is_plagiarized,
+        "overall_similarity": round(result.overall_similarity * 100, 2),
+        "plagiarism_level": result.plagiarism_level,
+        "word_count": result.word_count,
+        "processing_time_ms": result.processing_time_ms,
+        "corpus_size": checker.get_corpus_stats()["total_documents"],
+        "segments_included": include_text,
+        "matches": [
+            {
+                "id": match_ids[i] if match_ids else None,
+                "title": m.title,
+                "author": m.author,
+                "university": m.university,
+                "year": m.year,
+                "similarity": round(m.similarity * 100, 2),
+                "segment_count": len(m.matched_segments or []),
+                "matched_segments": [
+                    _segment_dict(seg, include_text) for seg in (m.matched_segments or [])
+                ]
+            }
+            for i, m in enumerate(result.matches)
+        ]
+    }
+
+
 @router.post("/check")
 async def check_single_file(
     file: UploadFile = File(..., description="File cần kiểm tra"),
-    db: Session = Depends(get_db)
+    include_text: bool = Query(False, description="Trả kèm nội dung mọi đoạn trùng khớp (response lớn)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Kiểm tra 1 file với toàn bộ corpus
@@ -57,11 +290,15 @@ async def check_single_file(
     - So sánh với tất cả tài liệu trong corpus
     - Trả về danh sách các tài liệu có độ tương đồng
     
+    File được đọc theo chunk (dừng ngay khi vượt MAX_UPLOAD_SIZE, SHA-256 tính
+    tăng dần), phân tích trực tiếp từ bộ đệm và được lưu lên MinIO song song.
+    
     Trả về:
         - is_plagiarized: True/False
         - overall_similarity: % tương đồng cao nhất
         - plagiarism_level: none/low/medium/high
-        - matches: Danh sách tài liệu tương tự
+        - matches: Danh sách tài liệu tương tự (điểm số + vị trí các đoạn trùng khớp;
+          nội dung đoạn lấy qua /history/{id}/matches/{match_id}/segments)
         - word_count: Số từ trong file
         - processing_time_ms: Thời gian xử lý
     """
@@ -75,117 +312,66 @@ async def check_single_file(
     # Tạo ID duy nhất cho file
     file_id = str(uuid.uuid4())
     
-    # Tạo thư mục tạm nếu chưa có
-    upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads')
-    os.makedirs(upload_dir, exist_ok=True)
-    safe_filename = f"{file_id}_{file.filename}"
-    local_file_path = os.path.join(upload_dir, safe_filename)
+    # Đọc theo chunk: giới hạn kích thước, tính SHA-256, kiểm tra loại file
+    upload = await spool_upload(file, ext)
     
     try:
-        # Lưu file tạm thời để xử lý
-        content = await file.read()
-        with open(local_file_path, 'wb') as f:
-            f.write(content)
-        
         checker = get_checker()
-        result = checker.check_against_corpus(local_file_path, file.filename)
-        
-        # Upload lên MinIO để lưu trữ lâu dài
-        minio_path = None
-        minio_storage = get_minio_storage()
-        if minio_storage.is_available():
-            minio_path = minio_storage.upload_file(
-                local_file_path,
-                object_name=f"checks/{file_id}/{file.filename}"
-            )
-            if minio_path:
-                # Xóa file cục bộ sau khi upload thành công lên MinIO
-                os.unlink(local_file_path)
-                local_file_path = None
         
-        # Lưu kết quả vào PostgreSQL
-        try:
-            # Tạo bản ghi CheckResult
-            check_result = CheckResult(
-                id=uuid.UUID(file_id),
-                query_filename=file.filename,
-                overall_similarity=result.overall_similarity,
-                plagiarism_level=result.plagiarism_level,
-                match_count=len(result.matches),
-                word_count=result.word_count,
-                processing_time_ms=result.processing_time_ms,
-                file_path=minio_path or local_file_path,  # Lưu đường dẫn MinIO hoặc cục bộ
-                status='completed',
-                completed_at=datetime.utcnow()
-            )
-            db.add(check_result)
-            
-            # Tạo các bản ghi MatchDetail cho từng đoạn khớp
-            for m in result.matches:
-                match_detail = MatchDetail(
-                    result_id=uuid.UUID(file_id),
-                    similarity_score=m.similarity,
-                    source_title=m.title,
-                    source_author=m.author,
-                    source_university=m.university,
-                    source_year=m.year,
-                    matched_segments=json.dumps([
-                        {
-                            "query_text": seg.query_text,
-                            "query_start": seg.query_start,
-                            "query_end": seg.query_end,
-                            "source_text": seg.source_text,
-                            "source_start": seg.source_start,
-                            "source_end": seg.source_end
-                        }
-                        for seg in (m.matched_segments or [])
-                    ]) if m.matched_segments else None
-                )
-                db.add(match_detail)
-            
-            db.commit()
-        except Exception as db_error:
-            db.rollback()
-            print(f"Lỗi lưu database: {db_error}")
-        
-        response = {
-            "id": file_id,  # Trả về ID để frontend tham chiếu
-            "filename": file.filename,
-            "is_plagiarized": result.is_plagiarized,
-            "overall_similarity": round(result.overall_similarity * 100, 2),
-            "plagiarism_level": result.plagiarism_level,
-            "word_count": result.word_count,
-            "processing_time_ms": result.processing_time_ms,
-            "corpus_size": checker.get_corpus_stats()["total_documents"],
-            "matches": [
-                {
-                    "title": m.title,
-                    "author": m.author,
-                    "university": m.university,
-                    "year": m.year,
-                    "similarity": round(m.similarity * 100, 2),
-                    "matched_segments": [
-                        {
-                            "query_text": seg.query_text,
-                            "query_start": seg.query_start,
-                            "query_end": seg.query_end,
-                            "source_text": seg.source_text,
-                            "source_start": seg.source_start,
-                            "source_end": seg.source_end
-                        }
-                        for seg in (m.matched_segments or [])
-                    ] if m.matched_segments else []
-                }
-                for m in result.matches
-            ]
-        }
-        
-        return response
-    except Exception as e:
-        # Dọn dẹp file cục bộ nếu xử lý thất bại
-        if local_file_path and os.path.exists(local_file_path):
-            os.unlink(local_file_path)
-        raise
+        # Phân tích và lưu trữ chạy song song trong threadpool
+        result, stored_path = await asyncio.gather(
+            run_in_threadpool(_analyse_upload, checker, upload, file.filename),
+            run_in_threadpool(_persist_upload, upload, file_id, file.filename),
+            return_exceptions=True
+        )
+    finally:
+        upload.close()
+    
+    if isinstance(stored_path, BaseException):
+        print(f"Lỗi lưu file upload: {stored_path}")
+        stored_path = None
+    
+    if isinstance(result, BaseException):
+        # Dọn dẹp file đã lưu nếu xử lý thất bại
+        if stored_path:
+            _discard_upload(stored_path)
+        raise result
+    
+    # Lưu kết quả vào PostgreSQL
+    match_ids = await _save_check_result(db, file_id, file.filename, result, stored_path)
+    
+    response = _build_check_response(file_id, file.filename, result, checker, match_ids, include_text)
+    response["file_hash_sha256"] = upload.sha256
+    return response
+
+
+@router.post("/check-text")
+async def check_raw_text(
+    payload: TextCheckRequest,
+    include_text: bool = Query(False, description="Trả kèm nội dung mọi đoạn trùng khớp (response lớn)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Kiểm tra văn bản thô (JSON) với toàn bộ corpus
+    
+    - Không cần upload file, không ghi gì ra đĩa
+    - Body: {"text": "...", "title": "Tên hiển thị (tùy chọn)"}
+    """
+    text = payload.text.strip()
+    if not text:
+        raise HTTPException(400, detail="Văn bản không được rỗng")
+    if len(text.encode('utf-8')) > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(413, detail="Văn bản vượt quá kích thước cho phép")
+    
+    file_id = str(uuid.uuid4())
+    filename = payload.title or "van_ban.txt"
+    
+    checker = get_checker()
+    result = await run_in_threadpool(checker.check_text, text)
+    
+    match_ids = await _save_check_result(db, file_id, filename, result, None)
+    
+    return _build_check_response(file_id, filename, result, checker, match_ids, include_text)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -200,34 +386,85 @@ async def get_corpus_stats():
     return {
         "total_documents": stats["total_documents"],
         "threshold": stats["threshold"],
-        "status": "ready" if stats["total_documents"] > 0 else "empty"
+        "status": "ready" if stats["total_documents"] > 0 else "empty",
+        "feed": stats.get("feed")
     }
 
 
+@router.get("/ocr/cache-stats")
+async def get_ocr_cache_stats():
+    """Lấy thống kê OCR cache của mọi worker (hit rate, số entry) để định cỡ cache"""
+    from app.services.preprocessing.ocr_cache import get_ocr_cache
+
+    cache = get_ocr_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
+
+
 # ═══════════════════════════════════════════════════════════════
 # LỊCH SỬ KIỂM TRA (PostgreSQL)
 # ═══════════════════════════════════════════════════════════════
 
+def _matched_source(source_id: uuid.UUID):
+    """Điều kiện: kết quả có match với tài liệu nguồn source_id (index idx_match_source_doc)"""
+    # So cả created_at: mỗi match chỉ dò khóa chính trong đúng phân vùng tháng của nó
+    return tuple_(CheckResult.id, CheckResult.created_at).in_(
+        select(MatchDetail.result_id, MatchDetail.created_at).where(MatchDetail.source_doc_id == source_id)
+    )
+
+
+async def _count_history(db: AsyncSession, exact: bool, source_id: Optional[uuid.UUID] = None) -> Tuple[int, bool]:
+    """
+    Tổng số bản ghi lịch sử: (số lượng, có phải ước lượng không)
+    
+    COUNT(*) phải quét cả bảng - chỉ dùng khi được yêu cầu hoặc bảng còn nhỏ.
+    Lọc theo tài liệu nguồn thì luôn đếm chính xác (chỉ đọc index).
+    """
+    query = select(func.count()).select_from(CheckResult)
+    if source_id is not None:
+        return await db.scalar(query.where(_matched_source(source_id))), False
+    if not exact:
+        estimate = await estimate_count(db, CheckResult.__tablename__)
+        if estimate is not None and estimate >= settings.HISTORY_EXACT_COUNT_THRESHOLD:
+            return estimate, True
+    return await db.scalar(query), False
+
+
 @router.get("/history")
 async def get_history(
-    page: int = Query(1, ge=1),
+    page: int = Query(1, ge=1, description="Trang (OFFSET) - chỉ dùng khi không có cursor"),
     page_size: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor của trang trước (phân trang keyset)"),
+    exact_total: bool = Query(False, description="Đếm chính xác thay vì ước lượng"),
+    source_id: Optional[uuid.UUID] = Query(None, description="Chỉ các lần kiểm tra trùng khớp với tài liệu nguồn này"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lấy lịch sử kiểm tra đạo văn từ PostgreSQL
+    
+    Mới nhất trước. Trang kế tiếp: truyền next_cursor của trang hiện tại
+    (keyset trên index (created_at, id), thời gian không đổi dù trang sâu);
+    page chỉ còn cho việc nhảy tới một trang bất kỳ (OFFSET).
+    total là số ước lượng (total_is_estimate) khi bảng lớn, trừ khi exact_total=true.
+    source_id: mọi lần kiểm tra đã trùng khớp với một tài liệu trong corpus.
     """
     try:
-        # Tính offset
-        offset = (page - 1) * page_size
+        query = select(CheckResult)
+        if source_id is not None:
+            query = query.where(_matched_source(source_id))
+        query = keyset_page(query, CheckResult.created_at, CheckResult.id, cursor, page_size)
+        if not cursor:
+            query = query.offset((page - 1) * page_size)
+        rows = (await db.scalars(query)).all()
+        results = rows[:page_size]
+        
+        # Dòng thừa (page_size + 1) cho biết còn trang sau
+        next_cursor = None
+        if len(rows) > page_size and results[-1].created_at is not None:
+            next_cursor = encode_cursor(results[-1].created_at, results[-1].id)
         
-        # Lấy tổng số bản ghi
-        total = db.query(CheckResult).count()
-        results = db.query(CheckResult)\
-            .order_by(CheckResult.created_at.desc())\
-            .offset(offset)\
-            .limit(page_size)\
-            .all()
+        total, total_is_estimate = await _count_history(db, exact_total, source_id)
         
         items = []
         for r in results:
@@ -246,37 +483,69 @@ async def get_history(
         return {
             "items": items,
             "total": total,
+            "total_is_estimate": total_is_estimate,
+            "next_cursor": next_cursor,
             "page": page,
             "page_size": page_size
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Lỗi lấy lịch sử: {e}")
         return {
             "items": [],
             "total": 0,
+            "total_is_estimate": False,
+            "next_cursor": None,
             "page": page,
             "page_size": page_size
         }
 
 
 @router.get("/history/{item_id}")
-async def get_history_detail(item_id: str, db: Session = Depends(get_db)):
-    """Lấy chi tiết một mục lịch sử cùng với thông tin các đoạn khớp"""
+async def get_history_detail(
+    item_id: str,
+    include_text: bool = Query(False, description="Trả kèm nội dung mọi đoạn trùng khớp (response lớn)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lấy chi tiết một mục lịch sử cùng với thông tin các đoạn khớp
+    
+    Mặc định mỗi match chỉ có vị trí các đoạn; nội dung lấy theo trang qua
+    GET /history/{id}/matches/{match_id}/segments.
+    """
     try:
-        result = db.query(CheckResult).filter(CheckResult.id == uuid.UUID(item_id)).first()
+        # Nạp match_details và vị trí các đoạn cùng lúc - session async không cho lazy load
+        result = await db.scalar(
+            select(CheckResult)
+            .options(selectinload(CheckResult.match_details).selectinload(MatchDetail.segments))
+            .where(CheckResult.id == uuid.UUID(item_id))
+        )
         if not result:
             raise HTTPException(404, detail="Không tìm thấy mục lịch sử")
         
         # Lấy chi tiết các đoạn khớp
         matches = []
-        for md in result.match_details:
+        query_tokens = None
+        for md in sorted(result.match_details, key=lambda md: md.similarity_score or 0, reverse=True):
+            segments, legacy = _stored_segments(md)
+            if not include_text:
+                segments = [_segment_offsets(seg) for seg in segments] if legacy else segments
+            elif not legacy:
+                if query_tokens is None:
+                    query_tokens = await _load_query_tokens(db, result.id, result.created_at)
+                segments = await run_in_threadpool(
+                    segment_store.with_texts, engine, segments, query_tokens, md.source_doc_id
+                )
             match_data = {
+                "id": str(md.id),
                 "title": md.source_title,
                 "author": md.source_author,
                 "university": md.source_university,
                 "year": md.source_year,
                 "similarity": float(md.similarity_score * 100) if md.similarity_score else 0,
-                "matched_segments": json.loads(md.matched_segments) if md.matched_segments else []
+                "segment_count": len(segments),
+                "matched_segments": segments
             }
             matches.append(match_data)
         
@@ -289,6 +558,7 @@ async def get_history_detail(item_id: str, db: Session = Depends(get_db)):
             "processing_time_ms": result.processing_time_ms,
             "match_count": result.match_count,
             "created_at": result.created_at.isoformat() if result.created_at else None,
+            "segments_included": include_text,
             "matches": matches
         }
     except HTTPException:
@@ -297,11 +567,70 @@ async def get_history_detail(item_id: str, db: Session = Depends(get_db)):
         raise HTTPException(500, detail=str(e))
 
 
+@router.get("/history/{item_id}/matches/{match_id}/segments")
+async def get_match_segments(
+    item_id: str,
+    match_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Nội dung các đoạn trùng khớp của một match, theo trang
+    
+    Chỉ đọc đúng các dòng match_segments của trang; nội dung dựng lại từ
+    token văn bản kiểm tra và văn bản nguồn (kết quả cũ: từ cột matched_segments).
+    """
+    try:
+        row = (await db.execute(
+            select(
+                MatchDetail.id, MatchDetail.result_id, MatchDetail.created_at,
+                MatchDetail.source_doc_id, MatchDetail.matched_segments, MatchDetail.tokenizer_version
+            )
+            .where(MatchDetail.id == uuid.UUID(match_id), MatchDetail.result_id == uuid.UUID(item_id))
+        )).first()
+    except ValueError:
+        row = None
+    if row is None:
+        raise HTTPException(404, detail="Không tìm thấy match")
+    
+    # created_at của match = khóa phân vùng: chỉ đọc một phân vùng match_segments
+    in_match = (MatchSegment.match_id == row.id, MatchSegment.created_at == row.created_at)
+    total = await db.scalar(
+        select(func.count()).select_from(MatchSegment).where(*in_match)
+    )
+    if total:
+        page = (await db.scalars(
+            select(MatchSegment)
+            .where(*in_match)
+            .order_by(MatchSegment.seq)
+            .offset(offset)
+            .limit(limit)
+        )).all()
+        segments = [{key: getattr(seg, key) for key in segment_store.OFFSET_KEYS} for seg in page]
+        query_tokens = await _load_query_tokens(db, row.result_id, row.created_at) if segments else None
+        items = await run_in_threadpool(
+            segment_store.with_texts, engine, segments, query_tokens, row.source_doc_id, row.tokenizer_version
+        )
+    else:
+        segments = json.loads(row.matched_segments) if row.matched_segments else []
+        total = len(segments)
+        items = segments[offset:offset + limit]
+    
+    return {
+        "items": items,
+        "total": total,
+        "offset": offset,
+        "limit": limit
+    }
+
+
 @router.delete("/history/{item_id}")
-async def delete_history_item(item_id: str, db: Session = Depends(get_db)):
+async def delete_history_item(item_id: str, db: AsyncSession = Depends(get_async_db)):
     """Xóa một mục lịch sử đơn lẻ"""
     try:
-        result = db.query(CheckResult).filter(CheckResult.id == uuid.UUID(item_id)).first()
+        # Khóa chính gồm cả created_at (phân vùng) - tra theo id
+        result = await db.scalar(select(CheckResult).where(CheckResult.id == uuid.UUID(item_id)))
         if not result:
             raise HTTPException(404, detail="Không tìm thấy mục lịch sử")
         
@@ -316,25 +645,26 @@ async def delete_history_item(item_id: str, db: Session = Depends(get_db)):
                 # Đường dẫn cục bộ
                 os.unlink(result.file_path)
         
-        db.delete(result)
-        db.commit()
+        await db.delete(result)
+        await db.commit()
         
         return {"message": "Đã xóa mục lịch sử"}
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, detail=str(e))
 
 
 @router.get("/history/{item_id}/download")
-async def download_history_file(item_id: str, db: Session = Depends(get_db)):
+async def download_history_file(item_id: str, db: AsyncSession = Depends(get_async_db)):
     """Tải xuống file gốc từ lịch sử kiểm tra"""
     from fastapi.responses import FileResponse, StreamingResponse
     from io import BytesIO
     
     try:
-        result = db.query(CheckResult).filter(CheckResult.id == uuid.UUID(item_id)).first()
+        # Khóa chính gồm cả created_at (phân vùng) - tra theo id
+        result = await db.scalar(select(CheckResult).where(CheckResult.id == uuid.UUID(item_id)))
         if not result:
             raise HTTPException(404, detail="Không tìm thấy mục lịch sử")
         
@@ -371,31 +701,20 @@ async def download_history_file(item_id: str, db: Session = Depends(get_db)):
         raise HTTPException(500, detail=str(e))
 
 
-@router.delete("/history")
-async def clear_history(db: Session = Depends(get_db)):
-    """Xóa toàn bộ lịch sử kiểm tra"""
+@router.delete("/history", status_code=202)
+async def clear_history(db: AsyncSession = Depends(get_async_db)):
+    """
+    Xóa toàn bộ lịch sử kiểm tra (trong nền)
+    
+    Chỉ xếp task dọn lịch sử với mốc là thời điểm hiện tại rồi trả về ngay;
+    Celery worker xóa bản ghi và file gốc theo lô (services/retention.py).
+    Các lần kiểm tra sau thời điểm này không bị ảnh hưởng.
+    """
     try:
-        # Lấy tất cả bản ghi để xóa file
-        results = db.query(CheckResult).all()
-        minio_storage = get_minio_storage()
-        
-        for r in results:
-            if r.file_path:
-                try:
-                    if r.file_path.startswith('checks/'):
-                        # Đường dẫn MinIO
-                        if minio_storage.is_available():
-                            minio_storage.delete_file(r.file_path)
-                    elif os.path.exists(r.file_path):
-                        # Đường dẫn cục bộ
-                        os.unlink(r.file_path)
-                except:
-                    pass
-        
-        # Xóa tất cả bản ghi (MatchDetails sẽ tự động xóa theo cascade)
-        db.query(CheckResult).delete()
-        db.commit()
-        return {"message": "Đã xóa toàn bộ lịch sử"}
+        # Giờ của PostgreSQL - cùng gốc với created_at (server_default now())
+        before = await db.scalar(select(func.localtimestamp()))
+        from app.workers.tasks import cleanup_old_jobs
+        task = cleanup_old_jobs.delay(before=before.isoformat())
+        return {"message": "Đã xếp lịch xóa toàn bộ lịch sử", "task_id": task.id, "status": "queued"}
     except Exception as e:
-        db.rollback()
-        raise HTTPException(500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(500, detail=str(e))
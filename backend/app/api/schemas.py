@@ -1,7 +1,7 @@
 """
 Các schema Pydantic dùng cho request/response của API
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -32,6 +32,12 @@ class TokenRefresh(BaseModel):
 
 
 # Schema liên quan đến kiểm tra đạo văn (Check)
+class TextCheckRequest(BaseModel):
+    """Yêu cầu kiểm tra văn bản thô (không cần upload file)"""
+    text: str
+    title: Optional[str] = None
+
+
 class CheckUploadResponse(BaseModel):
     """Phản hồi sau khi tải file lên"""
     job_id: str
@@ -96,4 +102,14 @@ class ErrorDetail(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Phản hồi lỗi chuẩn"""
-    error: ErrorDetail
\ No newline at end of file
+    error: ErrorDetail
+
+
+# Schema quản trị chỉ mục corpus
+class IndexRebuildRequest(BaseModel):
+    """Yêu cầu dựng lại chỉ mục - trường bỏ trống lấy theo cấu hình hiện tại"""
+    shingle_size: Optional[int] = Field(None, ge=1, le=20)
+    num_perm: Optional[int] = Field(None, ge=16, le=1024)
+    lsh_threshold: Optional[float] = Field(None, gt=0.0, lt=1.0)
+    # Bỏ qua chữ ký đã lưu trong PostgreSQL - bắt buộc khi đổi bộ tách từ / chuẩn hóa văn bản
+    resign: bool = False
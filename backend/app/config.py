@@ -26,6 +26,12 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Pool async (asyncpg) của các route FastAPI - tính theo từng process uvicorn
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30                # Chờ kết nối rảnh tối đa (giây)
+    DB_POOL_RECYCLE: int = 1800              # Đóng kết nối cũ hơn (giây)
+    DB_STATEMENT_CACHE_SIZE: int = 256       # Prepared statement cache mỗi kết nối; 0 khi qua pgbouncer (transaction mode)
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
@@ -44,8 +50,18 @@ class Settings(BaseSettings):
     
     # Giới hạn tải file lên
     MAX_UPLOAD_SIZE: int = 20 * 1024 * 1024  # 20MB
+    UPLOAD_SPOOL_MEMORY_BYTES: int = 2 * 1024 * 1024  # File lớn hơn 2MB được ghi ra file tạm
     ALLOWED_EXTENSIONS: list[str] = [".pdf", ".docx", ".txt", ".tex"]
     
+    # Lịch sử kiểm tra: dưới ngưỡng này vẫn đếm chính xác (rẻ), trên ngưỡng dùng số ước lượng
+    HISTORY_EXACT_COUNT_THRESHOLD: int = 10_000
+    # Dọn lịch sử theo thời gian (Celery beat, hằng ngày lúc HISTORY_RETENTION_HOUR giờ UTC)
+    HISTORY_RETENTION_DAYS: int = 180        # 0 = giữ vĩnh viễn
+    HISTORY_RETENTION_HOUR: int = 3
+    RETENTION_BATCH_SIZE: int = 500          # Số kết quả xóa mỗi transaction
+    RETENTION_BATCH_PAUSE: float = 0.5       # Nghỉ giữa hai lô (giây) - nhường tài nguyên cho request thật
+    HISTORY_PARTITIONS_AHEAD: int = 3        # Số tháng tạo sẵn phân vùng lịch sử (migration 009)
+    
     # Tham số MinHash / LSH
     MINHASH_SEED: int = 42
     MINHASH_PERMUTATIONS: int = 128
@@ -53,12 +69,33 @@ class Settings(BaseSettings):
     LSH_BANDS: int = 16
     LSH_ROWS: int = 8
     SHINGLE_SIZE: int = 7
+    NEAR_DUPLICATE_THRESHOLD: float = 0.9   # Jaccard ≥ ngưỡng này → gộp vào cụm gần trùng
+    
+    # Luồng thay đổi corpus (Redis Stream) - giữ chỉ mục LSH của mọi process đồng bộ
+    CORPUS_FEED_ENABLED: bool = True
+    CORPUS_FEED_STREAM: str = "corpus:changes"
+    CORPUS_FEED_MAXLEN: int = 100_000        # Số sự kiện tối đa giữ lại (xấp xỉ, ~100 byte / sự kiện)
+    CORPUS_FEED_BLOCK_MS: int = 500          # Thời gian chờ sự kiện mới mỗi lần đọc
+    CORPUS_FEED_BATCH_SIZE: int = 500        # Số sự kiện áp dụng mỗi lần
+    
+    # Dựng lại chỉ mục (blue/green) khi đổi tham số shingle / MinHash / LSH
+    INDEX_REBUILD_BATCH_SIZE: int = 500      # Số tài liệu ký lại mỗi lô
+    INDEX_REBUILD_LOCK_TTL: int = 900        # Khóa rebuild tự hết hạn nếu worker chết (giây)
+    INDEX_GC_GRACE_SECONDS: int = 120        # Chờ trước khi xóa chữ ký của phiên bản cũ
+    
+    # Văn bản đã trích xuất lưu nén trong bảng document_texts
+    TEXT_COMPRESSION_LEVEL: int = 9          # Mức nén zstd (zlib dùng tối đa 9)
+    TEXT_DICTIONARY_SIZE: int = 112_640      # Kích thước dictionary zstd huấn luyện từ corpus (byte)
     
     # Cấu hình OCR
+    OCR_ENABLED: bool = True     # OCR PDF scan khi trích xuất (cần Tesseract + poppler)
     OCR_TIMEOUT: int = 30        # đơn vị giây
     TESSERACT_LANG: str = "vie+eng"
     MAX_PAGES_FOR_OCR: int = 100
-    
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_DIR: str = "/app/uploads/ocr_cache"
+    OCR_CACHE_MAX_ENTRIES: int = 20000   # ~ vài trăm MB văn bản
+
     # Giới hạn tốc độ (Rate Limiting)
     RATE_LIMIT_PER_MINUTE: str = "20/hour"
     RATE_LIMIT_PREMIUM: str = "100/hour"
@@ -1,8 +1,15 @@
 """
 Cấu hình và khởi tạo kết nối cơ sở dữ liệu
 Sử dụng SQLAlchemy với PostgreSQL (hoặc database tương thích)
+
+- engine / SessionLocal / get_db: đồng bộ (psycopg2) - dùng cho script, Celery
+  và các service chạy trong threadpool
+- async_engine / AsyncSessionLocal / get_async_db: bất đồng bộ (asyncpg) - dùng
+  cho các route FastAPI, truy vấn không chặn event loop
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
 
@@ -12,6 +19,29 @@ engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 # Tạo factory để sinh session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url(url: str):
+    """postgresql://... → postgresql+asyncpg://... kèm kích thước prepared statement cache"""
+    return make_url(url).set(drivername="postgresql+asyncpg").update_query_dict({
+        "prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE),
+    })
+
+
+# Engine bất đồng bộ cho request path
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    # Cache statement phía asyncpg (khác cache của SQLAlchemy ở URL) - cùng tắt khi qua pgbouncer
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+)
+
+# expire_on_commit=False: đọc thuộc tính sau commit không phát sinh truy vấn ngầm (không được phép khi async)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Base class cho các model declarative
 Base = declarative_base()
 
@@ -30,6 +60,16 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency cung cấp AsyncSession cho các route async def
+    
+    Sử dụng: db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """
     Tạo tất cả các bảng trong cơ sở dữ liệu tự động.
@@ -40,4 +80,8 @@ def init_db():
     from app.db import models  # noqa: F401
     
     Base.metadata.create_all(bind=engine)
-    print("✅ Các bảng cơ sở dữ liệu đã được tạo/kiểm tra thành công")
\ No newline at end of file
+    
+    # create_all chỉ tạo bảng cha của lịch sử kiểm tra (phân vùng theo tháng) - tạo sẵn phân vùng
+    from app.services.history_partitions import ensure_partitions
+    ensure_partitions(engine)
+    print("✅ Các bảng cơ sở dữ liệu đã được tạo/kiểm tra thành công")
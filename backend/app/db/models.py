@@ -1,10 +1,17 @@
 """
 Các model SQLAlchemy đại diện cho bảng trong cơ sở dữ liệu
-Bao gồm: User, Document, CheckResult, MatchDetail
+Bao gồm: User, Document, DocumentText, TextDictionary, DocumentSignature, CheckResult, CheckTokens,
+MatchDetail, MatchSegment
+
+Bốn bảng của lịch sử kiểm tra (check_results, check_tokens, match_details,
+match_segments) phân vùng theo tháng trên created_at (migration 009): khóa
+chính / khóa ngoại giữa chúng gồm cả created_at, bảng con mang created_at của
+kết quả cha nên cùng tháng luôn nằm cùng phân vùng. Phân vùng được tạo trước
+bởi app/services/history_partitions.py.
 """
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, BigInteger, Numeric
+from sqlalchemy import Column, String, Integer, SmallInteger, DateTime, ForeignKey, ForeignKeyConstraint, Text, BigInteger, Numeric, LargeBinary, Index, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 import uuid
 
@@ -43,7 +50,9 @@ class Document(Base):
     extraction_method = Column(String(50))
     status = Column(String(20), default='processing')  # processing, completed, failed
     error_message = Column(Text)
-    extracted_text = Column(Text)  # văn bản đã trích xuất từ file, lưu trực tiếp trong DB
+    # Cột cũ - văn bản nay lưu nén trong document_texts (đọc qua app.services.text_store);
+    # deferred để load một Document không kéo theo toàn bộ văn bản
+    extracted_text = deferred(Column(Text))
     
     # Metadata dành cho tài liệu trong corpus
     author = Column(String(255), nullable=True)
@@ -51,15 +60,74 @@ class Document(Base):
     year = Column(Integer, nullable=True)
     topic = Column(String(255), nullable=True)
     is_corpus = Column(Integer, default=0)  # 1 = tài liệu corpus, 0 = tài liệu người dùng upload
+    # Tài liệu gần trùng (Jaccard ≥ NEAR_DUPLICATE_THRESHOLD) trỏ về tài liệu đại diện
+    # của cụm; chỉ tài liệu đại diện (canonical_id = NULL) được đưa vào chỉ mục LSH
+    canonical_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='SET NULL'), nullable=True)
+    # ID số nguyên dày đặc của tài liệu corpus (sequence documents_corpus_row_seq, cấp khi
+    # nhập): khóa trong chỉ mục LSH, hậu tố key Redis và hàng của ma trận chữ ký
+    corpus_row = Column(Integer, unique=True, nullable=True)
     
     created_at = Column(DateTime, server_default=func.now())
     indexed_at = Column(DateTime)  # thời điểm hoàn tất lập chỉ mục (indexing) cho corpus
 
     owner = relationship('User')
+    text_content = relationship('DocumentText', uselist=False, lazy='select', passive_deletes=True)
+
+    # Index theo truy vấn thực tế (migration 006) - file_hash_sha256 / corpus_row đã có unique index
+    __table_args__ = (
+        Index('idx_documents_owner', 'owner_id'),
+        Index('idx_documents_created', 'created_at'),
+        # Corpus đã lập chỉ mục: đếm và lọc theo khoảng word_count
+        Index('idx_documents_corpus_indexed', 'word_count',
+              postgresql_where=text("is_corpus = 1 AND status = 'indexed'")),
+        # Tài liệu corpus chưa có corpus_row (assign_missing_corpus_rows) - thường rỗng
+        Index('idx_documents_corpus_row_missing', 'id',
+              postgresql_where=text("is_corpus = 1 AND corpus_row IS NULL")),
+        # Khóa ngoại ON DELETE SET NULL: xóa tài liệu đại diện không phải quét cả bảng
+        Index('idx_documents_canonical', 'canonical_id',
+              postgresql_where=text("canonical_id IS NOT NULL")),
+    )
+
+
+class TextDictionary(Base):
+    """Dictionary zstd huấn luyện từ corpus để nén văn bản (text_dictionaries)"""
+    __tablename__ = "text_dictionaries"
+
+    id = Column(Integer, primary_key=True)
+    content = Column(LargeBinary, nullable=False)
+    sample_count = Column(Integer)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class DocumentText(Base):
+    """Văn bản đã trích xuất của tài liệu, lưu nén (document_texts)"""
+    __tablename__ = "document_texts"
+
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'), primary_key=True)
+    codec = Column(String(16), nullable=False)  # zstd, zlib
+    dictionary_id = Column(Integer, ForeignKey('text_dictionaries.id'), nullable=True)
+    raw_size = Column(Integer)  # số byte UTF-8 trước khi nén
+    content = deferred(Column(LargeBinary, nullable=False))
+
+
+class DocumentSignature(Base):
+    """Chữ ký MinHash của tài liệu corpus theo từng bộ tham số ký (document_signatures)"""
+    __tablename__ = "document_signatures"
+
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'), primary_key=True)
+    scheme = Column(String(32), primary_key=True)  # ví dụ "k7p128" - xem IndexParams.signature_scheme
+    language = Column(String(10))
+    shingle_count = Column(Integer)
+    signature = Column(LargeBinary, nullable=False)  # num_perm giá trị uint32 little-endian
+    created_at = Column(DateTime, server_default=func.now())
+
+
+# Khai báo phân vùng theo tháng cho các bảng lịch sử kiểm tra
+HISTORY_PARTITION_BY = {"postgresql_partition_by": "RANGE (created_at)"}
 
 
 class CheckResult(Base):
-    """Bảng kết quả kiểm tra đạo văn (check_results)"""
+    """Bảng kết quả kiểm tra đạo văn (check_results, phân vùng theo tháng)"""
     __tablename__ = "check_results"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -74,12 +142,42 @@ class CheckResult(Base):
     error_message = Column(Text)
     processing_time_ms = Column(Integer)
     file_path = Column(String(1000))  # object key trong MinIO cho file upload
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, primary_key=True, server_default=func.now())  # khóa phân vùng
     completed_at = Column(DateTime)
 
     user = relationship('User')
     document = relationship('Document')
-    match_details = relationship('MatchDetail', back_populates='result', cascade='all, delete-orphan')
+    match_details = relationship('MatchDetail', back_populates='result',
+                                 cascade='all, delete-orphan', passive_deletes=True)
+    query_tokens = relationship('CheckTokens', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+
+    __table_args__ = (
+        # Lịch sử mới nhất trước, phân trang keyset theo (created_at, id) - quét ngược B-tree
+        Index('idx_results_created_id', 'created_at', 'id'),
+        # Lịch sử của một người dùng; thay cho index chỉ trên user_id
+        Index('idx_results_user_created', 'user_id', 'created_at'),
+        Index('idx_results_query_doc', 'query_doc_id',
+              postgresql_where=text("query_doc_id IS NOT NULL")),
+        HISTORY_PARTITION_BY,
+    )
+
+
+class CheckTokens(Base):
+    """Mảng token của văn bản đã kiểm tra (JSON, nén như document_texts) - nguồn nội dung của match_segments"""
+    __tablename__ = "check_tokens"
+
+    result_id = Column(UUID(as_uuid=True), primary_key=True)
+    created_at = Column(DateTime, primary_key=True)  # = check_results.created_at
+    codec = Column(String(16), nullable=False)  # zstd, zlib
+    dictionary_id = Column(Integer, ForeignKey('text_dictionaries.id'), nullable=True)
+    raw_size = Column(Integer)  # số byte UTF-8 trước khi nén
+    content = deferred(Column(LargeBinary, nullable=False))
+
+    __table_args__ = (
+        ForeignKeyConstraint(['result_id', 'created_at'], ['check_results.id', 'check_results.created_at'],
+                             ondelete='CASCADE'),
+        HISTORY_PARTITION_BY,
+    )
 
 
 class MatchDetail(Base):
@@ -87,14 +185,14 @@ class MatchDetail(Base):
     __tablename__ = "match_details"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    result_id = Column(UUID(as_uuid=True), ForeignKey('check_results.id', ondelete='CASCADE'))
+    result_id = Column(UUID(as_uuid=True), nullable=False)
     source_doc_id = Column(UUID(as_uuid=True), ForeignKey('documents.id'))
     similarity_score = Column(Numeric(5, 4))
     
-    # Chi tiết các đoạn văn bản trùng khớp (lưu dưới dạng JSON array dạng text)
-    # Format ví dụ: 
-    # [{"query_text": "...", "query_start": 0, "query_end": 100, 
+    # Định dạng cũ (trước migration 008): JSON array kèm nội dung từng đoạn, ví dụ
+    # [{"query_text": "...", "query_start": 0, "query_end": 100,
     #   "source_text": "...", "source_start": 50, "source_end": 150}]
+    # Kết quả mới lưu vị trí trong bảng match_segments, cột này để NULL
     matched_segments = Column(Text)
     
     # Metadata của tài liệu nguồn (để hiển thị trên frontend mà không cần join thêm)
@@ -103,7 +201,42 @@ class MatchDetail(Base):
     source_university = Column(String(255))
     source_year = Column(Integer)
     
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, primary_key=True)  # = check_results.created_at (cùng phân vùng)
+    # TOKENIZER_VERSION khi tính vị trí nguồn của match_segments (migration 010)
+    tokenizer_version = Column(SmallInteger)
 
     result = relationship('CheckResult', back_populates='match_details')
-    source_doc = relationship('Document')
\ No newline at end of file
+    source_doc = relationship('Document')
+    segments = relationship('MatchSegment', order_by='MatchSegment.seq',
+                            cascade='all, delete-orphan', passive_deletes=True)
+
+    __table_args__ = (
+        ForeignKeyConstraint(['result_id', 'created_at'], ['check_results.id', 'check_results.created_at'],
+                             ondelete='CASCADE'),
+        # Khóa ngoại: chi tiết của một kết quả, xóa kết quả (CASCADE)
+        Index('idx_match_result', 'result_id', 'created_at'),
+        # Khóa ngoại: xóa tài liệu nguồn; các lần kiểm tra theo một nguồn
+        Index('idx_match_source_doc', 'source_doc_id',
+              postgresql_where=text("source_doc_id IS NOT NULL")),
+        HISTORY_PARTITION_BY,
+    )
+
+
+class MatchSegment(Base):
+    """Một đoạn trùng khớp của MatchDetail: chỉ vị trí token, nội dung dựng lại khi cần (match_segments)"""
+    __tablename__ = "match_segments"
+
+    match_id = Column(UUID(as_uuid=True), primary_key=True)
+    created_at = Column(DateTime, primary_key=True)  # = check_results.created_at
+    seq = Column(SmallInteger, primary_key=True)  # thứ tự hiển thị (đoạn dài trước)
+    # Nửa khoảng [start, end) trên mảng token của văn bản kiểm tra / văn bản nguồn
+    query_start = Column(Integer, nullable=False)
+    query_end = Column(Integer, nullable=False)
+    source_start = Column(Integer, nullable=False)
+    source_end = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        ForeignKeyConstraint(['match_id', 'created_at'], ['match_details.id', 'match_details.created_at'],
+                             ondelete='CASCADE'),
+        HISTORY_PARTITION_BY,
+    )
@@ -5,7 +5,8 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.db.database import init_db
+from app.db.database import async_engine, init_db
+from app.api.middleware import BodySizeLimitMiddleware
 
 
 @asynccontextmanager
@@ -14,13 +15,13 @@ async def lifespan(app: FastAPI):
     Xử lý sự kiện khởi động và tắt ứng dụng
     
     - Khởi động: Tạo các bảng trong database
-    - Tắt ứng dụng: Dọn dẹp nếu cần (hiện tại chưa có)
+    - Tắt ứng dụng: Đóng pool kết nối async
     """
     # Khởi động ứng dụng
     init_db()
     yield
-    # Tắt ứng dụng - dọn dẹp nếu cần
-    pass
+    # Tắt ứng dụng - đóng các kết nối asyncpg đang giữ trong pool
+    await async_engine.dispose()
 
 
 # Tạo ứng dụng FastAPI
@@ -45,6 +46,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Giới hạn kích thước upload - ngắt ngay khi vượt MAX_UPLOAD_SIZE
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.MAX_UPLOAD_SIZE,
+    path_prefixes=[f"{settings.API_V1_PREFIX}/plagiarism/check"],
+)
+
 
 @app.get("/")
 async def root():
@@ -67,10 +75,11 @@ async def health_check():
 
 
 # Đăng ký các router API
-from app.api.routes import auth, plagiarism
+from app.api.routes import admin, auth, plagiarism
 
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(plagiarism.router, prefix=settings.API_V1_PREFIX)
+app.include_router(admin.router, prefix=settings.API_V1_PREFIX)
 
 
 if __name__ == "__main__":
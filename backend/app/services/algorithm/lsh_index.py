@@ -1,100 +1,206 @@
 """
 Module chỉ mục LSH (Locality Sensitive Hashing)
 Sử dụng để tìm kiếm nhanh tài liệu tương đồng dựa trên Jaccard similarity
+
+Khóa tài liệu là corpus_row (số nguyên dày đặc cấp khi nhập corpus, xem
+documents.corpus_row): chữ ký được lưu thành một hàng của ma trận numpy
+(corpus_row → hàng), không giữ đối tượng MinHash cho từng tài liệu.
 """
+import threading
+
+import numpy as np
 from datasketch import MinHash, MinHashLSH
-from typing import List, Tuple, Dict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INDEX_LANGUAGE = "vi"
+
+# Dung lượng ban đầu của ma trận chữ ký (số hàng); tăng gấp đôi khi cần
+_INITIAL_CAPACITY = 1024
+
+# Mã ngôn ngữ của hàng chưa có tài liệu
+_ABSENT = -1
+
+# Hashvalue MinHash của datasketch < 2^32 (dù MinHash giữ dạng uint64) → lưu 4 byte/permutation
+_SIGNATURE_DTYPE = np.uint32
 
 
 class LSHIndex:
     """
     Lớp bọc quanh MinHashLSH của thư viện datasketch
-    
+
     Nguyên lý hoạt động của LSH:
     - Chia signature thành b bands, mỗi band có r rows
     - Hai tài liệu được coi là candidate nếu chúng khớp ít nhất ở một band
     - Xác suất phát hiện: P(candidate) = 1 - (1 - s^r)^b
-    
+
     Cấu hình mặc định:
         threshold=0.3, num_perm=128 (b=32, r=4 → b*r=128)
         - Với similarity s=0.5: Xác suất phát hiện ≈ 86%
         - Với similarity s=0.2: Xác suất false positive ≈ 5%
+
+    Lưu trữ:
+        matrix[corpus_row]          → hashvalues (uint32, num_perm cột)
+        language_codes[corpus_row]  → mã ngôn ngữ (int8, -1 = không có tài liệu)
+    Jaccard của các candidate được tính một lần trên cả khối hàng.
     """
-    
+
     def __init__(self, threshold: float = 0.3, num_perm: int = 128):
         """
         Khởi tạo chỉ mục LSH
-        
+
         Args:
             threshold: Ngưỡng Jaccard similarity tối thiểu (mặc định 0.4)
             num_perm: Số lượng permutation (phải khớp với MinHash, mặc định 128)
         """
         self.threshold = threshold
         self.num_perm = num_perm
-        self.lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
-        self.signatures: Dict[str, MinHash] = {}  # doc_id -> MinHash
-    
-    def insert(self, doc_id: str, minhash: MinHash) -> None:
+        # Mỗi ngôn ngữ có một MinHashLSH riêng: query chỉ dò các chỉ mục cùng ngôn ngữ
+        self.lsh_by_language: Dict[str, MinHashLSH] = {}
+        self.matrix = np.zeros((0, num_perm), dtype=_SIGNATURE_DTYPE)
+        self.language_codes = np.zeros(0, dtype=np.int8)
+        self._language_names: List[str] = []
+        self._count = 0
+        # Luồng thay đổi corpus cập nhật chỉ mục từ thread nền trong khi request đang query
+        self._lock = threading.RLock()
+
+    def _get_lsh(self, language: str) -> MinHashLSH:
+        """Lấy (hoặc tạo mới) chỉ mục LSH của một ngôn ngữ"""
+        lsh = self.lsh_by_language.get(language)
+        if lsh is None:
+            lsh = MinHashLSH(threshold=self.threshold, num_perm=self.num_perm)
+            self.lsh_by_language[language] = lsh
+        return lsh
+
+    def _language_code(self, language: str) -> int:
+        if language not in self._language_names:
+            self._language_names.append(language)
+        return self._language_names.index(language)
+
+    def _ensure_capacity(self, row: int) -> None:
+        """Mở rộng ma trận (gấp đôi) để chứa được hàng `row`"""
+        capacity = len(self.language_codes)
+        if row < capacity:
+            return
+        new_capacity = max(_INITIAL_CAPACITY, capacity * 2, row + 1)
+        matrix = np.zeros((new_capacity, self.num_perm), dtype=_SIGNATURE_DTYPE)
+        matrix[:capacity] = self.matrix
+        codes = np.full(new_capacity, _ABSENT, dtype=np.int8)
+        codes[:capacity] = self.language_codes
+        self.matrix, self.language_codes = matrix, codes
+
+    def __contains__(self, doc_id: int) -> bool:
+        return 0 <= doc_id < len(self.language_codes) and self.language_codes[doc_id] != _ABSENT
+
+    def __len__(self) -> int:
+        return self._count
+
+    def insert(self, doc_id: int, minhash: MinHash, language: str = DEFAULT_INDEX_LANGUAGE) -> None:
         """
-        Thêm một tài liệu vào chỉ mục LSH
-        
+        Thêm một tài liệu vào chỉ mục LSH (đã có thì thay bằng chữ ký mới)
+
         Args:
-            doc_id: Mã định danh duy nhất của tài liệu
+            doc_id: corpus_row của tài liệu
             minhash: Chữ ký MinHash của tài liệu
+            language: Ngôn ngữ của tài liệu (mặc định "vi")
         """
-        self.lsh.insert(doc_id, minhash)
-        self.signatures[doc_id] = minhash
-    
-    def query(self, minhash: MinHash, top_k: int = 10) -> List[Tuple[str, float]]:
+        if doc_id < 0:
+            raise ValueError(f"corpus_row không hợp lệ: {doc_id}")
+        language = language or DEFAULT_INDEX_LANGUAGE
+        with self._lock:
+            if doc_id in self:
+                self.remove(doc_id)
+            self._get_lsh(language).insert(doc_id, minhash)
+            self._ensure_capacity(doc_id)
+            self.matrix[doc_id] = minhash.hashvalues.astype(_SIGNATURE_DTYPE)
+            self.language_codes[doc_id] = self._language_code(language)
+            self._count += 1
+
+    def query(
+        self,
+        minhash: MinHash,
+        top_k: int = 10,
+        languages: Optional[Iterable[str]] = None
+    ) -> List[Tuple[int, float]]:
         """
         Tìm kiếm các tài liệu candidate tương đồng với tài liệu query
-        
+
         Args:
             minhash: Chữ ký MinHash của tài liệu query
             top_k: Số lượng kết quả tối đa trả về (mặc định 10)
-        
+            languages: Chỉ dò chỉ mục của các ngôn ngữ này (None = tất cả)
+
         Returns:
-            Danh sách các cặp (doc_id, estimated_jaccard) được sắp xếp giảm dần theo độ tương đồng
-        
+            Danh sách các cặp (corpus_row, estimated_jaccard) được sắp xếp giảm dần theo độ tương đồng
+
         Ví dụ:
-            results = lsh_index.query(query_minhash, top_k=5)
-            # Kết quả: [('doc123', 0.85), ('doc456', 0.72), ...]
+            results = lsh_index.query(query_minhash, top_k=5, languages={"vi"})
+            # Kết quả: [(123, 0.85), (456, 0.72), ...]
         """
-        # Lấy danh sách candidate từ LSH
-        candidates = self.lsh.query(minhash)
-        
-        # Tính Jaccard similarity chính xác cho từng candidate
-        results = []
-        for doc_id in candidates:
-            if doc_id in self.signatures:
-                jaccard = minhash.jaccard(self.signatures[doc_id])
-                results.append((doc_id, jaccard))
-        
+        with self._lock:
+            if languages is None:
+                indexes = list(self.lsh_by_language.values())
+            else:
+                indexes = [self.lsh_by_language[lang] for lang in languages if lang in self.lsh_by_language]
+
+            # Lấy danh sách candidate từ LSH
+            candidates = set()
+            for lsh in indexes:
+                candidates.update(lsh.query(minhash))
+            if not candidates:
+                return []
+
+            rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            rows = rows[self.language_codes[rows] != _ABSENT]
+            signatures = self.matrix[rows]
+
+        # Jaccard ước lượng cho cả khối candidate: tỉ lệ permutation có hashvalue bằng nhau
+        similarities = np.count_nonzero(signatures == minhash.hashvalues, axis=1) / self.num_perm
+
         # Sắp xếp theo độ tương đồng giảm dần
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        return results[:top_k]
-    
-    def remove(self, doc_id: str) -> None:
+        order = np.argsort(-similarities, kind="stable")[:top_k]
+        return [(int(rows[i]), float(similarities[i])) for i in order]
+
+    def signature(self, doc_id: int) -> Optional[np.ndarray]:
+        """Hashvalues (uint64, như MinHash.hashvalues) của một tài liệu trong chỉ mục (None nếu không có)"""
+        with self._lock:
+            if doc_id not in self:
+                return None
+            return self.matrix[doc_id].astype(np.uint64)
+
+    def remove(self, doc_id: int) -> None:
         """
         Xóa một tài liệu khỏi chỉ mục LSH
-        
+
         Args:
-            doc_id: Mã định danh của tài liệu cần xóa
+            doc_id: corpus_row của tài liệu cần xóa
         """
-        if doc_id in self.signatures:
-            self.lsh.remove(doc_id)
-            del self.signatures[doc_id]
-    
+        with self._lock:
+            if doc_id in self:
+                language = self._language_names[self.language_codes[doc_id]]
+                self._get_lsh(language).remove(doc_id)
+                self.language_codes[doc_id] = _ABSENT
+                self.matrix[doc_id] = 0
+                self._count -= 1
+
     def get_stats(self) -> Dict:
         """
         Lấy thông tin thống kê của chỉ mục
-        
+
         Returns:
             Dictionary chứa các thông tin thống kê
         """
+        with self._lock:
+            present = self.language_codes[self.language_codes != _ABSENT]
+            counts = np.bincount(present, minlength=len(self._language_names)) if len(present) else []
+            by_language = {
+                name: int(count) for name, count in zip(self._language_names, counts) if count
+            }
+            capacity = len(self.language_codes)
         return {
-            "total_documents": len(self.signatures),
+            "total_documents": self._count,
+            "documents_by_language": by_language,
             "threshold": self.threshold,
-            "num_perm": self.num_perm
-        }
\ No newline at end of file
+            "num_perm": self.num_perm,
+            "matrix_rows": capacity,
+            "matrix_bytes": capacity * self.num_perm * self.matrix.itemsize
+        }
@@ -10,7 +10,7 @@ MINHASH_SEED = 42           # Seed cố định, không được random
 MINHASH_PERMUTATIONS = 128  # Số lượng permutation - sai số ước lượng ≈ 1/√128 ≈ 8.8%
 
 
-def create_minhash_signature(shingles: Set[int]) -> MinHash:
+def create_minhash_signature(shingles: Set[int], num_perm: int = MINHASH_PERMUTATIONS) -> MinHash:
     """
     Tạo chữ ký MinHash từ tập hợp shingles
     
@@ -19,6 +19,7 @@ def create_minhash_signature(shingles: Set[int]) -> MinHash:
     
     Args:
         shingles: Tập hợp các giá trị hash của shingles (số nguyên 32-bit)
+        num_perm: Số permutation (theo tham số của phiên bản chỉ mục, mặc định 128)
     
     Returns:
         Đối tượng MinHash chứa chữ ký đã tạo
@@ -35,12 +36,12 @@ def create_minhash_signature(shingles: Set[int]) -> MinHash:
         raise ValueError("Tập hợp shingles không được rỗng")
     
     # Tạo MinHash với seed cố định để đảm bảo kết quả lặp lại được
-    m = MinHash(num_perm=MINHASH_PERMUTATIONS, seed=MINHASH_SEED)
+    m = MinHash(num_perm=num_perm, seed=MINHASH_SEED)
     
-    for shingle in shingles:
-        # Chuyển thành bytes để update vào MinHash
-        # MinHash.update() yêu cầu dữ liệu dạng bytes
-        m.update(str(shingle).encode('utf-8'))
+    # Chuyển thành bytes để update vào MinHash (yêu cầu dữ liệu dạng bytes).
+    # update_batch tính toàn bộ bằng numpy một lần - cho kết quả giống hệt
+    # việc gọi update() từng shingle nhưng nhanh hơn nhiều với văn bản dài
+    m.update_batch([str(shingle).encode('utf-8') for shingle in shingles])
     
     return m
 
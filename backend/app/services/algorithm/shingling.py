@@ -6,7 +6,7 @@ from typing import Set, List, Tuple, Dict
 import mmh3  # Thư viện MurmurHash3
 
 
-def create_shingles(tokens: List[str], k: int = 7) -> Set[int]:
+def create_shingles(tokens: List[str], k: int = 7, namespace: str = "") -> Set[int]:
     """
     Tạo tập các hash của shingle từ danh sách tokens
     
@@ -15,6 +15,8 @@ def create_shingles(tokens: List[str], k: int = 7) -> Set[int]:
     Args:
         tokens: Danh sách các từ đã được tokenize
         k: Kích thước shingle (số từ). Mặc định = 7 cho tiếng Việt
+        namespace: Tiền tố phân vùng shingle theo ngôn ngữ (rỗng = tiếng Việt,
+                   giữ nguyên giá trị hash như trước)
     
     Returns:
         Tập các giá trị hash (số nguyên 32-bit không dấu)
@@ -27,15 +29,17 @@ def create_shingles(tokens: List[str], k: int = 7) -> Set[int]:
         # - "nhân_tạo đang phát_triển"
         # - "đang phát_triển mạnh"
     """
+    prefix = f"{namespace}:" if namespace else ""
+    
     if len(tokens) < k:
         # Nếu văn bản quá ngắn thì dùng toàn bộ làm 1 shingle
-        shingle = " ".join(tokens)
+        shingle = prefix + " ".join(tokens)
         return {mmh3.hash(shingle, signed=False)}
     
     shingle_set = set()
     for i in range(len(tokens) - k + 1):
         # Tạo shingle từ k token liên tiếp
-        shingle = " ".join(tokens[i:i+k])
+        shingle = prefix + " ".join(tokens[i:i+k])
         
         # Hash bằng MurmurHash3 32-bit không dấu
         # signed=False đảm bảo luôn là số dương
@@ -0,0 +1,220 @@
+"""
+Consumer luồng thay đổi corpus (Redis Stream)
+
+Mỗi PlagiarismChecker chạy một thread nền đọc `corpus:changes` bằng XREAD
+(không dùng consumer group - mọi process đều phải nhận mọi sự kiện) và áp
+dụng theo lô vào chỉ mục LSH cục bộ. Nhờ đó tài liệu do ingest engine,
+daemon theo dõi thư mục hay process khác thêm vào xuất hiện ở mọi node trong
+khoảng một giây, không cần khởi động lại.
+
+Mỗi sự kiện mang phiên bản chỉ mục của chữ ký; consumer chỉ áp dụng sự kiện
+của phiên bản mình đang phục vụ, chữ ký đọc từ Redis theo doc_id (MGET mỗi lô).
+Sự kiện swap (sau một lần rebuild) khiến consumer gọi on_swap để nạp phiên bản
+mới và chuyển sang chỉ mục đó. Consumer trễ quá điểm cắt của luồng
+(CORPUS_FEED_MAXLEN) cũng gọi on_swap với phiên bản hiện tại để nạp lại toàn bộ.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services import corpus_store
+from app.services.algorithm.lsh_index import LSHIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else (value or "")
+
+
+def _changed_ids(entries: List[Tuple[str, Dict]]) -> List[int]:
+    """corpus_row của các sự kiện add/update trong lô (không lặp)"""
+    doc_ids = []
+    for _entry_id, fields in entries:
+        fields = {_text(k): v for k, v in fields.items()}
+        if _text(fields.get("op")) in (corpus_store.CHANGE_ADD, corpus_store.CHANGE_UPDATE):
+            doc_id = corpus_store.parse_doc_id(fields.get("doc_id"))
+            if doc_id is not None:
+                doc_ids.append(doc_id)
+    return list(dict.fromkeys(doc_ids))
+
+
+class CorpusFeedConsumer:
+    """
+    Áp dụng các sự kiện add/update/remove vào một LSHIndex
+
+    Ví dụ:
+        start_id = corpus_store.latest_change_id(redis)   # trước khi nạp snapshot
+        ... nạp doc:sig:* vào index ...
+        consumer = CorpusFeedConsumer(redis, index, start_id)
+        consumer.start()
+        consumer.status()  # {'applied_id': '1718000000000-0', 'lag_events': 0, ...}
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        index: LSHIndex,
+        start_id: Optional[str] = None,
+        block_ms: int = None,
+        batch_size: int = None,
+        version: str = corpus_store.LEGACY_INDEX_VERSION,
+        on_swap: Optional[Callable[[str], LSHIndex]] = None
+    ):
+        """
+        Args:
+            index: Chỉ mục LSH của phiên bản `version`
+            start_id: Đọc sự kiện sau ID này (None = chỉ sự kiện mới)
+            version: Phiên bản chỉ mục đang phục vụ
+            on_swap: Hàm nạp chỉ mục của một phiên bản - khi có sự kiện swap, hoặc nạp
+                lại phiên bản hiện tại khi luồng đã bị cắt mất sự kiện chưa đọc
+        """
+        self.redis_client = redis_client
+        self.index = index
+        self.version = version
+        self.on_swap = on_swap
+        self.stream = settings.CORPUS_FEED_STREAM
+        self.block_ms = block_ms or settings.CORPUS_FEED_BLOCK_MS
+        self.batch_size = batch_size or settings.CORPUS_FEED_BATCH_SIZE
+
+        # Mặc định: chỉ nhận sự kiện phát ra từ bây giờ
+        self.applied_id = start_id or corpus_store.latest_change_id(redis_client)
+        self.applied_events = 0
+        self.reloads = 0
+        self.last_applied_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ─── Áp dụng sự kiện ──────────────────────────────────────
+
+    def apply(self, entries: List[Tuple[str, Dict]]) -> int:
+        """
+        Áp dụng một lô sự kiện theo thứ tự
+
+        Returns:
+            Số sự kiện đã áp dụng
+        """
+        # Chữ ký hiện tại của mọi add/update trong lô, một lần MGET (lỗi được ném ra: vị trí
+        # không tiến, lần đọc sau thử lại)
+        changed = _changed_ids(entries)
+        signatures = corpus_store.fetch_signatures(self.redis_client, changed, self.version)
+        for entry_id, fields in entries:
+            fields = {_text(k): v for k, v in fields.items()}
+            op = _text(fields.get("op"))
+            event_version = _text(fields.get("version")) or corpus_store.LEGACY_INDEX_VERSION
+            if op == corpus_store.CHANGE_SWAP:
+                # Lỗi khi nạp phiên bản mới được ném ra: vị trí không tiến, lần đọc sau thử lại
+                if self._swap(event_version):
+                    signatures = corpus_store.fetch_signatures(self.redis_client, changed, self.version)
+                continue
+            doc_id = corpus_store.parse_doc_id(fields.get("doc_id"))
+            if doc_id is None or event_version != self.version:
+                # Sự kiện không có corpus_row, hoặc chữ ký của phiên bản khác (ghi muộn quanh swap)
+                continue
+            try:
+                if op == corpus_store.CHANGE_REMOVE:
+                    self.index.remove(doc_id)
+                elif op in (corpus_store.CHANGE_ADD, corpus_store.CHANGE_UPDATE):
+                    minhash = signatures.get(doc_id)
+                    if minhash is not None:
+                        # Không còn chữ ký: tài liệu đã bị xóa, sự kiện remove ở phía sau
+                        self.index.insert(doc_id, minhash, language=_text(fields.get("language")) or "vi")
+            except Exception as e:
+                logger.warning(f"⚠️  Bỏ qua sự kiện {_text(entry_id)} ({op} {doc_id}): {e}")
+
+        if entries:
+            self.applied_id = _text(entries[-1][0])
+            self.applied_events += len(entries)
+            self.last_applied_at = time.time()
+        return len(entries)
+
+    def _reload(self) -> None:
+        """Nạp lại toàn bộ phiên bản đang phục vụ rồi đọc tiếp từ đầu luồng hiện tại"""
+        position = corpus_store.latest_change_id(self.redis_client)
+        if self.on_swap is None:
+            logger.error(f"❌ Luồng thay đổi corpus đã bị cắt sau {self.applied_id} - chỉ mục thiếu thay đổi")
+        else:
+            logger.warning(
+                f"⚠️  Luồng thay đổi corpus đã bị cắt sau {self.applied_id} "
+                f"(trễ quá CORPUS_FEED_MAXLEN) - nạp lại chỉ mục v{self.version}"
+            )
+            self.index = self.on_swap(self.version)
+        self.applied_id = position
+        self.reloads += 1
+
+    def _swap(self, version: str) -> bool:
+        if version == self.version or self.on_swap is None:
+            return False
+        logger.info(f"🔄 Chuyển chỉ mục corpus sang phiên bản {version}")
+        self.index = self.on_swap(version)
+        self.version = version
+        return True
+
+    def poll_once(self, block_ms: Optional[int] = None) -> int:
+        """Đọc và áp dụng một lô sự kiện (chặn tối đa block_ms nếu chưa có)"""
+        if corpus_store.changes_trimmed_after(self.redis_client, self.applied_id):
+            self._reload()
+        response = self.redis_client.xread(
+            {self.stream: self.applied_id},
+            count=self.batch_size,
+            block=self.block_ms if block_ms is None else block_ms
+        )
+        applied = 0
+        for _stream, entries in response or []:
+            applied += self.apply(entries)
+        return applied
+
+    # ─── Thread nền ───────────────────────────────────────────
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"⚠️  Lỗi đọc luồng thay đổi corpus: {e}")
+                self._stop.wait(min(5.0, self.block_ms / 1000 * 4))
+
+    def start(self) -> "CorpusFeedConsumer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="corpus-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Dict:
+        """Vị trí đã áp dụng và độ trễ so với đầu luồng"""
+        lag_events = None
+        try:
+            latest = corpus_store.latest_change_id(self.redis_client)
+            if latest == self.applied_id or latest == "0-0":
+                lag_events = 0
+            else:
+                # XRANGE có giới hạn để không quét cả luồng khi bị trễ nhiều
+                pending = self.redis_client.xrange(
+                    self.stream, min=f"({self.applied_id}", max="+", count=self.batch_size
+                )
+                lag_events = len(pending)
+        except Exception as e:
+            self.last_error = str(e)
+        return {
+            "stream": self.stream,
+            "index_version": self.version,
+            "applied_id": self.applied_id,
+            "applied_events": self.applied_events,
+            "reloads": self.reloads,
+            "lag_events": lag_events,
+            "last_applied_at": self.last_applied_at,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "last_error": self.last_error,
+        }
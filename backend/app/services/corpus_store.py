@@ -0,0 +1,363 @@
+"""
+Lưu trữ chỉ mục corpus trong Redis
+Định nghĩa định dạng key và cách tuần tự hóa chữ ký MinHash dùng chung
+giữa PlagiarismChecker (đọc) và các pipeline nhập corpus (ghi)
+
+doc_id là documents.corpus_row - số nguyên dày đặc cấp khi nhập corpus, dùng
+chung làm khóa trong chỉ mục LSH, hậu tố key Redis và hàng của ma trận chữ ký.
+
+Định dạng:
+    doc:sig:{doc_id}       → JSON list 128 hashvalue của MinHash (phiên bản chỉ mục "0")
+    idx:{v}:sig:{doc_id}   → chữ ký của phiên bản chỉ mục v (dựng lại bằng rebuild)
+    doc:meta:{doc_id}      → hash (title, author, university, year, language, pg_id)
+    corpus:index:active    → phiên bản chỉ mục đang phục vụ (không có = "0")
+    corpus:changes         → Redis Stream các sự kiện add/update/remove (chỉ doc_id, ngôn
+                             ngữ, phiên bản - chữ ký đọc từ sig key) và swap, để mọi
+                             process cập nhật chỉ mục LSH mà không cần khởi động lại;
+                             cắt theo CORPUS_FEED_MAXLEN
+"""
+import json
+import logging
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from datasketch import MinHash
+
+from app.config import settings
+from app.services.algorithm.minhash import MINHASH_SEED
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_KEY_PREFIX = "doc:sig:"
+METADATA_KEY_PREFIX = "doc:meta:"
+ACTIVE_INDEX_KEY = "corpus:index:active"
+
+# Phiên bản chỉ mục trước khi có rebuild - giữ nguyên key doc:sig:{doc_id}
+LEGACY_INDEX_VERSION = "0"
+
+# Số lệnh Redis gửi trong một lần round-trip của pipeline
+REDIS_PIPELINE_SIZE = 1000
+
+# Loại sự kiện trong luồng thay đổi corpus
+CHANGE_ADD = "add"
+CHANGE_UPDATE = "update"
+CHANGE_REMOVE = "remove"
+CHANGE_SWAP = "swap"
+
+
+def connect_redis():
+    """Kết nối Redis theo settings.REDIS_URL; trả về None nếu không kết nối được"""
+    import redis
+
+    try:
+        client = redis.from_url(settings.REDIS_URL, decode_responses=False)
+        client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Không kết nối được Redis ({settings.REDIS_URL}): {e}")
+        return None
+
+
+def parse_doc_id(value: Union[str, bytes, int, None]) -> Optional[int]:
+    """
+    corpus_row từ hậu tố key / trường sự kiện; None nếu không phải số nguyên
+
+    Key dạng cũ (8 ký tự đầu của UUID) chưa được chuyển bằng
+    scripts/migrate_corpus_rows.py sẽ trả về None.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, bytes):
+        value = value.decode()
+    if not value or not value.isdigit():
+        return None
+    return int(value)
+
+
+def signature_prefix(version: str = LEGACY_INDEX_VERSION) -> str:
+    """Tiền tố key chữ ký của một phiên bản chỉ mục"""
+    if version == LEGACY_INDEX_VERSION:
+        return SIGNATURE_KEY_PREFIX
+    return f"idx:{version}:sig:"
+
+
+def signature_key(doc_id: int, version: str = LEGACY_INDEX_VERSION) -> str:
+    return f"{signature_prefix(version)}{doc_id}"
+
+
+def metadata_key(doc_id: int) -> str:
+    return f"{METADATA_KEY_PREFIX}{doc_id}"
+
+
+def serialize_signature(signature: Union[MinHash, Sequence[int], np.ndarray]) -> str:
+    """Chuyển chữ ký MinHash (hoặc mảng hashvalue) thành chuỗi JSON"""
+    if isinstance(signature, MinHash):
+        signature = signature.hashvalues
+    return json.dumps([int(v) for v in signature])
+
+
+def signature_from_hashvalues(hashvalues: Union[Sequence[int], np.ndarray]) -> MinHash:
+    """Dựng lại MinHash từ mảng hashvalue (cùng seed, số permutation = độ dài mảng)"""
+    minhash = MinHash(num_perm=len(hashvalues), seed=MINHASH_SEED)
+    minhash.hashvalues = np.array(hashvalues, dtype=np.uint64)
+    return minhash
+
+
+def deserialize_signature(data: Union[str, bytes]) -> MinHash:
+    """Dựng lại MinHash từ chuỗi JSON"""
+    if isinstance(data, bytes):
+        data = data.decode()
+    return signature_from_hashvalues(json.loads(data))
+
+
+def active_version_id(redis_client) -> str:
+    """Phiên bản chỉ mục đang phục vụ ("0" nếu chưa từng rebuild)"""
+    value = redis_client.get(ACTIVE_INDEX_KEY)
+    if not value:
+        return LEGACY_INDEX_VERSION
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _publish_change(
+    pipe,
+    op: str,
+    doc_id: Union[int, str] = "",
+    language: str = "",
+    version: str = LEGACY_INDEX_VERSION
+) -> None:
+    """
+    Thêm một sự kiện vào luồng thay đổi corpus (trong cùng pipeline với lệnh ghi)
+
+    Sự kiện không mang chữ ký (~2.5 KB) - consumer đọc chữ ký từ signature_key,
+    nên luồng giữ CORPUS_FEED_MAXLEN sự kiện mà Redis vẫn nhỏ.
+    """
+    if not settings.CORPUS_FEED_ENABLED:
+        return
+    pipe.xadd(
+        settings.CORPUS_FEED_STREAM,
+        {"op": op, "doc_id": doc_id, "language": language or "", "version": version},
+        maxlen=settings.CORPUS_FEED_MAXLEN,
+        approximate=True
+    )
+
+
+def publish_index_swap(pipe, version: str) -> None:
+    """Báo cho mọi process chuyển sang phiên bản chỉ mục mới"""
+    _publish_change(pipe, CHANGE_SWAP, version=version)
+
+
+def write_documents(
+    redis_client,
+    documents: Iterable[Tuple[int, Union[MinHash, Sequence[int], np.ndarray], Dict]],
+    pipeline_size: int = REDIS_PIPELINE_SIZE,
+    op: str = CHANGE_ADD,
+    version: Optional[str] = None,
+    publish: bool = True
+) -> int:
+    """
+    Ghi chữ ký + metadata của nhiều tài liệu bằng Redis pipeline
+
+    Mỗi tài liệu đồng thời được phát vào luồng thay đổi corpus để các
+    PlagiarismChecker đang chạy cập nhật chỉ mục LSH của mình.
+
+    Args:
+        redis_client: Client Redis
+        documents: Iterable các bộ (corpus_row, chữ ký, metadata)
+        pipeline_size: Số tài liệu mỗi lần gửi
+        op: Loại sự kiện phát ra (CHANGE_ADD hoặc CHANGE_UPDATE)
+        version: Phiên bản chỉ mục được ghi (None = phiên bản đang phục vụ);
+            chữ ký phải được tính bằng tham số của đúng phiên bản này
+        publish: False = không phát sự kiện (rebuild ghi phiên bản chưa kích hoạt)
+
+    Returns:
+        Số tài liệu đã ghi
+    """
+    if version is None:
+        version = active_version_id(redis_client)
+    written = 0
+    pipe = redis_client.pipeline(transaction=False)
+    pending = 0
+
+    for doc_id, signature, metadata in documents:
+        serialized = serialize_signature(signature)
+        pipe.set(signature_key(doc_id, version), serialized)
+        mapping = {k: v for k, v in metadata.items() if v is not None}
+        if mapping:
+            pipe.hset(metadata_key(doc_id), mapping=mapping)
+        if publish:
+            _publish_change(pipe, op, doc_id, metadata.get("language"), version)
+        pending += 1
+        written += 1
+        if pending >= pipeline_size:
+            pipe.execute()
+            pending = 0
+
+    if pending:
+        pipe.execute()
+    return written
+
+
+def delete_documents(
+    redis_client,
+    doc_ids: Iterable[int],
+    pipeline_size: int = REDIS_PIPELINE_SIZE,
+    version: Optional[str] = None
+) -> int:
+    """
+    Xóa chữ ký + metadata của nhiều tài liệu và phát sự kiện remove
+
+    Một rebuild đang chạy đọc các sự kiện remove này để xóa tài liệu khỏi
+    phiên bản đang dựng.
+
+    Returns:
+        Số tài liệu đã xử lý
+    """
+    if version is None:
+        version = active_version_id(redis_client)
+    removed = 0
+    pipe = redis_client.pipeline(transaction=False)
+    pending = 0
+
+    for doc_id in doc_ids:
+        pipe.delete(signature_key(doc_id, version), metadata_key(doc_id))
+        _publish_change(pipe, CHANGE_REMOVE, doc_id, version=version)
+        pending += 1
+        removed += 1
+        if pending >= pipeline_size:
+            pipe.execute()
+            pending = 0
+
+    if pending:
+        pipe.execute()
+    return removed
+
+
+def latest_change_id(redis_client) -> str:
+    """
+    ID sự kiện mới nhất trong luồng thay đổi ("0-0" nếu luồng trống)
+
+    Đọc trước khi nạp snapshot từ doc:sig:* để không bỏ sót sự kiện phát ra
+    trong lúc đang nạp (áp dụng lại một sự kiện add là vô hại).
+    """
+    entries = redis_client.xrevrange(settings.CORPUS_FEED_STREAM, count=1)
+    if not entries:
+        return "0-0"
+    entry_id = entries[0][0]
+    return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+
+def _stream_id(value: Union[str, bytes]) -> Tuple[int, int]:
+    milliseconds, _, sequence = (value.decode() if isinstance(value, bytes) else value).partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+def changes_trimmed_after(redis_client, after_id: str) -> bool:
+    """
+    Luồng thay đổi đã bị cắt mất sự kiện nằm sau after_id chưa
+
+    Xảy ra khi một consumer trễ hơn CORPUS_FEED_MAXLEN sự kiện: đọc tiếp từ
+    after_id sẽ bỏ sót add/remove mà không báo lỗi, phải nạp lại snapshot.
+    Redis 7+ so với max-deleted-entry-id; bản cũ hơn so với sự kiện đầu luồng
+    (có thể báo thừa khi chính sự kiện after_id vừa bị cắt - chỉ tốn một lần nạp lại).
+    """
+    try:
+        info = redis_client.xinfo_stream(settings.CORPUS_FEED_STREAM)
+    except Exception:
+        return False  # Luồng chưa tồn tại
+    max_deleted = info.get("max-deleted-entry-id")
+    if max_deleted is not None:
+        return _stream_id(max_deleted) > _stream_id(after_id)
+    first = info.get("first-entry")
+    return bool(first) and after_id != "0-0" and _stream_id(first[0]) > _stream_id(after_id)
+
+
+def fetch_signatures(redis_client, doc_ids: Sequence[int], version: str) -> Dict[int, MinHash]:
+    """Chữ ký hiện tại của các tài liệu (MGET một lần); tài liệu đã bị xóa không có trong kết quả"""
+    if not doc_ids:
+        return {}
+    values = redis_client.mget([signature_key(doc_id, version) for doc_id in doc_ids])
+    return {doc_id: deserialize_signature(value) for doc_id, value in zip(doc_ids, values) if value}
+
+
+def delete_signatures(redis_client, version: str, batch_size: int = REDIS_PIPELINE_SIZE) -> int:
+    """
+    Xóa toàn bộ chữ ký của một phiên bản chỉ mục (dọn phiên bản cũ sau khi swap)
+
+    Dùng SCAN + UNLINK theo lô để không chặn Redis với corpus lớn.
+
+    Returns:
+        Số key đã xóa
+    """
+    deleted = 0
+    batch = []
+    for key in redis_client.scan_iter(match=f"{signature_prefix(version)}*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += redis_client.unlink(*batch)
+            batch = []
+    if batch:
+        deleted += redis_client.unlink(*batch)
+    return deleted
+
+
+def read_metadata(redis_client, doc_id: int) -> Dict[str, str]:
+    """Đọc metadata của một tài liệu (đã decode về str)"""
+    metadata = redis_client.hgetall(metadata_key(doc_id)) or {}
+    return {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in metadata.items()
+    }
+
+
+def iter_signatures(
+    redis_client,
+    fields: Sequence[str] = ("language",),
+    batch_size: int = REDIS_PIPELINE_SIZE,
+    version: Optional[str] = None
+) -> Iterator[Tuple[int, MinHash, Dict[str, str]]]:
+    """
+    Đọc toàn bộ chữ ký của một phiên bản chỉ mục kèm một số trường metadata
+
+    Mỗi lô dùng một pipeline (1 round-trip) thay vì 2 lệnh cho mỗi tài liệu.
+
+    Args:
+        version: Phiên bản chỉ mục (None = phiên bản đang phục vụ)
+
+    Yields:
+        (corpus_row, MinHash, {field: giá trị}) - trường không có sẽ vắng mặt trong dict
+    """
+    if version is None:
+        version = active_version_id(redis_client)
+    prefix = signature_prefix(version)
+    doc_keys = []
+    legacy_keys = 0
+    for key in redis_client.keys(f"{prefix}*"):
+        key = key if isinstance(key, str) else key.decode()
+        if parse_doc_id(key[len(prefix):]) is None:
+            legacy_keys += 1
+        else:
+            doc_keys.append(key)
+    if legacy_keys:
+        logger.warning(
+            f"⚠️  Bỏ qua {legacy_keys} chữ ký dùng ID dạng cũ - chạy scripts/migrate_corpus_rows.py"
+        )
+    for i in range(0, len(doc_keys), batch_size):
+        batch = doc_keys[i:i + batch_size]
+        doc_ids = [int(key[len(prefix):]) for key in batch]
+
+        pipe = redis_client.pipeline(transaction=False)
+        for key, doc_id in zip(batch, doc_ids):
+            pipe.get(key)
+            pipe.hmget(metadata_key(doc_id), list(fields))
+        values = pipe.execute()
+
+        for j, doc_id in enumerate(doc_ids):
+            sig_data, meta_values = values[2 * j], values[2 * j + 1]
+            if not sig_data:
+                continue
+            metadata = {
+                name: (value.decode() if isinstance(value, bytes) else value)
+                for name, value in zip(fields, meta_values or [])
+                if value is not None
+            }
+            yield doc_id, deserialize_signature(sig_data), metadata
@@ -1,6 +1,7 @@
 from typing import Optional
 from sqlalchemy.orm import Session
 from app.db import models
+from app.services import text_store
 import hashlib
 
 
@@ -72,7 +73,15 @@ class DocumentService:
         if not doc:
             return None
         
-        doc.extracted_text = text
+        # Văn bản lưu nén trong document_texts; cột cũ documents.extracted_text bỏ trống
+        compressed = text_store.TextCodec.active(db.get_bind()).compress(text)
+        record = doc.text_content or models.DocumentText(document_id=doc.id)
+        record.codec = compressed.codec
+        record.dictionary_id = compressed.dictionary_id
+        record.raw_size = compressed.raw_size
+        record.content = compressed.content
+        doc.text_content = record
+        doc.extracted_text = None
         doc.word_count = word_count
         doc.page_count = page_count
         doc.extraction_method = extraction_method
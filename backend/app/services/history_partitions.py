@@ -0,0 +1,167 @@
+"""
+Phân vùng theo tháng của lịch sử kiểm tra (migration 009)
+
+check_results, check_tokens, match_details, match_segments phân vùng RANGE trên
+created_at, mỗi tháng một phân vùng <bảng>_pYYYYMM ở cả 4 bảng. Bảng con mang
+created_at của kết quả cha nên một tháng lịch sử nằm trọn trong 4 phân vùng
+cùng tên tháng và được dọn bằng cách gỡ rồi DROP chúng - không DELETE từng
+dòng, không để lại dead tuple cho VACUUM.
+
+    ensure_partitions  → tạo trước phân vùng tới HISTORY_PARTITIONS_AHEAD tháng
+                         sau (khi khởi động backend + Celery beat hằng ngày)
+    drop_expired       → gỡ + DROP các tháng nằm trọn trước mốc retention
+
+Trên database chưa chạy migration 009 (bảng thường) cả hai không làm gì.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import Callable, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TABLES = ("check_results", "check_tokens", "match_details", "match_segments")
+
+# Gỡ phân vùng: bảng tham chiếu trước bảng được tham chiếu (khóa ngoại gồm created_at)
+_DETACH_ORDER = ("match_segments", "check_tokens", "match_details", "check_results")
+
+# Không xếp hàng sau truy vấn của request thật quá lâu: thử lại ở lần chạy sau
+LOCK_TIMEOUT = "5s"
+
+# Số file_path mỗi lần gọi on_files (một request xóa nhiều object của MinIO)
+FILE_BATCH_SIZE = 1000
+
+_PARTITION_NAME = re.compile(r"^check_results_p(\d{4})(\d{2})$")
+
+# Cả phân vùng đã gỡ nhưng chưa kịp DROP (lần dọn trước bị ngắt giữa chừng)
+_MONTH_TABLES_SQL = "SELECT relname FROM pg_class WHERE relkind = 'r' AND relname ~ '^check_results_p[0-9]{6}$'"
+
+_IS_PARTITIONED_SQL = "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('check_results')"
+
+_LIST_SQL = """
+SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = to_regclass('{table}')
+"""
+
+
+def add_months(month: date, count: int) -> date:
+    """Ngày đầu tháng, cộng thêm `count` tháng"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _ddl_connection(db_engine):
+    # DETACH ... CONCURRENTLY không chạy được trong transaction
+    return db_engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def _is_partitioned(conn) -> bool:
+    return bool(conn.exec_driver_sql(_IS_PARTITIONED_SQL).scalar())
+
+
+def _partitions(conn, table: str) -> set:
+    return set(conn.exec_driver_sql(_LIST_SQL.format(table=table)).scalars())
+
+
+def partition_months(conn) -> List[date]:
+    """Các tháng có bảng check_results_pYYYYMM, cũ nhất trước"""
+    months = []
+    for name in conn.exec_driver_sql(_MONTH_TABLES_SQL).scalars():
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def ensure_partitions(db_engine, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Tạo phân vùng của tháng hiện tại và `months_ahead` tháng sau (mặc định
+    HISTORY_PARTITIONS_AHEAD) cho cả 4 bảng
+
+    Returns:
+        Tên các phân vùng vừa tạo
+    """
+    months_ahead = settings.HISTORY_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    created = []
+    with _ddl_connection(db_engine) as conn:
+        if not _is_partitioned(conn):
+            logger.warning("⚠️  check_results chưa phân vùng - chạy migrations/009_partition_history.sql")
+            return created
+        conn.exec_driver_sql(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        try:
+            current = conn.exec_driver_sql("SELECT date_trunc('month', localtimestamp)::date").scalar()
+            for table in HISTORY_TABLES:
+                existing = _partitions(conn, table)
+                for offset in range(months_ahead + 1):
+                    month = add_months(current, offset)
+                    name = partition_name(table, month)
+                    if name in existing:
+                        continue
+                    conn.exec_driver_sql(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+                    )
+                    created.append(name)
+        finally:
+            conn.exec_driver_sql("RESET lock_timeout")
+    if created:
+        logger.info(f"🗓️  Đã tạo {len(created)} phân vùng lịch sử: {', '.join(created)}")
+    return created
+
+
+def _detach(conn, table: str, name: str, concurrently: bool) -> None:
+    mode = " CONCURRENTLY" if concurrently else ""
+    conn.exec_driver_sql(f"ALTER TABLE {table} DETACH PARTITION {name}{mode}")
+
+
+def drop_expired(
+    db_engine,
+    before: datetime,
+    on_files: Optional[Callable[[List[str]], None]] = None
+) -> int:
+    """
+    Gỡ và DROP phân vùng của các tháng kết thúc trước `before` (cũ nhất trước)
+
+    Phân vùng check_results được gỡ trước khi đọc file_path, nên ứng dụng không
+    còn thấy các kết quả đó khi file gốc bị xóa (on_files nhận từng lô đường dẫn).
+    PostgreSQL 14+ gỡ bằng DETACH ... CONCURRENTLY (không chặn đọc / ghi).
+
+    Returns:
+        Số tháng đã xóa
+    """
+    dropped = 0
+    with _ddl_connection(db_engine) as conn:
+        if not _is_partitioned(conn):
+            return dropped
+        concurrently = conn.dialect.server_version_info >= (14,)
+        conn.exec_driver_sql(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        try:
+            for month in partition_months(conn):
+                if datetime.combine(add_months(month, 1), datetime.min.time()) > before:
+                    break
+                for table in _DETACH_ORDER:
+                    name = partition_name(table, month)
+                    if name in _partitions(conn, table):
+                        _detach(conn, table, name, concurrently)
+                    if table != "check_results":
+                        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+
+                name = partition_name("check_results", month)
+                if on_files is not None:
+                    file_paths = conn.exec_driver_sql(
+                        f"SELECT file_path FROM {name} WHERE file_path IS NOT NULL"
+                    ).scalars().all()
+                    for i in range(0, len(file_paths), FILE_BATCH_SIZE):
+                        on_files(file_paths[i:i + FILE_BATCH_SIZE])
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+                dropped += 1
+                logger.info(f"🗑️  Đã xóa phân vùng lịch sử tháng {month:%Y-%m}")
+        finally:
+            conn.exec_driver_sql("RESET lock_timeout")
+    return dropped
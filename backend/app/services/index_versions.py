@@ -0,0 +1,239 @@
+"""
+Quản lý phiên bản chỉ mục corpus (blue/green rebuild)
+
+Đổi SHINGLE_SIZE, số permutation MinHash, bộ tách từ hay tham số LSH đòi hỏi
+ký lại toàn bộ corpus. Mỗi lần rebuild tạo một phiên bản mới với namespace
+chữ ký riêng (idx:{v}:sig:*) và manifest lưu tham số + tiến độ; phiên bản cũ
+vẫn phục vụ cho tới khi phiên bản mới được kích hoạt bằng một transaction
+(đổi con trỏ corpus:index:active + phát sự kiện swap trên luồng thay đổi).
+
+Redis:
+    corpus:index:active        → phiên bản đang phục vụ
+    corpus:index:{v}           → manifest (tham số, trạng thái, tiến độ)
+    corpus:index:next_version  → bộ đếm sinh số phiên bản
+    corpus:index:last_rebuild  → phiên bản của lần rebuild gần nhất
+    corpus:index:rebuild_lock  → khóa chỉ cho một rebuild chạy tại một thời điểm
+"""
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict
+
+from app.config import settings
+from app.services import corpus_store
+
+VERSION_COUNTER_KEY = "corpus:index:next_version"
+LAST_REBUILD_KEY = "corpus:index:last_rebuild"
+REBUILD_LOCK_KEY = "corpus:index:rebuild_lock"
+
+# Trạng thái trong manifest
+STATUS_BUILDING = "building"
+STATUS_CATCHING_UP = "catching_up"
+STATUS_ACTIVE = "active"
+STATUS_RETIRED = "retired"
+STATUS_FAILED = "failed"
+STATUS_COLLECTED = "collected"
+
+
+def manifest_key(version: str) -> str:
+    return f"corpus:index:{version}"
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else (value or "")
+
+
+@dataclass(frozen=True)
+class IndexParams:
+    """Tham số quyết định chữ ký MinHash và cấu trúc chỉ mục LSH"""
+    shingle_size: int
+    num_perm: int
+    lsh_threshold: float
+
+    @classmethod
+    def from_settings(cls) -> "IndexParams":
+        return cls(
+            shingle_size=settings.SHINGLE_SIZE,
+            num_perm=settings.MINHASH_PERMUTATIONS,
+            lsh_threshold=settings.LSH_THRESHOLD
+        )
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, str]) -> "IndexParams":
+        """Đọc từ manifest; trường thiếu lấy theo settings"""
+        defaults = cls.from_settings()
+        return cls(
+            shingle_size=int(mapping.get("shingle_size") or defaults.shingle_size),
+            num_perm=int(mapping.get("num_perm") or defaults.num_perm),
+            lsh_threshold=float(mapping.get("lsh_threshold") or defaults.lsh_threshold)
+        )
+
+    @property
+    def signature_scheme(self) -> str:
+        """Tên bộ tham số ký (ví dụ "k7p128") - khóa chữ ký lưu trong PostgreSQL"""
+        return f"k{self.shingle_size}p{self.num_perm}"
+
+    def to_mapping(self) -> Dict[str, str]:
+        return {
+            "shingle_size": str(self.shingle_size),
+            "num_perm": str(self.num_perm),
+            "lsh_threshold": str(self.lsh_threshold),
+        }
+
+
+@dataclass(frozen=True)
+class IndexVersion:
+    """Một phiên bản chỉ mục: namespace chữ ký + tham số dùng để ký"""
+    version: str
+    params: IndexParams
+
+    @property
+    def is_legacy(self) -> bool:
+        return self.version == corpus_store.LEGACY_INDEX_VERSION
+
+
+def legacy_version() -> IndexVersion:
+    """Phiên bản "0" (key doc:sig:*), tham số theo settings"""
+    return IndexVersion(corpus_store.LEGACY_INDEX_VERSION, IndexParams.from_settings())
+
+
+def read_manifest(redis_client, version: str) -> Dict[str, str]:
+    raw = redis_client.hgetall(manifest_key(version)) or {}
+    return {_text(k): _text(v) for k, v in raw.items()}
+
+
+def get_version(redis_client, version: str) -> IndexVersion:
+    """Phiên bản kèm tham số đọc từ manifest"""
+    if version == corpus_store.LEGACY_INDEX_VERSION:
+        return legacy_version()
+    return IndexVersion(version, IndexParams.from_mapping(read_manifest(redis_client, version)))
+
+
+def active_version(redis_client) -> IndexVersion:
+    """Phiên bản đang phục vụ (legacy nếu không có Redis hoặc chưa từng rebuild)"""
+    if redis_client is None:
+        return legacy_version()
+    return get_version(redis_client, corpus_store.active_version_id(redis_client))
+
+
+def update_manifest(redis_client, version: str, **fields) -> None:
+    mapping = {name: str(value) for name, value in fields.items() if value is not None}
+    mapping["updated_at"] = str(time.time())
+    redis_client.hset(manifest_key(version), mapping=mapping)
+
+
+# ─── Vòng đời một lần rebuild ─────────────────────────────────
+
+def acquire_rebuild_lock(redis_client, owner: str, ttl_seconds: int = None) -> bool:
+    """Giữ khóa rebuild (hết hạn sau ttl nếu process chết); False nếu đang có rebuild khác"""
+    ttl = ttl_seconds or settings.INDEX_REBUILD_LOCK_TTL
+    return bool(redis_client.set(REBUILD_LOCK_KEY, owner, nx=True, ex=ttl))
+
+
+def refresh_rebuild_lock(redis_client, ttl_seconds: int = None) -> None:
+    redis_client.expire(REBUILD_LOCK_KEY, ttl_seconds or settings.INDEX_REBUILD_LOCK_TTL)
+
+
+def release_rebuild_lock(redis_client) -> None:
+    redis_client.delete(REBUILD_LOCK_KEY)
+
+
+def create_version(redis_client, params: IndexParams) -> IndexVersion:
+    """Cấp số phiên bản mới và ghi manifest ở trạng thái building"""
+    version = str(redis_client.incr(VERSION_COUNTER_KEY))
+    now = str(time.time())
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(manifest_key(version), mapping={
+        **params.to_mapping(),
+        "status": STATUS_BUILDING,
+        "previous": corpus_store.active_version_id(redis_client),
+        "processed": "0",
+        "total": "0",
+        "started_at": now,
+        "updated_at": now,
+    })
+    pipe.set(LAST_REBUILD_KEY, version)
+    pipe.execute()
+    return IndexVersion(version, params)
+
+
+def activate_version(redis_client, version: str) -> str:
+    """
+    Kích hoạt một phiên bản đã dựng xong
+
+    Con trỏ, trạng thái manifest và sự kiện swap được ghi trong cùng một
+    MULTI/EXEC: process nào thấy sự kiện swap cũng thấy con trỏ mới.
+
+    Returns:
+        Phiên bản đã phục vụ trước đó
+    """
+    previous = corpus_store.active_version_id(redis_client)
+    now = str(time.time())
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.set(corpus_store.ACTIVE_INDEX_KEY, version)
+    pipe.hset(manifest_key(version), mapping={"status": STATUS_ACTIVE, "activated_at": now, "updated_at": now})
+    if previous != version:
+        pipe.hset(manifest_key(previous), mapping={"status": STATUS_RETIRED, "updated_at": now})
+    corpus_store.publish_index_swap(pipe, version)
+    pipe.execute()
+    return previous
+
+
+def garbage_collect(redis_client, version: str) -> int:
+    """Xóa chữ ký của một phiên bản đã ngừng phục vụ; trả về số key đã xóa"""
+    if version == corpus_store.active_version_id(redis_client):
+        raise ValueError(f"Không thể dọn phiên bản đang phục vụ: {version}")
+    deleted = corpus_store.delete_signatures(redis_client, version)
+    update_manifest(redis_client, version, status=STATUS_COLLECTED, collected_keys=deleted)
+    return deleted
+
+
+# ─── Trạng thái cho trang quản trị ────────────────────────────
+
+def _progress(manifest: Dict[str, str]) -> Dict:
+    processed = int(manifest.get("processed") or 0)
+    total = int(manifest.get("total") or 0)
+    started_at = float(manifest.get("started_at") or 0) or None
+    updated_at = float(manifest.get("updated_at") or 0) or None
+    finished_at = float(manifest.get("finished_at") or 0) or None
+
+    elapsed = ((finished_at or time.time()) - started_at) if started_at else None
+    docs_per_sec = processed / elapsed if elapsed and processed else None
+    eta_seconds = None
+    if docs_per_sec and manifest.get("status") == STATUS_BUILDING and total > processed:
+        eta_seconds = round((total - processed) / docs_per_sec)
+
+    return {
+        "status": manifest.get("status"),
+        "phase": manifest.get("phase"),
+        "processed": processed,
+        "total": total,
+        "reused": int(manifest.get("reused") or 0),
+        "percent": round(100.0 * processed / total, 1) if total else None,
+        "docs_per_sec": round(docs_per_sec, 1) if docs_per_sec else None,
+        "eta_seconds": eta_seconds,
+        "started_at": started_at,
+        "updated_at": updated_at,
+        "activated_at": float(manifest.get("activated_at") or 0) or None,
+        "finished_at": finished_at,
+        "previous": manifest.get("previous"),
+        "error": manifest.get("error") or None,
+    }
+
+
+def rebuild_status(redis_client) -> Dict:
+    """Phiên bản đang phục vụ và tiến độ / ETA / tốc độ của lần rebuild gần nhất"""
+    active = active_version(redis_client)
+    last = _text(redis_client.get(LAST_REBUILD_KEY)) or None
+    rebuild = None
+    if last:
+        manifest = read_manifest(redis_client, last)
+        rebuild = {
+            "version": last,
+            "params": asdict(IndexParams.from_mapping(manifest)),
+            **_progress(manifest),
+        }
+    return {
+        "active": {"version": active.version, "params": asdict(active.params)},
+        "rebuild": rebuild,
+        "running": bool(redis_client.exists(REBUILD_LOCK_KEY)),
+    }
@@ -0,0 +1,13 @@
+"""
+Gói nhập corpus hàng loạt
+Xử lý song song bằng process pool, ghi PostgreSQL bằng COPY và Redis bằng pipeline
+"""
+from app.services.ingest.checkpoint import IngestCheckpoint
+from app.services.ingest.engine import IngestEngine, IngestStats
+from app.services.ingest.rebuild import IndexRebuilder, RebuildInProgress
+from app.services.ingest.worker import IngestItem, PreparedDocument
+
+__all__ = [
+    "IngestEngine", "IngestStats", "IngestItem", "PreparedDocument", "IngestCheckpoint",
+    "IndexRebuilder", "RebuildInProgress",
+]
@@ -0,0 +1,208 @@
+"""
+Nhật ký checkpoint cho các lần nhập corpus dài
+
+Mỗi lần chạy (run) lưu vào một file SQLite cục bộ:
+- cursor: vị trí nguồn đã commit gần nhất (offset byte, continuation của
+  chuyên mục, ...) - dạng JSON, do từng script tự định nghĩa
+- trạng thái từng item (khóa do script chọn: đường dẫn file, URL bài viết, ...)
+
+Nhật ký được ghi trong callback on_batch_done của IngestEngine, tức là sau khi
+lô đã commit vào PostgreSQL. Khi chạy lại với --resume, script đọc cursor và
+bỏ qua các item đã xong bằng tra cứu khóa chính - không phải tải lại, tách từ
+lại hay dựa vào truy vấn khử trùng.
+
+Ví dụ:
+    checkpoint = IngestCheckpoint.open("upload:/data/corpus", path="ingest_checkpoints.sqlite3")
+    items = (item for item in items if not checkpoint.is_done(item.path))
+    engine = IngestEngine(on_batch_done=checkpoint.batch_recorder(lambda item: item.path))
+"""
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.services.ingest.engine import STATUS_FAILED
+from app.services.ingest.worker import IngestItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = "ingest_checkpoints.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_runs (
+    run_name TEXT PRIMARY KEY,
+    cursor TEXT,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS ingest_items (
+    run_name TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (run_name, item_key)
+) WITHOUT ROWID;
+"""
+
+
+class IngestCheckpoint:
+    """
+    Checkpoint của một lần nhập, lưu trong SQLite
+
+    Item có trạng thái STATUS_FAILED không được coi là xong - lần chạy sau sẽ
+    thử lại.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, run_name: str):
+        self._conn = conn
+        self.run_name = run_name
+
+    @classmethod
+    def open(
+        cls,
+        run_name: str,
+        path: str = DEFAULT_CHECKPOINT_PATH,
+        resume: bool = True
+    ) -> "IngestCheckpoint":
+        """
+        Mở (hoặc tạo) checkpoint cho một run
+
+        Args:
+            run_name: Tên định danh lần nhập (ví dụ "upload:/data/corpus")
+            path: File SQLite chứa nhật ký
+            resume: False = xóa nhật ký cũ của run này và bắt đầu lại
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+
+        checkpoint = cls(conn, run_name)
+        if not resume:
+            checkpoint.reset()
+
+        now = datetime.now().isoformat()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO ingest_runs (run_name, started_at, updated_at) VALUES (?, ?, ?)",
+                (run_name, now, now)
+            )
+        return checkpoint
+
+    @property
+    def cursor(self) -> Optional[Dict[str, Any]]:
+        """Vị trí nguồn đã commit gần nhất (None nếu chưa có)"""
+        row = self._conn.execute(
+            "SELECT cursor FROM ingest_runs WHERE run_name = ?", (self.run_name,)
+        ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    @property
+    def finished(self) -> bool:
+        row = self._conn.execute(
+            "SELECT finished_at FROM ingest_runs WHERE run_name = ?", (self.run_name,)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def is_done(self, item_key: str) -> bool:
+        """Item đã được xử lý xong ở lần chạy trước (thêm mới, trùng hoặc quá ngắn)"""
+        row = self._conn.execute(
+            "SELECT status FROM ingest_items WHERE run_name = ? AND item_key = ?",
+            (self.run_name, item_key)
+        ).fetchone()
+        return row is not None and row[0] != STATUS_FAILED
+
+    def counts(self) -> Dict[str, int]:
+        """Số item theo từng trạng thái"""
+        return dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM ingest_items WHERE run_name = ? GROUP BY status",
+            (self.run_name,)
+        ).fetchall())
+
+    def done_count(self) -> int:
+        return sum(count for status, count in self.counts().items() if status != STATUS_FAILED)
+
+    def record_batch(
+        self,
+        item_keys: Iterable[str],
+        statuses: Iterable[str],
+        cursor: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Ghi trạng thái một lô và (tùy chọn) cursor mới trong cùng một transaction
+        """
+        now = datetime.now().isoformat()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ingest_items (run_name, item_key, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(self.run_name, key, status, now) for key, status in zip(item_keys, statuses) if key]
+            )
+            if cursor is not None:
+                self._conn.execute(
+                    "UPDATE ingest_runs SET cursor = ?, updated_at = ? WHERE run_name = ?",
+                    (json.dumps(cursor, ensure_ascii=False), now, self.run_name)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE ingest_runs SET updated_at = ? WHERE run_name = ?", (now, self.run_name)
+                )
+
+    def batch_recorder(
+        self,
+        key_of: Callable[[IngestItem], Optional[str]],
+        cursor_of: Optional[Callable[[List[IngestItem]], Optional[Dict[str, Any]]]] = None
+    ) -> Callable[[List[IngestItem], List[str]], None]:
+        """
+        Tạo callback on_batch_done cho IngestEngine
+
+        Cursor chỉ tiến qua các item đã xong: gặp item STATUS_FAILED đầu tiên,
+        cursor dừng ngay trước nó và giữ nguyên cho tới hết run - nếu không,
+        --resume sẽ seek qua item lỗi và không bao giờ thử lại.
+
+        Args:
+            key_of: Hàm lấy khóa checkpoint của một item
+            cursor_of: Hàm tính cursor mới từ các item đã commit của lô, theo
+                thứ tự nguồn (None = không lưu cursor)
+        """
+        stalled = False
+
+        def on_batch_done(batch: List[IngestItem], statuses: List[str]) -> None:
+            nonlocal stalled
+            cursor = None
+            if cursor_of and not stalled:
+                committed = batch
+                if STATUS_FAILED in statuses:
+                    committed = batch[:statuses.index(STATUS_FAILED)]
+                    stalled = True
+                    logger.warning(
+                        "⚠️  Lô có item lỗi - cursor checkpoint dừng trước item lỗi đầu tiên, "
+                        "--resume sẽ thử lại từ đó"
+                    )
+                if committed:
+                    cursor = cursor_of(committed)
+            self.record_batch((key_of(item) for item in batch), statuses, cursor)
+        return on_batch_done
+
+    def mark_finished(self) -> None:
+        """Đánh dấu run đã hoàn tất"""
+        now = datetime.now().isoformat()
+        with self._conn:
+            self._conn.execute(
+                "UPDATE ingest_runs SET finished_at = ?, updated_at = ? WHERE run_name = ?",
+                (now, now, self.run_name)
+            )
+
+    def reset(self) -> None:
+        """Xóa toàn bộ nhật ký của run này"""
+        with self._conn:
+            self._conn.execute("DELETE FROM ingest_items WHERE run_name = ?", (self.run_name,))
+            self._conn.execute("DELETE FROM ingest_runs WHERE run_name = ?", (self.run_name,))
+
+    def close(self) -> None:
+        self._conn.close()
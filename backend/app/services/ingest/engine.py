@@ -0,0 +1,445 @@
+"""
+Ingest engine cho corpus
+Dùng chung cho mọi nguồn nhập (crawler Wikipedia/ArXiv, thư mục file, ...)
+
+Luồng xử lý theo lô:
+    items ──► process pool: extract → tokenize → shingle → MinHash
+          ──► khử trùng: so với hash đã nạp trước từ database (HashDeduplicator)
+          ──► corpus_row: cấp cả khối từ sequence (khóa chỉ mục LSH / Redis)
+          ──► gần trùng: dò LSH các tài liệu đại diện, gắn canonical_id nếu Jaccard ≥ ngưỡng
+          ──► PostgreSQL: COPY vào bảng tạm + INSERT ... ON CONFLICT DO NOTHING
+                      + chữ ký MinHash vào document_signatures (cùng transaction)
+          ──► Redis: doc:sig / doc:meta theo corpus_row qua pipeline (trước khi commit)
+                     - chỉ tài liệu đại diện
+
+Lô N+1 được xử lý trong pool trong khi lô N đang được ghi. ID tài liệu
+suy ra từ SHA-256 nội dung nên chạy lại sau khi bị ngắt là an toàn:
+các lô đã commit được bỏ qua nhờ ON CONFLICT.
+"""
+import functools
+import hashlib
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from app.config import settings
+from app.services import corpus_store
+from app.services.ingest.dedup import HashDeduplicator
+from app.services.index_versions import IndexVersion, active_version, get_version
+from app.services.ingest.near_duplicates import NearDuplicateDetector
+from app.services.ingest.postgres_writer import PostgresBulkWriter
+from app.services.ingest.worker import IngestItem, PreparedDocument, prepare_document, sign_tokens
+from app.services.preprocessing.multilingual import tokenize_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Trạng thái từng item sau khi lô được xử lý (báo qua on_batch_done)
+STATUS_INSERTED = "inserted"
+STATUS_NEAR_DUPLICATE = "near_duplicate"
+STATUS_DUPLICATE = "duplicate"
+STATUS_TOO_SHORT = "too_short"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class IngestStats:
+    """Thống kê một lần nhập"""
+    processed: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    near_duplicates: int = 0
+    too_short: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def docs_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Đã xử lý {self.processed} tài liệu trong {self.elapsed:.1f}s "
+            f"({self.docs_per_sec:.1f} docs/s) — thêm mới: {self.inserted}, "
+            f"trùng: {self.duplicates}, gần trùng: {self.near_duplicates}, quá ngắn: {self.too_short}, lỗi: {self.failed}"
+        )
+
+
+def _chunked(items: Iterable[IngestItem], size: int) -> Iterator[List[IngestItem]]:
+    """Cắt iterable thành các lô mà không đọc hết vào bộ nhớ"""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _hash_known_upfront(item: IngestItem) -> bool:
+    """Hash nội dung tính được ngay từ item (không cần trích xuất / làm sạch)"""
+    return item.text is not None and item.markup is None
+
+
+def _text_hash_of(doc: PreparedDocument) -> str:
+    """Hash nội dung của tài liệu đã xử lý ("" nếu lỗi trước khi tính được hash)"""
+    if doc.text_hash:
+        return doc.text_hash
+    if _hash_known_upfront(doc.item):
+        return hashlib.sha256(doc.item.text.encode('utf-8')).hexdigest()
+    return ""
+
+
+class IngestEngine:
+    """
+    Engine nhập corpus song song với ghi hàng loạt
+
+    Ví dụ:
+        engine = IngestEngine(redis_client=corpus_store.connect_redis(), min_words=50)
+        stats = engine.run(IngestItem(title=d['title'], text=d['content']) for d in docs)
+        print(stats.summary())
+    """
+
+    def __init__(
+        self,
+        db_engine=None,
+        redis_client=None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        min_words: int = 50,
+        on_indexed: Optional[Callable[[List[PreparedDocument]], None]] = None,
+        on_batch_done: Optional[Callable[[List[IngestItem], List[str]], None]] = None,
+        prefetch_hashes: bool = True,
+        near_duplicate_threshold: Optional[float] = settings.NEAR_DUPLICATE_THRESHOLD
+    ):
+        """
+        Args:
+            db_engine: SQLAlchemy engine (mặc định engine của ứng dụng)
+            redis_client: Client Redis để ghi chữ ký; None = chỉ ghi PostgreSQL
+            workers: Số process xử lý (mặc định = số CPU, 0 = xử lý ngay trong process chính)
+            batch_size: Số tài liệu mỗi lô ghi
+            min_words: Bỏ qua tài liệu ít hơn số từ này
+            on_indexed: Callback nhận các tài liệu vừa được thêm (sau khi commit)
+            on_batch_done: Callback nhận toàn bộ item của một lô đã xử lý xong
+                (kể cả bản trùng / lỗi) cùng trạng thái STATUS_* của từng item -
+                các lô được báo theo đúng thứ tự đầu vào, dùng để lưu checkpoint
+            prefetch_hashes: Nạp trước toàn bộ hash đã có để khử trùng lặp trong bộ nhớ
+            near_duplicate_threshold: Ngưỡng Jaccard gộp cụm gần trùng (None = tắt)
+        """
+        if db_engine is None:
+            from app.db.database import engine as db_engine
+        self.db_engine = db_engine
+        self.redis_client = redis_client
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = batch_size
+        self.min_words = min_words
+        self.on_indexed = on_indexed
+        self.on_batch_done = on_batch_done
+        self.prefetch_hashes = prefetch_hashes
+        self.near_duplicate_threshold = near_duplicate_threshold
+
+        # Trạng thái nạp bởi start() - dùng lại giữa các lần run
+        self._dedup: Optional[HashDeduplicator] = None
+        self._detector: Optional[NearDuplicateDetector] = None
+        self._writer: Optional[PostgresBulkWriter] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._index: Optional[IndexVersion] = None  # phiên bản chỉ mục đang ghi
+
+    def _drop_known(
+        self,
+        batch: List[IngestItem],
+        dedup: HashDeduplicator,
+        stats: IngestStats
+    ) -> List[IngestItem]:
+        """
+        Loại tài liệu trùng trước khi đưa vào pool (chỉ với item đã có sẵn text thuần)
+
+        Tránh tốn CPU tách từ / ký MinHash cho tài liệu chắc chắn bị bỏ qua.
+        Item dạng file (path) hoặc cần làm sạch markup được kiểm tra sau khi
+        xử lý, trong _write_batch.
+        """
+        with_text = [item for item in batch if _hash_known_upfront(item)]
+        if not with_text:
+            return batch
+
+        duplicates = dedup.check_and_add_batch(
+            hashlib.sha256(item.text.encode('utf-8')).hexdigest() for item in with_text
+        )
+        dropped = {id(item) for item, dup in zip(with_text, duplicates) if dup}
+        if dropped:
+            stats.processed += len(dropped)
+            stats.duplicates += len(dropped)
+        # Item bị loại ở đây có trạng thái STATUS_DUPLICATE (xem _finish_batch)
+        return [item for item in batch if id(item) not in dropped]
+
+    def _process(self, executor: Optional[ProcessPoolExecutor], batch: List[IngestItem]):
+        prepare = functools.partial(prepare_document, params=self._index.params)
+        if executor is None:
+            return map(prepare, batch)
+        # map() gửi toàn bộ lô vào pool ngay lập tức, kết quả lấy ra theo thứ tự
+        chunksize = max(1, len(batch) // (self.workers * 4))
+        return executor.map(prepare, batch, chunksize=chunksize)
+
+    def _follow_index_swap(
+        self,
+        docs: List[PreparedDocument],
+        detector: Optional[NearDuplicateDetector]
+    ) -> Optional[NearDuplicateDetector]:
+        """
+        Chuyển sang phiên bản chỉ mục mới nếu vừa có rebuild được kích hoạt
+
+        Tài liệu đã được pool ký bằng tham số cũ được ký lại ngay trong process
+        chính (chỉ xảy ra với các lô quanh thời điểm swap).
+
+        Returns:
+            Bộ dò gần trùng ứng với phiên bản đang ghi
+        """
+        if self.redis_client is not None:
+            current = corpus_store.active_version_id(self.redis_client)
+            if current != self._index.version:
+                self._index = get_version(self.redis_client, current)
+                logger.info(f"🔄 Chỉ mục corpus đã chuyển sang phiên bản {current} - ký theo tham số mới")
+                if detector is not None:
+                    detector = self._detector = NearDuplicateDetector.load(
+                        self.redis_client, self.near_duplicate_threshold, self._index
+                    )
+        for doc in docs:
+            if doc.index_params != self._index.params:
+                doc.hashvalues, doc.shingle_count = sign_tokens(tokenize_text(doc.text), self._index.params)
+                doc.index_params = self._index.params
+        return detector
+
+    def _assign_clusters(
+        self,
+        docs: List[PreparedDocument],
+        detector: NearDuplicateDetector
+    ) -> List[PreparedDocument]:
+        """
+        Gắn canonical_id cho các tài liệu gần trùng
+
+        Tài liệu còn lại tạm thành đại diện ngay (để bản gần trùng đến sau trong
+        cùng lô gộp vào); chỉ được giữ lại nếu thực sự được ghi - xem _settle_clusters.
+
+        Returns:
+            Các tài liệu vừa được thêm làm đại diện
+        """
+        representatives = []
+        for doc in docs:
+            minhash = corpus_store.signature_from_hashvalues(doc.hashvalues)
+            canonical = detector.find_canonical(minhash, doc.language)
+            if canonical:
+                doc.canonical_id = canonical
+            else:
+                # Trở thành đại diện cho các tài liệu đến sau
+                detector.add(doc.corpus_row, minhash, doc.language, str(doc.doc_id))
+                representatives.append(doc)
+        return representatives
+
+    @staticmethod
+    def _settle_clusters(
+        detector: NearDuplicateDetector,
+        representatives: List[PreparedDocument],
+        inserted: List[PreparedDocument]
+    ) -> None:
+        """
+        Bỏ các đại diện tạm không có dòng trong PostgreSQL (lô lỗi / ON CONFLICT bỏ qua)
+
+        Nếu giữ lại, tài liệu gần trùng về sau sẽ có canonical_id trỏ tới dòng không
+        tồn tại và cả lô của chúng vi phạm khóa ngoại documents.canonical_id.
+        """
+        written = {id(doc) for doc in inserted}
+        for doc in representatives:
+            if id(doc) not in written:
+                detector.remove(doc.corpus_row)
+
+    def _write_redis(self, docs: List[PreparedDocument]) -> None:
+        # Bản gần trùng không được index riêng - chỉ tài liệu đại diện có chữ ký trong Redis
+        docs = [doc for doc in docs if doc.canonical_id is None]
+        if self.redis_client is None or not docs:
+            return
+        corpus_store.write_documents(self.redis_client, (
+            (
+                doc.corpus_row,
+                doc.hashvalues,
+                {
+                    "title": doc.item.title,
+                    "author": doc.item.author,
+                    "university": doc.item.university,
+                    "year": doc.item.year,
+                    "language": doc.language,
+                    "pg_id": str(doc.doc_id),
+                },
+            )
+            for doc in docs
+        ), version=self._index.version)
+
+    def _write_batch(
+        self,
+        writer: PostgresBulkWriter,
+        prepared: Iterable[PreparedDocument],
+        dedup: HashDeduplicator,
+        detector: Optional[NearDuplicateDetector],
+        stats: IngestStats
+    ) -> List[str]:
+        """Ghi một lô đã xử lý; trả về trạng thái STATUS_* theo thứ tự của `prepared`"""
+        prepared = list(prepared)
+        status = {}
+        candidates: List[PreparedDocument] = []
+        for doc in prepared:
+            stats.processed += 1
+            if not doc.ok:
+                if doc.error != "empty":
+                    logger.warning(f"⚠️  {doc.item.title[:50]} - Lỗi: {doc.error}")
+                    stats.failed += 1
+                    status[id(doc)] = STATUS_FAILED
+                else:
+                    stats.too_short += 1
+                    status[id(doc)] = STATUS_TOO_SHORT
+                continue
+            if doc.word_count < self.min_words or doc.hashvalues is None:
+                stats.too_short += 1
+                status[id(doc)] = STATUS_TOO_SHORT
+                continue
+            candidates.append(doc)
+
+        # Item dạng file / có markup chỉ biết hash sau khi xử lý → kiểm tra cả lô một lần
+        from_files = [doc for doc in candidates if not _hash_known_upfront(doc.item)]
+        duplicates = dedup.check_and_add_batch(doc.text_hash for doc in from_files)
+        dropped = {id(doc) for doc, dup in zip(from_files, duplicates) if dup}
+        stats.duplicates += len(dropped)
+        accepted = [doc for doc in candidates if id(doc) not in dropped]
+        for doc in candidates:
+            # Mặc định là trùng: bị loại ở trên hoặc ON CONFLICT bỏ qua khi ghi
+            status[id(doc)] = STATUS_DUPLICATE
+
+        if accepted:
+            detector = self._follow_index_swap(accepted, detector)
+            representatives: List[PreparedDocument] = []
+            try:
+                # corpus_row là khóa trong chỉ mục gần trùng → cấp trước khi gom cụm
+                writer.reserve_rows(accepted)
+                if detector is not None:
+                    representatives = self._assign_clusters(accepted, detector)
+                inserted = writer.insert_batch(accepted, before_commit=self._write_redis)
+            except Exception as e:
+                logger.error(f"❌ Ghi lô {len(accepted)} tài liệu thất bại: {e}")
+                stats.failed += len(accepted)
+                status.update((id(doc), STATUS_FAILED) for doc in accepted)
+                inserted = []
+            if detector is not None:
+                self._settle_clusters(detector, representatives, inserted)
+
+            stats.inserted += len(inserted)
+            stats.near_duplicates += sum(1 for doc in inserted if doc.canonical_id)
+            stats.duplicates += len(accepted) - len(inserted)
+            for doc in inserted:
+                status[id(doc)] = STATUS_NEAR_DUPLICATE if doc.canonical_id else STATUS_INSERTED
+
+            if self.on_indexed and inserted:
+                try:
+                    self.on_indexed(inserted)
+                except Exception as e:
+                    logger.warning(f"⚠️  Callback on_indexed lỗi: {e}")
+
+        # Hash đã được đánh dấu từ lúc kiểm tra trùng → trả lại để lần thử sau không bị coi là trùng
+        dedup.discard_batch(
+            _text_hash_of(doc) for doc in prepared
+            if status[id(doc)] == STATUS_FAILED and _text_hash_of(doc)
+        )
+        return [status[id(doc)] for doc in prepared]
+
+    def _finish_batch(self, writer, in_flight, dedup, detector, stats) -> None:
+        batch, kept, prepared = in_flight
+        kept_status = self._write_batch(writer, prepared, dedup, detector, stats)
+        if self.on_batch_done:
+            by_item = {id(item): item_status for item, item_status in zip(kept, kept_status)}
+            statuses = [by_item.get(id(item), STATUS_DUPLICATE) for item in batch]
+            try:
+                self.on_batch_done(batch, statuses)
+            except Exception as e:
+                logger.warning(f"⚠️  Callback on_batch_done lỗi: {e}")
+
+    def start(self) -> "IngestEngine":
+        """
+        Nạp trạng thái dùng chung cho nhiều lần run (hash đã có, chỉ mục gần trùng,
+        kết nối COPY, process pool)
+
+        Dùng cho tiến trình chạy lâu (ví dụ daemon theo dõi thư mục) để không
+        phải nạp lại toàn bộ hash / chữ ký cho mỗi lô file mới:
+
+            with IngestEngine(redis_client=redis) as engine:
+                for items in new_arrivals():
+                    engine.run(items)
+        """
+        if self._writer is not None:
+            return self
+        self._index = active_version(self.redis_client)
+        self._dedup = HashDeduplicator.load(self.db_engine) if self.prefetch_hashes else HashDeduplicator()
+        self._detector = (
+            NearDuplicateDetector.load(self.redis_client, self.near_duplicate_threshold, self._index)
+            if self.near_duplicate_threshold else None
+        )
+        self._writer = PostgresBulkWriter(self.db_engine)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        return self
+
+    def close(self) -> None:
+        """Giải phóng process pool và kết nối database"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        if self._writer is not None:
+            self._writer.close()
+        self._dedup = self._detector = self._writer = self._executor = self._index = None
+
+    def __enter__(self) -> "IngestEngine":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def run(self, items: Iterable[IngestItem]) -> IngestStats:
+        """
+        Nhập toàn bộ tài liệu từ một iterable (được đọc dần theo lô)
+
+        Nếu engine chưa được start() thì trạng thái được nạp cho riêng lần chạy
+        này và giải phóng khi kết thúc.
+
+        Returns:
+            IngestStats của lần chạy
+        """
+        owns_state = self._writer is None
+        if owns_state:
+            self.start()
+        stats = IngestStats()
+        dedup, writer, executor = self._dedup, self._writer, self._executor
+
+        try:
+            in_flight = None
+            for batch in _chunked(items, self.batch_size):
+                # Đưa lô mới vào pool trước, rồi mới ghi lô trước đó
+                kept = self._drop_known(batch, dedup, stats)
+                pending = (batch, kept, self._process(executor, kept))
+                if in_flight is not None:
+                    self._finish_batch(writer, in_flight, dedup, self._detector, stats)
+                    logger.info(f"📦 {stats.summary()}")
+                in_flight = pending
+
+            if in_flight is not None:
+                self._finish_batch(writer, in_flight, dedup, self._detector, stats)
+        finally:
+            if owns_state:
+                self.close()
+
+        stats.finished_at = time.time()
+        logger.info(f"✅ {stats.summary()}")
+        return stats
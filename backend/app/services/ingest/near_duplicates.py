@@ -0,0 +1,84 @@
+"""
+Phát hiện tài liệu gần trùng khi nhập corpus
+Ký MinHash trước rồi dò chỉ mục LSH của corpus hiện có: tài liệu có Jaccard
+≥ NEAR_DUPLICATE_THRESHOLD với một tài liệu đại diện sẽ được gắn vào cụm của
+tài liệu đó (documents.canonical_id) thay vì được index riêng.
+"""
+import logging
+from typing import Dict, Optional
+
+from datasketch import MinHash
+
+from app.config import settings
+from app.services import corpus_store
+from app.services.algorithm.lsh_index import LSHIndex
+from app.services.index_versions import IndexParams, IndexVersion, active_version
+
+logger = logging.getLogger(__name__)
+
+
+class NearDuplicateDetector:
+    """
+    Chỉ mục LSH chứa các tài liệu đại diện, dùng để tìm cụm cho tài liệu mới
+
+    Chỉ mục dùng ngưỡng LSH thấp hơn ngưỡng gần trùng một chút để giảm
+    false negative quanh ngưỡng; Jaccard ước lượng được kiểm tra lại sau đó.
+    """
+
+    def __init__(self, threshold: float = None, params: IndexParams = None):
+        self.threshold = threshold or settings.NEAR_DUPLICATE_THRESHOLD
+        params = params or IndexParams.from_settings()
+        self.index = LSHIndex(
+            threshold=max(params.lsh_threshold, self.threshold * 0.8),
+            num_perm=params.num_perm
+        )
+        self.pg_ids: Dict[int, str] = {}  # corpus_row → UUID trong PostgreSQL
+
+    @classmethod
+    def load(
+        cls,
+        redis_client,
+        threshold: float = None,
+        index: IndexVersion = None
+    ) -> "NearDuplicateDetector":
+        """
+        Nạp các tài liệu đại diện đang có trong Redis
+
+        Args:
+            index: IndexVersion cần nạp (None = phiên bản đang phục vụ)
+        """
+        if index is None:
+            index = active_version(redis_client)
+        detector = cls(threshold, index.params)
+        if redis_client is None:
+            return detector
+        for doc_id, minhash, metadata in corpus_store.iter_signatures(
+            redis_client, fields=("language", "pg_id"), version=index.version
+        ):
+            detector.index.insert(doc_id, minhash, language=metadata.get("language") or "vi")
+            if metadata.get("pg_id"):
+                detector.pg_ids[doc_id] = metadata["pg_id"]
+        logger.info(f"🔎 Đã nạp {len(detector.pg_ids)} tài liệu đại diện để dò gần trùng")
+        return detector
+
+    def find_canonical(self, minhash: MinHash, language: str) -> Optional[str]:
+        """
+        Tìm tài liệu đại diện gần trùng nhất (cùng ngôn ngữ)
+
+        Returns:
+            UUID (PostgreSQL) của tài liệu đại diện, hoặc None nếu không có
+        """
+        results = self.index.query(minhash, top_k=1, languages={language})
+        if results and results[0][1] >= self.threshold:
+            return self.pg_ids.get(results[0][0])
+        return None
+
+    def add(self, doc_id: int, minhash: MinHash, language: str, pg_id: str) -> None:
+        """Thêm một tài liệu đại diện mới (để các tài liệu sau trong cùng lần chạy gộp vào)"""
+        self.index.insert(doc_id, minhash, language=language)
+        self.pg_ids[doc_id] = pg_id
+
+    def remove(self, doc_id: int) -> None:
+        """Bỏ một tài liệu đại diện (ví dụ lô chứa nó không được ghi vào PostgreSQL)"""
+        self.index.remove(doc_id)
+        self.pg_ids.pop(doc_id, None)
@@ -0,0 +1,203 @@
+"""
+Ghi tài liệu corpus vào PostgreSQL theo lô bằng COPY
+
+COPY dữ liệu vào một bảng tạm (staging) rồi chuyển sang `documents` bằng
+một câu INSERT ... ON CONFLICT DO NOTHING duy nhất - thay cho hàng nghìn
+lệnh SELECT kiểm tra trùng + INSERT qua ORM. Chữ ký MinHash của các tài
+liệu vừa thêm được COPY vào document_signatures, văn bản đã nén vào
+document_texts, trong cùng transaction.
+"""
+import csv
+import io
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional, Set
+
+from app.services import signature_store, text_store
+from app.services.ingest.worker import PreparedDocument
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "ingest_staging"
+
+_COLUMNS = (
+    "id", "title", "author", "university", "year", "topic",
+    "original_filename", "file_hash_sha256", "file_size_bytes", "word_count",
+    "language", "extraction_method",
+    "is_corpus", "status", "indexed_at", "canonical_id", "corpus_row",
+)
+
+_CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    id UUID,
+    title VARCHAR(500),
+    author VARCHAR(255),
+    university VARCHAR(255),
+    year INTEGER,
+    topic VARCHAR(255),
+    original_filename VARCHAR(255),
+    file_hash_sha256 VARCHAR(64),
+    file_size_bytes BIGINT,
+    word_count INTEGER,
+    language VARCHAR(10),
+    extraction_method VARCHAR(50),
+    is_corpus INTEGER,
+    status VARCHAR(20),
+    indexed_at TIMESTAMP,
+    canonical_id UUID,
+    corpus_row INTEGER
+) ON COMMIT DELETE ROWS
+"""
+
+_COLUMN_LIST = ", ".join(_COLUMNS)
+
+CORPUS_ROW_SEQUENCE = "documents_corpus_row_seq"
+
+_RESERVE_ROWS_SQL = f"SELECT nextval('{CORPUS_ROW_SEQUENCE}') FROM generate_series(1, %s)"
+
+_ASSIGN_MISSING_ROWS_SQL = f"""
+UPDATE documents SET corpus_row = nextval('{CORPUS_ROW_SEQUENCE}')
+WHERE is_corpus = 1 AND corpus_row IS NULL
+"""
+
+_INSERT_SQL = f"""
+INSERT INTO documents ({_COLUMN_LIST})
+SELECT {_COLUMN_LIST} FROM {STAGING_TABLE}
+ON CONFLICT DO NOTHING
+RETURNING file_hash_sha256
+"""
+
+
+def _truncate(value: Optional[str], length: int) -> Optional[str]:
+    return value[:length] if value else value
+
+
+def assign_missing_corpus_rows(db_engine) -> int:
+    """
+    Cấp corpus_row cho tài liệu corpus chưa có (ví dụ tạo qua ORM / script seed)
+
+    Returns:
+        Số tài liệu vừa được cấp
+    """
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_ASSIGN_MISSING_ROWS_SQL)
+        assigned = cur.rowcount
+        cur.close()
+        conn.commit()
+        return assigned
+    finally:
+        conn.close()
+
+
+class PostgresBulkWriter:
+    """
+    Ghi tài liệu đã xử lý vào bảng documents bằng COPY
+
+    Giữ một kết nối psycopg2 trong suốt quá trình nhập; mỗi lô là một transaction.
+    """
+
+    def __init__(self, db_engine):
+        self._conn = db_engine.raw_connection()
+        self._codec = text_store.TextCodec.active(db_engine)
+        with self._conn.cursor() as cur:
+            cur.execute(_CREATE_STAGING_SQL)
+        self._conn.commit()
+
+    def _to_csv(self, docs: List[PreparedDocument]) -> io.StringIO:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        now = datetime.now().isoformat()
+        for doc in docs:
+            item = doc.item
+            writer.writerow((
+                str(doc.doc_id),
+                _truncate(item.title, 500),
+                _truncate(item.author, 255),
+                _truncate(item.university, 255),
+                item.year,
+                _truncate(item.topic, 255),
+                _truncate(item.original_filename, 255),
+                doc.text_hash,
+                doc.file_size_bytes,
+                doc.word_count,
+                doc.language,
+                _truncate(item.extraction_method, 50),
+                1,
+                'indexed',
+                now,
+                doc.canonical_id,
+                doc.corpus_row,
+            ))
+        buffer.seek(0)
+        return buffer
+
+    def reserve_rows(self, docs: List[PreparedDocument]) -> None:
+        """
+        Cấp corpus_row cho các tài liệu trước khi gom cụm gần trùng và ghi
+
+        Lấy cả khối từ sequence trong một câu lệnh; số của tài liệu bị
+        ON CONFLICT bỏ qua để lại lỗ nhỏ trong dãy (ma trận chữ ký chịu được).
+        """
+        pending = [doc for doc in docs if doc.corpus_row is None]
+        if not pending:
+            return
+        with self._conn.cursor() as cur:
+            cur.execute(_RESERVE_ROWS_SQL, (len(pending),))
+            rows = [row[0] for row in cur.fetchall()]
+        self._conn.commit()
+        for doc, corpus_row in zip(pending, rows):
+            doc.corpus_row = corpus_row
+
+    def insert_batch(
+        self,
+        docs: List[PreparedDocument],
+        before_commit: Optional[Callable[[List[PreparedDocument]], None]] = None
+    ) -> List[PreparedDocument]:
+        """
+        Ghi một lô tài liệu, bỏ qua các tài liệu đã tồn tại (trùng hash/id)
+
+        Args:
+            docs: Các tài liệu đã xử lý thành công
+            before_commit: Callback nhận danh sách tài liệu thực sự được thêm,
+                chạy trước khi commit (ví dụ ghi Redis) - nếu lỗi thì cả lô rollback
+
+        Returns:
+            Danh sách tài liệu đã được thêm mới
+        """
+        if not docs:
+            return []
+
+        try:
+            with self._conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {STAGING_TABLE} ({_COLUMN_LIST}) FROM STDIN WITH (FORMAT csv)",
+                    self._to_csv(docs)
+                )
+                cur.execute(_INSERT_SQL)
+                inserted_hashes: Set[str] = {row[0] for row in cur.fetchall()}
+
+                inserted = [doc for doc in docs if doc.text_hash in inserted_hashes]
+                signature_store.copy_signatures(cur, (
+                    (doc.doc_id, doc.index_params.signature_scheme, doc.language,
+                     doc.shingle_count, doc.hashvalues)
+                    for doc in inserted if doc.hashvalues is not None
+                ))
+                text_store.copy_texts(cur, (
+                    (doc.doc_id, self._codec.compress(doc.text)) for doc in inserted
+                ))
+
+            if before_commit and inserted:
+                before_commit(inserted)
+            self._conn.commit()
+            return inserted
+        except Exception:
+            self._conn.rollback()
+            raise
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception as e:
+            logger.debug("Lỗi khi đóng kết nối: %s", e)
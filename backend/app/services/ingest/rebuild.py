@@ -0,0 +1,325 @@
+"""
+Dựng lại chỉ mục corpus theo kiểu blue/green
+
+Ký lại toàn bộ tài liệu đại diện trong PostgreSQL bằng tham số mới vào một
+namespace Redis riêng (idx:{v}:sig:*) trong khi phiên bản cũ vẫn phục vụ:
+
+    building     server-side cursor → chữ ký đã lưu trong document_signatures nếu cùng
+                 scheme (trừ khi resign), còn lại process pool ký lại (và lưu vào
+                 document_signatures) → Redis pipeline (không phát sự kiện)
+    catching_up  áp dụng các add/remove phát ra trong lúc dựng (đọc lại từ luồng thay đổi)
+    swap         kích hoạt phiên bản mới: con trỏ + sự kiện swap trong một MULTI/EXEC,
+                 mọi PlagiarismChecker nạp phiên bản mới rồi đổi tham chiếu chỉ mục
+    gc           chờ INDEX_GC_GRACE_SECONDS, bắt kịp lần cuối các ghi muộn vào
+                 phiên bản cũ, rồi xóa chữ ký của phiên bản cũ
+
+Tiến độ (processed / total, tốc độ, ETA) được ghi vào manifest của phiên bản
+sau mỗi lô - xem index_versions.rebuild_status().
+"""
+import functools
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.services import corpus_store, index_versions, signature_store, text_store
+from app.services.index_versions import IndexParams, IndexVersion
+from app.services.ingest.postgres_writer import assign_missing_corpus_rows
+from app.services.ingest.worker import sign_text
+
+logger = logging.getLogger(__name__)
+
+# Văn bản (nén, cùng 4 cột với text_store.TEXT_COLUMNS_SQL) chỉ được đọc khi chưa có chữ ký lưu sẵn
+# theo scheme của phiên bản mới (resign: bỏ qua chữ ký đã lưu); _decode_rows() đưa về dạng
+# (id, text, title, author, university, year, language, signature, corpus_row)
+_SELECT_CORPUS_SQL = f"""
+SELECT d.id, d.title, d.author, d.university, d.year, s.language, s.signature, d.corpus_row,
+       t.codec, t.dictionary_id,
+       CASE WHEN s.signature IS NULL THEN t.content END,
+       CASE WHEN s.signature IS NULL THEN d.extracted_text END
+FROM documents d
+LEFT JOIN document_signatures s ON s.document_id = d.id AND s.scheme = %(scheme)s AND NOT %(resign)s
+{text_store.TEXT_JOIN_SQL}
+WHERE d.is_corpus = 1 AND d.canonical_id IS NULL AND {text_store.HAS_TEXT_SQL}
+  AND d.corpus_row IS NOT NULL
+"""
+
+_SELECT_BY_ROWS_SQL = _SELECT_CORPUS_SQL + " AND d.corpus_row = ANY(%(rows)s)"
+
+
+class RebuildInProgress(RuntimeError):
+    """Đang có một lần dựng lại chỉ mục khác"""
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else (value or "")
+
+
+class IndexRebuilder:
+    """
+    Một lần dựng lại chỉ mục
+
+    Ví dụ:
+        rebuilder = IndexRebuilder(redis, IndexParams(shingle_size=5, num_perm=128, lsh_threshold=0.3))
+        new_version = rebuilder.run()
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        params: Optional[IndexParams] = None,
+        db_engine=None,
+        workers: Optional[int] = None,
+        batch_size: int = None,
+        gc_grace_seconds: int = None,
+        resign: bool = False
+    ):
+        """
+        Args:
+            redis_client: Client Redis
+            params: Tham số của phiên bản mới (mặc định theo settings)
+            db_engine: SQLAlchemy engine (mặc định engine của ứng dụng)
+            workers: Số process ký song song (mặc định = số CPU, 0 = trong process chính)
+            batch_size: Số tài liệu mỗi lô
+            gc_grace_seconds: Thời gian chờ sau swap trước khi xóa phiên bản cũ
+            resign: Ký lại mọi tài liệu kể cả khi đã có chữ ký cùng scheme - scheme chỉ gồm
+                shingle_size / num_perm, nên bắt buộc khi đổi bộ tách từ / chuẩn hóa văn bản
+        """
+        if db_engine is None:
+            from app.db.database import engine as db_engine
+        self.redis_client = redis_client
+        self.params = params or IndexParams.from_settings()
+        self.db_engine = db_engine
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = batch_size or settings.INDEX_REBUILD_BATCH_SIZE
+        self.gc_grace_seconds = (
+            settings.INDEX_GC_GRACE_SECONDS if gc_grace_seconds is None else gc_grace_seconds
+        )
+        self.resign = resign
+        self.index: Optional[IndexVersion] = None
+        self.reused = 0  # số tài liệu dùng chữ ký đã lưu thay vì ký lại
+
+    # ─── Đọc PostgreSQL ───────────────────────────────────────
+
+    def _decode_rows(self, rows: List[Tuple]) -> List[Tuple]:
+        """Giải nén văn bản: (id, text, title, author, university, year, language, signature, corpus_row)"""
+        return [
+            (row[0], text_store.decode_columns(self.db_engine, *row[8:12])) + tuple(row[1:8])
+            for row in rows
+        ]
+
+    def _iter_rows(self) -> Iterator[List[Tuple]]:
+        """Đọc dần các tài liệu đại diện bằng server-side cursor, theo lô"""
+        conn = self.db_engine.raw_connection()
+        try:
+            cur = conn.cursor(name="index_rebuild_documents")
+            cur.itersize = self.batch_size
+            cur.execute(_SELECT_CORPUS_SQL, {"scheme": self.params.signature_scheme, "resign": self.resign})
+            while True:
+                rows = cur.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield self._decode_rows(rows)
+            cur.close()
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _rows_by_corpus_row(self, corpus_rows: List[int]) -> List[Tuple]:
+        conn = self.db_engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(_SELECT_BY_ROWS_SQL, {
+                "scheme": self.params.signature_scheme, "resign": self.resign, "rows": corpus_rows
+            })
+            rows = cur.fetchall()
+            cur.close()
+            conn.commit()
+            return self._decode_rows(rows)
+        finally:
+            conn.close()
+
+    # ─── Ký lại và ghi ────────────────────────────────────────
+
+    def _sign(self, executor: Optional[ProcessPoolExecutor], rows: List[Tuple]) -> List[Tuple]:
+        """Ký các dòng chưa có chữ ký lưu sẵn và lưu chữ ký mới vào PostgreSQL"""
+        sign = functools.partial(sign_text, params=self.params)
+        texts = [row[1] for row in rows]
+        if executor is None:
+            signed = list(map(sign, texts))
+        else:
+            signed = list(executor.map(sign, texts, chunksize=max(1, len(texts) // (self.workers * 4))))
+
+        scheme = self.params.signature_scheme
+        signature_store.store_signatures(self.db_engine, (
+            (row[0], scheme, language, shingle_count, hashvalues)
+            for row, (language, hashvalues, shingle_count) in zip(rows, signed)
+            if hashvalues is not None
+        ))
+        return [
+            (row, language, hashvalues)
+            for row, (language, hashvalues, _shingle_count) in zip(rows, signed)
+        ]
+
+    def _sign_rows(self, executor: Optional[ProcessPoolExecutor], rows: List[Tuple]) -> int:
+        """Ký lại một lô và ghi vào namespace của phiên bản mới; trả về số tài liệu đã ghi"""
+        stored = [row for row in rows if row[7] is not None]
+        self.reused += len(stored)
+        signed = [(row, row[6], signature_store.decode_signature(row[7])) for row in stored]
+        to_sign = [row for row in rows if row[7] is None]
+        if to_sign:
+            signed += self._sign(executor, to_sign)
+
+        documents = []
+        for row, language, hashvalues in signed:
+            if hashvalues is None:
+                continue
+            pg_id, _, title, author, university, year, _, _, corpus_row = row
+            documents.append((
+                corpus_row,
+                hashvalues,
+                {
+                    "title": title,
+                    "author": author,
+                    "university": university,
+                    "year": year,
+                    "language": language,
+                    "pg_id": str(pg_id),
+                },
+            ))
+        return corpus_store.write_documents(
+            self.redis_client, documents, version=self.index.version, publish=False
+        )
+
+    def _build(self, executor: Optional[ProcessPoolExecutor], total: int) -> int:
+        processed = 0
+        for rows in self._iter_rows():
+            self._sign_rows(executor, rows)
+            processed += len(rows)
+            index_versions.update_manifest(
+                self.redis_client, self.index.version,
+                processed=processed, total=max(total, processed), reused=self.reused
+            )
+            index_versions.refresh_rebuild_lock(self.redis_client)
+            logger.info(
+                f"🔁 Dựng lại chỉ mục v{self.index.version}: {processed}/{total} "
+                f"({self.reused} chữ ký dùng lại từ PostgreSQL)"
+            )
+        return processed
+
+    def _catch_up(self, executor: Optional[ProcessPoolExecutor], after_id: str) -> str:
+        """
+        Áp dụng vào phiên bản mới các thay đổi corpus phát ra sau after_id
+
+        Tài liệu của sự kiện add được đọc lại (theo corpus_row) từ PostgreSQL và ký theo tham
+        số mới; sự kiện của chính phiên bản mới được bỏ qua.
+
+        Returns:
+            ID sự kiện cuối cùng đã xử lý
+        """
+        if corpus_store.changes_trimmed_after(self.redis_client, after_id):
+            # Không biết tài liệu nào đã thay đổi - phiên bản mới sẽ thiếu / thừa tài liệu
+            raise RuntimeError(
+                f"Luồng thay đổi corpus đã bị cắt sau {after_id} trong lúc dựng lại - "
+                f"tăng CORPUS_FEED_MAXLEN rồi chạy lại"
+            )
+        while True:
+            entries = self.redis_client.xrange(
+                settings.CORPUS_FEED_STREAM, min=f"({after_id}", max="+", count=self.batch_size
+            )
+            if not entries:
+                return after_id
+            after_id = _text(entries[-1][0])
+
+            changed: Dict[int, str] = {}  # corpus_row → op cuối cùng
+            for _entry_id, fields in entries:
+                fields = {_text(k): _text(v) for k, v in fields.items()}
+                version = fields.get("version") or corpus_store.LEGACY_INDEX_VERSION
+                if fields.get("op") == corpus_store.CHANGE_SWAP or version == self.index.version:
+                    continue
+                doc_id = corpus_store.parse_doc_id(fields.get("doc_id"))
+                if doc_id is not None:
+                    changed[doc_id] = fields.get("op")
+
+            removed = [doc_id for doc_id, op in changed.items() if op == corpus_store.CHANGE_REMOVE]
+            if removed:
+                self.redis_client.unlink(*(corpus_store.signature_key(d, self.index.version) for d in removed))
+
+            added = [doc_id for doc_id, op in changed.items() if op != corpus_store.CHANGE_REMOVE]
+            if added:
+                self._sign_rows(executor, self._rows_by_corpus_row(added))
+            logger.info(f"🔁 Bắt kịp {len(changed)} thay đổi corpus (tới {after_id})")
+
+    # ─── Điều phối ────────────────────────────────────────────
+
+    def run(self) -> IndexVersion:
+        """
+        Dựng, kích hoạt phiên bản mới và dọn phiên bản cũ
+
+        Raises:
+            RebuildInProgress: Nếu đang có rebuild khác giữ khóa
+        """
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        if not index_versions.acquire_rebuild_lock(self.redis_client, owner):
+            raise RebuildInProgress("Đang có một lần dựng lại chỉ mục khác")
+
+        activated = False
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        try:
+            # Vị trí luồng thay đổi đọc TRƯỚC khi dựng: mọi ghi trong lúc dựng đều được bắt kịp
+            start_id = corpus_store.latest_change_id(self.redis_client)
+            self.index = index_versions.create_version(self.redis_client, self.params)
+            version = self.index.version
+
+            assigned = assign_missing_corpus_rows(self.db_engine)
+            if assigned:
+                logger.info(f"🔢 Đã cấp corpus_row cho {assigned} tài liệu corpus")
+            stored, total = signature_store.count_signatures(self.db_engine, self.params.signature_scheme)
+            index_versions.update_manifest(self.redis_client, version, phase="building", total=total)
+            logger.info(
+                f"🔁 Bắt đầu dựng lại chỉ mục v{version} ({total} tài liệu, "
+                f"{stored} đã có chữ ký {self.params.signature_scheme}"
+                f"{' - bỏ qua, ký lại toàn bộ' if self.resign else ''}, {self.params})"
+            )
+            self._build(executor, total)
+
+            index_versions.update_manifest(
+                self.redis_client, version, status=index_versions.STATUS_CATCHING_UP, phase="catching_up"
+            )
+            last_id = self._catch_up(executor, start_id)
+
+            previous = index_versions.activate_version(self.redis_client, version)
+            activated = True
+            index_versions.update_manifest(self.redis_client, version, phase="swapped")
+            logger.info(f"✅ Đã kích hoạt chỉ mục v{version} (thay cho v{previous})")
+
+            # Writer chưa thấy swap có thể vẫn ghi vào phiên bản cũ trong thời gian ngắn
+            time.sleep(self.gc_grace_seconds)
+            self._catch_up(executor, last_id)
+            if previous != version:
+                deleted = index_versions.garbage_collect(self.redis_client, previous)
+                logger.info(f"🧹 Đã xóa {deleted} chữ ký của chỉ mục v{previous}")
+
+            index_versions.update_manifest(
+                self.redis_client, version, phase="done", finished_at=time.time()
+            )
+            return self.index
+        except BaseException as e:
+            # Kể cả Ctrl+C: hủy phiên bản dựng dở để không để lại manifest "building"
+            logger.error(f"❌ Dựng lại chỉ mục thất bại: {e!r}")
+            if self.index is not None:
+                index_versions.update_manifest(
+                    self.redis_client, self.index.version,
+                    error=str(e)[:500], finished_at=time.time(),
+                    **({} if activated else {"status": index_versions.STATUS_FAILED})
+                )
+                if not activated:
+                    corpus_store.delete_signatures(self.redis_client, self.index.version)
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            index_versions.release_rebuild_lock(self.redis_client)
@@ -0,0 +1,217 @@
+"""
+Theo dõi thư mục corpus để nhập file mới liên tục
+
+Dùng inotify (qua thư viện watchdog, nếu có cài) để biết ngay khi có file
+mới; không có watchdog thì quét định kỳ (polling). Trong cả hai trường hợp,
+một file chỉ được coi là sẵn sàng khi kích thước và mtime không đổi trong
+`settle_seconds` - tránh đọc file đang được copy dở.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# File tạm của trình duyệt / Office / rsync - không bao giờ nhập
+_TEMP_PREFIXES = ('.', '~$')
+_TEMP_SUFFIXES = ('.tmp', '.part', '.crdownload', '.partial', '.swp')
+
+
+@dataclass(frozen=True)
+class ReadyFile:
+    """Một file đã ổn định, sẵn sàng để nhập"""
+    path: str
+    size: int
+    mtime: float
+
+    @property
+    def key(self) -> str:
+        """Khóa checkpoint: file bị ghi đè (đổi size/mtime) được nhập lại"""
+        return f"{self.path}|{self.size}|{int(self.mtime)}"
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Nhận sự kiện inotify và đánh dấu đường dẫn cần kiểm tra lại"""
+
+    def __init__(self, watcher: "FolderWatcher"):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self._watcher._mark_dirty(getattr(event, 'dest_path', None) or event.src_path)
+
+
+class FolderWatcher:
+    """
+    Phát hiện file mới / đã thay đổi trong một hoặc nhiều thư mục
+
+    Ví dụ:
+        watcher = FolderWatcher(['/data/theses'], extensions={'.pdf', '.docx'})
+        for files in watcher.batches(max_batch=200, max_wait=30):
+            ...
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[str],
+        extensions: Iterable[str],
+        settle_seconds: float = 10.0,
+        poll_interval: float = 5.0,
+        full_scan_interval: float = 300.0,
+        use_inotify: bool = True
+    ):
+        """
+        Args:
+            directories: Các thư mục cần theo dõi (bao gồm thư mục con)
+            extensions: Phần mở rộng được nhận (ví dụ {'.pdf', '.docx', '.txt'})
+            settle_seconds: File phải đứng yên ngần này giây mới được nhập
+            poll_interval: Chu kỳ kiểm tra (giây)
+            full_scan_interval: Chu kỳ quét toàn bộ khi dùng inotify (phòng sự kiện bị mất)
+            use_inotify: Dùng watchdog nếu có; False = luôn polling
+        """
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.extensions = {e.lower() for e in extensions}
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.full_scan_interval = full_scan_interval
+        self.use_inotify = use_inotify and WATCHDOG_AVAILABLE
+
+        # path → (size, mtime, thời điểm lần cuối thấy thay đổi)
+        self._pending: Dict[str, Tuple[int, float, float]] = {}
+        self._emitted: Set[str] = set()   # khóa ReadyFile đã trả ra
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._observer = None
+        self._last_full_scan = 0.0
+
+    # ─── Phát hiện ────────────────────────────────────────────
+
+    def _accepts(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if name.startswith(_TEMP_PREFIXES) or name.lower().endswith(_TEMP_SUFFIXES):
+            return False
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def _mark_dirty(self, path: str) -> None:
+        if self._accepts(path):
+            with self._lock:
+                self._dirty.add(path)
+
+    def _scan_all(self) -> Set[str]:
+        found = set()
+        for directory in self.directories:
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for name in files:
+                    path = os.path.join(root, name)
+                    if self._accepts(path):
+                        found.add(path)
+        return found
+
+    def start(self) -> None:
+        """Bắt đầu nhận sự kiện inotify (không làm gì nếu đang polling)"""
+        if not self.use_inotify or self._observer is not None:
+            return
+        self._observer = Observer()
+        handler = _ChangeHandler(self)
+        for directory in self.directories:
+            self._observer.schedule(handler, directory, recursive=True)
+        self._observer.start()
+        logger.info(f"👀 Theo dõi bằng inotify: {', '.join(self.directories)}")
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def poll(self) -> List[ReadyFile]:
+        """
+        Một vòng kiểm tra: cập nhật trạng thái các file và trả về những file vừa ổn định
+        """
+        now = time.time()
+        if not self.use_inotify or now - self._last_full_scan >= self.full_scan_interval:
+            candidates = self._scan_all()
+            self._last_full_scan = now
+        else:
+            candidates = set()
+        with self._lock:
+            candidates |= self._dirty
+            self._dirty.clear()
+        candidates |= set(self._pending)
+
+        ready = []
+        for path in candidates:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # File đã bị xóa / đổi tên trước khi kịp ổn định
+                self._pending.pop(path, None)
+                continue
+
+            signature = (stat.st_size, stat.st_mtime)
+            previous = self._pending.get(path)
+            if previous is None or previous[:2] != signature:
+                ready_file = ReadyFile(path, stat.st_size, stat.st_mtime)
+                if ready_file.key not in self._emitted:
+                    self._pending[path] = (*signature, now)
+                continue
+
+            if stat.st_size > 0 and now - previous[2] >= self.settle_seconds:
+                del self._pending[path]
+                ready_file = ReadyFile(path, stat.st_size, stat.st_mtime)
+                self._emitted.add(ready_file.key)
+                ready.append(ready_file)
+
+        return sorted(ready, key=lambda f: f.mtime)
+
+    def forget(self, files: Iterable[ReadyFile]) -> None:
+        """Cho phép các file này được trả ra lại (ví dụ sau khi nhập thất bại)"""
+        for ready_file in files:
+            self._emitted.discard(ready_file.key)
+            self._mark_dirty(ready_file.path)
+
+    def batches(self, max_batch: int = 200, max_wait: float = 30.0) -> Iterator[List[ReadyFile]]:
+        """
+        Vòng lặp vô hạn gom các file sẵn sàng thành lô
+
+        Một lô được trả ra khi đủ `max_batch` file, hoặc khi file sẵn sàng đầu
+        tiên đã chờ quá `max_wait` giây.
+        """
+        self.start()
+        buffer: List[ReadyFile] = []
+        first_ready_at: Optional[float] = None
+        try:
+            while True:
+                ready = self.poll()
+                if ready:
+                    buffer.extend(ready)
+                    if first_ready_at is None:
+                        first_ready_at = time.time()
+
+                while len(buffer) >= max_batch:
+                    yield buffer[:max_batch]
+                    buffer = buffer[max_batch:]
+                    first_ready_at = time.time() if buffer else None
+
+                if buffer and time.time() - first_ready_at >= max_wait:
+                    yield buffer
+                    buffer, first_ready_at = [], None
+
+                time.sleep(self.poll_interval)
+        finally:
+            self.stop()
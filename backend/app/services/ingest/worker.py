@@ -0,0 +1,151 @@
+"""
+Phần xử lý chạy trong process pool của ingest engine
+extract → tokenize → shingle → MinHash cho từng tài liệu
+
+Các hàm ở đây phải là hàm cấp module (picklable) và không đụng tới
+database/Redis - mọi thao tác ghi do process chính đảm nhận.
+"""
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.algorithm.minhash import create_minhash_signature
+from app.services.index_versions import IndexParams
+from app.services.preprocessing.multilingual import TokenizedText, create_language_shingles, tokenize_text
+
+# Namespace cố định để sinh UUID xác định từ SHA-256 của nội dung:
+# chạy lại cùng một lô tài liệu luôn cho cùng id và cùng key Redis
+DOCUMENT_ID_NAMESPACE = uuid.UUID("6f1c2b5e-3a7d-4c1e-9b0a-5d2e8f4c7a91")
+
+
+def document_id_for_hash(text_hash: str) -> uuid.UUID:
+    """UUID xác định của tài liệu corpus, suy ra từ hash nội dung"""
+    return uuid.uuid5(DOCUMENT_ID_NAMESPACE, text_hash)
+
+
+@dataclass
+class IngestItem:
+    """
+    Một tài liệu đầu vào của ingest engine
+
+    Cần có `text` (đã trích xuất, ví dụ từ crawler) hoặc `path` (file trên đĩa,
+    được trích xuất trong worker).
+    """
+    title: str
+    text: Optional[str] = None
+    path: Optional[str] = None
+    author: Optional[str] = None
+    university: Optional[str] = None
+    year: Optional[int] = None
+    topic: Optional[str] = None
+    original_filename: Optional[str] = None
+    extraction_method: Optional[str] = None
+    markup: Optional[str] = None  # "wikitext" → làm sạch trong worker trước khi tách từ
+    extra: Dict[str, Any] = field(default_factory=dict)  # dữ liệu riêng của nguồn (không ghi DB)
+
+
+@dataclass
+class PreparedDocument:
+    """Kết quả xử lý của worker, sẵn sàng để ghi hàng loạt"""
+    item: IngestItem
+    text: str = ""
+    text_hash: str = ""
+    doc_id: Optional[uuid.UUID] = None
+    language: str = "vi"
+    word_count: int = 0
+    file_size_bytes: int = 0
+    hashvalues: Optional[List[int]] = None
+    shingle_count: int = 0  # số shingle (phân biệt) đã đưa vào MinHash
+    canonical_id: Optional[str] = None  # tài liệu đại diện nếu đây là bản gần trùng
+    corpus_row: Optional[int] = None  # cấp bởi PostgresBulkWriter.reserve_rows trước khi ghi
+    index_params: Optional[IndexParams] = None  # tham số đã dùng để ký hashvalues
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _read_item_text(item: IngestItem) -> str:
+    if item.text is not None:
+        if item.markup == "wikitext":
+            from app.services.preprocessing.wikitext import strip_wikitext
+            return strip_wikitext(item.text)
+        return item.text
+    if not item.path:
+        raise ValueError("IngestItem cần có text hoặc path")
+
+    filename = item.original_filename or os.path.basename(item.path)
+    if os.path.splitext(filename)[1].lower() in ('.txt', ''):
+        with open(item.path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+
+    from app.services.preprocessing.extractor import extract_text
+    return extract_text(item.path, filename)
+
+
+def sign_tokens(tokenized: TokenizedText, params: Optional[IndexParams] = None) -> Tuple[List[int], int]:
+    """
+    Ký MinHash văn bản đã tách từ theo tham số của một phiên bản chỉ mục
+
+    Returns:
+        (hashvalues, số shingle)
+    """
+    params = params or IndexParams.from_settings()
+    shingles = create_language_shingles(tokenized, k=params.shingle_size)
+    return create_minhash_signature(shingles, num_perm=params.num_perm).hashvalues.tolist(), len(shingles)
+
+
+def sign_text(text: str, params: IndexParams) -> Tuple[str, Optional[List[int]], int]:
+    """
+    Tách từ và ký lại văn bản đã lưu (dùng khi dựng lại chỉ mục)
+
+    Returns:
+        (ngôn ngữ, hashvalues, số shingle) - hashvalues là None nếu không có token nào
+    """
+    tokenized = tokenize_text(text)
+    if not tokenized.tokens:
+        return tokenized.language, None, 0
+    hashvalues, shingle_count = sign_tokens(tokenized, params)
+    return tokenized.language, hashvalues, shingle_count
+
+
+def prepare_document(item: IngestItem, params: Optional[IndexParams] = None) -> PreparedDocument:
+    """
+    Xử lý một tài liệu: trích xuất, nhận diện ngôn ngữ, tách từ và ký MinHash
+
+    Không bao giờ raise - lỗi được trả về trong trường `error` để một tài liệu
+    hỏng không làm dừng cả lô.
+
+    Args:
+        item: Tài liệu đầu vào
+        params: Tham số ký của phiên bản chỉ mục đang ghi (None = theo settings)
+    """
+    prepared = PreparedDocument(item=item)
+    try:
+        raw_text = _read_item_text(item)
+        if not raw_text or not raw_text.strip():
+            prepared.error = "empty"
+            return prepared
+
+        # Hash trên văn bản gốc - cùng cách tính với các bản ghi đã nhập trước đây
+        raw = raw_text.encode('utf-8')
+        text = raw_text.replace('\x00', '')  # PostgreSQL không chấp nhận ký tự NUL
+        prepared.text = text
+        prepared.text_hash = hashlib.sha256(raw).hexdigest()
+        prepared.doc_id = document_id_for_hash(prepared.text_hash)
+        prepared.file_size_bytes = os.path.getsize(item.path) if item.path else len(raw)
+
+        tokenized = tokenize_text(text)
+        prepared.language = tokenized.language
+        prepared.word_count = len(tokenized.tokens)
+        if not tokenized.tokens:
+            return prepared
+
+        prepared.index_params = params or IndexParams.from_settings()
+        prepared.hashvalues, prepared.shingle_count = sign_tokens(tokenized, prepared.index_params)
+    except Exception as e:
+        prepared.error = str(e)[:200]
+    return prepared
@@ -4,23 +4,28 @@ Xử lý việc upload/download file lên MinIO (hệ thống lưu trữ tương
 """
 import os
 import uuid
-from typing import Optional
+from typing import BinaryIO, Dict, Iterable, Optional
 from datetime import timedelta
 import logging
 
 try:
     from minio import Minio
+    from minio.deleteobjects import DeleteObject
     from minio.error import S3Error
     MINIO_AVAILABLE = True
 except ImportError:
     MINIO_AVAILABLE = False
     Minio = None
+    DeleteObject = None
     S3Error = Exception
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Số object tối đa trong một request DeleteObjects của S3
+DELETE_BATCH_SIZE = 1000
+
 
 class MinIOStorage:
     """
@@ -153,6 +158,48 @@ class MinIOStorage:
             logger.error(f"Lỗi khi upload bytes: {e}")
             return None
     
+    def upload_stream(
+        self,
+        stream: BinaryIO,
+        length: int,
+        object_name: str,
+        bucket: Optional[str] = None,
+        content_type: str = "application/octet-stream",
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """
+        Upload dữ liệu từ stream lên MinIO (tự động multipart với file lớn)
+
+        Args:
+            stream: Đối tượng file-like để đọc dữ liệu
+            length: Số byte cần upload
+            object_name: Tên object trong MinIO
+            bucket: Bucket đích
+            content_type: MIME type
+            metadata: Metadata gắn kèm object (ví dụ: sha256)
+
+        Returns:
+            Tên object nếu thành công, None nếu thất bại
+        """
+        if not self.client:
+            return None
+
+        bucket = bucket or settings.MINIO_BUCKET_UPLOADS
+
+        try:
+            self.client.put_object(
+                bucket,
+                object_name,
+                stream,
+                length,
+                content_type=content_type,
+                metadata=metadata
+            )
+            return object_name
+        except S3Error as e:
+            logger.error(f"Lỗi khi upload stream: {e}")
+            return None
+
     def download_file(
         self, 
         object_name: str, 
@@ -244,6 +291,42 @@ class MinIOStorage:
             logger.error(f"Lỗi khi xóa file: {e}")
             return False
     
+    def delete_files(
+        self,
+        object_names: Iterable[str],
+        bucket: Optional[str] = None
+    ) -> int:
+        """
+        Xóa nhiều file bằng API xóa nhiều object (mỗi request tối đa DELETE_BATCH_SIZE object)
+        
+        Args:
+            object_names: Tên các object cần xóa
+            bucket: Bucket nguồn
+            
+        Returns:
+            Số object xóa thất bại
+        """
+        names = list(object_names)
+        if not names:
+            return 0
+        if not self.client:
+            return len(names)
+        
+        bucket = bucket or settings.MINIO_BUCKET_UPLOADS
+        failed = 0
+        for i in range(0, len(names), DELETE_BATCH_SIZE):
+            chunk = names[i:i + DELETE_BATCH_SIZE]
+            try:
+                # remove_objects trả về iterator lười - phải duyệt hết thì request mới được gửi
+                for error in self.client.remove_objects(bucket, [DeleteObject(name) for name in chunk]):
+                    failed += 1
+                    logger.error(f"Lỗi khi xóa {bucket}/{error.name}: {error.message}")
+            except S3Error as e:
+                failed += len(chunk)
+                logger.error(f"Lỗi khi xóa {len(chunk)} file: {e}")
+        logger.info(f"Đã xóa {len(names) - failed}/{len(names)} file khỏi {bucket}")
+        return failed
+    
     def list_objects(
         self, 
         bucket: Optional[str] = None,
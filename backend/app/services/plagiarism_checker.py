@@ -7,17 +7,24 @@ Features: check_against_corpus: Check 1 file với corpus
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from datasketch import MinHash
-import tempfile
+import numpy as np
 import os
 import time
 
 from fastapi import HTTPException
 
-from app.services.preprocessing.vietnamese_nlp import preprocess_vietnamese
-from app.services.preprocessing.text_normalizer import normalize_text
-from app.services.algorithm.shingling import create_shingles, find_common_shingles
-from app.services.algorithm.minhash import create_minhash_signature, estimate_jaccard
+from app.services.preprocessing.extractor import extract_text, TextSource
+from app.services.preprocessing.multilingual import (
+    TokenizedText,
+    create_language_shingles,
+    tokenize_text,
+)
+from app.services.algorithm.shingling import find_common_shingles
+from app.services.algorithm.minhash import create_minhash_signature
 from app.services.algorithm.lsh_index import LSHIndex
+from app.services import corpus_store, index_versions, text_store
+from app.services.corpus_feed import CorpusFeedConsumer
+from app.services.index_versions import IndexParams, IndexVersion
 from app.config import settings
 from app.db.database import SessionLocal
 from app.db.models import Document
@@ -37,13 +44,14 @@ class MatchedSegment:
 @dataclass
 class CorpusMatch:
     """Một document match từ corpus với chi tiết các đoạn trùng khớp"""
-    doc_id: str
+    doc_id: int  # documents.corpus_row
     title: str
     author: str
     university: str
     similarity: float
     year: Optional[int] = None
     matched_segments: Optional[List[MatchedSegment]] = None
+    pg_id: Optional[str] = None  # documents.id
 
 
 @dataclass  
@@ -55,6 +63,7 @@ class PlagiarismResult:
     matches: List[CorpusMatch]
     word_count: int
     processing_time_ms: int
+    query_tokens: Optional[List[str]] = None  # vị trí trong MatchedSegment trỏ vào mảng này
 
 
 class PlagiarismChecker:
@@ -62,132 +71,138 @@ class PlagiarismChecker:
     
     def __init__(self, redis_client=None):
         self.redis_client = redis_client
-        # Initialize LSH index
-        self.lsh_index = LSHIndex(
-            threshold=settings.LSH_THRESHOLD,
-            num_perm=settings.MINHASH_PERMUTATIONS
-        )
+        # (index version, LSH index) are swapped together as one reference so a
+        # request never mixes signing params of one version with another's index
+        legacy = index_versions.legacy_version()
+        self._serving: Tuple[IndexVersion, LSHIndex] = (legacy, self._new_index(legacy.params))
+        
+        self.feed: Optional[CorpusFeedConsumer] = None
         
-        # Load corpus from Redis
+        # Load corpus from Redis, then follow the change feed from the position
+        # read *before* the snapshot so nothing written meanwhile is missed
         if redis_client:
-            self._load_corpus()
+            start_id = self._feed_position()
+            self._serving = self._load_version(self._active_version())
+            if settings.CORPUS_FEED_ENABLED and start_id is not None:
+                self.feed = CorpusFeedConsumer(
+                    redis_client,
+                    self.lsh_index,
+                    start_id,
+                    version=self.index_version.version,
+                    on_swap=self._swap_index
+                ).start()
+    
+    @property
+    def lsh_index(self) -> LSHIndex:
+        return self._serving[1]
+    
+    @property
+    def index_version(self) -> IndexVersion:
+        return self._serving[0]
+    
+    @staticmethod
+    def _new_index(params: IndexParams) -> LSHIndex:
+        return LSHIndex(threshold=params.lsh_threshold, num_perm=params.num_perm)
+    
+    def _active_version(self) -> IndexVersion:
+        try:
+            return index_versions.active_version(self.redis_client)
+        except Exception as e:
+            print(f"⚠️ Could not read active index version: {e}")
+            return index_versions.legacy_version()
     
-    def _load_corpus(self):
-        """Load corpus từ Redis vào LSH index"""
-        import json
-        import numpy as np
+    def _feed_position(self) -> Optional[str]:
+        try:
+            return corpus_store.latest_change_id(self.redis_client)
+        except Exception as e:
+            print(f"⚠️ Corpus change feed unavailable: {e}")
+            return None
+    
+    def _load_corpus(self, index_version: IndexVersion) -> LSHIndex:
+        """Load corpus (1 phiên bản chỉ mục) từ Redis vào một LSH index mới"""
+        lsh_index = self._new_index(index_version.params)
+        loaded = 0
         
+        # Signature + language fetched in pipelined batches
+        for doc_id, minhash, metadata in corpus_store.iter_signatures(
+            self.redis_client, version=index_version.version
+        ):
+            # Docs indexed before language detection have no language → "vi"
+            lsh_index.insert(doc_id, minhash, language=metadata.get("language") or "vi")
+            loaded += 1
+        
+        print(f"✅ Loaded {loaded} documents into LSH index (version {index_version.version})")
+        return lsh_index
+    
+    def _load_version(self, index_version: IndexVersion) -> Tuple[IndexVersion, LSHIndex]:
         try:
-            doc_keys = self.redis_client.keys("doc:sig:*")
-            loaded = 0
-            
-            for key in doc_keys:
-                doc_id = key.replace("doc:sig:", "") if isinstance(key, str) else key.decode().replace("doc:sig:", "")
-                sig_data = self.redis_client.get(key)
-                
-                if sig_data:
-                    if isinstance(sig_data, bytes):
-                        sig_data = sig_data.decode()
-                    
-                    # Reconstruct MinHash from JSON with same seed
-                    from app.services.algorithm.minhash import MINHASH_SEED
-                    minhash = MinHash(num_perm=settings.MINHASH_PERMUTATIONS, seed=MINHASH_SEED)
-                    hashvalues = json.loads(sig_data)
-                    minhash.hashvalues = np.array(hashvalues, dtype=np.uint64)
-                    
-                    self.lsh_index.insert(doc_id, minhash)
-                    loaded += 1
-            
-            print(f"✅ Loaded {loaded} documents into LSH index")
+            return index_version, self._load_corpus(index_version)
         except Exception as e:
             print(f"⚠️ Could not load corpus: {e}")
+            return index_version, self._new_index(index_version.params)
+    
+    def _swap_index(self, version: str) -> LSHIndex:
+        """
+        Nạp phiên bản chỉ mục vừa được kích hoạt rồi đổi tham chiếu (gọi từ
+        thread của luồng thay đổi); request đang chạy tiếp tục với bản cũ
+        """
+        index_version = index_versions.get_version(self.redis_client, version)
+        lsh_index = self._load_corpus(index_version)
+        self._serving = (index_version, lsh_index)
+        return lsh_index
     
-    def _get_text_from_postgres(self, doc_id: str, pg_id: str = None) -> str:
+    def _get_texts_from_postgres(self, doc_ids: List[int]) -> Dict[int, Tuple[str, str]]:
         """
-        Query document text from PostgreSQL instead of Redis.
+        Query document texts from PostgreSQL instead of Redis.
         This saves RAM as Redis runs in memory.
         
+        One indexed lookup on documents.corpus_row for all matched documents.
+        
         Args:
-            doc_id: Short document ID (8 chars from UUID)
-            pg_id: Full PostgreSQL UUID if available from Redis metadata
+            doc_ids: corpus_row of the matched documents
         
         Returns:
-            Extracted text from document or None if not found
+            {corpus_row: (PostgreSQL UUID, extracted text)} for the documents found
         """
+        if not doc_ids:
+            return {}
         try:
             db = SessionLocal()
             try:
-                import uuid as uuid_module
-                doc = None
-                
-                # Method 1: Try pg_id (full UUID from Redis metadata)
-                if pg_id:
-                    try:
-                        full_uuid = uuid_module.UUID(pg_id)
-                        doc = db.query(Document).filter(Document.id == full_uuid).first()
-                    except (ValueError, AttributeError):
-                        pass
-                
-                # Method 2: Try padded UUID (doc_id + zeros)
-                if not doc:
-                    full_uuid_str = doc_id + '0' * (32 - len(doc_id))
-                    try:
-                        full_uuid = uuid_module.UUID(full_uuid_str)
-                        doc = db.query(Document).filter(Document.id == full_uuid).first()
-                    except ValueError:
-                        pass
-                
-                # Method 3: Search by ID prefix using string cast
-                if not doc:
-                    from sqlalchemy import cast, String
-                    doc = db.query(Document).filter(
-                        Document.is_corpus == 1,
-                        Document.extracted_text.isnot(None),
-                        cast(Document.id, String).like(f"{doc_id}%")
-                    ).first()
-                
-                # Method 4: Fallback - search any corpus doc with matching hash prefix
-                if not doc:
-                    doc = db.query(Document).filter(
-                        Document.is_corpus == 1,
-                        Document.extracted_text.isnot(None)
-                    ).filter(
-                        Document.file_hash_sha256.like(f"{doc_id}%")
-                    ).first()
-                
-                if doc and doc.extracted_text:
-                    return doc.extracted_text
-                    
-                return None
+                rows = db.query(Document.corpus_row, Document.id).filter(
+                    Document.corpus_row.in_(doc_ids)
+                ).all()
+                texts = text_store.fetch_texts(db.get_bind(), (pg_id for _, pg_id in rows))
+                return {
+                    corpus_row: (str(pg_id), texts[str(pg_id)])
+                    for corpus_row, pg_id in rows if str(pg_id) in texts
+                }
             finally:
                 db.close()
         except Exception as e:
-            print(f"⚠️ Error querying PostgreSQL for doc {doc_id}: {e}")
-            return None
+            print(f"⚠️ Error querying PostgreSQL for docs {doc_ids}: {e}")
+            return {}
     
-    def _extract_text(self, file_path: str, filename: str) -> str:
-        """Extract text từ file"""
+    def _extract_text(self, source: TextSource, filename: str) -> str:
+        """
+        Extract text từ file (đường dẫn, bytes hoặc buffer file-like)
+        
+        Nội dung upload được xử lý trực tiếp trong bộ nhớ, không cần ghi file tạm.
+        """
         ext = os.path.splitext(filename)[1].lower()
         
-        if ext == '.pdf':
-            from app.services.preprocessing.pdf_extractor import extract_text_from_pdf
-            return extract_text_from_pdf(file_path)
-        elif ext == '.docx':
-            from docx import Document
+        if ext == '.docx':
             try:
-                # Add delay to ensure file is fully written on Windows
-                import time
-                time.sleep(0.5)
-                
-                # Verify file exists and is readable
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"DOCX file not found: {file_path}")
-                
-                if os.path.getsize(file_path) == 0:
+                if isinstance(source, str):
+                    # Verify file exists and is readable
+                    if not os.path.exists(source):
+                        raise FileNotFoundError(f"DOCX file not found: {source}")
+                    if os.path.getsize(source) == 0:
+                        raise ValueError("DOCX file is empty")
+                elif isinstance(source, (bytes, bytearray)) and not source:
                     raise ValueError("DOCX file is empty")
                 
-                doc = Document(file_path)
-                text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+                text = extract_text(source, filename)
                 
                 if not text.strip():
                     raise ValueError("No text content found in DOCX file")
@@ -200,99 +215,137 @@ class PlagiarismChecker:
                     status_code=400,
                     detail=f"Cannot read DOCX file: {str(e)}. Please ensure the file is a valid Word document."
                 )
-        else:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+        
+        return extract_text(source, filename)
     
-    def _process_text(self, text: str) -> Tuple[List[str], MinHash]:
-        """Process text → tokens → shingles → MinHash"""
-        # Normalize
-        text = normalize_text(text)
+    def _process_text(self, text: str, params: Optional[IndexParams] = None) -> Tuple[TokenizedText, MinHash]:
+        """Process text → detect language → tokens → shingles → MinHash (theo tham số của phiên bản chỉ mục)"""
+        params = params or self.index_version.params
         
-        # Tokenize (Vietnamese NLP)
-        tokens = preprocess_vietnamese(text)
+        # Detect language per paragraph + tokenize (Vietnamese NLP / English regex)
+        tokenized = tokenize_text(text)
         
-        # Create shingles
-        shingles = create_shingles(tokens, k=settings.SHINGLE_SIZE)
+        # Create shingles (separate namespace per language)
+        shingles = create_language_shingles(tokenized, k=params.shingle_size)
         
         # Create MinHash signature
-        minhash = create_minhash_signature(shingles)
+        minhash = create_minhash_signature(shingles, num_perm=params.num_perm)
+        
+        return tokenized, minhash
+    
+    def _collapse_near_duplicates(
+        self,
+        candidates: List[Tuple[int, float]],
+        lsh_index: LSHIndex
+    ) -> List[Tuple[int, float]]:
+        """
+        Giữ 1 đại diện cho mỗi cụm gần trùng trong danh sách candidate
         
-        return tokens, minhash
+        Documents ingested after clustering are already excluded from the index;
+        this also covers near-identical docs indexed before (e.g. seeded corpus).
+        Candidates are sorted by similarity, so the best match of each cluster wins.
+        """
+        threshold = settings.NEAR_DUPLICATE_THRESHOLD
+        kept: List[Tuple[int, float]] = []
+        kept_signatures: List[np.ndarray] = []
+        
+        for doc_id, similarity in candidates:
+            signature = lsh_index.signature(doc_id)
+            if signature is not None and any(
+                np.mean(signature == other) >= threshold for other in kept_signatures
+            ):
+                continue
+            kept.append((doc_id, similarity))
+            if signature is not None:
+                kept_signatures.append(signature)
+        
+        return kept
     
     # ═══════════════════════════════════════════════════════════
     # FEATURE: Check 1 file với corpus
     # ═══════════════════════════════════════════════════════════
     
-    def check_against_corpus(self, file_path: str, filename: str) -> PlagiarismResult:
+    def check_against_corpus(self, source: TextSource, filename: str) -> PlagiarismResult:
         """
         Check 1 file với corpus
         
         Args:
-            file_path: Path to file
+            source: Path to file, hoặc nội dung file dạng bytes/buffer
             filename: Name of file
         
         Returns:
             PlagiarismResult với matches từ corpus (bao gồm chi tiết từng đoạn trùng khớp)
         """
         start_time = time.time()
+        text = self._extract_text(source, filename)
+        return self.check_text(text, start_time=start_time)
+    
+    def check_text(self, text: str, start_time: Optional[float] = None) -> PlagiarismResult:
+        """
+        Check văn bản thô (đã trích xuất) với corpus
+        
+        Args:
+            text: Văn bản cần kiểm tra
+            start_time: Mốc thời gian bắt đầu (để tính cả thời gian trích xuất)
         
-        # Extract and process
-        text = self._extract_text(file_path, filename)
-        tokens, minhash = self._process_text(text)
+        Returns:
+            PlagiarismResult với matches từ corpus
+        """
+        start_time = start_time or time.time()
+        
+        # Snapshot of the serving index - a concurrent swap does not affect this check
+        index_version, lsh_index = self._serving
+        tokenized, minhash = self._process_text(text, index_version.params)
+        tokens = tokenized.tokens
+        
+        # Query LSH index (only indexes of languages present in the text),
+        # then keep one representative per near-duplicate cluster
+        candidates = lsh_index.query(minhash, top_k=50, languages=tokenized.languages)
+        candidates = self._collapse_near_duplicates(candidates, lsh_index)[:20]
         
-        # Query LSH index
-        candidates = self.lsh_index.query(minhash, top_k=20)
+        # Minimum 20% similarity
+        candidates = [(doc_id, similarity) for doc_id, similarity in candidates if similarity >= 0.2]
+        
+        # Get source texts from PostgreSQL (not Redis - saves RAM), one query by corpus_row
+        sources = self._get_texts_from_postgres([doc_id for doc_id, _ in candidates])
         
         # Build matches list với matched segments
         matches = []
         for doc_id, similarity in candidates:
-            if similarity >= 0.2:  # Minimum 20% similarity
-                # Get metadata from Redis
-                metadata = {}
-                source_text = None
-                pg_id = None
-                
-                if self.redis_client:
-                    # Get metadata from Redis (fast, lightweight)
-                    meta_key = f"doc:meta:{doc_id}"
-                    metadata = self.redis_client.hgetall(meta_key)
-                    if metadata and isinstance(list(metadata.keys())[0], bytes):
-                        metadata = {k.decode(): v.decode() for k, v in metadata.items()}
-                    
-                    # Get pg_id for PostgreSQL lookup
-                    pg_id = metadata.get('pg_id')
-                
-                # Get source text from PostgreSQL (not Redis - saves RAM)
-                # Query by pg_id or doc_id pattern matching in documents table
-                source_text = self._get_text_from_postgres(doc_id, pg_id)
-                
-                # Find matched segments if source text available
-                matched_segments = []
-                if source_text:
-                    source_tokens = preprocess_vietnamese(normalize_text(source_text))
-                    segments_data = find_common_shingles(tokens, source_tokens, k=settings.SHINGLE_SIZE)
-                    
-                    # Show up to 50 segments per match (sorted by length, longest first)
-                    for seg in segments_data[:50]:
-                        matched_segments.append(MatchedSegment(
-                            query_text=seg["query_text"],
-                            query_start=seg["query_start"],
-                            query_end=seg["query_end"],
-                            source_text=seg["source_text"],
-                            source_start=seg["source_start"],
-                            source_end=seg["source_end"]
-                        ))
+            # Get metadata from Redis (fast, lightweight)
+            metadata = {}
+            if self.redis_client:
+                metadata = corpus_store.read_metadata(self.redis_client, doc_id)
+            
+            pg_id, source_text = sources.get(doc_id, (metadata.get('pg_id'), None))
+            
+            # Find matched segments if source text available
+            matched_segments = []
+            if source_text:
+                source_tokens = tokenize_text(source_text).tokens
+                segments_data = find_common_shingles(tokens, source_tokens, k=index_version.params.shingle_size)
                 
-                matches.append(CorpusMatch(
-                    doc_id=doc_id,
-                    title=metadata.get('title', 'Unknown'),
-                    author=metadata.get('author', 'Unknown'),
-                    university=metadata.get('university', 'Unknown'),
-                    year=int(metadata.get('year', 0)) or None,
-                    similarity=similarity,
-                    matched_segments=matched_segments if matched_segments else None
-                ))
+                # Show up to 50 segments per match (sorted by length, longest first)
+                for seg in segments_data[:50]:
+                    matched_segments.append(MatchedSegment(
+                        query_text=seg["query_text"],
+                        query_start=seg["query_start"],
+                        query_end=seg["query_end"],
+                        source_text=seg["source_text"],
+                        source_start=seg["source_start"],
+                        source_end=seg["source_end"]
+                    ))
+            
+            matches.append(CorpusMatch(
+                doc_id=doc_id,
+                title=metadata.get('title', 'Unknown'),
+                author=metadata.get('author', 'Unknown'),
+                university=metadata.get('university', 'Unknown'),
+                year=int(metadata.get('year', 0)) or None,
+                similarity=similarity,
+                matched_segments=matched_segments if matched_segments else None,
+                pg_id=pg_id
+            ))
         
         # Sort by similarity
         matches.sort(key=lambda x: x.similarity, reverse=True)
@@ -323,28 +376,32 @@ class PlagiarismChecker:
             plagiarism_level=level,
             matches=matches,
             word_count=len(tokens),
-            processing_time_ms=processing_time
+            processing_time_ms=processing_time,
+            query_tokens=tokens
         )
     
     # ═══════════════════════════════════════════════════════════
     # CORPUS MANAGEMENT
     # ═══════════════════════════════════════════════════════════
     
-    def add_to_corpus(self, doc_id: str, text: str, metadata: Dict) -> bool:
-        """Thêm 1 document vào corpus"""
+    def add_to_corpus(self, doc_id: int, text: str, metadata: Dict) -> bool:
+        """Thêm 1 document vào corpus (doc_id = documents.corpus_row)"""
         try:
-            tokens, minhash = self._process_text(text)
+            index_version, lsh_index = self._serving
+            tokenized, minhash = self._process_text(text, index_version.params)
+            language = tokenized.language
             
             # Insert into LSH index
-            self.lsh_index.insert(doc_id, minhash)
+            lsh_index.insert(doc_id, minhash, language=language)
             
             # Store in Redis if available
             if self.redis_client:
-                # Store signature
-                self.redis_client.set(f"doc:sig:{doc_id}", minhash.digest().hex())
-                
-                # Store metadata
-                self.redis_client.hset(f"doc:meta:{doc_id}", mapping=metadata)
+                # Store signature + metadata (same format as _load_corpus reads)
+                corpus_store.write_documents(
+                    self.redis_client,
+                    [(doc_id, minhash, {**metadata, "language": language})],
+                    version=index_version.version
+                )
             
             return True
         except Exception as e:
@@ -352,5 +409,9 @@ class PlagiarismChecker:
             return False
     
     def get_corpus_stats(self) -> Dict:
-        """Get corpus statistics"""
-        return self.lsh_index.get_stats()
+        """Get corpus statistics (incl. change feed position when enabled)"""
+        stats = self.lsh_index.get_stats()
+        stats["index_version"] = self.index_version.version
+        if self.feed is not None:
+            stats["feed"] = self.feed.status()
+        return stats
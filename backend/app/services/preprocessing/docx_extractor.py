@@ -0,0 +1,107 @@
+"""
+Module trích xuất văn bản từ DOCX dạng streaming
+Đọc trực tiếp word/document.xml trong file zip bằng parser XML tuần tự (iterparse),
+không dựng toàn bộ object model của python-docx
+
+Lấy văn bản từ đoạn văn, bảng và text box theo thứ tự xuất hiện trong tài liệu.
+Header/footer không được lấy (tương tự filter_header_footer cho PDF).
+"""
+import zipfile
+from typing import BinaryIO, Iterator, List, Union
+from xml.etree.ElementTree import iterparse, ParseError
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC_NS = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+TAG_P = W_NS + 'p'
+TAG_R = W_NS + 'r'
+TAG_T = W_NS + 't'
+TAG_TAB = W_NS + 'tab'
+TAG_BR = W_NS + 'br'
+TAG_CR = W_NS + 'cr'
+TAG_FALLBACK = MC_NS + 'Fallback'
+
+DOCUMENT_PART = 'word/document.xml'
+
+
+def iter_docx_paragraphs(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """
+    Duyệt từng đoạn văn (không rỗng) của file DOCX theo thứ tự tài liệu
+
+    Bộ nhớ được giữ ở mức thấp: mỗi phần tử con trực tiếp của <w:body>
+    được giải phóng ngay sau khi xử lý xong.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like (bytes) của DOCX
+
+    Yields:
+        Văn bản của từng đoạn
+
+    Raises:
+        ValueError: Nếu file không phải DOCX hợp lệ
+    """
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"File không phải DOCX hợp lệ: {e}")
+
+    with archive:
+        try:
+            part = archive.open(DOCUMENT_PART)
+        except KeyError:
+            raise ValueError(f"DOCX thiếu {DOCUMENT_PART}")
+
+        with part:
+            stack: List[List[str]] = []   # Buffer cho các đoạn lồng nhau (text box trong đoạn)
+            fallback_depth = 0            # Bỏ qua mc:Fallback để text box không bị lặp
+            open_tags: List[str] = []     # Các phần tử đang mở (phần tử cha của phần tử vừa đóng)
+            body = None
+
+            try:
+                for event, elem in iterparse(part, events=('start', 'end')):
+                    if event == 'start':
+                        open_tags.append(elem.tag)
+                        if len(open_tags) == 2:
+                            body = elem
+                        if elem.tag == TAG_P:
+                            stack.append([])
+                        elif elem.tag == TAG_FALLBACK:
+                            fallback_depth += 1
+                        continue
+
+                    open_tags.pop()
+                    tag = elem.tag
+                    if tag == TAG_FALLBACK:
+                        fallback_depth -= 1
+                    elif fallback_depth == 0 and stack:
+                        if tag == TAG_T:
+                            stack[-1].append(elem.text or '')
+                        elif tag == TAG_TAB and open_tags and open_tags[-1] == TAG_R:
+                            # Chỉ ký tự tab trong run; <w:tab> trong w:pPr/w:tabs là định nghĩa tab stop
+                            stack[-1].append('\t')
+                        elif tag in (TAG_BR, TAG_CR):
+                            stack[-1].append('\n')
+
+                    if tag == TAG_P:
+                        text = ''.join(stack.pop())
+                        if fallback_depth == 0 and text.strip():
+                            yield text
+
+                    # Giải phóng phần tử con trực tiếp của body sau khi xử lý
+                    if len(open_tags) == 2 and body is not None:
+                        body.clear()
+            except ParseError as e:
+                raise ValueError(f"Không thể phân tích {DOCUMENT_PART}: {e}")
+
+
+def extract_text_from_docx(source: Union[str, BinaryIO]) -> str:
+    """
+    Trích xuất toàn bộ văn bản từ file DOCX
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like của DOCX
+
+    Returns:
+        Văn bản đã trích xuất, mỗi đoạn một dòng
+    """
+    return "\n".join(iter_docx_paragraphs(source))
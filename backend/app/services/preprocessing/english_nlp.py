@@ -0,0 +1,46 @@
+"""
+Module xử lý NLP tiếng Anh
+Tách từ bằng regex đơn giản - nhanh hơn nhiều so với bộ tách từ tiếng Việt
+"""
+import re
+from typing import List
+from .text_normalizer import normalize_text
+
+# Từ gồm chữ cái/chữ số, giữ dạng rút gọn như "don't", "model's"
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def english_tokenize(text: str) -> List[str]:
+    """
+    Tách từ tiếng Anh bằng regex
+
+    Args:
+        text: Văn bản tiếng Anh (đã chuẩn hóa về chữ thường)
+
+    Returns:
+        Danh sách token
+
+    Ví dụ:
+        Input:  "locality sensitive hashing isn't slow"
+        Output: ["locality", "sensitive", "hashing", "isn't", "slow"]
+    """
+    if not text:
+        return []
+    return _WORD_RE.findall(text.replace('’', "'"))
+
+
+def preprocess_english(text: str) -> List[str]:
+    """
+    Quy trình tiền xử lý cho văn bản tiếng Anh
+
+    Các bước:
+    1. Chuẩn hóa văn bản (Unicode, chữ thường, khoảng trắng)
+    2. Tách từ bằng regex
+
+    Args:
+        text: Văn bản tiếng Anh gốc
+
+    Returns:
+        Danh sách các token đã được tiền xử lý
+    """
+    return english_tokenize(normalize_text(text))
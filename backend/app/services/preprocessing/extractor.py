@@ -0,0 +1,49 @@
+"""
+Module trích xuất văn bản dùng chung
+Nhận đầu vào là đường dẫn file, bytes hoặc buffer file-like để tránh ghi file tạm
+"""
+import io
+import os
+from typing import BinaryIO, Union
+
+TextSource = Union[str, bytes, BinaryIO]
+
+
+def _read_bytes(source: TextSource) -> bytes:
+    """Đọc toàn bộ nội dung nguồn dưới dạng bytes"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read()
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    return source.read()
+
+
+def extract_text(source: TextSource, filename: str) -> str:
+    """
+    Trích xuất văn bản theo phần mở rộng của tên file
+
+    - PDF  → PyMuPDF (fitz.open(stream=...) khi đầu vào là bytes)
+    - DOCX → docx_extractor (đọc zip trực tiếp từ BytesIO)
+    - Khác → giải mã UTF-8 trực tiếp
+
+    Args:
+        source: Đường dẫn file, nội dung bytes hoặc buffer nhị phân
+        filename: Tên file gốc (dùng để xác định định dạng)
+
+    Returns:
+        Văn bản đã trích xuất
+    """
+    ext = os.path.splitext(filename)[1].lower()
+
+    if ext == '.pdf':
+        from .pdf_extractor import extract_text_from_pdf
+        return extract_text_from_pdf(source)
+
+    if ext == '.docx':
+        from .docx_extractor import extract_text_from_docx
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        return extract_text_from_docx(source)
+
+    return _read_bytes(source).decode('utf-8')
@@ -11,7 +11,7 @@ except Exception:
     magic = None
 
 import fitz  # Thư viện PyMuPDF
-from typing import Dict
+from typing import Dict, Optional
 
 
 class FileValidationError(Exception):
@@ -19,6 +19,32 @@ class FileValidationError(Exception):
     pass
 
 
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """
+    Xác định loại file từ các byte đầu tiên (magic bytes)
+    
+    Args:
+        head: Chunk đầu tiên của file (vài KB là đủ)
+    
+    Returns:
+        '.pdf', '.docx', '.txt' hoặc None nếu không nhận diện được
+    """
+    if head.startswith(b'%PDF-'):
+        return '.pdf'
+    if head.startswith(b'PK\x03\x04'):
+        # DOCX là file zip; nội dung bên trong được kiểm tra khi trích xuất
+        return '.docx'
+    if b'\x00' in head:
+        return None
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Cho phép ký tự UTF-8 bị cắt dở ở cuối chunk
+        if e.start < len(head) - 3:
+            return None
+    return '.txt'
+
+
 def is_scanned_pdf(page) -> bool:
     """
     Phát hiện PDF có phải dạng scan (ảnh) hay không
@@ -0,0 +1,141 @@
+"""
+Module nhận diện ngôn ngữ
+Phân loại nhanh văn bản tiếng Việt / tiếng Anh dựa trên thống kê ký tự,
+dùng ở đầu pipeline để chọn bộ tách từ phù hợp
+"""
+import re
+import unicodedata
+from typing import List, Tuple
+
+LANG_VI = "vi"
+LANG_EN = "en"
+SUPPORTED_LANGUAGES = (LANG_VI, LANG_EN)
+DEFAULT_LANGUAGE = LANG_VI
+
+# Tỉ lệ ký tự mang dấu tiếng Việt (trên tổng số chữ cái) để coi là tiếng Việt.
+# Văn bản tiếng Việt thường có 15-30% chữ cái mang dấu, tiếng Anh gần như 0%.
+VI_DIACRITIC_RATIO = 0.03
+
+# Đoạn có ít chữ cái hơn ngưỡng này không đủ tin cậy → theo ngôn ngữ đoạn trước
+MIN_PARAGRAPH_LETTERS = 40
+
+# Hư từ phổ biến - dùng khi văn bản không có dấu
+_EN_FUNCTION_WORDS = frozenset(
+    "the of and to in is that for it as with was on are be by this an or "
+    "from which we at not have has can these their our its were been".split()
+)
+_VI_FUNCTION_WORDS = frozenset(
+    "cua va cac nhung duoc trong cho khong la mot voi nay de nguoi khi "
+    "thi da se co tu ve nhu theo tai cung".split()
+)
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n|\n")
+
+
+def _diacritic_stats(text: str) -> Tuple[int, int]:
+    """Đếm (số chữ cái, số chữ cái mang dấu tiếng Việt) trong văn bản"""
+    letters = 0
+    marked = 0
+    for ch in unicodedata.normalize('NFD', text):
+        if unicodedata.combining(ch):
+            # Dấu thanh / dấu mũ đi kèm chữ cái phía trước
+            marked += 1
+        elif ch.isalpha():
+            letters += 1
+            if ch in 'đĐ':
+                marked += 1
+    return letters, marked
+
+
+def detect_language(text: str) -> str:
+    """
+    Nhận diện ngôn ngữ của một đoạn văn bản
+
+    Thuật toán:
+    1. Tỉ lệ ký tự mang dấu tiếng Việt ≥ VI_DIACRITIC_RATIO → "vi"
+    2. Ngược lại so tần suất hư từ tiếng Anh / tiếng Việt không dấu
+    3. Không đủ dấu hiệu → DEFAULT_LANGUAGE
+
+    Args:
+        text: Văn bản cần nhận diện (gốc hoặc đã chuẩn hóa đều được)
+
+    Returns:
+        Mã ngôn ngữ: "vi" hoặc "en"
+
+    Ví dụ:
+        detect_language("Trí tuệ nhân tạo đang phát triển")  # "vi"
+        detect_language("Locality sensitive hashing is fast")  # "en"
+    """
+    if not text:
+        return DEFAULT_LANGUAGE
+
+    # Chỉ cần một mẫu đủ lớn để phân loại
+    sample = text[:5000]
+
+    letters, marked = _diacritic_stats(sample)
+    if letters == 0:
+        return DEFAULT_LANGUAGE
+    if marked / letters >= VI_DIACRITIC_RATIO:
+        return LANG_VI
+
+    words = _WORD_RE.findall(sample.lower())
+    if not words:
+        return DEFAULT_LANGUAGE
+    en_hits = sum(1 for w in words if w in _EN_FUNCTION_WORDS)
+    vi_hits = sum(1 for w in words if w in _VI_FUNCTION_WORDS)
+    if en_hits > vi_hits:
+        return LANG_EN
+    if vi_hits > en_hits:
+        return LANG_VI
+
+    # Không có hư từ nào: văn bản không dấu nhiều khả năng là tiếng Anh
+    return LANG_EN if marked == 0 and len(words) >= 5 else DEFAULT_LANGUAGE
+
+
+def split_by_language(text: str) -> List[Tuple[str, str]]:
+    """
+    Tách văn bản hỗn hợp thành các khối liên tiếp cùng ngôn ngữ (theo đoạn văn)
+
+    Các đoạn liền nhau cùng ngôn ngữ được gộp lại để giảm số lần gọi bộ tách từ.
+    Đoạn quá ngắn (tiêu đề, số trang...) đi theo ngôn ngữ của đoạn trước đó.
+
+    Args:
+        text: Văn bản gốc (còn giữ ký tự xuống dòng)
+
+    Returns:
+        Danh sách (mã ngôn ngữ, văn bản của khối)
+
+    Ví dụ:
+        split_by_language("Tóm tắt ...\\n\\nAbstract ...")
+        # [("vi", "Tóm tắt ..."), ("en", "Abstract ...")]
+    """
+    blocks: List[Tuple[str, List[str]]] = []
+    pending: List[str] = []  # Các đoạn ngắn đứng trước đoạn dài đầu tiên
+
+    for paragraph in _PARAGRAPH_SPLIT_RE.split(text):
+        if not paragraph.strip():
+            continue
+
+        letters, _ = _diacritic_stats(paragraph)
+        if letters < MIN_PARAGRAPH_LETTERS:
+            if blocks:
+                blocks[-1][1].append(paragraph)
+            else:
+                pending.append(paragraph)
+            continue
+
+        language = detect_language(paragraph)
+        if blocks and blocks[-1][0] == language:
+            blocks[-1][1].append(paragraph)
+        else:
+            blocks.append((language, pending + [paragraph]))
+            pending = []
+
+    if pending:
+        if blocks:
+            blocks[-1][1].extend(pending)
+        else:
+            blocks.append((detect_language("\n".join(pending)), pending))
+
+    return [(language, "\n".join(parts)) for language, parts in blocks]
@@ -0,0 +1,118 @@
+"""
+Module tiền xử lý đa ngôn ngữ
+Nhận diện ngôn ngữ theo từng đoạn rồi chuyển tới bộ tách từ tương ứng:
+- Tiếng Việt → underthesea (vietnamese_nlp)
+- Tiếng Anh  → regex (english_nlp), rẻ hơn nhiều
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Set, Tuple
+
+from app.services.algorithm.shingling import create_shingles
+from .english_nlp import preprocess_english
+from .language_detector import (
+    DEFAULT_LANGUAGE,
+    LANG_EN,
+    LANG_VI,
+    detect_language,
+    split_by_language,
+)
+from .vietnamese_nlp import preprocess_vietnamese
+
+_TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    LANG_VI: preprocess_vietnamese,
+    LANG_EN: preprocess_english,
+}
+
+# Namespace shingle theo ngôn ngữ. Tiếng Việt giữ namespace rỗng để
+# chữ ký MinHash của corpus đã index trước đây vẫn dùng được.
+SHINGLE_NAMESPACES: Dict[str, str] = {
+    LANG_VI: "",
+    LANG_EN: LANG_EN,
+}
+
+# Phiên bản của tokenize_text: tăng khi đổi bộ tách từ / cách chuẩn hóa làm lệch vị trí
+# token. Vị trí đoạn nguồn đã lưu (match_segments) chỉ dựng lại được với cùng phiên bản.
+TOKENIZER_VERSION = 1
+
+
+@dataclass
+class TokenizedText:
+    """Kết quả tách từ của một văn bản (có thể gồm nhiều ngôn ngữ)"""
+    tokens: List[str] = field(default_factory=list)
+    # Các khoảng token cùng ngôn ngữ: (mã ngôn ngữ, token bắt đầu, token kết thúc)
+    spans: List[Tuple[str, int, int]] = field(default_factory=list)
+
+    @property
+    def language(self) -> str:
+        """Ngôn ngữ chiếm nhiều token nhất"""
+        if not self.spans:
+            return DEFAULT_LANGUAGE
+        counts: Counter = Counter()
+        for language, start, end in self.spans:
+            counts[language] += end - start
+        return counts.most_common(1)[0][0]
+
+    @property
+    def languages(self) -> Set[str]:
+        """Tập các ngôn ngữ xuất hiện trong văn bản"""
+        return {language for language, _, _ in self.spans} or {DEFAULT_LANGUAGE}
+
+
+def tokenize_text(text: str) -> TokenizedText:
+    """
+    Tách từ văn bản, chọn bộ tách từ theo ngôn ngữ của từng đoạn
+
+    Văn bản thuần một ngôn ngữ chỉ gọi bộ tách từ một lần; luận văn song ngữ
+    (ví dụ tóm tắt tiếng Anh + nội dung tiếng Việt) được xử lý theo từng đoạn.
+
+    Args:
+        text: Văn bản gốc (nên còn giữ ký tự xuống dòng để tách đoạn)
+
+    Returns:
+        TokenizedText gồm danh sách token và các khoảng ngôn ngữ
+    """
+    result = TokenizedText()
+    if not text:
+        return result
+
+    blocks = split_by_language(text)
+    if len(blocks) <= 1:
+        language = blocks[0][0] if blocks else detect_language(text)
+        blocks = [(language, text)]
+
+    for language, block in blocks:
+        tokens = _TOKENIZERS.get(language, preprocess_vietnamese)(block)
+        if not tokens:
+            continue
+        start = len(result.tokens)
+        result.tokens.extend(tokens)
+        if result.spans and result.spans[-1][0] == language:
+            result.spans[-1] = (language, result.spans[-1][1], len(result.tokens))
+        else:
+            result.spans.append((language, start, len(result.tokens)))
+
+    return result
+
+
+def create_language_shingles(tokenized: TokenizedText, k: int = 7) -> Set[int]:
+    """
+    Tạo shingle cho từng khoảng ngôn ngữ trong namespace riêng
+
+    Shingle không vắt qua ranh giới giữa hai ngôn ngữ.
+
+    Args:
+        tokenized: Kết quả của tokenize_text
+        k: Kích thước shingle
+
+    Returns:
+        Tập các giá trị hash của shingle
+    """
+    shingles: Set[int] = set()
+    for language, start, end in tokenized.spans:
+        shingles |= create_shingles(
+            tokenized.tokens[start:end],
+            k=k,
+            namespace=SHINGLE_NAMESPACES.get(language, language),
+        )
+    return shingles
@@ -0,0 +1,255 @@
+"""
+Module cache kết quả OCR theo từng trang
+Ánh xạ hash nội dung ảnh trang đã render → văn bản OCR, lưu trên đĩa cục bộ với cơ chế LRU
+
+Các trang bìa, trang cam đoan... thường lặp lại giữa nhiều tài liệu scan hoặc khi
+nộp lại cùng một file. Cache giúp bỏ qua lần gọi Tesseract tốn kém cho những trang đó.
+
+Thư mục cache dùng chung giữa các worker (uvicorn / Celery): entry, thứ tự LRU
+(mtime) và bộ đếm hit/miss (stats.json) đều nằm trên đĩa, nên thống kê và giới
+hạn số entry áp dụng cho cả cache chứ không riêng một tiến trình. Bộ đếm hit/miss
+được gộp trong từng tiến trình và chỉ ghi vào stats.json theo đợt.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def hash_page_image(image, lang: str) -> str:
+    """
+    Tính hash chính xác (SHA-256) của ảnh trang đã render
+
+    Dùng hash chính xác thay vì perceptual hash: hai trang bìa khác nhau một
+    dòng tên sinh viên có thể trùng perceptual hash nhưng cho văn bản OCR khác nhau.
+
+    Args:
+        image: Ảnh PIL của trang
+        lang: Ngôn ngữ Tesseract (là một phần của khóa cache)
+
+    Returns:
+        Chuỗi hexdigest 64 ký tự
+    """
+    h = hashlib.sha256()
+    h.update(f"{lang}|{image.mode}|{image.size[0]}x{image.size[1]}|".encode('utf-8'))
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+class OCRCache:
+    """
+    Cache OCR dạng content-addressed lưu trên đĩa
+
+    Mỗi entry là một file `<dir>/<2 ký tự đầu>/<hash>.txt`; mtime được cập nhật
+    mỗi lần cache hit và là thứ tự LRU chung của mọi worker. Số entry của cả thư
+    mục được đếm trong stats.json; khi vượt max_entries, một worker (khóa
+    evict.lock) đọc lại danh sách entry từ đĩa theo mtime và loại bỏ các entry
+    cũ nhất xuống còn EVICT_TO * max_entries - lần quét thư mục tiếp theo chỉ
+    xảy ra sau ~10% max_entries lượt ghi mới, không phải ở mọi lượt ghi.
+    """
+
+    STATS_FILE = "stats.json"
+    _STAT_KEYS = ("hits", "misses", "stores", "evictions", "entries")
+
+    EVICT_TO = 0.9          # Mức entry còn lại sau khi dọn (tỉ lệ max_entries)
+    FLUSH_EVERY = 50        # Số lượt hit/miss gộp trong tiến trình trước khi ghi stats.json
+    FLUSH_INTERVAL = 5.0    # Hoặc sau chừng này giây kể từ lần ghi trước
+
+    def __init__(self, cache_dir: str, max_entries: int = 10000):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, None]" = OrderedDict()
+        self._stats_path = os.path.join(cache_dir, self.STATS_FILE)
+        self._pending: Dict[str, int] = {}  # bộ đếm chưa ghi vào stats.json
+        self._last_flush = time.monotonic()
+        self._load_index()
+        self._count(entries_on_disk=len(self._entries))
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def _load_index(self) -> None:
+        """Đọc danh sách entry có sẵn trên đĩa, sắp xếp theo mtime (cũ nhất trước)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        found = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.txt'):
+                    path = os.path.join(root, name)
+                    try:
+                        found.append((os.path.getmtime(path), name[:-4]))
+                    except OSError:
+                        continue
+        for _mtime, key in sorted(found):
+            self._entries[key] = None
+        logger.debug("OCR cache: %d entry tại %s", len(self._entries), self.cache_dir)
+
+    def _count(self, entries_on_disk: Optional[int] = None, **deltas: int) -> Dict[str, int]:
+        """
+        Cộng dồn bộ đếm (kèm phần đang gộp trong tiến trình) vào stats.json dùng
+        chung (khóa file giữa các tiến trình)
+
+        Args:
+            entries_on_disk: Số entry vừa đếm lại trên đĩa (ghi đè bộ đếm entries)
+
+        Returns:
+            Bộ đếm sau khi cập nhật
+        """
+        for name, value in self._pending.items():
+            deltas[name] = deltas.get(name, 0) + value
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        stats = dict.fromkeys(self._STAT_KEYS, 0)
+        try:
+            with open(f"{self._stats_path}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                stats = self._read_stats()
+                for name, value in deltas.items():
+                    stats[name] += value
+                if entries_on_disk is not None:
+                    stats["entries"] = entries_on_disk
+                tmp_path = f"{self._stats_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f)
+                os.replace(tmp_path, self._stats_path)
+        except OSError as e:
+            logger.warning("Không thể cập nhật thống kê OCR cache: %s", e)
+        return stats
+
+    def _record(self, **deltas: int) -> None:
+        """Gộp bộ đếm hit/miss trong tiến trình, ghi vào stats.json theo đợt"""
+        for name, value in deltas.items():
+            self._pending[name] = self._pending.get(name, 0) + value
+        if (sum(self._pending.values()) >= self.FLUSH_EVERY
+                or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL):
+            self._count()
+
+    def _read_stats(self) -> Dict[str, int]:
+        stats = dict.fromkeys(self._STAT_KEYS, 0)
+        try:
+            with open(self._stats_path, 'r', encoding='utf-8') as f:
+                stats.update({k: int(v) for k, v in json.load(f).items() if k in stats})
+        except (OSError, ValueError):
+            pass
+        return stats
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Lấy văn bản OCR theo khóa
+
+        Returns:
+            Văn bản đã cache, None nếu chưa có
+        """
+        with self._lock:
+            # Đọc thẳng từ đĩa: entry có thể do worker khác ghi
+            path = self._path_for(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                os.utime(path, None)
+            except OSError:
+                # Chưa có, hoặc bị xóa từ bên ngoài / bởi worker khác → miss
+                self._entries.pop(key, None)
+                self._record(misses=1)
+                return None
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            self._record(hits=1)
+            return text
+
+    def put(self, key: str, text: str) -> None:
+        """Lưu văn bản OCR và loại bỏ các entry cũ nhất nếu vượt giới hạn"""
+        with self._lock:
+            path = self._path_for(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            is_new = not os.path.exists(path)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp_path, path)  # Ghi nguyên tử, tránh entry bị đọc dở
+            except OSError as e:
+                logger.warning("Không thể ghi OCR cache %s: %s", key, e)
+                return
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            # Ghi ngay (không gộp): bộ đếm entries quyết định khi nào phải dọn
+            stats = self._count(stores=1, entries=int(is_new))
+            if stats["entries"] > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Loại bỏ các entry cũ nhất của cả thư mục xuống còn EVICT_TO * max_entries"""
+        try:
+            with open(f"{self._stats_path}.evict.lock", 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return  # Worker khác đang dọn
+                # Giới hạn áp dụng cho cả thư mục: đọc lại entry của mọi worker trước khi loại bỏ
+                self._load_index()
+                target = int(self.max_entries * self.EVICT_TO)
+                evictions = 0
+                while len(self._entries) > target:
+                    old_key, _ = self._entries.popitem(last=False)
+                    try:
+                        os.unlink(self._path_for(old_key))
+                        evictions += 1
+                    except OSError:
+                        pass  # Worker khác đã loại bỏ
+                self._count(entries_on_disk=len(self._entries), evictions=evictions)
+        except OSError as e:
+            logger.warning("Không thể dọn OCR cache: %s", e)
+
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê cache của mọi worker (dùng để định cỡ cache)
+
+        Hit/miss của worker khác có thể trễ tối đa FLUSH_EVERY lượt / FLUSH_INTERVAL giây.
+
+        Returns:
+            Dictionary gồm số entry trên đĩa, hits, misses, hit_rate, ...
+        """
+        with self._lock:
+            self._load_index()
+            stats = self._count(entries_on_disk=len(self._entries))
+            lookups = stats["hits"] + stats["misses"]
+            return {
+                "max_entries": self.max_entries,
+                **stats,
+                "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Instance toàn cục
+_ocr_cache: Optional[OCRCache] = None
+
+
+_ocr_cache_unavailable = False
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """Lấy hoặc tạo instance OCR cache (None nếu cache bị tắt hoặc không dùng được thư mục cache)"""
+    global _ocr_cache, _ocr_cache_unavailable
+    if not settings.OCR_CACHE_ENABLED or _ocr_cache_unavailable:
+        return None
+    if _ocr_cache is None:
+        try:
+            _ocr_cache = OCRCache(settings.OCR_CACHE_DIR, settings.OCR_CACHE_MAX_ENTRIES)
+        except OSError as e:
+            # OCR vẫn chạy, chỉ không có cache (ví dụ máy dev không có /app/uploads)
+            logger.warning("OCR cache không khả dụng tại %s, OCR chạy không cache: %s", settings.OCR_CACHE_DIR, e)
+            _ocr_cache_unavailable = True
+            return None
+    return _ocr_cache
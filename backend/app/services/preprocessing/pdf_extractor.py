@@ -2,18 +2,26 @@
 Module trích xuất văn bản từ PDF
 Hỗ trợ cả PDF thường và PDF dạng scan (sử dụng OCR)
 """
+import logging
 import fitz  # Thư viện PyMuPDF
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_bytes, convert_from_path
 from PIL import Image
 import signal
-from typing import Tuple
+import threading
+import time
+from typing import Tuple, Union, BinaryIO
+from app.config import settings
 from .file_validator import is_scanned_pdf
+from .ocr_cache import get_ocr_cache, hash_page_image
+
+logger = logging.getLogger(__name__)
 
 # Cấu hình OCR
 OCR_TIMEOUT_SECONDS = 300  # Timeout toàn bộ tài liệu: 5 phút
 OCR_TIMEOUT_PER_PAGE = 30  # Timeout mỗi trang: 30 giây
 MAX_PAGES_FOR_OCR = 100    # Giới hạn số trang khi dùng OCR
+OCR_LANG = 'vie+eng'       # Ngôn ngữ Tesseract (cũng là một phần của khóa OCR cache)
 
 
 def filter_header_footer(page) -> str:
@@ -41,33 +49,64 @@ def filter_header_footer(page) -> str:
     return " ".join(safe_blocks)
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def open_pdf(source: Union[str, bytes, BinaryIO]) -> "fitz.Document":
+    """
+    Mở PDF từ đường dẫn, bytes hoặc đối tượng file-like (không cần file tạm)
+    
+    Args:
+        source: Đường dẫn file, nội dung bytes hoặc buffer nhị phân
+    
+    Returns:
+        Đối tượng Document của PyMuPDF
+    """
+    if isinstance(source, str):
+        return fitz.open(source)
+    if not isinstance(source, (bytes, bytearray)):
+        source = source.read()
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def extract_text_from_pdf(source: Union[str, bytes, BinaryIO]) -> str:
     """
     Trích xuất văn bản từ PDF (có loại bỏ header/footer)
     
+    PDF dạng scan (trang đầu gần như chỉ có ảnh) được OCR qua OCR cache khi
+    settings.OCR_ENABLED; nếu OCR lỗi (thiếu Tesseract / poppler, timeout...)
+    thì trả về văn bản gốc của PDF như trước.
+    
     Args:
-        pdf_path: Đường dẫn tới file PDF
+        source: Đường dẫn tới file PDF, hoặc nội dung PDF dạng bytes/buffer
     
     Returns:
         Văn bản đã trích xuất
     """
-    doc = fitz.open(pdf_path)
-    full_text = []
-    
-    for page in doc:
-        text = filter_header_footer(page)
-        full_text.append(text)
+    if not isinstance(source, (str, bytes, bytearray)):
+        source = source.read()  # Buffer chỉ đọc được một lần, OCR cần mở lại
+    doc = open_pdf(source)
+    try:
+        full_text = [filter_header_footer(page) for page in doc]
+        scanned = settings.OCR_ENABLED and doc.page_count > 0 and is_scanned_pdf(doc[0])
+    finally:
+        doc.close()
     
-    doc.close()
+    if scanned:
+        try:
+            return ocr_pdf_with_timeout(source)
+        except Exception as e:
+            logger.warning(f"⚠️  OCR PDF scan thất bại, dùng văn bản gốc của PDF: {e}")
     return "\n".join(full_text)
 
 
-def ocr_pdf_with_timeout(pdf_path: str) -> str:
+def ocr_pdf_with_timeout(source: Union[str, bytes]) -> str:
     """
     Thực hiện OCR với cơ chế giới hạn thời gian
     
+    SIGALRM chỉ dùng được ở main thread (Celery, process pool nhập corpus);
+    trong thread khác (threadpool của FastAPI) hạn tổng được kiểm tra giữa
+    các trang, mỗi trang vẫn bị giới hạn OCR_TIMEOUT_PER_PAGE.
+    
     Args:
-        pdf_path: Đường dẫn tới PDF dạng scan
+        source: Đường dẫn tới PDF dạng scan, hoặc nội dung PDF dạng bytes
     
     Returns:
         Văn bản trích xuất bằng OCR
@@ -80,31 +119,47 @@ def ocr_pdf_with_timeout(pdf_path: str) -> str:
         raise TimeoutError("OCR vượt quá thời gian cho phép")
     
     # Thiết lập timeout
-    signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(OCR_TIMEOUT_SECONDS)
+    use_alarm = threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        signal.signal(signal.SIGALRM, timeout_handler)
+        signal.alarm(OCR_TIMEOUT_SECONDS)
+    deadline = time.monotonic() + OCR_TIMEOUT_SECONDS
     
     try:
-        images = convert_from_path(pdf_path)
+        if isinstance(source, str):
+            images = convert_from_path(source)
+        else:
+            images = convert_from_bytes(bytes(source))
         
         if len(images) > MAX_PAGES_FOR_OCR:
             raise ValueError(
                 f"PDF có {len(images)} trang, vượt quá giới hạn {MAX_PAGES_FOR_OCR}"
             )
         
+        cache = get_ocr_cache()
         full_text = []
         for i, image in enumerate(images):
-            # Timeout cho từng trang
-            text = pytesseract.image_to_string(
-                image, 
-                lang='vie+eng',
-                timeout=OCR_TIMEOUT_PER_PAGE
-            )
+            if time.monotonic() > deadline:
+                raise TimeoutError("OCR vượt quá thời gian cho phép")
+            # Tra cache theo hash ảnh trang trước khi gọi Tesseract
+            cache_key = hash_page_image(image, OCR_LANG) if cache else None
+            text = cache.get(cache_key) if cache else None
+            if text is None:
+                # Timeout cho từng trang
+                text = pytesseract.image_to_string(
+                    image, 
+                    lang=OCR_LANG,
+                    timeout=OCR_TIMEOUT_PER_PAGE
+                )
+                if cache:
+                    cache.put(cache_key, text)
             full_text.append(text)
         
         return "\n".join(full_text)
     
     finally:
-        signal.alarm(0)  # Hủy timeout
+        if use_alarm:
+            signal.alarm(0)  # Hủy timeout
 
 
 def extract_text_with_fallback(pdf_path: str) -> Tuple[str, str]:
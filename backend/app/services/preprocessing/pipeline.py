@@ -5,14 +5,14 @@ Pipeline tiền xử lý - Điểm vào chính của hệ thống
 from typing import Tuple, Dict, List
 from .file_validator import validate_pdf, FileValidationError
 from .pdf_extractor import extract_text_with_fallback
-from .vietnamese_nlp import preprocess_vietnamese
-import docx  # Thư viện python-docx
+from .multilingual import tokenize_text
+from .docx_extractor import extract_text_from_docx
 import re
 
 
 def extract_docx(file_path: str) -> str:
     """
-    Trích xuất văn bản từ file DOCX
+    Trích xuất văn bản từ file DOCX (đoạn văn, bảng, text box)
     
     Args:
         file_path: Đường dẫn tới file DOCX
@@ -20,13 +20,7 @@ def extract_docx(file_path: str) -> str:
     Returns:
         Văn bản đã trích xuất
     """
-    doc = docx.Document(file_path)
-    full_text = []
-    
-    for paragraph in doc.paragraphs:
-        full_text.append(paragraph.text)
-    
-    return "\n".join(full_text)
+    return extract_text_from_docx(file_path)
 
 
 def strip_latex_commands(text: str) -> str:
@@ -95,7 +89,7 @@ class PreprocessingPipeline:
             
         elif file_type == 'docx':
             text = extract_docx(file_path)
-            metadata["method"] = "python-docx"
+            metadata["method"] = "docx-stream"
             
         elif file_type == 'tex':
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -111,8 +105,10 @@ class PreprocessingPipeline:
         else:
             raise ValueError(f"Định dạng file không hỗ trợ: {file_type}")
         
-        # Chuẩn hóa và tokenize tiếng Việt
-        tokens = preprocess_vietnamese(text)
+        # Nhận diện ngôn ngữ theo đoạn, chuẩn hóa và tokenize
+        tokenized = tokenize_text(text)
+        tokens = tokenized.tokens
+        metadata["language"] = tokenized.language
         metadata["token_count"] = len(tokens)
         
         return tokens, metadata
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Module làm sạch wikitext
+Chuyển mã nguồn bài viết MediaWiki (từ file dump) thành văn bản thuần bằng regex,
+đủ nhanh để chạy trong process pool của ingest engine
+"""
+import re
+
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_REF_RE = re.compile(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', re.DOTALL | re.IGNORECASE)
+_BLOCK_TAG_RE = re.compile(
+    r'<(math|gallery|timeline|score|syntaxhighlight|source|pre|imagemap)[^>]*>.*?</\1>',
+    re.DOTALL | re.IGNORECASE
+)
+_TEMPLATE_RE = re.compile(r'\{\{[^{}]*\}\}')               # template trong cùng (không lồng)
+_TABLE_RE = re.compile(r'\{\|[^{}]*?\|\}', re.DOTALL)      # bảng trong cùng
+_FILE_LINK_RE = re.compile(
+    r'\[\[(?:File|Image|Tập tin|Tập_tin|Hình|Thể loại|Thể_loại|Category)\s*:[^\[\]]*\]\]',
+    re.IGNORECASE
+)
+_PIPED_LINK_RE = re.compile(r'\[\[[^\[\]|]*\|([^\[\]]*)\]\]')
+_LINK_RE = re.compile(r'\[\[([^\[\]|]*)\]\]')
+_EXTERNAL_LINK_RE = re.compile(r'\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]')
+_BOLD_ITALIC_RE = re.compile(r"'{2,5}")
+_HEADING_RE = re.compile(r'^\s*={2,}.*?={2,}\s*$', re.MULTILINE)
+_HTML_TAG_RE = re.compile(r'<[^>\n]+>')
+_LIST_PREFIX_RE = re.compile(r'^[*#:;]+\s*', re.MULTILINE)
+_MAGIC_WORD_RE = re.compile(r'__[A-ZĐ_]+__')
+_ENTITY_MAP = {'&nbsp;': ' ', '&ndash;': '–', '&mdash;': '—', '&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"'}
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n+')
+_SPACES_RE = re.compile(r'[ \t]{2,}')
+
+
+def _remove_nested(pattern: re.Pattern, text: str, max_passes: int = 10) -> str:
+    """Xóa cấu trúc lồng nhau bằng cách xóa lặp lại từ lớp trong cùng"""
+    for _ in range(max_passes):
+        text, count = pattern.subn('', text)
+        if count == 0:
+            break
+    return text
+
+
+def _strip_links(text: str, max_passes: int = 5) -> str:
+    """
+    Xử lý liên kết từ trong ra ngoài: chú thích ảnh thường chứa liên kết lồng
+    bên trong ([[Tập tin:x.jpg|nhỏ|Ảnh [[Hồ Gươm]]]])
+    """
+    for _ in range(max_passes):
+        before = text
+        text = _FILE_LINK_RE.sub('', text)
+        text = _PIPED_LINK_RE.sub(r'\1', text)
+        text = _LINK_RE.sub(r'\1', text)
+        if text == before:
+            break
+    return text
+
+
+def strip_wikitext(text: str) -> str:
+    """
+    Chuyển wikitext thành văn bản thuần
+
+    Loại bỏ: chú thích, <ref>, template {{...}}, bảng {|...|}, ảnh / thể loại,
+    tiêu đề mục, định dạng đậm/nghiêng, thẻ HTML. Liên kết [[a|b]] được giữ lại
+    phần chữ hiển thị.
+
+    Args:
+        text: Mã nguồn wikitext của bài viết
+
+    Returns:
+        Văn bản thuần, các đoạn cách nhau bởi một dòng trống
+
+    Ví dụ:
+        strip_wikitext("'''Hà Nội''' là [[thủ đô|thủ đô]] của [[Việt Nam]].{{cn}}")
+        # "Hà Nội là thủ đô của Việt Nam."
+    """
+    if not text:
+        return ""
+
+    text = _COMMENT_RE.sub('', text)
+    text = _REF_RE.sub('', text)
+    text = _BLOCK_TAG_RE.sub('', text)
+    text = _remove_nested(_TEMPLATE_RE, text)
+    text = _remove_nested(_TABLE_RE, text)
+    text = _strip_links(text)
+    text = _EXTERNAL_LINK_RE.sub(r'\1', text)
+    text = _BOLD_ITALIC_RE.sub('', text)
+    text = _HEADING_RE.sub('', text)
+    text = _HTML_TAG_RE.sub('', text)
+    text = _MAGIC_WORD_RE.sub('', text)
+    for entity, replacement in _ENTITY_MAP.items():
+        text = text.replace(entity, replacement)
+    text = _LIST_PREFIX_RE.sub('', text)
+    text = _SPACES_RE.sub(' ', text)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    return text.strip()
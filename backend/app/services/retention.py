@@ -0,0 +1,188 @@
+"""
+Dọn lịch sử kiểm tra theo lô (retention)
+
+Xóa các check_results tạo trước một mốc thời gian:
+    1. Các tháng nằm trọn trước mốc: gỡ + DROP cả phân vùng (history_partitions)
+    2. Phần còn lại, mỗi lô một transaction ngắn:
+       WITH batch AS (SELECT id ... ORDER BY created_at LIMIT n FOR UPDATE SKIP LOCKED)
+       DELETE ... RETURNING file_path
+match_details / match_segments / check_tokens đi theo (cùng phân vùng tháng, hoặc
+ON DELETE CASCADE). File gốc được gỡ khỏi MinIO bằng API xóa nhiều object (file
+cục bộ thì unlink). Giữa hai lô nghỉ RETENTION_BATCH_PAUSE giây để không tranh I/O và khóa
+với request thật; tại một thời điểm chỉ một tiến trình dọn (advisory lock).
+
+Dùng bởi task Celery cleanup_old_jobs (lịch hằng ngày + DELETE /plagiarism/history).
+"""
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from app.config import settings
+from app.services import history_partitions
+from app.services.minio_storage import get_minio_storage
+
+logger = logging.getLogger(__name__)
+
+# Khóa advisory của PostgreSQL (bigint tùy chọn, cố định) - một tiến trình dọn mỗi lúc
+PURGE_LOCK_KEY = 4_804_900_001
+
+_CUTOFF_SQL = "SELECT localtimestamp - %s * interval '1 day'"
+
+_DELETE_BATCH_SQL = """
+WITH batch AS (
+    SELECT id, created_at FROM check_results
+    WHERE created_at < %(before)s
+    ORDER BY created_at
+    LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM check_results r
+USING batch
+WHERE r.id = batch.id AND r.created_at = batch.created_at
+RETURNING r.file_path
+"""
+
+
+class PurgeInProgress(Exception):
+    """Một tiến trình khác đang dọn lịch sử"""
+
+
+@dataclass
+class PurgeStats:
+    """Kết quả một lần dọn"""
+    before: datetime
+    deleted: int = 0
+    files_deleted: int = 0
+    files_failed: int = 0
+    batches: int = 0
+    partitions_dropped: int = 0
+    finished: bool = False  # False: dừng vì hết thời gian, còn bản ghi cần xóa
+
+
+def retention_cutoff(db_engine, days: Optional[int] = None) -> Optional[datetime]:
+    """Mốc thời gian theo HISTORY_RETENTION_DAYS (giờ của PostgreSQL, như created_at); None = giữ vĩnh viễn"""
+    days = settings.HISTORY_RETENTION_DAYS if days is None else days
+    if days <= 0:
+        return None
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_CUTOFF_SQL, (days,))
+        cutoff = cur.fetchone()[0]
+        cur.close()
+        conn.commit()
+        return cutoff
+    finally:
+        conn.close()
+
+
+def remove_files(file_paths: List[str]) -> int:
+    """
+    Xóa file gốc của các kết quả đã xóa (object MinIO hoặc file cục bộ)
+
+    Returns:
+        Số file xóa thất bại
+    """
+    object_names = [path for path in file_paths if path.startswith('checks/')]
+    failed = 0
+    if object_names:
+        minio_storage = get_minio_storage()
+        if minio_storage.is_available():
+            failed += minio_storage.delete_files(object_names)
+        else:
+            logger.warning(f"⚠️  MinIO không khả dụng - bỏ lại {len(object_names)} file")
+            failed += len(object_names)
+    for path in file_paths:
+        if path.startswith('checks/'):
+            continue
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            failed += 1
+            logger.warning(f"⚠️  Không xóa được {path}: {e}")
+    return failed
+
+
+def purge_history(
+    db_engine,
+    before: datetime,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    time_budget: Optional[float] = None
+) -> PurgeStats:
+    """
+    Xóa theo lô mọi kết quả kiểm tra tạo trước `before`
+
+    Args:
+        before: Mốc thời gian (so với created_at)
+        batch_size: Số kết quả mỗi transaction (mặc định RETENTION_BATCH_SIZE)
+        pause: Nghỉ giữa hai lô, giây (mặc định RETENTION_BATCH_PAUSE)
+        time_budget: Dừng sau khoảng này (giây) kể cả khi chưa xóa hết
+
+    Raises:
+        PurgeInProgress: Tiến trình khác đang giữ khóa dọn lịch sử
+    """
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    pause = settings.RETENTION_BATCH_PAUSE if pause is None else pause
+    stats = PurgeStats(before=before)
+    started = time.monotonic()
+
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (PURGE_LOCK_KEY,))
+        locked = cur.fetchone()[0]
+        conn.commit()
+        if not locked:
+            raise PurgeInProgress("Đang có một tiến trình dọn lịch sử khác")
+        try:
+            def remove_partition_files(file_paths: List[str]) -> None:
+                failed = remove_files(file_paths)
+                stats.files_deleted += len(file_paths) - failed
+                stats.files_failed += failed
+
+            stats.partitions_dropped = history_partitions.drop_expired(db_engine, before, remove_partition_files)
+
+            while True:
+                cur.execute(_DELETE_BATCH_SQL, {"before": before, "limit": batch_size})
+                file_paths = [path for (path,) in cur.fetchall() if path]
+                deleted = cur.rowcount
+                conn.commit()
+
+                # File chỉ bị xóa sau khi bản ghi đã commit - không có bản ghi trỏ tới file mất
+                if file_paths:
+                    failed = remove_files(file_paths)
+                    stats.files_deleted += len(file_paths) - failed
+                    stats.files_failed += failed
+                stats.deleted += deleted
+                stats.batches += 1
+
+                if deleted < batch_size:
+                    stats.finished = True
+                    break
+                if time_budget is not None and time.monotonic() - started >= time_budget:
+                    break
+                if pause:
+                    time.sleep(pause)
+        finally:
+            conn.rollback()
+            cur.execute("SELECT pg_advisory_unlock(%s)", (PURGE_LOCK_KEY,))
+            conn.commit()
+        cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    logger.info(
+        f"🧹 Đã xóa {stats.deleted} kết quả kiểm tra trước {before} "
+        f"({stats.partitions_dropped} phân vùng tháng, {stats.batches} lô, "
+        f"{stats.files_deleted} file, {stats.files_failed} file lỗi)"
+    )
+    return stats
@@ -0,0 +1,120 @@
+"""
+Lưu các đoạn trùng khớp dạng vị trí token (bảng match_segments, check_tokens)
+
+Mỗi đoạn chỉ gồm 4 số nguyên - nửa khoảng [start, end) trên mảng token của
+văn bản kiểm tra và của văn bản nguồn. Nội dung đoạn được dựng lại khi cần
+giống hệt lúc kiểm tra (find_common_shingles nối token bằng dấu cách):
+    - token văn bản kiểm tra: lưu nén một lần cho mỗi lần kiểm tra (check_tokens)
+    - token văn bản nguồn: tách từ lại từ document_texts theo source_doc_id,
+      chỉ khi match được lưu với cùng TOKENIZER_VERSION (đổi bộ tách từ làm lệch vị trí)
+
+Kết quả cũ (trước migration 008) vẫn đọc từ cột match_details.matched_segments.
+"""
+import json
+import logging
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from app.services import text_store
+from app.services.preprocessing.multilingual import TOKENIZER_VERSION, tokenize_text
+
+logger = logging.getLogger(__name__)
+
+OFFSET_KEYS = ("query_start", "query_end", "source_start", "source_end")
+
+# Số tài liệu nguồn giữ mảng token trong bộ nhớ (người dùng thường lật trang
+# các đoạn của cùng một match)
+SOURCE_TOKEN_CACHE_SIZE = 16
+
+
+def segment_rows(match_id: Union[str, uuid.UUID], created_at: datetime, segments: Iterable) -> List[Dict]:
+    """
+    MatchedSegment của một match → các dòng match_segments (cho một INSERT nhiều dòng)
+
+    created_at là created_at của kết quả kiểm tra (khóa phân vùng, migration 009).
+    """
+    return [
+        {
+            "match_id": match_id,
+            "created_at": created_at,
+            "seq": seq,
+            "query_start": seg.query_start,
+            "query_end": seg.query_end,
+            "source_start": seg.source_start,
+            "source_end": seg.source_end,
+        }
+        for seq, seg in enumerate(segments or [])
+    ]
+
+
+def compress_tokens(db_engine, tokens: Sequence[str]) -> text_store.CompressedText:
+    """Mảng token của văn bản kiểm tra → dữ liệu nén cho check_tokens"""
+    data = json.dumps(list(tokens), ensure_ascii=False, separators=(",", ":"))
+    return text_store.TextCodec.active(db_engine).compress(data)
+
+
+def decode_tokens(db_engine, codec: str, dictionary_id: Optional[int], content) -> List[str]:
+    """Dòng check_tokens → mảng token"""
+    return json.loads(text_store.decompress(db_engine, codec, content, dictionary_id))
+
+
+@lru_cache(maxsize=SOURCE_TOKEN_CACHE_SIZE)
+def _source_tokens(db_engine, document_id: str) -> Optional[tuple]:
+    text = text_store.fetch_texts(db_engine, [document_id]).get(document_id)
+    return tuple(tokenize_text(text).tokens) if text else None
+
+
+def source_tokens(db_engine, document_id: Union[str, uuid.UUID, None]) -> Optional[Sequence[str]]:
+    """Mảng token của tài liệu nguồn (None nếu tài liệu đã bị xóa / không có văn bản)"""
+    if document_id is None:
+        return None
+    return _source_tokens(db_engine, str(document_id))
+
+
+def _span(tokens: Optional[Sequence[str]], start: int, end: int) -> Optional[str]:
+    if tokens is None:
+        return None
+    return " ".join(tokens[start:end])
+
+
+def with_texts(
+    db_engine,
+    segments: List[Dict],
+    query_tokens: Optional[Sequence[str]],
+    source_document_id: Union[str, uuid.UUID, None],
+    tokenizer_version: Optional[int] = None
+) -> List[Dict]:
+    """
+    Thêm query_text / source_text vào các đoạn (dict chứa OFFSET_KEYS)
+
+    Phía nào không còn token (kết quả lưu khi thiếu check_tokens, tài liệu
+    nguồn đã bị xóa, match lưu với phiên bản bộ tách từ khác) thì nội dung
+    tương ứng là None.
+
+    Args:
+        tokenizer_version: match_details.tokenizer_version của match
+    """
+    if not segments:
+        return segments
+    source = None
+    if tokenizer_version != TOKENIZER_VERSION:
+        # Tách từ lại bằng bộ tách từ hiện tại sẽ trả về sai đoạn
+        logger.info(
+            f"ℹ️  Match lưu với bộ tách từ phiên bản {tokenizer_version} "
+            f"(hiện tại {TOKENIZER_VERSION}) - không dựng lại nội dung nguồn"
+        )
+    else:
+        try:
+            source = source_tokens(db_engine, source_document_id)
+        except Exception as e:
+            logger.warning(f"⚠️  Không đọc được văn bản nguồn {source_document_id}: {e}")
+    return [
+        {
+            **seg,
+            "query_text": _span(query_tokens, seg["query_start"], seg["query_end"]),
+            "source_text": _span(source, seg["source_start"], seg["source_end"]),
+        }
+        for seg in segments
+    ]
@@ -0,0 +1,219 @@
+"""
+Lưu chữ ký MinHash của tài liệu corpus trong PostgreSQL (bảng document_signatures)
+
+Redis chỉ giữ bản sao phục vụ truy vấn. Chữ ký được ghi vào PostgreSQL cùng
+transaction với tài liệu nên khi Redis mất dữ liệu (hoặc rebuild với cùng
+tham số ký) chỉ mục được nạp lại bằng một lần đọc tuần tự, không phải tách từ
++ ký lại toàn bộ văn bản.
+
+Định dạng:
+    scheme     → IndexParams.signature_scheme, ví dụ "k7p128"
+    signature  → num_perm giá trị uint32 little-endian; hashvalue của datasketch
+                 luôn ≤ 2^32 - 1 nên lưu 4 byte thay vì 8 không mất thông tin
+"""
+import csv
+import io
+import logging
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.services import corpus_store, text_store
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_DTYPE = np.dtype("<u4")
+_MAX_HASHVALUE = np.iinfo(np.uint32).max
+
+STAGING_TABLE = "signature_staging"
+
+_CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    document_id UUID,
+    scheme VARCHAR(32),
+    language VARCHAR(10),
+    shingle_count INTEGER,
+    signature BYTEA
+) ON COMMIT DELETE ROWS
+"""
+
+_UPSERT_SQL = f"""
+INSERT INTO document_signatures (document_id, scheme, language, shingle_count, signature)
+SELECT document_id, scheme, language, shingle_count, signature FROM {STAGING_TABLE}
+ON CONFLICT (document_id, scheme) DO UPDATE SET
+    language = EXCLUDED.language,
+    shingle_count = EXCLUDED.shingle_count,
+    signature = EXCLUDED.signature,
+    created_at = CURRENT_TIMESTAMP
+"""
+
+_SELECT_CORPUS_SQL = """
+SELECT d.corpus_row, s.document_id, s.language, s.signature, d.title, d.author, d.university, d.year
+FROM document_signatures s
+JOIN documents d ON d.id = s.document_id
+WHERE s.scheme = %s AND d.is_corpus = 1 AND d.canonical_id IS NULL AND d.corpus_row IS NOT NULL
+"""
+
+_COUNT_CORPUS_SQL = f"""
+SELECT COUNT(*) FILTER (WHERE s.document_id IS NOT NULL), COUNT(*)
+FROM documents d
+LEFT JOIN document_signatures s ON s.document_id = d.id AND s.scheme = %s
+{text_store.TEXT_JOIN_SQL}
+WHERE d.is_corpus = 1 AND d.canonical_id IS NULL AND {text_store.HAS_TEXT_SQL}
+"""
+
+# (document_id, scheme, language, shingle_count, hashvalues)
+SignatureRow = Tuple[Union[str, uuid.UUID], str, Optional[str], int, Sequence[int]]
+
+
+def encode_signature(hashvalues: Union[Sequence[int], np.ndarray]) -> bytes:
+    """Mảng hashvalue → bytea (uint32 little-endian)"""
+    values = np.asarray(hashvalues, dtype=np.uint64)
+    if values.size and int(values.max()) > _MAX_HASHVALUE:
+        raise ValueError("Hashvalue vượt quá 32 bit - không phải chữ ký MinHash của datasketch")
+    return values.astype(SIGNATURE_DTYPE).tobytes()
+
+
+def decode_signature(data: Union[bytes, memoryview]) -> np.ndarray:
+    """bytea → mảng hashvalue uint64 (dạng MinHash.hashvalues)"""
+    return np.frombuffer(data, dtype=SIGNATURE_DTYPE).astype(np.uint64)
+
+
+def _to_csv(rows: Iterable[SignatureRow]) -> Tuple[io.StringIO, int]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for document_id, scheme, language, shingle_count, hashvalues in rows:
+        # bytea dạng hex (\x...) - COPY csv không cần escape thêm
+        writer.writerow((str(document_id), scheme, language, shingle_count,
+                         "\\x" + encode_signature(hashvalues).hex()))
+        count += 1
+    buffer.seek(0)
+    return buffer, count
+
+
+def copy_signatures(cur, rows: Iterable[SignatureRow]) -> int:
+    """
+    Ghi chữ ký bằng COPY vào bảng tạm rồi upsert sang document_signatures
+
+    Chạy trong transaction của cursor được truyền vào (người gọi commit).
+
+    Returns:
+        Số chữ ký đã ghi
+    """
+    buffer, count = _to_csv(rows)
+    if not count:
+        return 0
+    cur.execute(_CREATE_STAGING_SQL)
+    cur.copy_expert(
+        f"COPY {STAGING_TABLE} (document_id, scheme, language, shingle_count, signature) "
+        f"FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    cur.execute(_UPSERT_SQL)
+    return count
+
+
+def store_signatures(db_engine, rows: Iterable[SignatureRow]) -> int:
+    """copy_signatures trong một transaction riêng"""
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        written = copy_signatures(cur, rows)
+        cur.close()
+        conn.commit()
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def count_signatures(db_engine, scheme: str) -> Tuple[int, int]:
+    """
+    Returns:
+        (số tài liệu đại diện đã có chữ ký theo scheme, tổng số tài liệu đại diện)
+    """
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_COUNT_CORPUS_SQL, (scheme,))
+        stored, total = cur.fetchone()
+        cur.close()
+        conn.commit()
+        return stored, total
+    finally:
+        conn.close()
+
+
+def iter_signatures(
+    db_engine,
+    scheme: str,
+    batch_size: int = corpus_store.REDIS_PIPELINE_SIZE
+) -> Iterator[List[Tuple[int, np.ndarray, Dict]]]:
+    """
+    Đọc dần chữ ký của các tài liệu đại diện bằng server-side cursor, theo lô
+
+    Yields:
+        Danh sách (corpus_row, hashvalues, metadata) - cùng dạng với
+        corpus_store.write_documents
+    """
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor(name="signature_store_scan")
+        cur.itersize = batch_size
+        cur.execute(_SELECT_CORPUS_SQL, (scheme,))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [
+                (
+                    corpus_row,
+                    decode_signature(signature),
+                    {
+                        "title": title,
+                        "author": author,
+                        "university": university,
+                        "year": year,
+                        "language": language,
+                        "pg_id": str(pg_id),
+                    },
+                )
+                for corpus_row, pg_id, language, signature, title, author, university, year in rows
+            ]
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def restore_index(
+    redis_client,
+    index,
+    db_engine=None,
+    batch_size: int = corpus_store.REDIS_PIPELINE_SIZE,
+    publish: bool = True
+) -> int:
+    """
+    Nạp lại chữ ký của một phiên bản chỉ mục từ PostgreSQL vào Redis
+
+    Args:
+        index: IndexVersion cần nạp (chữ ký đọc theo scheme của tham số phiên bản)
+        publish: Phát sự kiện add để các PlagiarismChecker đang chạy nạp vào LSH
+
+    Returns:
+        Số tài liệu đã ghi
+    """
+    if db_engine is None:
+        from app.db.database import engine as db_engine
+    scheme = index.params.signature_scheme
+    written = 0
+    for documents in iter_signatures(db_engine, scheme, batch_size):
+        written += corpus_store.write_documents(
+            redis_client, documents, version=index.version, publish=publish
+        )
+        logger.info(f"📥 Đã nạp {written} chữ ký {scheme} vào chỉ mục v{index.version}")
+    return written
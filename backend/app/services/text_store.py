@@ -0,0 +1,278 @@
+"""
+Lưu văn bản đã trích xuất của tài liệu dạng nén (bảng document_texts)
+
+Văn bản không còn nằm trên bảng documents: truy vấn metadata (đếm, lọc,
+ORM load cả dòng) không kéo theo hàng MB văn bản, và văn bản nén zstd với
+dictionary huấn luyện trên chính corpus (tiếng Việt lặp nhiều âm tiết / cụm từ)
+nhỏ hơn nhiều lần so với TEXT không nén.
+
+Định dạng:
+    codec          → "zstd" (có thể kèm dictionary_id) hoặc "zlib" khi chưa cài zstandard
+    dictionary_id  → text_dictionaries.id - dictionary không bao giờ bị sửa, chỉ thêm mới
+    content        → dữ liệu nén
+    raw_size       → số byte UTF-8 trước khi nén
+
+Tài liệu cũ chưa chuyển (scripts/migrate_document_texts.py) vẫn đọc được từ
+cột documents.extracted_text.
+"""
+import csv
+import io
+import logging
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+
+# Dictionary đang dùng để nén được đọc lại sau khoảng này (giây)
+ACTIVE_CODEC_TTL = 300
+
+STAGING_TABLE = "text_staging"
+
+_CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    document_id UUID,
+    codec VARCHAR(16),
+    dictionary_id INTEGER,
+    raw_size INTEGER,
+    content BYTEA
+) ON COMMIT DELETE ROWS
+"""
+
+_UPSERT_SQL = f"""
+INSERT INTO document_texts (document_id, codec, dictionary_id, raw_size, content)
+SELECT document_id, codec, dictionary_id, raw_size, content FROM {STAGING_TABLE}
+ON CONFLICT (document_id) DO UPDATE SET
+    codec = EXCLUDED.codec,
+    dictionary_id = EXCLUDED.dictionary_id,
+    raw_size = EXCLUDED.raw_size,
+    content = EXCLUDED.content
+"""
+
+# Dùng trong truy vấn SQL thô trên `documents d`: 4 cột cuối truyền cho decode_columns()
+TEXT_JOIN_SQL = "LEFT JOIN document_texts t ON t.document_id = d.id"
+TEXT_COLUMNS_SQL = "t.codec, t.dictionary_id, t.content, d.extracted_text"
+HAS_TEXT_SQL = "(t.document_id IS NOT NULL OR d.extracted_text IS NOT NULL)"
+
+_FETCH_SQL = f"""
+SELECT d.id, {TEXT_COLUMNS_SQL}
+FROM documents d
+{TEXT_JOIN_SQL}
+WHERE d.id = ANY(%s::uuid[])
+"""
+
+_dictionaries: Dict[int, bytes] = {}
+_dict_data: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+_active: Optional[Tuple[float, "TextCodec"]] = None
+_lock = threading.Lock()
+
+
+@dataclass
+class CompressedText:
+    """Một văn bản đã nén, sẵn sàng ghi vào document_texts"""
+    codec: str
+    dictionary_id: Optional[int]
+    raw_size: int
+    content: bytes
+
+
+def _query_one(db_engine, sql: str, params=()) -> Optional[tuple]:
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        row = cur.fetchone()
+        cur.close()
+        conn.commit()
+        return row
+    finally:
+        conn.close()
+
+
+def load_dictionary(db_engine, dictionary_id: int) -> bytes:
+    """Nội dung một dictionary zstd (cache trong process - dictionary không đổi sau khi tạo)"""
+    data = _dictionaries.get(dictionary_id)
+    if data is None:
+        row = _query_one(db_engine, "SELECT content FROM text_dictionaries WHERE id = %s", (dictionary_id,))
+        if row is None:
+            raise LookupError(f"Không tìm thấy dictionary nén văn bản {dictionary_id}")
+        data = _dictionaries[dictionary_id] = bytes(row[0])
+    return data
+
+
+class TextCodec:
+    """
+    Bộ nén văn bản: zstd (kèm dictionary nếu có) hoặc zlib khi chưa cài zstandard
+
+    Đối tượng ZstdCompressor không thread-safe nên mỗi lần nén tạo compressor
+    mới (rẻ so với việc nén); dictionary đã được phân tích sẵn một lần.
+
+    Ví dụ:
+        codec = TextCodec.active(engine)
+        compressed = codec.compress(text)
+    """
+
+    def __init__(self, dictionary_id: Optional[int] = None, dictionary: Optional[bytes] = None, level: int = None):
+        self.level = level or settings.TEXT_COMPRESSION_LEVEL
+        self.dictionary_id = dictionary_id if ZSTD_AVAILABLE and dictionary else None
+        self._dict_data = None
+        if self.dictionary_id is not None:
+            self._dict_data = zstandard.ZstdCompressionDict(dictionary)
+            self._dict_data.precompute_compress(level=self.level)
+
+    @classmethod
+    def active(cls, db_engine) -> "TextCodec":
+        """Bộ nén với dictionary mới nhất (cache ACTIVE_CODEC_TTL giây)"""
+        global _active
+        with _lock:
+            if _active is not None and time.time() - _active[0] < ACTIVE_CODEC_TTL:
+                return _active[1]
+            codec = cls()
+            if ZSTD_AVAILABLE:
+                try:
+                    row = _query_one(db_engine, "SELECT id FROM text_dictionaries ORDER BY id DESC LIMIT 1")
+                    if row is not None:
+                        codec = cls(row[0], load_dictionary(db_engine, row[0]))
+                except Exception as e:
+                    logger.warning(f"⚠️  Không đọc được dictionary nén văn bản, nén không dictionary: {e}")
+            _active = (time.time(), codec)
+            return codec
+
+    def compress(self, text: str) -> CompressedText:
+        raw = text.encode("utf-8")
+        if not ZSTD_AVAILABLE:
+            return CompressedText(CODEC_ZLIB, None, len(raw), zlib.compress(raw, min(self.level, 9)))
+        compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._dict_data)
+        return CompressedText(CODEC_ZSTD, self.dictionary_id, len(raw), compressor.compress(raw))
+
+
+def decompress(db_engine, codec: str, content: Union[bytes, memoryview], dictionary_id: Optional[int] = None) -> str:
+    """Giải nén một văn bản đọc từ document_texts"""
+    content = bytes(content)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(content).decode("utf-8")
+    if codec != CODEC_ZSTD:
+        raise ValueError(f"Codec văn bản không hỗ trợ: {codec}")
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("Văn bản được nén bằng zstd - cần cài thư viện zstandard")
+    dict_data = None
+    if dictionary_id is not None:
+        dict_data = _dict_data.get(dictionary_id)
+        if dict_data is None:
+            dict_data = _dict_data[dictionary_id] = zstandard.ZstdCompressionDict(
+                load_dictionary(db_engine, dictionary_id)
+            )
+    return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(content).decode("utf-8")
+
+
+def decode_columns(db_engine, codec, dictionary_id, content, legacy_text) -> Optional[str]:
+    """Văn bản từ 4 cột TEXT_COLUMNS_SQL (document_texts hoặc cột cũ documents.extracted_text)"""
+    if content is not None:
+        return decompress(db_engine, codec, content, dictionary_id)
+    return legacy_text
+
+
+def fetch_texts(db_engine, document_ids: Iterable[Union[str, uuid.UUID]]) -> Dict[str, str]:
+    """
+    Đọc và giải nén văn bản của nhiều tài liệu trong một truy vấn
+
+    Returns:
+        {UUID dạng chuỗi: văn bản} - tài liệu không có văn bản sẽ vắng mặt
+    """
+    ids = [str(document_id) for document_id in document_ids]
+    if not ids:
+        return {}
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_FETCH_SQL, (ids,))
+        rows = cur.fetchall()
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+    texts = {}
+    for document_id, *columns in rows:
+        text = decode_columns(db_engine, *columns)
+        if text is not None:
+            texts[str(document_id)] = text
+    return texts
+
+
+def copy_texts(cur, rows: Iterable[Tuple[Union[str, uuid.UUID], CompressedText]]) -> int:
+    """
+    Ghi văn bản đã nén bằng COPY vào bảng tạm rồi upsert sang document_texts
+
+    Chạy trong transaction của cursor được truyền vào (người gọi commit).
+
+    Returns:
+        Số văn bản đã ghi
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for document_id, compressed in rows:
+        writer.writerow((
+            str(document_id),
+            compressed.codec,
+            compressed.dictionary_id,
+            compressed.raw_size,
+            "\\x" + compressed.content.hex(),
+        ))
+        count += 1
+    if not count:
+        return 0
+    buffer.seek(0)
+    cur.execute(_CREATE_STAGING_SQL)
+    cur.copy_expert(
+        f"COPY {STAGING_TABLE} (document_id, codec, dictionary_id, raw_size, content) "
+        f"FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    cur.execute(_UPSERT_SQL)
+    return count
+
+
+def train_dictionary(samples: List[str], dict_size: int = None) -> bytes:
+    """Huấn luyện dictionary zstd từ các văn bản mẫu (cần zstandard)"""
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("Huấn luyện dictionary cần thư viện zstandard")
+    dict_size = dict_size or settings.TEXT_DICTIONARY_SIZE
+    dictionary = zstandard.train_dictionary(dict_size, [sample.encode("utf-8") for sample in samples])
+    return dictionary.as_bytes()
+
+
+def save_dictionary(db_engine, dictionary: bytes, sample_count: int) -> int:
+    """Lưu dictionary mới; từ lần đọc TextCodec.active() kế tiếp, văn bản mới được nén bằng nó"""
+    global _active
+    conn = db_engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO text_dictionaries (content, sample_count) VALUES (%s, %s) RETURNING id",
+            (dictionary, sample_count)
+        )
+        dictionary_id = cur.fetchone()[0]
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+    _dictionaries[dictionary_id] = dictionary
+    with _lock:
+        _active = None
+    return dictionary_id
@@ -0,0 +1,127 @@
+"""
+Dịch vụ tiếp nhận file upload dạng streaming
+Đọc file theo từng chunk: tính SHA-256 tăng dần, giới hạn kích thước ngay khi vượt,
+nhận diện loại file từ chunk đầu tiên và chỉ ghi ra file tạm khi file lớn
+"""
+import hashlib
+import io
+import os
+import tempfile
+from typing import BinaryIO, List, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.services.preprocessing.file_validator import sniff_file_type
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB mỗi lần đọc
+
+
+class SpooledUpload:
+    """
+    File upload đã được tiếp nhận xong
+
+    File nhỏ (≤ UPLOAD_SPOOL_MEMORY_BYTES) được giữ trong bộ nhớ, file lớn hơn
+    được ghi ra file tạm. `open()` trả về một reader độc lập mỗi lần gọi để
+    phân tích và lưu trữ có thể đọc song song.
+    """
+
+    def __init__(self, size: int, sha256: str, file_type: str,
+                 data: Optional[bytes] = None, path: Optional[str] = None):
+        self.size = size
+        self.sha256 = sha256
+        self.file_type = file_type
+        self._data = data
+        self.path = path
+
+    def open(self) -> BinaryIO:
+        """Mở một reader mới, đọc từ đầu file"""
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        return open(self.path, 'rb')
+
+    def close(self) -> None:
+        """Giải phóng bộ nhớ / xóa file tạm"""
+        self._data = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.path = None
+
+
+async def spool_upload(
+    file: UploadFile,
+    expected_ext: str,
+    max_size: Optional[int] = None
+) -> SpooledUpload:
+    """
+    Đọc file upload theo chunk và kiểm tra ngay trong lúc đọc
+
+    Args:
+        file: File upload từ FastAPI
+        expected_ext: Phần mở rộng khai báo ('.pdf', '.docx', '.txt')
+        max_size: Kích thước tối đa (mặc định settings.MAX_UPLOAD_SIZE)
+
+    Returns:
+        SpooledUpload chứa nội dung, kích thước và SHA-256
+
+    Raises:
+        HTTPException 413: Nếu file vượt quá giới hạn (dừng đọc ngay lập tức)
+        HTTPException 400: Nếu file rỗng hoặc nội dung không khớp phần mở rộng
+    """
+    max_size = max_size or settings.MAX_UPLOAD_SIZE
+    memory_limit = settings.UPLOAD_SPOOL_MEMORY_BYTES
+
+    hasher = hashlib.sha256()
+    chunks: List[bytes] = []
+    spool_file = None
+    size = 0
+    file_type = None
+
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            if file_type is None:
+                file_type = sniff_file_type(chunk)
+                if file_type != expected_ext:
+                    raise HTTPException(
+                        400,
+                        detail=f"Nội dung file không khớp định dạng {expected_ext}"
+                    )
+
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(
+                    413,
+                    detail=f"File vượt quá giới hạn {max_size // (1024 * 1024)}MB"
+                )
+
+            hasher.update(chunk)
+
+            if spool_file is None and size > memory_limit:
+                # Chuyển sang file tạm khi vượt ngưỡng bộ nhớ
+                spool_file = tempfile.NamedTemporaryFile(delete=False, suffix=expected_ext)
+                for buffered in chunks:
+                    spool_file.write(buffered)
+                chunks = []
+
+            if spool_file is not None:
+                spool_file.write(chunk)
+            else:
+                chunks.append(chunk)
+    except BaseException:
+        if spool_file is not None:
+            spool_file.close()
+            os.unlink(spool_file.name)
+        raise
+
+    if size == 0:
+        raise HTTPException(400, detail="File rỗng")
+
+    if spool_file is not None:
+        spool_file.close()
+        return SpooledUpload(size, hasher.hexdigest(), file_type, path=spool_file.name)
+
+    return SpooledUpload(size, hasher.hexdigest(), file_type, data=b"".join(chunks))
@@ -2,6 +2,7 @@
 Cấu hình ứng dụng Celery (xử lý tác vụ nền bất đồng bộ)
 """
 from celery import Celery
+from celery.schedules import crontab
 from app.config import settings
 
 # Khởi tạo ứng dụng Celery
@@ -25,6 +26,18 @@ app.conf.update(
     
     worker_prefetch_multiplier=1,        # Mỗi worker xử lý 1 task tại một thời điểm
     worker_max_tasks_per_child=100,      # Restart worker sau 100 task (tránh memory leak)
+    
+    # Tác vụ định kỳ (chạy worker kèm beat: celery -A app.workers.celery_app worker -B)
+    beat_schedule={
+        'purge-expired-history': {
+            'task': 'app.workers.tasks.cleanup_old_jobs',
+            'schedule': crontab(hour=settings.HISTORY_RETENTION_HOUR, minute=0),
+        },
+        'create-history-partitions': {
+            'task': 'app.workers.tasks.create_history_partitions',
+            'schedule': crontab(hour=settings.HISTORY_RETENTION_HOUR, minute=30),
+        },
+    },
 )
 
 # Tự động phát hiện các task trong module workers
@@ -7,10 +7,11 @@ from app.workers.celery_app import app
 from app.db.database import SessionLocal
 from app.services.document_service import DocumentService
 from app.services.plagiarism_checker import PlagiarismChecker
-from app.api.deps import get_minio_storage
-import tempfile
-import os
+from app.services.minio_storage import get_minio_storage
+from app.services import segment_store
+from sqlalchemy import func, insert
 from datetime import datetime, timedelta
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,8 +33,20 @@ class PermanentError(Exception):
 
 from redis import Redis
 import uuid
-import json
-from app.core.config import settings
+from app.config import settings
+
+# Checker dùng chung trong mỗi process worker: nạp corpus một lần rồi được
+# luồng thay đổi corpus giữ đồng bộ (tạo lười trong process con sau khi fork)
+_checker = None
+
+
+def get_worker_checker() -> PlagiarismChecker:
+    global _checker
+    if _checker is None:
+        redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        _checker = PlagiarismChecker(redis_client=redis_client)
+    return _checker
+
 
 @app.task(bind=True, max_retries=MAX_RETRIES)
 def process_document(self: Task, job_id: str, doc_id: str, file_type: str):
@@ -57,20 +70,17 @@ def process_document(self: Task, job_id: str, doc_id: str, file_type: str):
         db.commit()
 
         # 2. Setup Services
-        redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
-        checker = PlagiarismChecker(redis_client=redis_client)
+        checker = get_worker_checker()
         storage = get_minio_storage()
 
-        # 3. Download and Extract
+        # 3. Download and Extract (in memory, no temp file)
         try:
             object_name = result.file_path # Using relative path stored in upload
-            tmp_suffix = os.path.splitext(doc.original_filename or '')[1] or file_type
-            with tempfile.NamedTemporaryFile(delete=False, suffix=tmp_suffix) as tmp:
-                tmp_path = tmp.name
-            
-            storage.download_file(object_name) # MinIOStorage logic - though internal extraction is preferred
-            # Using checker's internal extraction logic
-            text = checker._extract_text(tmp_path, doc.original_filename)
+            file_data = storage.download_file(object_name)
+            if file_data is None:
+                raise FileNotFoundError(f"Object not found in MinIO: {object_name}")
+            filename = doc.original_filename or f"document{file_type}"
+            text = checker._extract_text(file_data, filename)
         except Exception as e:
             logger.error(f"❌ Extraction error: {e}")
             result.status = 'failed'
@@ -80,7 +90,7 @@ def process_document(self: Task, job_id: str, doc_id: str, file_type: str):
 
         # 4. Perform Plagiarism Check
         start_time = datetime.now()
-        check_result = checker.check_against_corpus(tmp_path, doc.original_filename)
+        check_result = checker.check_text(text)
         end_time = datetime.now()
         
         duration_ms = int((end_time - start_time).total_seconds() * 1000)
@@ -97,51 +107,64 @@ def process_document(self: Task, job_id: str, doc_id: str, file_type: str):
         result.word_count = check_result.word_count
         result.processing_time_ms = duration_ms
         result.status = 'done'
-        result.completed_at = datetime.now()
+        # DB clock, same as created_at's server default (retention keys on created_at)
+        result.completed_at = func.localtimestamp()
 
-        # 7. Save Match Details
-        # Clear any existing (shouldn't be any for new job)
-        db.query(models.MatchDetail).filter(models.MatchDetail.result_id == result.id).delete()
-        
+        # 7. Save Match Details + segment offsets (one multi-row INSERT per table)
+        # Clear any existing (shouldn't be any for new job; segments cascade).
+        # Child rows carry the result's created_at: same monthly partition (migration 009)
+        db.query(models.MatchDetail).filter(
+            models.MatchDetail.result_id == result.id, models.MatchDetail.created_at == result.created_at
+        ).delete()
+        db.query(models.CheckTokens).filter(
+            models.CheckTokens.result_id == result.id, models.CheckTokens.created_at == result.created_at
+        ).delete()
+
+        # Source docs by primary key, one query (the checker resolves corpus_row → UUID)
+        source_ids = [uuid.UUID(m.pg_id) for m in check_result.matches if m.pg_id]
+        source_docs = {
+            doc.id: doc for doc in
+            db.query(models.Document).filter(models.Document.id.in_(source_ids)).all()
+        } if source_ids else {}
+
+        match_rows = []
+        segment_rows = []
         for m in check_result.matches:
-            # Re-fetch source doc by UUID if possible (checker uses doc_id prefix)
-            # Find complete doc in DB
-            source_doc = db.query(models.Document).filter(
-                models.Document.is_corpus == 1
-            ).filter(
-                db.cast(models.Document.id, db.String).like(f"{m.doc_id}%")
-            ).first()
-
-            detail = models.MatchDetail(
-                result_id=result.id,
-                source_doc_id=source_doc.id if source_doc else None,
-                similarity_score=m.similarity,
-                source_title=m.title or (source_doc.title if source_doc else "Unknown"),
-                source_author=m.author or (source_doc.author if source_doc else "Unknown"),
-                source_university=m.university or (source_doc.university if source_doc else "Unknown"),
-                source_year=m.year or (source_doc.year if source_doc else None),
-                matched_segments=json.dumps([
-                    {
-                        "query_text": seg.query_text,
-                        "query_start": seg.query_start,
-                        "query_end": seg.query_end,
-                        "source_text": seg.source_text,
-                        "source_start": seg.source_start,
-                        "source_end": seg.source_end
-                    } for seg in (m.matched_segments or [])
-                ])
-            )
-            db.add(detail)
+            source_doc = source_docs.get(uuid.UUID(m.pg_id)) if m.pg_id else None
+            match_id = uuid.uuid4()
+            match_rows.append({
+                "id": match_id,
+                "result_id": result.id,
+                "created_at": result.created_at,
+                "source_doc_id": source_doc.id if source_doc else None,
+                "similarity_score": m.similarity,
+                "source_title": m.title or (source_doc.title if source_doc else "Unknown"),
+                "source_author": m.author or (source_doc.author if source_doc else "Unknown"),
+                "source_university": m.university or (source_doc.university if source_doc else "Unknown"),
+                "source_year": m.year or (source_doc.year if source_doc else None),
+                "tokenizer_version": segment_store.TOKENIZER_VERSION,
+            })
+            segment_rows.extend(segment_store.segment_rows(match_id, result.created_at, m.matched_segments))
+
+        if match_rows:
+            db.execute(insert(models.MatchDetail), match_rows)
+        if segment_rows:
+            db.execute(insert(models.MatchSegment), segment_rows)
+            if check_result.query_tokens:
+                # Segment text is rebuilt from these tokens, not copied per segment
+                tokens = segment_store.compress_tokens(db.get_bind(), check_result.query_tokens)
+                db.add(models.CheckTokens(
+                    result_id=result.id,
+                    created_at=result.created_at,
+                    codec=tokens.codec,
+                    dictionary_id=tokens.dictionary_id,
+                    raw_size=tokens.raw_size,
+                    content=tokens.content
+                ))
 
         db.commit()
         logger.info(f"✅ Job {job_id} done. matches={len(check_result.matches)}")
 
-        # Cleanup
-        try:
-            os.unlink(tmp_path)
-        except:
-            pass
-
         return {"job_id": job_id, "status": "done", "matches": len(check_result.matches)}
 
     except Exception as e:
@@ -164,17 +187,93 @@ def process_document(self: Task, job_id: str, doc_id: str, file_type: str):
         db.close()
 
 
+# Dựng lại chỉ mục có thể lâu hơn giới hạn chung 1 giờ của task
+REBUILD_TIME_LIMIT = 12 * 3600
+
+
+@app.task(bind=True, time_limit=REBUILD_TIME_LIMIT, soft_time_limit=REBUILD_TIME_LIMIT - 300)
+def rebuild_index(self: Task, shingle_size: int, num_perm: int, lsh_threshold: float, resign: bool = False):
+    """
+    Dựng lại chỉ mục corpus với tham số mới (blue/green, xem services/ingest/rebuild.py)
+
+    resign=True ký lại mọi tài liệu thay vì dùng chữ ký đã lưu (đổi bộ tách từ / chuẩn hóa).
+
+    Tiến độ được ghi vào manifest của phiên bản trong Redis và đọc qua
+    GET /admin/index/rebuild.
+    """
+    from app.services import corpus_store
+    from app.services.index_versions import IndexParams
+    from app.services.ingest import IndexRebuilder, RebuildInProgress
+
+    params = IndexParams(shingle_size=shingle_size, num_perm=num_perm, lsh_threshold=lsh_threshold)
+    redis_client = corpus_store.connect_redis()
+    if redis_client is None:
+        raise PermanentError("Redis không khả dụng")
+
+    # Worker prefork là process daemon - không tạo được process pool con
+    rebuilder = IndexRebuilder(redis_client, params, workers=0, resign=resign)
+    try:
+        index = rebuilder.run()
+    except RebuildInProgress as e:
+        logger.warning(f"⚠️  {e}")
+        return {"status": "skipped", "error": str(e)}
+    return {"status": "done", "version": index.version, "params": params.to_mapping()}
+
+
+# Mỗi lần chạy dừng trước giới hạn mềm của task; phần còn lại được xếp lịch tiếp
+PURGE_TIME_BUDGET = 3000
+
+
+@app.task(bind=True, max_retries=MAX_RETRIES)
+def cleanup_old_jobs(self: Task, before: Optional[str] = None):
+    """
+    Dọn lịch sử kiểm tra theo lô (xem services/retention.py)
+
+    - Theo lịch (Celery beat): xóa kết quả cũ hơn HISTORY_RETENTION_DAYS
+    - DELETE /plagiarism/history: xóa mọi kết quả tạo trước `before` (ISO)
+
+    Bản ghi, match_details / match_segments và file gốc trên MinIO được xóa
+    theo lô nhỏ, nghỉ giữa các lô để không ảnh hưởng request thật.
+    """
+    from app.db.database import engine
+    from app.services import retention
+
+    cutoff = datetime.fromisoformat(before) if before else retention.retention_cutoff(engine)
+    if cutoff is None:
+        logger.info("Retention disabled (HISTORY_RETENTION_DAYS = 0)")
+        return {"status": "skipped"}
+
+    try:
+        stats = retention.purge_history(engine, cutoff, time_budget=PURGE_TIME_BUDGET)
+    except retention.PurgeInProgress as e:
+        # Lần dọn khác đang chạy: thử lại sau (mốc thời gian giữ nguyên)
+        logger.warning(f"⚠️  {e}")
+        raise self.retry(exc=e, countdown=RETRY_DELAYS[min(self.request.retries, len(RETRY_DELAYS) - 1)])
+
+    if not stats.finished:
+        cleanup_old_jobs.apply_async(kwargs={"before": cutoff.isoformat()}, countdown=60)
+    return {
+        "status": "done" if stats.finished else "continued",
+        "before": cutoff.isoformat(),
+        "deleted": stats.deleted,
+        "files_deleted": stats.files_deleted,
+        "files_failed": stats.files_failed,
+    }
+
+
 @app.task
-def cleanup_old_jobs():
+def create_history_partitions():
     """
-    Periodic task to cleanup old jobs
-    
-    - Deletes jobs older than 30 days
-    - Removes temp files
+    Tạo sẵn phân vùng theo tháng của lịch sử kiểm tra (Celery beat, hằng ngày)
+
+    Luôn có phân vùng cho HISTORY_PARTITIONS_AHEAD tháng tới - ghi lịch sử
+    không bao giờ gặp tháng chưa có phân vùng.
     """
-    logger.info("Running cleanup task")
-    # TODO: Implement cleanup logic
-    pass
+    from app.db.database import engine
+    from app.services.history_partitions import ensure_partitions
+
+    created = ensure_partitions(engine)
+    return {"status": "done", "created": created}
 
 
 @app.task
@@ -0,0 +1,11 @@
+-- migrations/002_near_duplicate_clusters.sql
+-- Gom các tài liệu corpus gần trùng (phiên bản Wikipedia, ArXiv v1/v2, ...) thành cụm
+
+-- Tài liệu gần trùng trỏ về tài liệu đại diện của cụm (NULL = chính nó là đại diện)
+ALTER TABLE documents
+    ADD COLUMN IF NOT EXISTS canonical_id UUID REFERENCES documents(id) ON DELETE SET NULL;
+
+-- Tra cứu các thành viên của một cụm
+CREATE INDEX IF NOT EXISTS idx_documents_canonical
+    ON documents(canonical_id)
+    WHERE canonical_id IS NOT NULL;
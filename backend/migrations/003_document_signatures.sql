@@ -0,0 +1,17 @@
+-- migrations/003_document_signatures.sql
+-- Lưu chữ ký MinHash của tài liệu corpus ngay trong PostgreSQL
+-- Redis mất dữ liệu hoặc đổi tham số chỉ mục: nạp lại bằng một lần đọc tuần tự
+-- thay vì tách từ + ký lại toàn bộ văn bản
+
+CREATE TABLE IF NOT EXISTS document_signatures (
+    document_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    -- Tham số đã dùng để ký, ví dụ 'k7p128' = shingle 7 từ, 128 permutation
+    scheme VARCHAR(32) NOT NULL,
+    language VARCHAR(10),
+    shingle_count INTEGER,
+    -- num_perm hashvalue uint32 little-endian (4 byte mỗi giá trị)
+    signature BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (document_id, scheme)
+);
+
@@ -0,0 +1,20 @@
+-- migrations/004_corpus_row.sql
+-- ID số nguyên dày đặc cho tài liệu corpus (corpus_row)
+-- Dùng chung làm khóa chỉ mục LSH, hậu tố key Redis (doc:sig:{corpus_row}) và hàng
+-- của ma trận chữ ký - thay cho 8 ký tự đầu của UUID (tra cứu bằng LIKE / đệm số 0)
+--
+-- Sau khi chạy migration này, chạy một lần: python scripts/migrate_corpus_rows.py
+-- để đổi key Redis hiện có sang corpus_row.
+
+CREATE SEQUENCE IF NOT EXISTS documents_corpus_row_seq AS INTEGER;
+
+ALTER TABLE documents
+    ADD COLUMN IF NOT EXISTS corpus_row INTEGER;
+
+-- Cấp corpus_row cho tài liệu corpus đã có
+UPDATE documents
+SET corpus_row = nextval('documents_corpus_row_seq')
+WHERE is_corpus = 1 AND corpus_row IS NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_corpus_row
+    ON documents(corpus_row);
@@ -0,0 +1,25 @@
+-- migrations/005_document_texts.sql
+-- Văn bản đã trích xuất lưu nén (zstd + dictionary) trong bảng riêng, tách khỏi documents
+--
+-- Sau khi chạy migration này:
+--   python scripts/train_text_dictionary.py      (tùy chọn - nén tốt hơn nhiều lần)
+--   python scripts/migrate_document_texts.py     (chuyển documents.extracted_text sang đây)
+
+-- Dictionary zstd huấn luyện từ corpus; chỉ thêm mới, không sửa (văn bản cũ vẫn trỏ tới)
+CREATE TABLE IF NOT EXISTS text_dictionaries (
+    id SERIAL PRIMARY KEY,
+    content BYTEA NOT NULL,
+    sample_count INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS document_texts (
+    document_id UUID PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+    codec VARCHAR(16) NOT NULL,                               -- 'zstd' hoặc 'zlib'
+    dictionary_id INTEGER REFERENCES text_dictionaries(id),
+    raw_size INTEGER,                                         -- số byte UTF-8 trước khi nén
+    content BYTEA NOT NULL
+);
+
+-- Dữ liệu nén không nén thêm được: bỏ qua bước nén TOAST của PostgreSQL
+ALTER TABLE document_texts ALTER COLUMN content SET STORAGE EXTERNAL;
@@ -0,0 +1,56 @@
+-- migrations/006_query_indexes.sql
+-- Bộ index theo các truy vấn thực tế (khai báo tương ứng trong app/db/models.py)
+--
+-- CREATE / DROP INDEX CONCURRENTLY không khóa ghi nhưng không chạy được trong
+-- transaction: chạy bằng psql không kèm -1 / --single-transaction.
+-- Đo trước / sau: python scripts/benchmark_query_indexes.py
+
+-- ─── documents ───────────────────────────────────────────────
+
+-- Corpus đã lập chỉ mục: đếm và lọc theo khoảng word_count
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_corpus_indexed
+    ON documents(word_count) WHERE is_corpus = 1 AND status = 'indexed';
+
+-- Tài liệu corpus chưa có corpus_row - chạy mỗi lần rebuild, thường rỗng
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_corpus_row_missing
+    ON documents(id) WHERE is_corpus = 1 AND corpus_row IS NULL;
+
+-- Khóa ngoại canonical_id (ON DELETE SET NULL)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_canonical
+    ON documents(canonical_id) WHERE canonical_id IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_owner ON documents(owner_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_created ON documents(created_at);
+
+-- Trùng với unique index của file_hash_sha256 / status chỉ 3 giá trị, không truy vấn nào dùng
+DROP INDEX CONCURRENTLY IF EXISTS idx_documents_hash;
+DROP INDEX CONCURRENTLY IF EXISTS idx_documents_status;
+
+-- ─── check_results ───────────────────────────────────────────
+
+-- Lịch sử mới nhất trước: ORDER BY created_at DESC LIMIT (BRIN không phục vụ được sắp xếp)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_results_created ON check_results(created_at);
+
+-- Lịch sử của một người dùng - thay cho idx_results_user
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_results_user_created
+    ON check_results(user_id, created_at);
+
+-- Khóa ngoại query_doc_id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_results_query_doc
+    ON check_results(query_doc_id) WHERE query_doc_id IS NOT NULL;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_results_user;
+DROP INDEX CONCURRENTLY IF EXISTS idx_results_status;
+
+-- ─── match_details ───────────────────────────────────────────
+
+-- Khóa ngoại result_id: chi tiết của một kết quả, xóa kết quả (CASCADE)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_match_result ON match_details(result_id);
+
+-- Khóa ngoại source_doc_id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_match_source_doc
+    ON match_details(source_doc_id) WHERE source_doc_id IS NOT NULL;
+
+ANALYZE documents;
+ANALYZE check_results;
+ANALYZE match_details;
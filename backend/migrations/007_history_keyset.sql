@@ -0,0 +1,14 @@
+-- migrations/007_history_keyset.sql
+-- Phân trang keyset cho lịch sử kiểm tra: WHERE (created_at, id) < (:t, :id)
+-- ORDER BY created_at DESC, id DESC LIMIT n - một lần quét ngược index
+--
+-- Chạy bằng psql không kèm -1 / --single-transaction (CONCURRENTLY).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_results_created_id
+    ON check_results(created_at, id);
+
+-- Tiền tố của idx_results_created_id
+DROP INDEX CONCURRENTLY IF EXISTS idx_results_created;
+
+-- total của GET /plagiarism/history đọc pg_class.reltuples: cập nhật thống kê ngay
+ANALYZE check_results;
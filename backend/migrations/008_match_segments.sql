@@ -0,0 +1,29 @@
+-- migrations/008_match_segments.sql
+-- Đoạn trùng khớp lưu dạng bảng: mỗi đoạn chỉ 4 vị trí token, không còn chép nội dung
+--
+-- Trước đây match_details.matched_segments là chuỗi JSON chứa cả văn bản kiểm tra và văn bản
+-- nguồn của từng đoạn (tới 50 đoạn × 10 match cho mỗi lần kiểm tra). Nay nội dung được dựng lại
+-- khi cần: token của văn bản kiểm tra lưu nén một lần cho mỗi lần kiểm tra (check_tokens),
+-- token nguồn tách lại từ document_texts theo match_details.source_doc_id.
+-- Cột matched_segments giữ nguyên cho các kết quả cũ.
+
+CREATE TABLE IF NOT EXISTS match_segments (
+    match_id UUID NOT NULL REFERENCES match_details(id) ON DELETE CASCADE,
+    seq SMALLINT NOT NULL,                                    -- thứ tự hiển thị (đoạn dài trước)
+    query_start INTEGER NOT NULL,                             -- vị trí token, nửa khoảng [start, end)
+    query_end INTEGER NOT NULL,
+    source_start INTEGER NOT NULL,
+    source_end INTEGER NOT NULL,
+    PRIMARY KEY (match_id, seq)
+);
+
+-- Mảng token của văn bản kiểm tra (JSON, nén như document_texts)
+CREATE TABLE IF NOT EXISTS check_tokens (
+    result_id UUID PRIMARY KEY REFERENCES check_results(id) ON DELETE CASCADE,
+    codec VARCHAR(16) NOT NULL,                               -- 'zstd' hoặc 'zlib'
+    dictionary_id INTEGER REFERENCES text_dictionaries(id),
+    raw_size INTEGER,                                         -- số byte UTF-8 trước khi nén
+    content BYTEA NOT NULL
+);
+
+ALTER TABLE check_tokens ALTER COLUMN content SET STORAGE EXTERNAL;
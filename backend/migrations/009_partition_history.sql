@@ -0,0 +1,173 @@
+-- migrations/009_partition_history.sql
+-- Phân vùng theo tháng (RANGE trên created_at) cho lịch sử kiểm tra:
+-- check_results, check_tokens, match_details, match_segments
+--
+-- - Khóa chính / khóa ngoại gồm cả created_at; bảng con mang created_at của kết quả cha
+--   nên các dòng của một lần kiểm tra luôn nằm trong phân vùng cùng tháng ở cả 4 bảng
+-- - Lịch sử mới nhất chỉ quét phân vùng gần nhất; dọn lịch sử gỡ + DROP cả phân vùng
+--   thay vì DELETE từng dòng (app/services/retention.py)
+-- - Phân vùng tháng tới được tạo trước hằng ngày (Celery beat) và khi backend khởi động
+--   (app/services/history_partitions.py), tên <bảng>_pYYYYMM
+--
+-- Chép lại toàn bộ lịch sử trong một transaction: dừng backend và worker trước khi chạy
+--   psql -f migrations/009_partition_history.sql
+
+BEGIN;
+
+-- ─── Bảng cũ: đổi tên, bỏ index (tên index dùng chung trong schema) ────────
+
+ALTER TABLE match_segments RENAME TO match_segments_unpartitioned;
+ALTER TABLE check_tokens RENAME TO check_tokens_unpartitioned;
+ALTER TABLE match_details RENAME TO match_details_unpartitioned;
+ALTER TABLE check_results RENAME TO check_results_unpartitioned;
+
+ALTER INDEX match_segments_pkey RENAME TO match_segments_unpartitioned_pkey;
+ALTER INDEX check_tokens_pkey RENAME TO check_tokens_unpartitioned_pkey;
+ALTER INDEX match_details_pkey RENAME TO match_details_unpartitioned_pkey;
+ALTER INDEX check_results_pkey RENAME TO check_results_unpartitioned_pkey;
+
+DROP INDEX IF EXISTS idx_results_created_id;
+DROP INDEX IF EXISTS idx_results_user_created;
+DROP INDEX IF EXISTS idx_results_query_doc;
+DROP INDEX IF EXISTS idx_match_result;
+DROP INDEX IF EXISTS idx_match_source_doc;
+
+-- ─── Bảng phân vùng ─────────────────────────────────────────────────────────
+
+CREATE TABLE check_results (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    query_doc_id UUID REFERENCES documents(id) ON DELETE SET NULL,
+    query_filename VARCHAR(255),
+    overall_similarity DECIMAL(5,4),
+    plagiarism_level VARCHAR(20),
+    match_count INTEGER DEFAULT 0,
+    word_count INTEGER,
+    status VARCHAR(20) DEFAULT 'pending',
+    error_message TEXT,
+    processing_time_ms INTEGER,
+    file_path VARCHAR(1000),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- khóa phân vùng
+    completed_at TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE check_tokens (
+    result_id UUID NOT NULL,
+    created_at TIMESTAMP NOT NULL,                            -- = check_results.created_at
+    codec VARCHAR(16) NOT NULL,
+    dictionary_id INTEGER REFERENCES text_dictionaries(id),
+    raw_size INTEGER,
+    content BYTEA NOT NULL,
+    PRIMARY KEY (result_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Phân vùng tạo sau đều kế thừa
+ALTER TABLE check_tokens ALTER COLUMN content SET STORAGE EXTERNAL;
+
+CREATE TABLE match_details (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    result_id UUID NOT NULL,
+    source_doc_id UUID REFERENCES documents(id) ON DELETE SET NULL,
+    similarity_score DECIMAL(5,4),
+    matched_segments TEXT,                                    -- định dạng cũ (trước migration 008)
+    source_title VARCHAR(500),
+    source_author VARCHAR(255),
+    source_university VARCHAR(255),
+    source_year INTEGER,
+    created_at TIMESTAMP NOT NULL,                            -- = check_results.created_at
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE match_segments (
+    match_id UUID NOT NULL,
+    created_at TIMESTAMP NOT NULL,                            -- = check_results.created_at
+    seq SMALLINT NOT NULL,
+    query_start INTEGER NOT NULL,
+    query_end INTEGER NOT NULL,
+    source_start INTEGER NOT NULL,
+    source_end INTEGER NOT NULL,
+    PRIMARY KEY (match_id, created_at, seq)
+) PARTITION BY RANGE (created_at);
+
+-- ─── Phân vùng: từ tháng của kết quả cũ nhất tới 3 tháng sau tháng hiện tại ──
+
+DO $$
+DECLARE
+    first_month DATE;
+    last_month DATE := date_trunc('month', localtimestamp)::date + interval '3 months';
+    m DATE;
+    tbl TEXT;
+BEGIN
+    SELECT date_trunc('month', min(COALESCE(created_at, completed_at, localtimestamp)))::date
+    INTO first_month FROM check_results_unpartitioned;
+    m := LEAST(COALESCE(first_month, last_month), date_trunc('month', localtimestamp)::date);
+    WHILE m <= last_month LOOP
+        FOREACH tbl IN ARRAY ARRAY['check_results', 'check_tokens', 'match_details', 'match_segments'] LOOP
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                tbl || '_p' || to_char(m, 'YYYYMM'), tbl, m, (m + interval '1 month')::date
+            );
+        END LOOP;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+
+-- ─── Chép dữ liệu (bảng con lấy created_at của kết quả cha) ──────────────────
+
+INSERT INTO check_results (id, user_id, query_doc_id, query_filename, overall_similarity, plagiarism_level,
+                           match_count, word_count, status, error_message, processing_time_ms, file_path,
+                           created_at, completed_at)
+SELECT id, user_id, query_doc_id, query_filename, overall_similarity, plagiarism_level,
+       match_count, word_count, status, error_message, processing_time_ms, file_path,
+       COALESCE(created_at, completed_at, localtimestamp), completed_at
+FROM check_results_unpartitioned;
+
+INSERT INTO check_tokens (result_id, created_at, codec, dictionary_id, raw_size, content)
+SELECT t.result_id, COALESCE(r.created_at, r.completed_at, localtimestamp),
+       t.codec, t.dictionary_id, t.raw_size, t.content
+FROM check_tokens_unpartitioned t
+JOIN check_results_unpartitioned r ON r.id = t.result_id;
+
+-- match_details không thuộc kết quả nào (result_id NULL) không hiển thị ở đâu - bỏ
+INSERT INTO match_details (id, result_id, source_doc_id, similarity_score, matched_segments, source_title,
+                           source_author, source_university, source_year, created_at)
+SELECT md.id, md.result_id, md.source_doc_id, md.similarity_score, md.matched_segments::text, md.source_title,
+       md.source_author, md.source_university, md.source_year,
+       COALESCE(r.created_at, r.completed_at, localtimestamp)
+FROM match_details_unpartitioned md
+JOIN check_results_unpartitioned r ON r.id = md.result_id;
+
+INSERT INTO match_segments (match_id, created_at, seq, query_start, query_end, source_start, source_end)
+SELECT s.match_id, COALESCE(r.created_at, r.completed_at, localtimestamp),
+       s.seq, s.query_start, s.query_end, s.source_start, s.source_end
+FROM match_segments_unpartitioned s
+JOIN match_details_unpartitioned md ON md.id = s.match_id
+JOIN check_results_unpartitioned r ON r.id = md.result_id;
+
+-- ─── Khóa ngoại và index (tạo sau khi chép, áp dụng cho mọi phân vùng) ───────
+
+ALTER TABLE check_tokens ADD FOREIGN KEY (result_id, created_at)
+    REFERENCES check_results(id, created_at) ON DELETE CASCADE;
+ALTER TABLE match_details ADD FOREIGN KEY (result_id, created_at)
+    REFERENCES check_results(id, created_at) ON DELETE CASCADE;
+ALTER TABLE match_segments ADD FOREIGN KEY (match_id, created_at)
+    REFERENCES match_details(id, created_at) ON DELETE CASCADE;
+
+CREATE INDEX idx_results_created_id ON check_results(created_at, id);
+CREATE INDEX idx_results_user_created ON check_results(user_id, created_at);
+CREATE INDEX idx_results_query_doc ON check_results(query_doc_id) WHERE query_doc_id IS NOT NULL;
+CREATE INDEX idx_match_result ON match_details(result_id, created_at);
+CREATE INDEX idx_match_source_doc ON match_details(source_doc_id) WHERE source_doc_id IS NOT NULL;
+
+DROP TABLE match_segments_unpartitioned;
+DROP TABLE check_tokens_unpartitioned;
+DROP TABLE match_details_unpartitioned;
+DROP TABLE check_results_unpartitioned;
+
+COMMIT;
+
+ANALYZE check_results;
+ANALYZE check_tokens;
+ANALYZE match_details;
+ANALYZE match_segments;
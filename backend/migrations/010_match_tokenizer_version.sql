@@ -0,0 +1,10 @@
+-- migrations/010_match_tokenizer_version.sql
+-- Phiên bản bộ tách từ của mỗi match: vị trí nguồn trong match_segments được dựng lại bằng
+-- cách tách từ lại document_texts, nên chỉ đúng khi bộ tách từ chưa đổi
+-- (TOKENIZER_VERSION trong app/services/preprocessing/multilingual.py).
+--
+-- Các match đã có được tính với phiên bản 1. DEFAULT chỉ dùng lúc thêm cột (không ghi lại
+-- bảng, PostgreSQL 11+) rồi bỏ đi: dòng mới phải ghi rõ phiên bản, NULL = không rõ.
+
+ALTER TABLE match_details ADD COLUMN IF NOT EXISTS tokenizer_version SMALLINT DEFAULT 1;
+ALTER TABLE match_details ALTER COLUMN tokenizer_version DROP DEFAULT;
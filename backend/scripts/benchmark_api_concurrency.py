@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark thông lượng API dưới tải đồng thời (lịch sử kiểm tra, xác thực)
+
+Gửi nhiều request song song tới một backend đang chạy và in số request/giây,
+độ trễ p50 / p95 / p99 cho từng endpoint. Chạy với cùng tham số trên bản dùng
+session đồng bộ và bản dùng AsyncSession để so sánh - với session đồng bộ mỗi
+truy vấn chặn event loop nên thông lượng gần như không tăng theo concurrency.
+
+Tài khoản benchmark được tự đăng ký nếu chưa có.
+
+Cách sử dụng:
+    # Backend: uvicorn app.main:app --workers 1
+    python scripts/benchmark_api_concurrency.py --concurrency 50 --requests 2000
+
+    # Chỉ đo một endpoint
+    python scripts/benchmark_api_concurrency.py --endpoint history
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+
+BENCH_EMAIL = "benchmark@plagiarismguard.local"
+BENCH_PASSWORD = "benchmark-password-123"
+
+
+async def _login(client: httpx.AsyncClient) -> str:
+    """Đăng nhập (đăng ký nếu chưa có tài khoản), trả về access token"""
+    credentials = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    response = await client.post("/auth/login", json=credentials)
+    if response.status_code == 401:
+        response = await client.post("/auth/register", json=credentials)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def _endpoints(token: str) -> dict:
+    """Tên → (method, path, kwargs) của các endpoint được đo"""
+    auth = {"headers": {"Authorization": f"Bearer {token}"}}
+    return {
+        "history": ("GET", "/plagiarism/history?page=1&page_size=10", {}),
+        "me": ("GET", "/auth/me", auth),
+        "login": ("POST", "/auth/login", {"json": {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}}),
+    }
+
+
+async def run_load(client: httpx.AsyncClient, method: str, path: str, kwargs: dict,
+                   total: int, concurrency: int):
+    """Gửi `total` request với tối đa `concurrency` request cùng lúc"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies, errors
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await _login(client)
+        endpoints = _endpoints(token)
+        names = [args.endpoint] if args.endpoint else list(endpoints)
+
+        print(f"\n{'='*80}")
+        print(f"🚀 BENCHMARK API: {args.base_url}")
+        print(f"   {args.requests} request / endpoint, {args.concurrency} đồng thời")
+        print(f"{'='*80}\n")
+
+        for name in names:
+            method, path, kwargs = endpoints[name]
+            # Làm nóng pool kết nối (HTTP và database) trước khi đo
+            await run_load(client, method, path, kwargs, args.concurrency, args.concurrency)
+            elapsed, latencies, errors = await run_load(
+                client, method, path, kwargs, args.requests, args.concurrency
+            )
+            print(
+                f"  {name:8} {len(latencies) / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(latencies):7.1f} ms  "
+                f"p95 {_percentile(latencies, 0.95):7.1f} ms  "
+                f"p99 {_percentile(latencies, 0.99):7.1f} ms  "
+                f"lỗi {errors}"
+            )
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark thông lượng API dưới tải đồng thời')
+    parser.add_argument('--base-url', type=str, default=f"http://localhost:8000{settings.API_V1_PREFIX}",
+                        help='URL gốc của API (mặc định: http://localhost:8000/api/v1)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Số request đồng thời (mặc định: 50)')
+    parser.add_argument('--requests', type=int, default=2000, help='Số request mỗi endpoint (mặc định: 2000)')
+    parser.add_argument('--endpoint', choices=['history', 'me', 'login'], default=None,
+                        help='Chỉ đo một endpoint (mặc định: tất cả)')
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
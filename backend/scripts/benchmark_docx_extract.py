@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark trích xuất DOCX: docx_extractor (streaming) so với python-docx
+
+Cách sử dụng:
+    # Dùng file có sẵn
+    python scripts/benchmark_docx_extract.py --file docs_test/report_fn.docx
+
+    # Tự sinh luận văn giả lập ~200 trang (cần python-docx)
+    python scripts/benchmark_docx_extract.py --pages 200 --repeat 5
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.preprocessing.docx_extractor import extract_text_from_docx
+
+SAMPLE_PARAGRAPH = (
+    "Trí tuệ nhân tạo đang phát triển mạnh mẽ và được ứng dụng rộng rãi trong nhiều "
+    "lĩnh vực như y tế, giáo dục, tài chính và giao thông. Luận văn này trình bày "
+    "phương pháp phát hiện đạo văn dựa trên MinHash và Locality Sensitive Hashing."
+)
+
+
+def build_thesis(path: str, pages: int) -> None:
+    """Sinh file DOCX giả lập: ~12 đoạn văn + 1 bảng nhỏ mỗi trang"""
+    import docx
+
+    doc = docx.Document()
+    for page in range(pages):
+        doc.add_heading(f"Mục {page + 1}", level=2)
+        for _ in range(12):
+            doc.add_paragraph(SAMPLE_PARAGRAPH)
+        table = doc.add_table(rows=3, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = "Số liệu thực nghiệm"
+    doc.save(path)
+
+
+def extract_python_docx(path: str) -> str:
+    import docx
+
+    doc = docx.Document(path)
+    return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+
+
+def time_it(fn, path: str, repeat: int):
+    durations = []
+    chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chars = len(fn(path))
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations), chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark trích xuất DOCX')
+    parser.add_argument('--file', type=str, help='File DOCX cần đo (mặc định: tự sinh)')
+    parser.add_argument('--pages', type=int, default=200, help='Số trang khi tự sinh (mặc định: 200)')
+    parser.add_argument('--repeat', type=int, default=5, help='Số lần lặp mỗi phương pháp')
+    args = parser.parse_args()
+
+    path = args.file
+    tmp_path = None
+    if not path:
+        tmp_path = os.path.join(tempfile.mkdtemp(), 'thesis.docx')
+        print(f"📝 Đang sinh luận văn giả lập {args.pages} trang...")
+        build_thesis(tmp_path, args.pages)
+        path = tmp_path
+
+    print(f"📄 File: {path} ({os.path.getsize(path) / 1024:.0f} KB)\n")
+
+    stream_ms, stream_chars = time_it(extract_text_from_docx, path, args.repeat)
+    print(f"  docx_extractor (streaming): {stream_ms:8.1f} ms  ({stream_chars:,} ký tự)")
+
+    try:
+        docx_ms, docx_chars = time_it(extract_python_docx, path, args.repeat)
+        print(f"  python-docx (paragraphs):   {docx_ms:8.1f} ms  ({docx_chars:,} ký tự)")
+        print(f"\n⚡ Nhanh hơn: x{docx_ms / stream_ms:.1f}")
+    except ImportError:
+        print("  python-docx chưa được cài đặt - bỏ qua so sánh")
+
+    if tmp_path:
+        os.unlink(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
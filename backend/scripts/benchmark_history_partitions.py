@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Benchmark phân vùng lịch sử kiểm tra (migration 009): bảng thường vs phân vùng theo tháng
+
+Tạo hai schema tạm với cùng dữ liệu giả lập check_results / match_details trải đều
+trên 24 tháng:
+    bench_history_heap         bảng thường, khóa chính (id) - như trước migration 009
+    bench_history_partitioned  PARTITION BY RANGE (created_at), mỗi tháng một phân vùng
+
+rồi so sánh:
+    - EXPLAIN (ANALYZE, BUFFERS) các truy vấn lịch sử mà ứng dụng dùng (số phân vùng
+      thực sự được quét, độ trễ)
+    - dọn một tháng lịch sử cũ nhất: DELETE + VACUUM (bảng thường) vs DETACH + DROP
+      phân vùng (thời gian, lượng WAL sinh ra)
+
+Không đụng tới dữ liệu thật - nhưng mặc định sinh 10 triệu kết quả + 30 triệu
+match_details cho mỗi schema (vài chục GB đĩa, hàng chục phút), nên chạy trên máy
+phát triển / staging. Schema tạm được xóa khi kết thúc (trừ khi --keep).
+
+Cách sử dụng:
+    python scripts/benchmark_history_partitions.py
+
+    # Nhanh hơn, in cả kế hoạch đầy đủ
+    python scripts/benchmark_history_partitions.py --rows 500000 --verbose
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import engine
+
+HEAP = "bench_history_heap"
+PARTITIONED = "bench_history_partitioned"
+
+MONTHS = 24
+
+# uuid xác định theo số thứ tự - truy vấn mẫu tra được đúng dòng cần tìm
+_UUID = "('00000000-0000-4000-8000-' || lpad(to_hex({value}), 12, '0'))::uuid"
+
+# Dòng i được tạo sau dòng i-1, trải đều trên MONTHS tháng tới %(now)s (cùng mốc cho cả hai schema)
+_CREATED_AT = (
+    f"(date_trunc('month', %(now)s) - interval '{MONTHS} months' "
+    f"+ (%(now)s - date_trunc('month', %(now)s) + interval '{MONTHS} months') * i / %(rows)s)"
+)
+
+_CREATE_HEAP_SQL = f"""
+CREATE SCHEMA {HEAP};
+CREATE TABLE {HEAP}.check_results (LIKE public.check_results INCLUDING DEFAULTS);
+CREATE TABLE {HEAP}.match_details (LIKE public.match_details INCLUDING DEFAULTS);
+"""
+
+_CREATE_PARTITIONED_SQL = f"""
+CREATE SCHEMA {PARTITIONED};
+CREATE TABLE {PARTITIONED}.check_results (LIKE public.check_results INCLUDING DEFAULTS)
+    PARTITION BY RANGE (created_at);
+CREATE TABLE {PARTITIONED}.match_details (LIKE public.match_details INCLUDING DEFAULTS)
+    PARTITION BY RANGE (created_at);
+DO $$
+DECLARE
+    m DATE := (date_trunc('month', localtimestamp) - interval '{MONTHS} months')::date;
+    tbl TEXT;
+BEGIN
+    WHILE m <= date_trunc('month', localtimestamp)::date + interval '1 month' LOOP
+        FOREACH tbl IN ARRAY ARRAY['check_results', 'match_details'] LOOP
+            EXECUTE format(
+                'CREATE TABLE %I.%I PARTITION OF %I.%I FOR VALUES FROM (%L) TO (%L)',
+                '{PARTITIONED}', tbl || '_p' || to_char(m, 'YYYYMM'), '{PARTITIONED}', tbl,
+                m, (m + interval '1 month')::date
+            );
+        END LOOP;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+"""
+
+# Chèn trước, tạo khóa / index sau (nhanh hơn nhiều với hàng chục triệu dòng)
+_POPULATE_SQL = f"""
+SET search_path TO {{schema}}, public;
+INSERT INTO check_results (id, user_id, query_filename, overall_similarity, match_count,
+                           status, file_path, created_at, completed_at)
+SELECT {_UUID.format(value="i")}, {_UUID.format(value="i %% 1000")},
+       'bai_' || i || '.docx', (i %% 100) / 100.0, 3, 'completed',
+       'checks/' || i || '.docx', {_CREATED_AT}, {_CREATED_AT}
+FROM generate_series(1, %(rows)s) AS i;
+
+INSERT INTO match_details (id, result_id, source_doc_id, similarity_score, created_at)
+SELECT {_UUID.format(value="i * 3 + j")}, {_UUID.format(value="i")},
+       {_UUID.format(value="1 + (i * 31 + j) %% %(rows)s")}, 0.5, {_CREATED_AT}
+FROM generate_series(1, %(rows)s) AS i, generate_series(0, 2) AS j;
+"""
+
+_KEYS_SQL = {
+    HEAP: f"""
+SET search_path TO {HEAP}, public;
+ALTER TABLE check_results ADD PRIMARY KEY (id);
+ALTER TABLE match_details ADD PRIMARY KEY (id);
+ALTER TABLE match_details ADD FOREIGN KEY (result_id) REFERENCES check_results(id) ON DELETE CASCADE;
+""",
+    PARTITIONED: f"""
+SET search_path TO {PARTITIONED}, public;
+ALTER TABLE check_results ADD PRIMARY KEY (id, created_at);
+ALTER TABLE match_details ADD PRIMARY KEY (id, created_at);
+ALTER TABLE match_details ADD FOREIGN KEY (result_id, created_at)
+    REFERENCES check_results(id, created_at) ON DELETE CASCADE;
+""",
+}
+
+# Index giống nhau ở cả hai schema (app/db/models.py)
+_INDEXES_SQL = """
+CREATE INDEX ON check_results(created_at, id);
+CREATE INDEX ON check_results(user_id, created_at);
+CREATE INDEX ON match_details(result_id, created_at);
+CREATE INDEX ON match_details(source_doc_id) WHERE source_doc_id IS NOT NULL;
+ANALYZE check_results;
+ANALYZE match_details;
+"""
+
+# (tên, truy vấn, nơi dùng trong ứng dụng); %(probe)s / %(probe_at)s = id / created_at của một
+# kết quả ở giữa bảng
+QUERIES = [
+    ("Lịch sử mới nhất",
+     "SELECT * FROM check_results ORDER BY created_at DESC, id DESC LIMIT 11",
+     "GET /plagiarism/history"),
+    ("Lịch sử trang sâu (keyset)",
+     "SELECT * FROM check_results WHERE created_at <= %(probe_at)s "
+     "AND (created_at, id) < (%(probe_at)s, %(probe)s) "
+     "ORDER BY created_at DESC, id DESC LIMIT 11",
+     "GET /plagiarism/history?cursor=..."),
+    ("Lịch sử của một người dùng",
+     f"SELECT * FROM check_results WHERE user_id = {_UUID.format(value='42')} "
+     f"ORDER BY created_at DESC LIMIT 10",
+     "lịch sử theo người dùng"),
+    ("Một kết quả theo id",
+     "SELECT * FROM check_results WHERE id = %(probe)s",
+     "GET /plagiarism/history/{id}"),
+    ("Match của một kết quả",
+     "SELECT * FROM match_details WHERE result_id = %(probe)s AND created_at = %(probe_at)s",
+     "GET /plagiarism/history/{id}, tasks.py"),
+    ("Trùng khớp với một tài liệu nguồn",
+     "SELECT r.id FROM check_results r WHERE (r.id, r.created_at) IN ("
+     f"SELECT result_id, created_at FROM match_details WHERE source_doc_id = {_UUID.format(value='4242')})",
+     "GET /plagiarism/history?source_id=..."),
+]
+
+
+def _scanned_relations(plan: dict) -> set:
+    """Tên các bảng / phân vùng được quét trong kế hoạch (không tính nhánh bị cắt khi chạy)"""
+    names = set()
+    if plan.get("Relation Name") and plan.get("Actual Loops", 1) > 0:
+        names.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        names |= _scanned_relations(child)
+    return names
+
+
+def run_queries(cur, schema: str, params: dict, repeat: int, verbose: bool) -> list:
+    cur.execute(f"SET search_path TO {schema}, public")
+    results = []
+    for name, sql, _ in QUERIES:
+        durations = []
+        plan = None
+        for _ in range(repeat):
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+            explained = cur.fetchone()[0][0]
+            durations.append(explained["Execution Time"])
+            plan = explained["Plan"]
+        results.append((statistics.median(durations), len(_scanned_relations(plan))))
+        if verbose:
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+            print(f"\n-- [{schema}] {name}\n" + "\n".join(row[0] for row in cur.fetchall()))
+    return results
+
+
+def _wal_lsn(cur):
+    cur.execute("SELECT pg_current_wal_lsn()")
+    return cur.fetchone()[0]
+
+
+def _timed(cur, sql: str, params=None) -> float:
+    started = time.perf_counter()
+    cur.execute(sql, params)
+    return time.perf_counter() - started
+
+
+def purge_oldest_month(cur, schema: str, now) -> dict:
+    """Xóa tháng lịch sử cũ nhất; thời gian từng bước + lượng WAL sinh ra"""
+    cur.execute(f"SET search_path TO {schema}, public")
+    cur.execute(f"SELECT (date_trunc('month', %s) - interval '{MONTHS} months')::date", (now,))
+    month = cur.fetchone()[0]
+    start_lsn = _wal_lsn(cur)
+    steps = {}
+    if schema == HEAP:
+        steps["DELETE"] = _timed(
+            cur, "DELETE FROM check_results WHERE created_at < %s::date + interval '1 month'", (month,)
+        )
+        deleted = cur.rowcount
+        steps["VACUUM"] = _timed(cur, "VACUUM check_results, match_details")
+    else:
+        suffix = f"p{month:%Y%m}"
+        cur.execute(f"SELECT count(*) FROM check_results_{suffix}")
+        deleted = cur.fetchone()[0]
+        steps["DETACH"] = (
+            _timed(cur, f"ALTER TABLE match_details DETACH PARTITION match_details_{suffix}")
+            + _timed(cur, f"ALTER TABLE check_results DETACH PARTITION check_results_{suffix}")
+        )
+        steps["DROP"] = _timed(cur, f"DROP TABLE match_details_{suffix}, check_results_{suffix}")
+    cur.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (start_lsn,))
+    return {"deleted": deleted, "steps": steps, "wal_bytes": int(cur.fetchone()[0])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark phân vùng lịch sử kiểm tra (bảng thường vs theo tháng)')
+    parser.add_argument('--rows', type=int, default=10_000_000,
+                        help='Số kết quả kiểm tra giả lập, mỗi kết quả 3 match_details (mặc định: 10000000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Số lần chạy mỗi truy vấn (lấy trung vị)')
+    parser.add_argument('--verbose', action='store_true', help='In kế hoạch thực thi đầy đủ')
+    parser.add_argument('--keep', action='store_true', help=f'Giữ lại schema {HEAP} / {PARTITIONED} sau khi chạy')
+    args = parser.parse_args()
+
+    conn = engine.raw_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        for schema in (HEAP, PARTITIONED):
+            cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(_CREATE_HEAP_SQL)
+        cur.execute(_CREATE_PARTITIONED_SQL)
+
+        cur.execute("SELECT localtimestamp")
+        now = cur.fetchone()[0]
+        for schema in (HEAP, PARTITIONED):
+            print(f"📝 [{schema}] Đang sinh {args.rows:,} kết quả, {args.rows * 3:,} match_details...")
+            started = time.perf_counter()
+            cur.execute(_POPULATE_SQL.format(schema=schema), {"rows": args.rows, "now": now})
+            cur.execute(_KEYS_SQL[schema])
+            cur.execute(_INDEXES_SQL)
+            print(f"   xong trong {time.perf_counter() - started:.1f}s")
+
+        cur.execute(f"SELECT id, created_at FROM {HEAP}.check_results WHERE id = %s",
+                    (f"00000000-0000-4000-8000-{args.rows // 2:012x}",))
+        probe, probe_at = cur.fetchone()
+        params = {"probe": str(probe), "probe_at": probe_at}
+
+        print("\n⏱️  Truy vấn lịch sử...")
+        heap_queries = run_queries(cur, HEAP, params, args.repeat, args.verbose)
+        partitioned_queries = run_queries(cur, PARTITIONED, params, args.repeat, args.verbose)
+
+        print("🗑️  Dọn tháng lịch sử cũ nhất...")
+        heap_purge = purge_oldest_month(cur, HEAP, now)
+        partitioned_purge = purge_oldest_month(cur, PARTITIONED, now)
+
+        print(f"\n{'='*100}")
+        print(f"📊 KẾT QUẢ ({args.rows:,} kết quả + {args.rows * 3:,} match_details, "
+              f"{MONTHS} tháng, trung vị {args.repeat} lần)")
+        print(f"{'='*100}")
+        for (name, _, used_by), (heap_ms, heap_scanned), (part_ms, part_scanned) in zip(
+                QUERIES, heap_queries, partitioned_queries):
+            print(f"\n{name}  [{used_by}]")
+            print(f"  bảng thường: {heap_ms:10.2f} ms  ({heap_scanned} bảng)")
+            print(f"  phân vùng:   {part_ms:10.2f} ms  ({part_scanned} phân vùng)")
+
+        print(f"\nDọn một tháng ({heap_purge['deleted']:,} kết quả + match_details)")
+        for label, purge in (("bảng thường", heap_purge), ("phân vùng", partitioned_purge)):
+            steps = ", ".join(f"{step} {seconds:.2f}s" for step, seconds in purge["steps"].items())
+            total = sum(purge["steps"].values())
+            print(f"  {label + ':':13}{total:10.2f} s   ({steps}; WAL {purge['wal_bytes'] / 1024 ** 2:,.1f} MB)")
+        heap_total = sum(heap_purge["steps"].values())
+        partitioned_total = sum(partitioned_purge["steps"].values())
+        print(f"  ⚡ x{heap_total / max(partitioned_total, 0.001):.1f}")
+    finally:
+        if not args.keep:
+            for schema in (HEAP, PARTITIONED):
+                cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark index truy vấn (migration 006): kế hoạch thực thi và độ trễ trước / sau
+
+Tạo schema tạm `bench_indexes` với bản sao cấu trúc documents / check_results /
+match_details (chỉ khóa chính và unique index sẵn có trước migration 006), sinh
+dữ liệu giả lập bằng generate_series, chạy EXPLAIN (ANALYZE, BUFFERS) cho các
+truy vấn mà ứng dụng thực sự dùng, tạo bộ index khai báo trong app/db/models.py
+rồi chạy lại và so sánh. Schema tạm được xóa khi kết thúc (trừ khi --keep).
+
+Không đụng tới dữ liệu thật - nhưng sinh 1 triệu dòng mất vài phút và vài GB đĩa,
+nên chạy trên máy phát triển / staging.
+
+Cách sử dụng:
+    # 1 triệu tài liệu + 1 triệu kết quả kiểm tra (3 triệu match_details)
+    python scripts/benchmark_query_indexes.py
+
+    # Nhanh hơn, in cả kế hoạch đầy đủ
+    python scripts/benchmark_query_indexes.py --rows 100000 --verbose
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.db.database import engine
+from app.db.models import CheckResult, Document, MatchDetail
+
+SCHEMA = "bench_indexes"
+
+TABLES = (Document.__table__, CheckResult.__table__, MatchDetail.__table__)
+
+# Bảng giả lập: cấu trúc giống hệt, chỉ có khóa chính + unique index như trước migration 006
+_CREATE_TABLES_SQL = f"""
+CREATE SCHEMA {SCHEMA};
+SET search_path TO {SCHEMA}, public;
+CREATE TABLE documents (LIKE public.documents INCLUDING DEFAULTS);
+ALTER TABLE documents ADD PRIMARY KEY (id);
+CREATE UNIQUE INDEX ON documents(file_hash_sha256);
+CREATE UNIQUE INDEX ON documents(corpus_row);
+CREATE TABLE check_results (LIKE public.check_results INCLUDING DEFAULTS);
+ALTER TABLE check_results ADD PRIMARY KEY (id);
+CREATE TABLE match_details (LIKE public.match_details INCLUDING DEFAULTS);
+ALTER TABLE match_details ADD PRIMARY KEY (id);
+"""
+
+# uuid xác định theo số thứ tự - truy vấn mẫu tra được đúng dòng cần tìm
+_UUID = "('00000000-0000-4000-8000-' || lpad(to_hex({value}), 12, '0'))::uuid"
+
+# Dòng i được tạo sau dòng i-1 (created_at tăng dần theo thứ tự vật lý, như dữ liệu thật)
+_POPULATE_SQL = f"""
+SET search_path TO {SCHEMA}, public;
+INSERT INTO documents (id, title, s3_path, file_hash_sha256, word_count, language, status,
+                       is_corpus, canonical_id, corpus_row, created_at, indexed_at)
+SELECT {_UUID.format(value="i")}, 'Tài liệu ' || i, '', md5(i::text),
+       200 + (i * 7919) %% 5000, 'vi',
+       CASE WHEN i %% 50 = 0 THEN 'failed' WHEN i %% 20 = 0 THEN 'processing' ELSE 'indexed' END,
+       CASE WHEN i %% 10 < 8 THEN 1 ELSE 0 END,
+       CASE WHEN i %% 25 = 0 THEN {_UUID.format(value="i - 1")} END,
+       CASE WHEN i %% 10 < 8 AND i %% 1000 <> 0 THEN i END,
+       now() - interval '730 days' + interval '730 days' * i / %(rows)s,
+       now() - interval '730 days' + interval '730 days' * i / %(rows)s
+FROM generate_series(1, %(rows)s) AS i;
+
+INSERT INTO check_results (id, user_id, query_doc_id, query_filename, overall_similarity,
+                           match_count, status, created_at)
+SELECT {_UUID.format(value="i")}, {_UUID.format(value="i %% 1000")},
+       CASE WHEN i %% 4 = 0 THEN {_UUID.format(value="i")} END,
+       'bai_' || i || '.docx', (i %% 100) / 100.0, 3, 'completed',
+       now() - interval '730 days' + interval '730 days' * i / %(rows)s
+FROM generate_series(1, %(rows)s) AS i;
+
+INSERT INTO match_details (id, result_id, source_doc_id, similarity_score, created_at)
+SELECT {_UUID.format(value="i * 3 + j")}, {_UUID.format(value="i")},
+       {_UUID.format(value="1 + (i * 31 + j) %% %(rows)s")}, 0.5,
+       now() - interval '730 days' + interval '730 days' * i / %(rows)s
+FROM generate_series(1, %(rows)s) AS i, generate_series(0, 2) AS j;
+
+ANALYZE documents;
+ANALYZE check_results;
+ANALYZE match_details;
+"""
+
+# (tên, truy vấn, nơi dùng trong ứng dụng); %(probe)s = uuid của một dòng có thật ở giữa bảng,
+# %(deep)s = số dòng đứng trước nó
+QUERIES = [
+    ("Lịch sử mới nhất",
+     "SELECT * FROM check_results ORDER BY created_at DESC, id DESC LIMIT 11",
+     "GET /plagiarism/history"),
+    ("Lịch sử trang sâu (OFFSET)",
+     "SELECT * FROM check_results ORDER BY created_at DESC, id DESC LIMIT 11 OFFSET %(deep)s",
+     "GET /plagiarism/history?page=..."),
+    ("Lịch sử trang sâu (keyset)",
+     "SELECT * FROM check_results WHERE (created_at, id) < "
+     "(SELECT created_at, id FROM check_results WHERE id = %(probe)s) "
+     "ORDER BY created_at DESC, id DESC LIMIT 11",
+     "GET /plagiarism/history?cursor=..."),
+    ("Lịch sử của một người dùng",
+     f"SELECT * FROM check_results WHERE user_id = {_UUID.format(value='42')} "
+     f"ORDER BY created_at DESC LIMIT 10",
+     "lịch sử theo người dùng"),
+    ("Kết quả cũ hơn 180 ngày",
+     "SELECT count(*) FROM check_results WHERE created_at < now() - interval '180 days'",
+     "dọn dữ liệu theo thời gian"),
+    ("Chi tiết của một kết quả",
+     "SELECT * FROM match_details WHERE result_id = %(probe)s",
+     "GET /plagiarism/history/{id}, tasks.py"),
+    ("Xóa tài liệu: tham chiếu match_details",
+     "SELECT 1 FROM match_details WHERE source_doc_id = %(probe)s",
+     "ON DELETE SET NULL"),
+    ("Xóa tài liệu: tham chiếu check_results",
+     "SELECT 1 FROM check_results WHERE query_doc_id = %(probe)s",
+     "ON DELETE SET NULL"),
+    ("Xóa tài liệu: tài liệu gần trùng",
+     "SELECT 1 FROM documents WHERE canonical_id = %(probe)s",
+     "ON DELETE SET NULL"),
+    ("Đếm corpus đã lập chỉ mục",
+     "SELECT count(*) FROM documents WHERE is_corpus = 1 AND status = 'indexed'",
+     "scripts/verify_corpus.py, check_wiki_corpus.py"),
+    ("Corpus theo khoảng word_count",
+     "SELECT id, title FROM documents WHERE is_corpus = 1 AND status = 'indexed' "
+     "AND word_count BETWEEN 1000 AND 1010",
+     "lọc corpus theo độ dài"),
+    ("Corpus chưa có corpus_row",
+     "SELECT id FROM documents WHERE is_corpus = 1 AND corpus_row IS NULL",
+     "assign_missing_corpus_rows"),
+]
+
+
+def _plan_summary(plan: dict) -> str:
+    """Nút gốc + nút quét đầu tiên của kế hoạch, ví dụ 'Limit → Index Scan Backward (idx_results_created_id)'"""
+    nodes = [plan["Node Type"]]
+    node = plan
+    while "Plans" in node and ("Scan" not in node["Node Type"] or node["Node Type"] == "Bitmap Heap Scan"):
+        node = node["Plans"][0]
+        nodes.append(node["Node Type"])
+    if node.get("Index Name"):
+        nodes[-1] += f" ({node['Index Name']})"
+    return " → ".join(nodes)
+
+
+def run_queries(cur, params: dict, repeat: int, verbose: bool) -> list:
+    results = []
+    for name, sql, _ in QUERIES:
+        durations = []
+        plan = None
+        for _ in range(repeat):
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+            explained = cur.fetchone()[0][0]
+            durations.append(explained["Execution Time"])
+            plan = explained["Plan"]
+        results.append((statistics.median(durations), _plan_summary(plan), plan))
+        if verbose:
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+            print(f"\n-- {name}\n" + "\n".join(row[0] for row in cur.fetchall()))
+    return results
+
+
+def create_indexes(cur) -> None:
+    for table in TABLES:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+            started = time.perf_counter()
+            cur.execute(ddl)
+            print(f"  🔧 {index.name:36} {time.perf_counter() - started:6.1f}s")
+    for table in TABLES:
+        cur.execute(f"ANALYZE {table.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark index truy vấn (EXPLAIN ANALYZE trước / sau)')
+    parser.add_argument('--rows', type=int, default=1_000_000,
+                        help='Số tài liệu và số kết quả kiểm tra giả lập (mặc định: 1000000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Số lần chạy mỗi truy vấn (lấy trung vị)')
+    parser.add_argument('--verbose', action='store_true', help='In kế hoạch thực thi đầy đủ')
+    parser.add_argument('--keep', action='store_true', help=f'Giữ lại schema {SCHEMA} sau khi chạy')
+    args = parser.parse_args()
+
+    conn = engine.raw_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.execute(_CREATE_TABLES_SQL)
+
+        print(f"📝 Đang sinh {args.rows:,} tài liệu, {args.rows:,} kết quả, {args.rows * 3:,} match_details...")
+        started = time.perf_counter()
+        cur.execute(_POPULATE_SQL, {"rows": args.rows})
+        print(f"   xong trong {time.perf_counter() - started:.1f}s\n")
+
+        cur.execute(f"SET search_path TO {SCHEMA}, public")
+        params = {"probe": f"00000000-0000-4000-8000-{args.rows // 2:012x}", "deep": args.rows // 2}
+
+        print("⏱️  Trước khi tạo index...")
+        before = run_queries(cur, params, args.repeat, args.verbose)
+        print("\n🔨 Tạo index (app/db/models.py):")
+        create_indexes(cur)
+        print("\n⏱️  Sau khi tạo index...")
+        after = run_queries(cur, params, args.repeat, args.verbose)
+
+        print(f"\n{'='*100}")
+        print(f"📊 KẾT QUẢ ({args.rows:,} dòng, trung vị {args.repeat} lần)")
+        print(f"{'='*100}")
+        for (name, _, used_by), (before_ms, before_plan, _), (after_ms, after_plan, _) in zip(QUERIES, before, after):
+            print(f"\n{name}  [{used_by}]")
+            print(f"  trước: {before_ms:10.2f} ms  {before_plan}")
+            print(f"  sau:   {after_ms:10.2f} ms  {after_plan}")
+            print(f"  ⚡ x{before_ms / max(after_ms, 0.001):.1f}")
+    finally:
+        if not args.keep:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -17,30 +17,26 @@ Cách sử dụng:
     # Thu thập bài báo liên quan đến Việt Nam
     python scripts/crawl_arxiv_import.py --vietnamese 100
     
-    # Thu thập và đồng bộ ngay vào Redis
-    python scripts/crawl_arxiv_import.py --ai 50 --sync-redis
+Tài liệu mới được phát lên luồng thay đổi corpus (Redis Stream) và xuất hiện
+trong LSH index của backend đang chạy trong khoảng một giây - không cần restart.
 
 Ví dụ:
     # Test nhanh
     python scripts/crawl_arxiv_import.py --ai 10
     
     # Thu thập lớn theo nhiều chuyên mục
-    python scripts/crawl_arxiv_import.py --multi-category 20 --sync-redis
+    python scripts/crawl_arxiv_import.py --multi-category 20
 """
 import os
 import sys
-import uuid
-import hashlib
 import argparse
 from datetime import datetime
 import logging
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.database import SessionLocal
-from app.db.models import Document
-from app.services.preprocessing.vietnamese_nlp import preprocess_vietnamese
-from app.services.preprocessing.text_normalizer import normalize_text
+from app.services import corpus_store
+from app.services.ingest import IngestEngine, IngestItem
 from crawlers.academic_crawlers import ArxivCrawler
 
 # Cấu hình logging
@@ -51,109 +47,43 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def import_documents_to_db(documents: list, db_session) -> int:
+def import_documents_to_db(documents: list, engine: IngestEngine) -> int:
     """
-    Nhập các tài liệu đã thu thập vào cơ sở dữ liệu PostgreSQL
+    Nhập các tài liệu đã thu thập vào PostgreSQL + Redis bằng ingest engine
     
     Args:
         documents: Danh sách tài liệu từ crawler
-        db_session: Session SQLAlchemy
+        engine: IngestEngine (process pool + COPY + Redis pipeline)
         
     Returns:
         Số lượng tài liệu nhập thành công
     """
-    imported = 0
-    skipped = 0
-    
     logger.info(f"\n{'='*70}")
     logger.info(f"📥 ĐANG NHẬP {len(documents)} TÀI LIỆU VÀO DATABASE")
     logger.info(f"{'='*70}\n")
     
-    for i, doc_data in enumerate(documents, 1):
-        try:
-            # Chuẩn hóa và tokenize văn bản
-            text = doc_data['content']
-            normalized = normalize_text(text)
-            tokens = preprocess_vietnamese(normalized)
-            word_count = len(tokens)
-            
-            # Bỏ qua nếu bài quá ngắn
-            if word_count < 100:
-                logger.warning(f"⚠️  [{i}/{len(documents)}] {doc_data['title'][:40]}... - Quá ngắn ({word_count} từ), bỏ qua")
-                skipped += 1
-                continue
-            
-            # Kiểm tra trùng lặp theo hash
-            text_hash = hashlib.sha256(text.encode()).hexdigest()
-            existing = db_session.query(Document).filter(
-                Document.file_hash_sha256 == text_hash
-            ).first()
-            
-            if existing:
-                logger.warning(f"⚠️  [{i}/{len(documents)}] {doc_data['title'][:40]}... - Trùng lặp, bỏ qua")
-                skipped += 1
-                continue
-            
-            # Tạo bản ghi Document
-            doc = Document(
-                id=uuid.uuid4(),
-                title=doc_data['title'][:500],
-                author=doc_data.get('author', 'Unknown'),
-                university=doc_data.get('university', 'ArXiv'),
-                year=doc_data.get('year', datetime.now().year),
-                original_filename=f"arxiv_{doc_data.get('source', 'unknown')}.txt",
-                file_hash_sha256=text_hash,
-                file_size_bytes=len(text.encode()),
-                word_count=word_count,
-                language='en',                    # ArXiv chủ yếu là tiếng Anh
-                extraction_method='arxiv_crawler',
-                extracted_text=text,
-                is_corpus=1,                      # Đánh dấu là tài liệu corpus
-                status='indexed',
-                indexed_at=datetime.now()
-            )
-            
-            db_session.add(doc)
-            imported += 1
-            
-            logger.info(f"✅ [{imported}/{len(documents)}] {doc_data['title'][:50]}... - {word_count} từ")
-            
-            # Commit theo batch
-            if imported % 50 == 0:
-                try:
-                    db_session.commit()
-                    logger.info(f"   💾 Đã lưu {imported} tài liệu...")
-                except Exception as commit_err:
-                    logger.error(f"❌ Lỗi commit batch: {commit_err}")
-                    db_session.rollback()
-        
-        except Exception as e:
-            logger.error(f"❌ [{i}/{len(documents)}] Lỗi: {e}")
-            db_session.rollback()
-            skipped += 1
-    
-    # Commit lần cuối
-    try:
-        db_session.commit()
-    except Exception as e:
-        logger.error(f"❌ Lỗi commit cuối cùng: {e}")
-        db_session.rollback()
+    items = (
+        IngestItem(
+            title=doc_data['title'],
+            text=doc_data['content'],
+            author=doc_data.get('author', 'Unknown'),
+            university=doc_data.get('university', 'ArXiv'),
+            year=doc_data.get('year', datetime.now().year),
+            original_filename=f"arxiv_{doc_data.get('source', 'unknown')}.txt",
+            extraction_method='arxiv_crawler',
+        )
+        for doc_data in documents
+    )
+    stats = engine.run(items)
     
     logger.info(f"\n{'='*70}")
     logger.info(f"✅ Tóm tắt nhập liệu:")
-    logger.info(f"   • Nhập thành công: {imported} tài liệu")
-    logger.info(f"   • Bỏ qua / Lỗi: {skipped} tài liệu")
-    logger.info(f"   • Tổng đã xử lý: {len(documents)} tài liệu")
+    logger.info(f"   • Nhập thành công: {stats.inserted} tài liệu")
+    logger.info(f"   • Trùng lặp: {stats.duplicates} | Quá ngắn: {stats.too_short} | Lỗi: {stats.failed}")
+    logger.info(f"   • Tổng đã xử lý: {stats.processed} tài liệu ({stats.docs_per_sec:.1f} docs/s)")
     logger.info(f"{'='*70}\n")
     
-    return imported
-
-
-def sync_to_redis():
-    """Hướng dẫn đồng bộ corpus vào Redis LSH index"""
-    logger.info("\n⚠️  ĐỂ ĐỒNG BỘ VÀO REDIS LSH INDEX:")
-    logger.info("   Chạy lệnh: docker restart plagiarism-backend")
-    logger.info("   Hoặc dùng flag --sync-redis ở lần chạy sau\n")
+    return stats.inserted
 
 
 def main():
@@ -178,7 +108,11 @@ def main():
     
     # Tùy chọn bổ sung
     parser.add_argument('--sync-redis', action='store_true',
-                       help='Đồng bộ ngay vào Redis sau khi nhập (yêu cầu Docker)')
+                       help='(Không còn cần thiết) backend tự nhận tài liệu mới qua luồng thay đổi corpus')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Số process xử lý song song (mặc định: số CPU)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                       help='Số tài liệu mỗi lô ghi database (mặc định: 500)')
     
     args = parser.parse_args()
     
@@ -221,26 +155,16 @@ def main():
     
     # Nhập vào database
     if documents:
-        db = SessionLocal()
-        try:
-            imported = import_documents_to_db(documents, db)
-            logger.info(f"✅ Đã nhập thành công {imported} tài liệu vào database")
-            
-            # Đồng bộ Redis nếu có yêu cầu
-            if args.sync_redis:
-                logger.info("\n🔄 Đang đồng bộ vào Redis...")
-                import subprocess
-                try:
-                    subprocess.run(['docker', 'restart', 'plagiarism-backend'], check=True)
-                    logger.info("✅ Đã restart backend - Redis sẽ đồng bộ khi khởi động lại")
-                except Exception as e:
-                    logger.error(f"❌ Không thể restart backend: {e}")
-                    sync_to_redis()
-            else:
-                sync_to_redis()
-                
-        finally:
-            db.close()
+        # Tối thiểu 100 từ cho bài báo ArXiv
+        engine = IngestEngine(
+            redis_client=corpus_store.connect_redis(),
+            workers=args.workers,
+            batch_size=args.batch_size,
+            min_words=100
+        )
+        imported = import_documents_to_db(documents, engine)
+        logger.info(f"✅ Đã nhập thành công {imported} tài liệu vào database")
+        logger.info("📡 Backend đang chạy sẽ nhận tài liệu mới qua luồng thay đổi corpus (~1 giây)")
     else:
         logger.warning("❌ Không thu thập được tài liệu nào. Kết thúc...")
     
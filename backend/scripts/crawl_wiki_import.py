@@ -14,30 +14,36 @@ Cách sử dụng:
     # Thu thập từ một chuyên mục cụ thể
     python scripts/crawl_wiki_import.py --category "Khoa_học_máy_tính" --limit 50
     
-    # Thu thập và đồng bộ ngay vào Redis
-    python scripts/crawl_wiki_import.py --random 100 --sync-redis
+    # Crawler bất đồng bộ: 20 bài/request, 10 request/s, nhập song song khi đang tải
+    python scripts/crawl_wiki_import.py --random 5000 --async --rate 10 --concurrency 4
+    
+    # Ghi lại response để chạy lại offline (benchmark / test)
+    python scripts/crawl_wiki_import.py --random 200 --async --record fixtures/viwiki.json
+    python scripts/crawl_wiki_import.py --random 200 --async --replay fixtures/viwiki.json
+    
+    # Tiếp tục lần chạy trước bị ngắt (checkpoint: bài đã nhập + vị trí trong chuyên mục)
+    python scripts/crawl_wiki_import.py --tech-categories 500 --async --resume
 
 Ví dụ:
     # Test nhanh
     python scripts/crawl_wiki_import.py --random 10
     
     # Thu thập lớn từ các chuyên mục công nghệ
-    python scripts/crawl_wiki_import.py --tech-categories 30 --sync-redis
+    python scripts/crawl_wiki_import.py --tech-categories 30
+
+Tài liệu mới được phát lên luồng thay đổi corpus (Redis Stream) và xuất hiện
+trong LSH index của backend đang chạy trong khoảng một giây - không cần restart.
 """
 import os
 import sys
-import uuid
-import hashlib
 import argparse
 from datetime import datetime
 import logging
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.database import SessionLocal
-from app.db.models import Document
-from app.services.preprocessing.vietnamese_nlp import preprocess_vietnamese
-from app.services.preprocessing.text_normalizer import normalize_text
+from app.services import corpus_store
+from app.services.ingest import IngestCheckpoint, IngestEngine, IngestItem
 from crawlers.viwiki_crawler import ViWikiCrawler
 
 # Cấu hình logging
@@ -48,142 +54,82 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def import_documents_to_db(documents: list, db_session) -> int:
+def import_documents_to_db(documents, engine: IngestEngine, checkpoint: IngestCheckpoint = None) -> int:
     """
-    Nhập các tài liệu đã thu thập vào cơ sở dữ liệu PostgreSQL
+    Nhập các tài liệu đã thu thập vào PostgreSQL + Redis bằng ingest engine
     
     Args:
-        documents: Danh sách tài liệu từ crawler
-        db_session: Session SQLAlchemy
+        documents: Danh sách tài liệu từ crawler, hoặc iterator (crawler bất đồng bộ)
+        engine: IngestEngine (process pool + COPY + Redis pipeline)
+        checkpoint: Checkpoint của lần chạy - bài đã xử lý xong trước đó được bỏ qua
         
     Returns:
         Số lượng tài liệu nhập thành công
     """
-    imported = 0
-    skipped = 0
-    
     logger.info(f"\n{'='*70}")
-    logger.info(f"📥 ĐANG NHẬP {len(documents)} TÀI LIỆU VÀO DATABASE")
+    if isinstance(documents, list):
+        logger.info(f"📥 ĐANG NHẬP {len(documents)} TÀI LIỆU VÀO DATABASE")
+    else:
+        logger.info("📥 ĐANG THU THẬP VÀ NHẬP SONG SONG VÀO DATABASE")
     logger.info(f"{'='*70}\n")
     
-    # Theo dõi hash để tránh trùng lặp trong cùng batch
-    seen_hashes = set()
-    
-    for i, doc_data in enumerate(documents, 1):
-        try:
-            # Chuẩn hóa và tokenize văn bản
-            text = doc_data['content']
-            normalized = normalize_text(text)
-            tokens = preprocess_vietnamese(normalized)
-            word_count = len(tokens)
-            
-            # Bỏ qua bài quá ngắn (tối thiểu 50 từ cho Wikipedia)
-            if word_count < 50:
-                logger.warning(f"⚠️  [{i}/{len(documents)}] {doc_data['title'][:40]}... - Quá ngắn ({word_count} từ), bỏ qua")
-                skipped += 1
-                continue
-            
-            # Kiểm tra trùng lặp theo hash (trong bộ nhớ + database)
-            text_hash = hashlib.sha256(text.encode()).hexdigest()
-            
-            if text_hash in seen_hashes:
-                logger.warning(f"⚠️  [{i}/{len(documents)}] {doc_data['title'][:40]}... - Trùng trong batch, bỏ qua")
-                skipped += 1
-                continue
-            
-            existing = db_session.query(Document).filter(
-                Document.file_hash_sha256 == text_hash
-            ).first()
-            
-            if existing:
-                logger.warning(f"⚠️  [{i}/{len(documents)}] {doc_data['title'][:40]}... - Đã tồn tại trong DB, bỏ qua")
-                seen_hashes.add(text_hash)
-                skipped += 1
-                continue
-            
-            # Tạo bản ghi Document
-            doc = Document(
-                id=uuid.uuid4(),
-                title=doc_data['title'][:500],
-                author=doc_data.get('author', 'Wikipedia Contributors'),
-                university=doc_data.get('university', 'Vietnamese Wikipedia'),
-                year=doc_data.get('year', datetime.now().year),
-                original_filename=f"wiki_{doc_data.get('source', 'unknown')}.txt",
-                file_hash_sha256=text_hash,
-                file_size_bytes=len(text.encode()),
-                word_count=word_count,
-                language='vi',
-                extraction_method='wikipedia_crawler',
-                extracted_text=text,
-                is_corpus=1,          # Đánh dấu là tài liệu corpus
-                status='indexed',
-                indexed_at=datetime.now()
-            )
-            
-            # Commit từng tài liệu một để tránh lỗi lan tỏa
-            db_session.add(doc)
-            try:
-                db_session.commit()
-                seen_hashes.add(text_hash)
-                imported += 1
-                logger.info(f"✅ [{imported}/{len(documents)}] {doc_data['title'][:50]}... - {word_count} từ")
-            except Exception as commit_err:
-                db_session.rollback()
-                logger.warning(f"⚠️  [{i}/{len(documents)}] {doc_data['title'][:40]}... - Lỗi DB, bỏ qua: {str(commit_err)[:80]}")
-                seen_hashes.add(text_hash)
-                skipped += 1
-        
-        except Exception as e:
-            logger.error(f"❌ [{i}/{len(documents)}] Lỗi: {e}")
-            try:
-                db_session.rollback()
-            except Exception:
-                pass
-            skipped += 1
+    items = (
+        IngestItem(
+            title=doc_data['title'],
+            text=doc_data['content'],
+            author=doc_data.get('author', 'Wikipedia Contributors'),
+            university=doc_data.get('university', 'Vietnamese Wikipedia'),
+            year=doc_data.get('year', datetime.now().year),
+            original_filename=f"wiki_{doc_data.get('source', 'unknown')}.txt",
+            extraction_method='wikipedia_crawler',
+            extra={
+                'source': doc_data.get('source'),
+                'category': doc_data.get('category'),
+                'continue': doc_data.get('continue'),
+            },
+        )
+        for doc_data in documents
+        if checkpoint is None or not checkpoint.is_done(doc_data.get('source'))
+    )
+    stats = engine.run(items)
     
     logger.info(f"\n{'='*70}")
     logger.info(f"✅ Tóm tắt nhập liệu:")
-    logger.info(f"   • Nhập thành công: {imported} tài liệu")
-    logger.info(f"   • Bỏ qua / Lỗi: {skipped} tài liệu")
-    logger.info(f"   • Tổng đã xử lý: {len(documents)} tài liệu")
+    logger.info(f"   • Nhập thành công: {stats.inserted} tài liệu")
+    logger.info(f"   • Trùng lặp: {stats.duplicates} | Quá ngắn: {stats.too_short} | Lỗi: {stats.failed}")
+    logger.info(f"   • Tổng đã xử lý: {stats.processed} tài liệu ({stats.docs_per_sec:.1f} docs/s)")
     logger.info(f"{'='*70}\n")
     
-    return imported
+    return stats.inserted
 
 
-def sync_to_redis():
-    """
-    Hướng dẫn đồng bộ corpus vào Redis LSH index
-    """
-    logger.info("\n⚠️  ĐỂ ĐỒNG BỘ VÀO REDIS LSH INDEX:")
-    logger.info("   Chạy lệnh: docker restart plagiarism-backend")
-    logger.info("   Hoặc dùng flag --sync-redis ở lần chạy sau\n")
+def run_name_for(args) -> str:
+    """Tên checkpoint của lần chạy, theo chế độ thu thập"""
+    if args.random:
+        return "crawl_wiki_import:random"
+    if args.tech_categories:
+        return "crawl_wiki_import:tech-categories"
+    return f"crawl_wiki_import:category:{args.category}"
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description='Thu thập bài viết Wikipedia tiếng Việt và nhập vào corpus'
-    )
-    
-    # Chọn chế độ thu thập
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--random', type=int, metavar='N',
-                      help='Thu thập N bài viết ngẫu nhiên')
-    group.add_argument('--tech-categories', type=int, metavar='N',
-                      help='Thu thập N bài từ mỗi chuyên mục công nghệ')
-    group.add_argument('--category', type=str,
-                      help='Thu thập từ một chuyên mục cụ thể (kết hợp với --limit)')
+def category_cursor_recorder(initial: dict):
+    """
+    Tạo hàm cursor_of cho checkpoint: lưu continuation mới nhất đã commit của
+    từng chuyên mục (chỉ có với crawler bất đồng bộ)
+    """
+    cursors = dict(initial)
     
-    # Tùy chọn bổ sung
-    parser.add_argument('--limit', type=int, default=50,
-                       help='Giới hạn cho chế độ chuyên mục (mặc định: 50)')
-    parser.add_argument('--sync-redis', action='store_true',
-                       help='Đồng bộ ngay vào Redis sau khi nhập (yêu cầu Docker)')
-    parser.add_argument('--delay', type=float, default=1.5,
-                       help='Thời gian nghỉ giữa các request (giây, mặc định: 1.5)')
-    
-    args = parser.parse_args()
+    def cursor_of(batch):
+        for item in batch:
+            if item.extra.get('category') and item.extra.get('continue') is not None:
+                cursors[item.extra['category']] = item.extra['continue']
+        return {'categories': dict(cursors)}
     
+    return cursor_of
+
+
+def crawl_documents(args) -> list:
+    """Thu thập tài liệu bằng crawler đồng bộ (ViWikiCrawler) theo chế độ đã chọn"""
     # Khởi tạo crawler
     logger.info("\n🚀 Đang khởi động Wikipedia Crawler...")
     crawler = ViWikiCrawler(delay_seconds=args.delay)
@@ -216,52 +162,151 @@ def main():
         logger.error(f"❌ Lỗi trong quá trình thu thập: {e}")
         sys.exit(1)
     
+    return documents
+
+
+def create_async_stream(args, category_cursors: dict = None):
+    """
+    Tạo stream tài liệu từ crawler bất đồng bộ (chạy trong thread riêng)
+    
+    Args:
+        args: Tham số dòng lệnh
+        category_cursors: Continuation bắt đầu của từng chuyên mục (khi --resume)
+    
+    Returns:
+        (iterator tài liệu, RecordingTransport hoặc None)
+    """
+    from crawlers.async_base_crawler import iterate_in_thread
+    from crawlers.async_viwiki_crawler import AsyncViWikiCrawler
+    from crawlers.replay_transport import RecordingTransport, ReplayTransport
+    
+    recorder = None
+    transport = None
+    if args.replay:
+        transport = ReplayTransport(args.replay)
+    elif args.record:
+        transport = recorder = RecordingTransport(args.record)
+    
+    crawler = AsyncViWikiCrawler(rate=args.rate, concurrency=args.concurrency, transport=transport)
+    
+    if args.random:
+        logger.info(f"Chế độ: Bài viết ngẫu nhiên (n={args.random}, bất đồng bộ)")
+        stream = crawler.stream(limit=args.random)
+    elif args.tech_categories:
+        logger.info(f"Chế độ: Chuyên mục công nghệ ({args.tech_categories} bài mỗi chuyên mục, bất đồng bộ)")
+        stream = crawler.stream_categories(
+            ViWikiCrawler.TECH_CATEGORIES, args.tech_categories, cursors=category_cursors
+        )
+    else:
+        logger.info(f"Chế độ: Chuyên mục cụ thể '{args.category}' (limit={args.limit}, bất đồng bộ)")
+        stream = crawler.stream_categories([args.category], args.limit, cursors=category_cursors)
+    
+    return iterate_in_thread(stream), recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Thu thập bài viết Wikipedia tiếng Việt và nhập vào corpus'
+    )
+    
+    # Chọn chế độ thu thập
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--random', type=int, metavar='N',
+                      help='Thu thập N bài viết ngẫu nhiên')
+    group.add_argument('--tech-categories', type=int, metavar='N',
+                      help='Thu thập N bài từ mỗi chuyên mục công nghệ')
+    group.add_argument('--category', type=str,
+                      help='Thu thập từ một chuyên mục cụ thể (kết hợp với --limit)')
+    
+    # Tùy chọn bổ sung
+    parser.add_argument('--limit', type=int, default=50,
+                       help='Giới hạn cho chế độ chuyên mục (mặc định: 50)')
+    parser.add_argument('--sync-redis', action='store_true',
+                       help='(Không còn cần thiết) backend tự nhận tài liệu mới qua luồng thay đổi corpus')
+    parser.add_argument('--delay', type=float, default=1.5,
+                       help='Thời gian nghỉ giữa các request (giây, mặc định: 1.5)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Số process xử lý song song (mặc định: số CPU)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                       help='Số tài liệu mỗi lô ghi database (mặc định: 500)')
+    
+    # Crawler bất đồng bộ
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                       help='Dùng crawler bất đồng bộ (truy vấn theo lô, nhập song song khi đang tải)')
+    parser.add_argument('--rate', type=float, default=5.0,
+                       help='Số request tối đa mỗi giây với --async (mặc định: 5)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                       help='Số request đồng thời với --async (mặc định: 4)')
+    parser.add_argument('--record', type=str, default=None,
+                       help='Ghi lại response HTTP vào file JSON (với --async)')
+    parser.add_argument('--replay', type=str, default=None,
+                       help='Phát lại response từ file JSON thay vì gọi mạng (với --async)')
+    
+    # Checkpoint
+    parser.add_argument('--resume', action='store_true',
+                       help='Tiếp tục từ checkpoint của lần chạy trước cùng chế độ')
+    parser.add_argument('--checkpoint', type=str, default='ingest_checkpoints.sqlite3',
+                       help='File SQLite lưu checkpoint (mặc định: ingest_checkpoints.sqlite3)')
+    
+    args = parser.parse_args()
+    
+    if (args.record or args.replay) and not args.use_async:
+        parser.error('--record / --replay chỉ dùng được với --async')
+    
+    checkpoint = IngestCheckpoint.open(run_name_for(args), path=args.checkpoint, resume=args.resume)
+    category_cursors = {}
+    if args.resume:
+        category_cursors = (checkpoint.cursor or {}).get('categories', {})
+        if args.random:
+            # Chỉ thu thập phần còn thiếu so với lần chạy trước
+            done = checkpoint.done_count()
+            args.random = max(0, args.random - done)
+            logger.info(f"⏩ Tiếp tục từ checkpoint: đã xử lý {done} bài, còn {args.random} bài")
+            if args.random == 0:
+                logger.info("✅ Đã thu thập đủ ở lần chạy trước")
+                sys.exit(0)
+        elif category_cursors:
+            logger.info(f"⏩ Tiếp tục từ checkpoint: {len(category_cursors)} chuyên mục đã có vị trí")
+    
+    recorder = None
+    if args.use_async:
+        logger.info("\n🚀 Đang khởi động Wikipedia Crawler (bất đồng bộ)...")
+        documents, recorder = create_async_stream(args, category_cursors)
+    else:
+        documents = crawl_documents(args)
+    
     # Kiểm tra có tài liệu không
     if not documents:
         logger.warning("❌ Không thu thập được tài liệu nào. Kết thúc...")
         sys.exit(1)
     
-    # Nhập vào database
-    db = SessionLocal()
+    # Nhập vào database (tối thiểu 50 từ cho Wikipedia)
+    engine = IngestEngine(
+        redis_client=corpus_store.connect_redis(),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        min_words=50,
+        on_batch_done=checkpoint.batch_recorder(
+            key_of=lambda item: item.extra.get('source'),
+            cursor_of=category_cursor_recorder(category_cursors)
+        )
+    )
     try:
-        imported_count = import_documents_to_db(documents, db)
+        imported_count = import_documents_to_db(documents, engine, checkpoint)
+        checkpoint.mark_finished()
         
         if imported_count > 0:
             logger.info(f"✅ Đã nhập thành công {imported_count} tài liệu vào database")
-            
-            # Đồng bộ Redis nếu có yêu cầu
-            if args.sync_redis:
-                logger.info("\n🔄 Đang đồng bộ vào Redis LSH index...")
-                import subprocess
-                try:
-                    result = subprocess.run(
-                        ['docker', 'restart', 'plagiarism-backend'],
-                        capture_output=True,
-                        text=True,
-                        timeout=30
-                    )
-                    if result.returncode == 0:
-                        logger.info("✅ Đã restart backend thành công")
-                        logger.info("⏳ Đang chờ LSH index tải lại (15 giây)...")
-                        import time
-                        time.sleep(15)
-                        logger.info("✅ Corpus đã sẵn sàng trong LSH index")
-                    else:
-                        logger.error(f"❌ Không thể restart backend: {result.stderr}")
-                        sync_to_redis()
-                except Exception as e:
-                    logger.error(f"❌ Lỗi khi restart backend: {e}")
-                    sync_to_redis()
-            else:
-                sync_to_redis()
+            logger.info("📡 Backend đang chạy sẽ nhận tài liệu mới qua luồng thay đổi corpus (~1 giây)")
         
     except Exception as e:
         logger.error(f"❌ Lỗi khi nhập dữ liệu: {e}")
-        db.rollback()
         sys.exit(1)
-    
     finally:
-        db.close()
+        checkpoint.close()
+        if recorder is not None:
+            recorder.save()
+            logger.info(f"💾 Đã ghi lại response HTTP vào {recorder.path}")
     
     logger.info("\n✅ Hoàn tất!\n")
 
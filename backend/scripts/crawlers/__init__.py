@@ -5,5 +5,10 @@ Dùng để thu thập tài liệu học thuật và corpus tiếng Việt
 from .base_crawler import BaseCrawler
 from .academic_crawlers import ArxivCrawler
 from .viwiki_crawler import ViWikiCrawler
+from .async_base_crawler import AsyncBaseCrawler, TokenBucket
+from .async_viwiki_crawler import AsyncViWikiCrawler
 
-__all__ = ['BaseCrawler', 'ArxivCrawler', 'ViWikiCrawler']
\ No newline at end of file
+__all__ = [
+    'BaseCrawler', 'ArxivCrawler', 'ViWikiCrawler',
+    'AsyncBaseCrawler', 'TokenBucket', 'AsyncViWikiCrawler',
+]
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Đọc snapshot metadata ArXiv (arxiv-metadata-oai-snapshot.json) dạng streaming
+
+File snapshot công khai (Kaggle / bucket gs://arxiv-dataset) là JSON-lines,
+mỗi dòng một bài báo, hơn 2 triệu dòng. Đọc từng dòng ở chế độ nhị phân nên
+bộ nhớ không đổi và biết chính xác vị trí byte sau mỗi bản ghi - dùng để
+tiếp tục từ chỗ đã dừng (seek thẳng tới offset, không phải đọc lại từ đầu).
+
+Cách sử dụng:
+    from crawlers.arxiv_snapshot_reader import iter_snapshot_records
+
+    for record in iter_snapshot_records('arxiv-metadata-oai-snapshot.json', categories=['cs']):
+        print(record['arxiv_id'], record['title'], record['offset'])
+"""
+import json
+import re
+from typing import Dict, Iterable, Iterator, Optional
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+
+
+def _clean(text: Optional[str]) -> str:
+    """Gộp xuống dòng / khoảng trắng thừa (tiêu đề và tóm tắt bị ngắt dòng cứng)"""
+    return _WHITESPACE_RE.sub(' ', text or '').strip()
+
+
+def _matches_category(record_categories: str, categories: Optional[set]) -> bool:
+    """
+    Khớp danh mục: 'cs' khớp mọi 'cs.*', 'cs.CL' chỉ khớp chính nó
+    """
+    if not categories:
+        return True
+    for cat in record_categories.split():
+        if cat in categories or cat.split('.', 1)[0] in categories:
+            return True
+    return False
+
+
+def _record_year(record: Dict) -> Optional[int]:
+    """Năm của phiên bản đầu tiên (v1), dự phòng bằng update_date"""
+    versions = record.get('versions') or []
+    if versions and versions[0].get('created'):
+        match = _YEAR_RE.search(versions[0]['created'])
+        if match:
+            return int(match.group(0))
+    update_date = record.get('update_date') or ''
+    if update_date[:4].isdigit():
+        return int(update_date[:4])
+    return None
+
+
+def _format_authors(record: Dict, max_authors: int = 3) -> str:
+    """'Tên Họ, Tên Họ, Tên Họ et al.' - giống định dạng của ArxivCrawler"""
+    parsed = record.get('authors_parsed') or []
+    if parsed:
+        names = [' '.join(p for p in (parts[1], parts[0]) if p) for parts in parsed if parts]
+    else:
+        names = [name.strip() for name in (record.get('authors') or '').split(',') if name.strip()]
+
+    author = ', '.join(names[:max_authors])
+    if len(names) > max_authors:
+        author += ' et al.'
+    return _clean(author) or 'Unknown'
+
+
+def iter_snapshot_records(
+    path: str,
+    categories: Optional[Iterable[str]] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    start_offset: int = 0,
+    limit: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Duyệt các bài báo trong snapshot theo bộ lọc
+
+    Args:
+        path: Đường dẫn file JSON-lines (không nén - cần seek theo byte)
+        categories: Danh mục cần lấy, ví dụ ['cs', 'math.ST'] (None = tất cả)
+        year_from: Năm nhỏ nhất (theo phiên bản v1)
+        year_to: Năm lớn nhất
+        start_offset: Vị trí byte bắt đầu đọc (từ trường 'offset' của lần chạy trước)
+        limit: Số bản ghi tối đa trả về
+
+    Yields:
+        Dict gồm arxiv_id, title, abstract, author, year, categories và
+        offset (vị trí byte ngay sau bản ghi này)
+    """
+    wanted = set(categories) if categories else None
+    yielded = 0
+
+    with open(path, 'rb') as stream:
+        stream.seek(start_offset)
+        offset = start_offset
+
+        for line in stream:
+            offset += len(line)
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+
+            if not _matches_category(record.get('categories') or '', wanted):
+                continue
+
+            year = _record_year(record)
+            if year_from and (year is None or year < year_from):
+                continue
+            if year_to and (year is None or year > year_to):
+                continue
+
+            title = _clean(record.get('title'))
+            abstract = _clean(record.get('abstract'))
+            if not title or not abstract:
+                continue
+
+            yield {
+                'arxiv_id': record.get('id'),
+                'title': title,
+                'abstract': abstract,
+                'author': _format_authors(record),
+                'year': year,
+                'categories': record.get('categories') or '',
+                'offset': offset,
+            }
+            yielded += 1
+            if limit and yielded >= limit:
+                return
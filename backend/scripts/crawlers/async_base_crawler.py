@@ -0,0 +1,212 @@
+"""
+Lớp cơ sở cho crawler bất đồng bộ (asyncio + httpx)
+
+So với BaseCrawler (requests + time.sleep):
+- Nhiều request chạy song song trên một connection pool giới hạn
+- Giới hạn tốc độ bằng token bucket (tổng số request/giây), không ngủ cố định
+- Thử lại với exponential backoff có jitter, tôn trọng header Retry-After
+- Kết quả được trả ra dạng stream để ingest engine xử lý ngay trong lúc đang thu thập
+
+Cách sử dụng:
+    crawler = AsyncViWikiCrawler(rate=10, concurrency=4)
+    for doc in iterate_in_thread(crawler.stream(limit=1000)):
+        ...
+"""
+import asyncio
+import queue
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+import httpx
+
+USER_AGENT = 'PlagiarismGuard/2.0 (Educational Research; Contact: github.com/plagiarismguard) python-httpx'
+
+# Mã lỗi tạm thời nên thử lại
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Bộ giới hạn tốc độ token bucket (dùng chung cho mọi coroutine của crawler)
+
+    Args:
+        rate: Số token nạp lại mỗi giây (= số request/giây trung bình)
+        capacity: Số token tối đa (cho phép dồn request tức thời)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Chờ đến khi có token rồi lấy một token"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AsyncBaseCrawler(ABC):
+    """Lớp cơ sở cho các crawler bất đồng bộ"""
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        timeout: float = 30.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Args:
+            rate: Số request tối đa mỗi giây (toàn crawler)
+            concurrency: Số request chạy đồng thời / số kết nối tối đa
+            max_retries: Số lần thử tối đa cho mỗi request
+            timeout: Timeout mỗi request (giây)
+            backoff_base: Thời gian chờ cơ sở khi thử lại (giây)
+            backoff_max: Thời gian chờ tối đa giữa hai lần thử (giây)
+            transport: Transport httpx thay thế (ví dụ ReplayTransport khi test offline)
+        """
+        self.rate = rate
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.transport = transport
+        self.docs_crawled = 0
+        self.requests_sent = 0
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency
+            ),
+            transport=self.transport
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full jitter: chờ ngẫu nhiên trong [0, min(max, base * 2^attempt)]"""
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _get_json(
+        self,
+        client: httpx.AsyncClient,
+        limiter: TokenBucket,
+        url: str,
+        params: Dict
+    ) -> Optional[Dict]:
+        """GET một URL trả về JSON, có giới hạn tốc độ và thử lại"""
+        for attempt in range(self.max_retries):
+            await limiter.acquire()
+            self.requests_sent += 1
+            retry_after = None
+            try:
+                response = await client.get(url, params=params)
+                if response.status_code in RETRY_STATUS_CODES:
+                    retry_after = response.headers.get('Retry-After')
+                    raise httpx.HTTPStatusError(
+                        f"HTTP {response.status_code}", request=response.request, response=response
+                    )
+                response.raise_for_status()
+                return response.json()
+            except (httpx.TransportError, httpx.HTTPStatusError, ValueError) as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status is not None and status not in RETRY_STATUS_CODES:
+                    print(f"❌ Lỗi không thể thử lại ({status}): {url}")
+                    return None
+                if attempt == self.max_retries - 1:
+                    print(f"❌ Thất bại sau {self.max_retries} lần thử: {url}")
+                    print(f"   Lỗi: {e}")
+                    return None
+                wait_time = self._backoff(attempt, retry_after)
+                print(f"⚠️  Thử lại lần {attempt + 1}/{self.max_retries} sau {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+        return None
+
+    @abstractmethod
+    def stream(self, limit: int = 100) -> AsyncIterator[Dict]:
+        """
+        Thu thập tài liệu dạng stream
+
+        Yields:
+            Dict với các trường: title, content, author, year, university, source
+        """
+
+    def format_document(
+        self,
+        title: str,
+        content: str,
+        author: str = "Unknown",
+        year: Optional[int] = None,
+        university: str = "Unknown",
+        source: str = "Unknown"
+    ) -> Dict:
+        """Định dạng tài liệu theo chuẩn thống nhất (giống BaseCrawler)"""
+        return {
+            "title": title.strip(),
+            "content": content.strip(),
+            "author": author.strip(),
+            "year": year or datetime.now().year,
+            "university": university.strip(),
+            "source": source,
+            "crawled_at": datetime.now().isoformat()
+        }
+
+
+_STREAM_END = object()
+
+
+def iterate_in_thread(async_iterable: AsyncIterator[Dict], buffer_size: int = 1000) -> Iterator[Dict]:
+    """
+    Chạy một async iterator trong thread riêng và trả về iterator đồng bộ
+
+    Dùng để nối crawler bất đồng bộ với IngestEngine.run: crawler tiếp tục tải
+    trong khi engine xử lý / ghi các lô trước. Hàng đợi có giới hạn để crawler
+    không chạy quá xa so với tốc độ nhập.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+    errors = []
+
+    async def pump():
+        try:
+            async for item in async_iterable:
+                await asyncio.to_thread(buffer.put, item)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            await asyncio.to_thread(buffer.put, _STREAM_END)
+
+    thread = threading.Thread(target=lambda: asyncio.run(pump()), daemon=True)
+    thread.start()
+
+    while True:
+        item = buffer.get()
+        if item is _STREAM_END:
+            break
+        yield item
+
+    thread.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,90 @@
+"""
+Ghi lại / phát lại response HTTP cho crawler bất đồng bộ
+
+Cho phép chạy crawler (và cả pipeline nhập) offline, lặp lại được:
+- RecordingTransport: chuyển request ra mạng thật và lưu response vào file JSON
+- ReplayTransport: trả response đã lưu, không cần mạng
+
+Request được nhận diện theo method + URL + tham số query (đã sắp xếp). Cùng một
+request có thể được ghi nhiều lần (ví dụ generator=random) - khi phát lại,
+các response được trả lần lượt; hết response thì trả 404.
+
+Cách sử dụng:
+    # Ghi lại
+    recorder = RecordingTransport('fixtures/viwiki.json')
+    crawler = AsyncViWikiCrawler(transport=recorder)
+    ...
+    recorder.save()
+
+    # Phát lại
+    crawler = AsyncViWikiCrawler(transport=ReplayTransport('fixtures/viwiki.json'))
+"""
+import json
+import os
+from collections import defaultdict, deque
+from typing import Dict, List
+
+import httpx
+
+
+def request_key(request: httpx.Request) -> str:
+    """Khóa ổn định cho một request: thứ tự tham số query không ảnh hưởng"""
+    params = sorted(request.url.params.multi_items())
+    query = '&'.join(f"{k}={v}" for k, v in params)
+    return f"{request.method} {request.url.scheme}://{request.url.host}{request.url.path}?{query}"
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport chuyển tiếp ra mạng và ghi lại mọi response"""
+
+    def __init__(self, path: str, transport: httpx.AsyncBaseTransport = None):
+        self.path = path
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._records: Dict[str, List[Dict]] = defaultdict(list)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        body = await response.aread()
+        self._records[request_key(request)].append({
+            'status_code': response.status_code,
+            'headers': {'content-type': response.headers.get('content-type', 'application/json')},
+            'body': body.decode('utf-8', errors='replace'),
+        })
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=body,
+            request=request
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def save(self) -> None:
+        """Ghi các response đã thu được ra file JSON"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self._records, f, ensure_ascii=False, indent=1)
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Transport trả về response đã ghi - thay thế mạng khi test / benchmark"""
+
+    def __init__(self, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        self._responses = {key: deque(items) for key, items in records.items()}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        queue = self._responses.get(request_key(request))
+        if not queue:
+            return httpx.Response(404, json={'error': 'not recorded'}, request=request)
+        record = queue.popleft()
+        return httpx.Response(
+            status_code=record['status_code'],
+            headers=record.get('headers'),
+            content=record['body'].encode('utf-8'),
+            request=request
+        )
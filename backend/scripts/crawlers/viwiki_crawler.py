@@ -22,24 +22,39 @@ from typing import List, Dict, Optional
 from .base_crawler import BaseCrawler
 
 
+def clean_extract(text: str) -> str:
+    """Làm sạch văn bản Wikipedia (extract dạng văn bản thuần từ MediaWiki API)"""
+    # Xóa nhiều dòng trống liên tiếp
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    # Xóa tiêu đề dạng == Tiêu đề ==
+    text = re.sub(r'={2,}.*?={2,}', '', text)
+    # Xóa số tham chiếu [1], [2], ...
+    text = re.sub(r'\[\d+\]', '', text)
+    # Xóa chú thích ngôn ngữ (tiếng Anh: ...)
+    text = re.sub(r'\(tiếng [^)]+\)', '', text)
+    return text.strip()
+
+
 class ViWikiCrawler(BaseCrawler):
     """Crawler cho Wikipedia tiếng Việt"""
     
+    # Các chuyên mục Công nghệ & Khoa học để thu thập có chủ đích
+    TECH_CATEGORIES = [
+        'Khoa_học_máy_tính',
+        'Trí_tuệ_nhân_tạo',
+        'Công_nghệ_thông_tin',
+        'Lập_trình_máy_tính',
+        'Khoa_học_dữ_liệu',
+        'Mạng_máy_tính',
+        'Phần_mềm',
+        'Cơ_sở_dữ_liệu'
+    ]
+    
     def __init__(self, delay_seconds: float = 1.5, **kwargs):
         super().__init__(delay_seconds=delay_seconds, **kwargs)
         self.api_url = "https://vi.wikipedia.org/w/api.php"
         
-        # Các chuyên mục Công nghệ & Khoa học để thu thập có chủ đích
-        self.tech_categories = [
-            'Khoa_học_máy_tính',
-            'Trí_tuệ_nhân_tạo',
-            'Công_nghệ_thông_tin',
-            'Lập_trình_máy_tính',
-            'Khoa_học_dữ_liệu',
-            'Mạng_máy_tính',
-            'Phần_mềm',
-            'Cơ_sở_dữ_liệu'
-        ]
+        self.tech_categories = list(self.TECH_CATEGORIES)
         
     def crawl(self, limit: int = 100) -> List[Dict]:
         """
@@ -253,15 +268,7 @@ class ViWikiCrawler(BaseCrawler):
     
     def _clean_text(self, text: str) -> str:
         """Làm sạch văn bản Wikipedia"""
-        # Xóa nhiều dòng trống liên tiếp
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        # Xóa tiêu đề dạng == Tiêu đề ==
-        text = re.sub(r'={2,}.*?={2,}', '', text)
-        # Xóa số tham chiếu [1], [2], ...
-        text = re.sub(r'\[\d+\]', '', text)
-        # Xóa chú thích ngôn ngữ (tiếng Anh: ...)
-        text = re.sub(r'\(tiếng [^)]+\)', '', text)
-        return text.strip()
+        return clean_extract(text)
 
 
 if __name__ == "__main__":
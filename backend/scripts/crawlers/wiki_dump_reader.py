@@ -0,0 +1,104 @@
+"""
+Đọc file dump Wikipedia (pages-articles.xml.bz2) dạng streaming
+
+Giải nén bz2 và parse XML tăng dần (iterparse), giải phóng từng <page> ngay
+sau khi đọc xong nên bộ nhớ không phụ thuộc kích thước dump. Không cần mạng,
+kết quả lặp lại được giữa các lần chạy.
+
+Cách sử dụng:
+    from crawlers.wiki_dump_reader import iter_dump_pages
+
+    for page in iter_dump_pages('viwiki-latest-pages-articles.xml.bz2'):
+        print(page['title'], len(page['wikitext']))
+"""
+import bz2
+import gzip
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional
+
+
+def _open_dump(path: str):
+    """Mở dump ở dạng nhị phân, tự giải nén theo phần mở rộng"""
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _local_name(tag: str) -> str:
+    """Bỏ namespace XML: '{http://www.mediawiki.org/xml/export-0.10/}page' → 'page'"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_dump_pages(
+    path: str,
+    namespaces: tuple = ('0',),
+    skip_redirects: bool = True,
+    limit: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Duyệt các trang trong file dump MediaWiki
+
+    Args:
+        path: Đường dẫn file dump (.xml, .xml.bz2 hoặc .xml.gz)
+        namespaces: Các namespace cần lấy (mặc định '0' = bài viết)
+        skip_redirects: Bỏ qua trang đổi hướng
+        limit: Số trang tối đa (None = toàn bộ dump)
+
+    Yields:
+        Dict gồm page_id, title, wikitext, timestamp
+    """
+    yielded = 0
+    with _open_dump(path) as stream:
+        context = ET.iterparse(stream, events=('start', 'end'))
+        _, root = next(context)
+
+        page: Dict = {}
+        in_revision = False
+
+        for event, elem in context:
+            name = _local_name(elem.tag)
+
+            if event == 'start':
+                if name == 'page':
+                    page = {}
+                elif name == 'revision':
+                    in_revision = True
+                continue
+
+            # event == 'end'
+            if name == 'title':
+                page['title'] = elem.text or ''
+            elif name == 'ns':
+                page['ns'] = elem.text
+            elif name == 'id' and not in_revision and 'page_id' not in page:
+                page['page_id'] = elem.text
+            elif name == 'redirect':
+                page['redirect'] = True
+            elif name == 'timestamp' and in_revision:
+                page['timestamp'] = elem.text
+            elif name == 'text' and in_revision:
+                page['wikitext'] = elem.text or ''
+            elif name == 'revision':
+                in_revision = False
+            elif name == 'page':
+                # Giải phóng cây XML đã đọc để giữ bộ nhớ ổn định
+                root.clear()
+
+                if page.get('ns') not in namespaces:
+                    continue
+                if skip_redirects and page.get('redirect'):
+                    continue
+                if not page.get('wikitext'):
+                    continue
+
+                yield {
+                    'page_id': page.get('page_id'),
+                    'title': page.get('title', ''),
+                    'wikitext': page['wikitext'],
+                    'timestamp': page.get('timestamp'),
+                }
+                yielded += 1
+                if limit and yielded >= limit:
+                    return
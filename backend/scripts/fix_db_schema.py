@@ -2,6 +2,7 @@
 """
 Script sửa chữa schema cơ sở dữ liệu
 Kiểm tra và tự động thêm các cột bị thiếu trong bảng documents
+và các bảng phụ (document_signatures, document_texts, match_segments, ...)
 """
 
 import os
@@ -27,7 +28,9 @@ def fix_db_schema():
         ("error_message", "TEXT"),
         ("topic", "VARCHAR(255)"),
         ("owner_id", "UUID"),
-        ("s3_path", "VARCHAR(500)")
+        ("s3_path", "VARCHAR(500)"),
+        ("canonical_id", "UUID"),
+        ("corpus_row", "INTEGER")
     ]
     
     try:
@@ -60,6 +63,119 @@ def fix_db_schema():
                 else:
                     print(f"ℹ️  Cột {col_name} đã tồn tại.")
             
+            # Sequence + unique index của corpus_row, cấp corpus_row cho tài liệu corpus cũ (migration 004)
+            try:
+                conn.execute(text("CREATE SEQUENCE IF NOT EXISTS documents_corpus_row_seq AS INTEGER;"))
+                assigned = conn.execute(text(
+                    "UPDATE documents SET corpus_row = nextval('documents_corpus_row_seq') "
+                    "WHERE is_corpus = 1 AND corpus_row IS NULL;"
+                )).rowcount
+                conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_corpus_row ON documents(corpus_row);"))
+                conn.commit()
+                if assigned:
+                    print(f"✅ Đã cấp corpus_row cho {assigned} tài liệu corpus (chạy scripts/migrate_corpus_rows.py để đổi key Redis).")
+                else:
+                    print("ℹ️  corpus_row đã sẵn sàng.")
+            except Exception as e:
+                conn.rollback()
+                print(f"⚠️  Lỗi khi tạo sequence / index corpus_row: {e}")
+            
+            # Bảng chữ ký MinHash lưu trong PostgreSQL (migration 003)
+            res = conn.execute(text("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'document_signatures');"))
+            if not res.scalar():
+                print("➕ Đang tạo bảng bị thiếu: document_signatures")
+                try:
+                    from app.db.models import DocumentSignature
+                    DocumentSignature.__table__.create(conn)
+                    conn.commit()
+                    print("✅ Đã tạo bảng document_signatures thành công.")
+                except Exception as e:
+                    print(f"⚠️  Lỗi khi tạo bảng document_signatures: {e}")
+            else:
+                print("ℹ️  Bảng document_signatures đã tồn tại.")
+            
+            # Văn bản nén + dictionary zstd (migration 005)
+            from app.db.models import DocumentText, TextDictionary
+            for table in (TextDictionary.__table__, DocumentText.__table__):
+                res = conn.execute(text(f"SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = '{table.name}');"))
+                if not res.scalar():
+                    print(f"➕ Đang tạo bảng bị thiếu: {table.name}")
+                    try:
+                        table.create(conn)
+                        conn.commit()
+                        print(f"✅ Đã tạo bảng {table.name} thành công.")
+                    except Exception as e:
+                        conn.rollback()
+                        print(f"⚠️  Lỗi khi tạo bảng {table.name}: {e}")
+                else:
+                    print(f"ℹ️  Bảng {table.name} đã tồn tại.")
+            
+            # Lịch sử kiểm tra phân vùng theo tháng (migration 009) - chép lại dữ liệu, không tự chạy
+            partitioned = conn.execute(text(
+                "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('check_results');"
+            )).scalar()
+            if not partitioned:
+                print("⚠️  check_results chưa phân vùng theo tháng - dừng backend / worker rồi chạy "
+                      "psql -f migrations/009_partition_history.sql")
+            
+            # Phiên bản bộ tách từ của match (migration 010) - match đã có được tính với phiên bản 1
+            exists = conn.execute(text(
+                "SELECT count(*) FROM information_schema.columns "
+                "WHERE table_name = 'match_details' AND column_name = 'tokenizer_version';"
+            )).scalar()
+            if exists == 0:
+                print("➕ Đang thêm cột bị thiếu: match_details.tokenizer_version (SMALLINT)")
+                try:
+                    conn.execute(text("ALTER TABLE match_details ADD COLUMN tokenizer_version SMALLINT DEFAULT 1;"))
+                    conn.execute(text("ALTER TABLE match_details ALTER COLUMN tokenizer_version DROP DEFAULT;"))
+                    conn.commit()
+                    print("✅ Đã thêm cột tokenizer_version thành công.")
+                except Exception as e:
+                    conn.rollback()
+                    print(f"⚠️  Lỗi khi thêm cột tokenizer_version: {e}")
+            else:
+                print("ℹ️  Cột match_details.tokenizer_version đã tồn tại.")
+            
+            # Vị trí đoạn trùng khớp + token văn bản kiểm tra (migration 008)
+            from app.db.models import CheckTokens, MatchSegment
+            for table in (MatchSegment.__table__, CheckTokens.__table__):
+                res = conn.execute(text(f"SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = '{table.name}');"))
+                if not res.scalar() and not partitioned:
+                    # Khóa ngoại của model tham chiếu (id, created_at) - chỉ có sau migration 009
+                    print(f"⚠️  Bỏ qua bảng {table.name} cho tới khi chạy migration 009")
+                elif not res.scalar():
+                    print(f"➕ Đang tạo bảng bị thiếu: {table.name}")
+                    try:
+                        table.create(conn)
+                        conn.commit()
+                        print(f"✅ Đã tạo bảng {table.name} thành công.")
+                    except Exception as e:
+                        conn.rollback()
+                        print(f"⚠️  Lỗi khi tạo bảng {table.name}: {e}")
+                else:
+                    print(f"ℹ️  Bảng {table.name} đã tồn tại.")
+            
+            # Index theo truy vấn (migration 006) - khai báo trong __table_args__ của model
+            from app.db.models import CheckResult, Document, MatchDetail
+            for table in (Document.__table__, CheckResult.__table__, MatchDetail.__table__):
+                for index in sorted(table.indexes, key=lambda index: index.name):
+                    try:
+                        index.create(conn, checkfirst=True)
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        print(f"⚠️  Lỗi khi tạo index {index.name}: {e}")
+            for name in ("idx_documents_hash", "idx_documents_status", "idx_results_user", "idx_results_status",
+                         "idx_results_created"):
+                conn.execute(text(f"DROP INDEX IF EXISTS {name};"))
+            conn.commit()
+            print("✅ Đã kiểm tra index theo truy vấn.")
+            
+            if partitioned:
+                from app.services.history_partitions import ensure_partitions
+                created = ensure_partitions(engine)
+                print(f"✅ Phân vùng lịch sử đã sẵn sàng ({len(created)} phân vùng mới).")
+            
             print("\n🎉 Hoàn tất cập nhật schema cơ sở dữ liệu!")
             
     except Exception as e:
@@ -11,20 +11,18 @@ Cách sử dụng:
     # Từ máy host (copy file vào container trước):
     docker cp /my/corpus plagiarism-backend:/data/corpus
     docker exec plagiarism-backend python scripts/import_custom_corpus.py /data/corpus
-    docker restart plagiarism-backend
+
+Backend đang chạy nhận tài liệu mới qua luồng thay đổi corpus - không cần restart.
 """
 import os
 import sys
-import uuid
+import logging
 from pathlib import Path
-from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.database import SessionLocal
-from app.db.models import Document
-from app.services.preprocessing.vietnamese_nlp import preprocess_vietnamese
-from app.services.preprocessing.text_normalizer import normalize_text
+from app.services import corpus_store
+from app.services.ingest import IngestEngine, IngestItem
 
 
 def import_corpus(folder_path: str, author='Unknown', university='Unknown', year=2024):
@@ -41,89 +39,46 @@ def import_corpus(folder_path: str, author='Unknown', university='Unknown', year
         print(f"❌ Không tìm thấy thư mục: {folder_path}")
         return
     
-    db = SessionLocal()
-    count = 0
-    failed = 0
-    
     print(f"\n{'='*70}")
     print(f"📥 ĐANG NHẬP CORPUS TÙY CHỈNH")
     print(f"{'='*70}")
     print(f"Nguồn: {folder_path}\n")
     
-    txt_files = list(Path(folder_path).glob('*.txt'))
+    txt_files = sorted(Path(folder_path).glob('*.txt'))
     total = len(txt_files)
     
     if total == 0:
         print("❌ Không tìm thấy file .txt nào trong thư mục")
-        db.close()
         return
     
     print(f"Tìm thấy {total} file văn bản\n")
     
-    for txt_file in txt_files:
-        try:
-            # Đọc nội dung file
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                text = f.read().strip()
-            
-            if not text:
-                print(f"⚠️  [{count+1}/{total}] {txt_file.name} - File rỗng, bỏ qua")
-                failed += 1
-                continue
-            
-            # Chuẩn hóa và tokenize văn bản
-            normalized = normalize_text(text)
-            tokens = preprocess_vietnamese(normalized)
-            word_count = len(tokens)
-            
-            # Kiểm tra độ dài (khuyến nghị tối thiểu 100 từ)
-            if word_count < 100:
-                print(f"⚠️  [{count+1}/{total}] {txt_file.name} - Quá ngắn ({word_count} từ), bỏ qua")
-                failed += 1
-                continue
-            
-            # Tạo bản ghi Document
-            doc = Document(
-                id=uuid.uuid4(),
-                title=txt_file.stem[:500],   # Dùng tên file làm tiêu đề (tối đa 500 ký tự)
-                author=author,
-                university=university,
-                year=year,
-                extracted_text=text,
-                word_count=word_count,
-                status='indexed',
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
-            
-            db.add(doc)
-            count += 1
-            
-            # Hiển thị tiến độ
-            print(f"✅ [{count}/{total}] {txt_file.name} - {word_count} từ")
-            
-            # Commit theo batch
-            if count % 100 == 0:
-                db.commit()
-                print(f"   💾 Đã lưu {count} tài liệu...")
-        
-        except Exception as e:
-            print(f"❌ [{count+1}/{total}] {txt_file.name} - Lỗi: {e}")
-            failed += 1
+    # Dùng tên file làm tiêu đề; đọc file + tách từ + ký MinHash trong process pool
+    items = (
+        IngestItem(
+            title=txt_file.stem,
+            path=str(txt_file),
+            author=author,
+            university=university,
+            year=year,
+            original_filename=txt_file.name,
+            extraction_method='custom_import',
+        )
+        for txt_file in txt_files
+    )
     
-    # Commit lần cuối
-    db.commit()
-    db.close()
+    # Khuyến nghị tối thiểu 100 từ
+    engine = IngestEngine(redis_client=corpus_store.connect_redis(), min_words=100)
+    stats = engine.run(items)
     
     # Tóm tắt kết quả
     print(f"\n{'='*70}")
     print(f"✅ Hoàn tất nhập corpus:")
-    print(f"   • Nhập thành công: {count} tài liệu")
-    print(f"   • Bỏ qua / Lỗi: {failed} file")
-    print(f"   • Tổng số file đã xử lý: {total} file")
+    print(f"   • Nhập thành công: {stats.inserted} tài liệu")
+    print(f"   • Trùng lặp: {stats.duplicates} | Quá ngắn / rỗng: {stats.too_short} | Lỗi: {stats.failed}")
+    print(f"   • Tổng số file đã xử lý: {stats.processed} file ({stats.docs_per_sec:.1f} file/s)")
     print(f"{'='*70}")
-    print(f"\n⚠️  QUAN TRỌNG: Hãy restart backend để đồng bộ vào Redis LSH index:")
-    print(f"   docker restart plagiarism-backend\n")
+    print(f"\n📡 Backend đang chạy sẽ nhận tài liệu mới qua luồng thay đổi corpus (~1 giây)\n")
 
 
 if __name__ == '__main__':
@@ -139,4 +94,6 @@ if __name__ == '__main__':
     university = sys.argv[3] if len(sys.argv) > 3 else 'Unknown'
     year = int(sys.argv[4]) if len(sys.argv) > 4 else 2024
     
+    # Hiển thị tiến độ (docs/s) của ingest engine
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     import_corpus(folder, author, university, year)
\ No newline at end of file
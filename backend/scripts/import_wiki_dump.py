@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Script nhập corpus từ file dump Wikipedia tiếng Việt (offline)
+
+Đọc streaming file viwiki-*-pages-articles.xml.bz2, làm sạch wikitext trong
+process pool của ingest engine và ghi vào PostgreSQL + Redis theo lô.
+Bộ nhớ không phụ thuộc kích thước dump, không cần mạng và cho kết quả lặp lại
+được - thay cho ViWikiCrawler khi cần dựng toàn bộ corpus Wikipedia.
+
+Tải dump:
+    https://dumps.wikimedia.org/viwiki/latest/viwiki-latest-pages-articles.xml.bz2
+
+Cách sử dụng:
+    # Nhập toàn bộ dump
+    python scripts/import_wiki_dump.py --dump viwiki-latest-pages-articles.xml.bz2
+
+    # Test nhanh / benchmark với 10.000 bài đầu tiên, 8 process
+    python scripts/import_wiki_dump.py --dump viwiki-latest-pages-articles.xml.bz2 --limit 10000 --workers 8
+"""
+import os
+import sys
+import argparse
+import logging
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import corpus_store
+from app.services.ingest import IngestEngine, IngestItem
+from crawlers.wiki_dump_reader import iter_dump_pages
+
+# Cấu hình logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def iter_dump_items(dump_path: str, limit: int = None):
+    """
+    Chuyển các trang trong dump thành IngestItem (wikitext thô, làm sạch trong worker)
+    """
+    for page in iter_dump_pages(dump_path, limit=limit):
+        year = datetime.now().year
+        if page.get('timestamp'):
+            year = int(page['timestamp'][:4])
+        yield IngestItem(
+            title=page['title'],
+            text=page['wikitext'],
+            markup='wikitext',
+            author='Wikipedia Contributors',
+            university='Vietnamese Wikipedia',
+            year=year,
+            original_filename=f"wiki_{page.get('page_id') or 'unknown'}.txt",
+            extraction_method='wikipedia_dump',
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Nhập corpus từ file dump Wikipedia tiếng Việt'
+    )
+    parser.add_argument('--dump', type=str, required=True,
+                        help='Đường dẫn file dump (.xml.bz2, .xml.gz hoặc .xml)')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Số bài viết tối đa (mặc định: toàn bộ dump)')
+    parser.add_argument('--min-words', type=int, default=50,
+                        help='Số từ tối thiểu sau khi làm sạch (mặc định: 50)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Số process xử lý song song (mặc định: số CPU)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Số tài liệu mỗi lô ghi database (mặc định: 500)')
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.dump):
+        logger.error(f"❌ Không tìm thấy file dump: {args.dump}")
+        sys.exit(1)
+
+    logger.info(f"\n{'='*70}")
+    logger.info(f"📥 ĐANG NHẬP DUMP WIKIPEDIA: {args.dump}")
+    if args.limit:
+        logger.info(f"   Giới hạn: {args.limit} bài viết")
+    logger.info(f"{'='*70}\n")
+
+    engine = IngestEngine(
+        redis_client=corpus_store.connect_redis(),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        min_words=args.min_words
+    )
+
+    try:
+        stats = engine.run(iter_dump_items(args.dump, limit=args.limit))
+    except KeyboardInterrupt:
+        logger.warning("\n⚠️  Quá trình nhập bị ngắt bởi người dùng (các lô đã commit được giữ lại)")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"❌ Lỗi khi nhập dữ liệu: {e}")
+        sys.exit(1)
+
+    logger.info(f"\n{'='*70}")
+    logger.info("✅ Tóm tắt nhập liệu:")
+    logger.info(f"   • Nhập thành công: {stats.inserted} tài liệu")
+    logger.info(f"   • Trùng lặp: {stats.duplicates} | Gần trùng: {stats.near_duplicates}")
+    logger.info(f"   • Quá ngắn: {stats.too_short} | Lỗi: {stats.failed}")
+    logger.info(f"   • Tổng đã xử lý: {stats.processed} tài liệu ({stats.docs_per_sec:.1f} docs/s)")
+    logger.info(f"{'='*70}\n")
+
+    logger.info("📡 Backend đang chạy sẽ nhận tài liệu mới qua luồng thay đổi corpus (~1 giây)")
+    logger.info("\n✅ Hoàn tất!\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Script đổi key Redis của corpus sang corpus_row (chạy một lần sau migration 004)
+
+Trước đây khóa tài liệu trong chỉ mục LSH / Redis là 8 ký tự đầu của UUID
+(doc:sig:1a2b3c4d). Nay khóa là documents.corpus_row (doc:sig:1234). Script
+tra corpus_row của từng key cũ (theo pg_id trong doc:meta, hoặc theo tiền tố
+UUID nếu không có pg_id) rồi RENAME chữ ký của mọi phiên bản chỉ mục và
+metadata sang key mới.
+
+Chạy khi backend / worker đã dừng, rồi khởi động lại.
+
+Cách sử dụng:
+    # Xem trước số key sẽ đổi
+    python scripts/migrate_corpus_rows.py --dry-run
+
+    # Đổi key
+    python scripts/migrate_corpus_rows.py
+"""
+import os
+import re
+import sys
+import argparse
+import logging
+from typing import Dict, List, Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import engine
+from app.services import corpus_store
+from app.services.ingest.postgres_writer import assign_missing_corpus_rows
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# doc:sig:{id} (phiên bản 0) và idx:{v}:sig:{id}
+SIGNATURE_KEY_PATTERN = re.compile(r"^(doc:sig:|idx:[^:]+:sig:)(.+)$")
+
+BATCH_SIZE = corpus_store.REDIS_PIPELINE_SIZE
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def scan_legacy_keys(redis_client):
+    """
+    Returns:
+        (danh sách (key chữ ký, tiền tố, id cũ), tập id cũ có doc:meta)
+    """
+    signature_keys = []
+    for pattern in ("doc:sig:*", "idx:*:sig:*"):
+        for key in redis_client.scan_iter(match=pattern, count=BATCH_SIZE):
+            match = SIGNATURE_KEY_PATTERN.match(_text(key))
+            if match and corpus_store.parse_doc_id(match.group(2)) is None:
+                signature_keys.append((match.group(0), match.group(1), match.group(2)))
+
+    meta_ids: Set[str] = set()
+    for key in redis_client.scan_iter(match=f"{corpus_store.METADATA_KEY_PREFIX}*", count=BATCH_SIZE):
+        legacy_id = _text(key)[len(corpus_store.METADATA_KEY_PREFIX):]
+        if corpus_store.parse_doc_id(legacy_id) is None:
+            meta_ids.add(legacy_id)
+    return signature_keys, meta_ids
+
+
+def resolve_rows(redis_client, legacy_ids: List[str]) -> Dict[str, tuple]:
+    """id cũ → (corpus_row, pg_id), theo pg_id trong metadata rồi theo tiền tố UUID"""
+    pg_ids: Dict[str, str] = {}
+    for i in range(0, len(legacy_ids), BATCH_SIZE):
+        batch = legacy_ids[i:i + BATCH_SIZE]
+        pipe = redis_client.pipeline(transaction=False)
+        for legacy_id in batch:
+            pipe.hget(corpus_store.metadata_key(legacy_id), "pg_id")
+        for legacy_id, pg_id in zip(batch, pipe.execute()):
+            if pg_id:
+                pg_ids[legacy_id] = _text(pg_id)
+
+    resolved: Dict[str, tuple] = {}
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        if pg_ids:
+            cur.execute(
+                "SELECT id::text, corpus_row FROM documents WHERE id = ANY(%s::uuid[])",
+                (list(set(pg_ids.values())),)
+            )
+            by_pg_id = {pg_id: row for pg_id, row in cur.fetchall()}
+            for legacy_id, pg_id in pg_ids.items():
+                if by_pg_id.get(pg_id) is not None:
+                    resolved[legacy_id] = (by_pg_id[pg_id], pg_id)
+
+        # Dữ liệu cũ không có pg_id: khớp 8 ký tự đầu của UUID (một lần duy nhất)
+        prefixes = [legacy_id for legacy_id in legacy_ids if legacy_id not in resolved]
+        if prefixes:
+            cur.execute(
+                "SELECT LEFT(id::text, 8), id::text, corpus_row FROM documents "
+                "WHERE is_corpus = 1 AND corpus_row IS NOT NULL AND LEFT(id::text, 8) = ANY(%s)",
+                (prefixes,)
+            )
+            for prefix, pg_id, row in cur.fetchall():
+                resolved.setdefault(prefix, (row, pg_id))
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+    return resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Đổi key Redis của corpus sang corpus_row')
+    parser.add_argument('--dry-run', action='store_true', help='Chỉ đếm, không đổi key')
+    args = parser.parse_args()
+
+    redis_client = corpus_store.connect_redis()
+    if redis_client is None:
+        logger.error("❌ Không kết nối được Redis")
+        sys.exit(1)
+
+    assigned = assign_missing_corpus_rows(engine)
+    if assigned:
+        logger.info(f"🔢 Đã cấp corpus_row cho {assigned} tài liệu corpus")
+
+    signature_keys, meta_ids = scan_legacy_keys(redis_client)
+    legacy_ids = sorted(meta_ids | {legacy_id for _, _, legacy_id in signature_keys})
+    logger.info(f"🔍 {len(signature_keys)} chữ ký, {len(meta_ids)} metadata dùng ID dạng cũ")
+    if not legacy_ids:
+        logger.info("✅ Không còn key dạng cũ")
+        return
+
+    resolved = resolve_rows(redis_client, legacy_ids)
+    unresolved = [legacy_id for legacy_id in legacy_ids if legacy_id not in resolved]
+    logger.info(f"🔗 Tra được corpus_row cho {len(resolved)}/{len(legacy_ids)} ID")
+    if unresolved:
+        logger.warning(
+            f"⚠️  {len(unresolved)} ID không có tài liệu corpus tương ứng (giữ nguyên key), "
+            f"ví dụ: {', '.join(unresolved[:5])}"
+        )
+    if args.dry_run:
+        return
+
+    renames = [
+        (key, f"{prefix}{resolved[legacy_id][0]}", None)
+        for key, prefix, legacy_id in signature_keys if legacy_id in resolved
+    ] + [
+        (corpus_store.metadata_key(legacy_id), corpus_store.metadata_key(resolved[legacy_id][0]),
+         resolved[legacy_id][1])
+        for legacy_id in meta_ids if legacy_id in resolved
+    ]
+
+    failed = 0
+    for i in range(0, len(renames), BATCH_SIZE):
+        pipe = redis_client.pipeline(transaction=False)
+        for old_key, new_key, pg_id in renames[i:i + BATCH_SIZE]:
+            pipe.rename(old_key, new_key)
+            if pg_id:
+                pipe.hset(new_key, "pg_id", pg_id)
+        for result in pipe.execute(raise_on_error=False):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.warning(f"⚠️  Lỗi đổi key: {result}")
+        logger.info(f"🔁 Đã đổi {min(i + BATCH_SIZE, len(renames))}/{len(renames)} key")
+
+    logger.info(
+        f"\n✅ Hoàn tất! Đã đổi {len(renames) - failed} key sang corpus_row "
+        f"- khởi động lại backend và worker\n"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Script chuyển văn bản từ cột documents.extracted_text sang document_texts (nén)
+
+Chạy sau migration 005 (nên chạy scripts/train_text_dictionary.py trước để
+văn bản được nén bằng dictionary). Đọc dần các tài liệu còn văn bản ở cột cũ
+bằng server-side cursor, nén, COPY vào document_texts rồi đặt cột cũ về NULL
+- mỗi lô một transaction nên có thể dừng và chạy lại bất cứ lúc nào.
+
+Sau khi chuyển xong, chạy VACUUM FULL documents để trả lại dung lượng cho hệ
+điều hành (VACUUM thường chỉ cho phép tái sử dụng).
+
+Cách sử dụng:
+    # Xem trước số tài liệu cần chuyển
+    python scripts/migrate_document_texts.py --dry-run
+
+    # Chuyển
+    python scripts/migrate_document_texts.py --batch-size 500
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import engine
+from app.services import text_store
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_COUNT_SQL = "SELECT COUNT(*), COALESCE(SUM(octet_length(extracted_text)), 0) FROM documents WHERE extracted_text IS NOT NULL"
+
+_SELECT_SQL = "SELECT id, extracted_text FROM documents WHERE extracted_text IS NOT NULL"
+
+_CLEAR_SQL = "UPDATE documents SET extracted_text = NULL WHERE id = ANY(%s::uuid[])"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chuyển documents.extracted_text sang document_texts (nén)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Số tài liệu mỗi lô (mặc định: 500)')
+    parser.add_argument('--dry-run', action='store_true', help='Chỉ đếm, không chuyển')
+    args = parser.parse_args()
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_COUNT_SQL)
+        total, total_bytes = cur.fetchone()
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+    codec = text_store.TextCodec.active(engine)
+    logger.info(f"\n{'='*70}")
+    logger.info("🗜️  CHUYỂN VĂN BẢN SANG document_texts")
+    logger.info(f"   Tài liệu còn ở cột cũ: {total} ({total_bytes / 1024 / 1024:.1f} MB)")
+    logger.info(f"   Codec: {'zstd' if text_store.ZSTD_AVAILABLE else 'zlib'}, "
+                f"dictionary: {codec.dictionary_id if codec.dictionary_id is not None else 'không'}")
+    logger.info(f"{'='*70}\n")
+    if args.dry_run or not total:
+        return
+
+    # Đọc bằng một kết nối, ghi bằng kết nối khác: commit từng lô không đóng server-side cursor
+    read_conn = engine.raw_connection()
+    write_conn = engine.raw_connection()
+    started = time.time()
+    migrated = raw_size = compressed_size = 0
+    try:
+        read_cur = read_conn.cursor(name="migrate_document_texts")
+        read_cur.itersize = args.batch_size
+        read_cur.execute(_SELECT_SQL)
+        while True:
+            rows = read_cur.fetchmany(args.batch_size)
+            if not rows:
+                break
+            batch = [(document_id, codec.compress(text)) for document_id, text in rows]
+            try:
+                with write_conn.cursor() as cur:
+                    text_store.copy_texts(cur, batch)
+                    cur.execute(_CLEAR_SQL, ([str(document_id) for document_id, _ in batch],))
+                write_conn.commit()
+            except Exception:
+                write_conn.rollback()
+                raise
+
+            migrated += len(batch)
+            raw_size += sum(compressed.raw_size for _, compressed in batch)
+            compressed_size += sum(len(compressed.content) for _, compressed in batch)
+            logger.info(
+                f"📦 {migrated}/{total} tài liệu - tỉ lệ nén {raw_size / max(compressed_size, 1):.1f}x"
+            )
+        read_cur.close()
+        read_conn.commit()
+    finally:
+        read_conn.close()
+        write_conn.close()
+
+    elapsed = time.time() - started
+    logger.info(
+        f"\n✅ Hoàn tất! Đã chuyển {migrated} tài liệu trong {elapsed:.1f}s: "
+        f"{raw_size / 1024 / 1024:.1f} MB → {compressed_size / 1024 / 1024:.1f} MB "
+        f"- chạy VACUUM FULL documents để thu hồi dung lượng\n"
+    )
+
+
+if __name__ == '__main__':
+    main()
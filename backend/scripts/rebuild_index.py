@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Script dựng lại chỉ mục corpus (blue/green) từ dòng lệnh
+
+Cùng quy trình với POST /admin/index/rebuild nhưng chạy trực tiếp với process
+pool đầy đủ (Celery worker prefork chỉ ký tuần tự). Phiên bản hiện tại vẫn
+phục vụ trong lúc dựng; khi xong, backend và worker tự chuyển sang phiên bản
+mới qua luồng thay đổi corpus, phiên bản cũ bị xóa sau thời gian chờ.
+
+Cách sử dụng:
+    # Dựng lại với tham số trong cấu hình hiện tại (.env)
+    python scripts/rebuild_index.py
+
+    # Thử shingle 5 từ, 256 permutation
+    python scripts/rebuild_index.py --shingle-size 5 --num-perm 256 --workers 8
+
+    # Sau khi đổi bộ tách từ / chuẩn hóa văn bản: ký lại toàn bộ, không dùng chữ ký đã lưu
+    python scripts/rebuild_index.py --resign
+
+    # Xem tiến độ lần dựng lại gần nhất
+    python scripts/rebuild_index.py --status
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import corpus_store, index_versions
+from app.services.index_versions import IndexParams
+from app.services.ingest import IndexRebuilder, RebuildInProgress
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    defaults = IndexParams.from_settings()
+    parser = argparse.ArgumentParser(description='Dựng lại chỉ mục corpus với tham số mới')
+    parser.add_argument('--shingle-size', type=int, default=defaults.shingle_size,
+                        help=f'Kích thước shingle (mặc định: {defaults.shingle_size})')
+    parser.add_argument('--num-perm', type=int, default=defaults.num_perm,
+                        help=f'Số permutation MinHash (mặc định: {defaults.num_perm})')
+    parser.add_argument('--lsh-threshold', type=float, default=defaults.lsh_threshold,
+                        help=f'Ngưỡng LSH (mặc định: {defaults.lsh_threshold})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Số process ký song song (mặc định: số CPU)')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Số tài liệu mỗi lô (mặc định: INDEX_REBUILD_BATCH_SIZE)')
+    parser.add_argument('--gc-grace', type=int, default=None,
+                        help='Số giây chờ sau swap trước khi xóa phiên bản cũ')
+    parser.add_argument('--resign', '--force', action='store_true',
+                        help='Ký lại mọi tài liệu, bỏ qua chữ ký đã lưu cùng scheme (sau khi đổi bộ tách từ)')
+    parser.add_argument('--status', action='store_true',
+                        help='Chỉ in trạng thái phiên bản / tiến độ rồi thoát')
+    args = parser.parse_args()
+
+    redis_client = corpus_store.connect_redis()
+    if redis_client is None:
+        logger.error("❌ Không kết nối được Redis")
+        sys.exit(1)
+
+    if args.status:
+        print(json.dumps(index_versions.rebuild_status(redis_client), indent=2, ensure_ascii=False))
+        return
+
+    params = IndexParams(
+        shingle_size=args.shingle_size,
+        num_perm=args.num_perm,
+        lsh_threshold=args.lsh_threshold
+    )
+    active = index_versions.active_version(redis_client)
+    logger.info(f"\n{'='*70}")
+    logger.info("🔁 DỰNG LẠI CHỈ MỤC CORPUS")
+    logger.info(f"   Đang phục vụ: v{active.version} {asdict(active.params)}")
+    logger.info(f"   Tham số mới:  {asdict(params)}{' (ký lại toàn bộ)' if args.resign else ''}")
+    logger.info(f"{'='*70}\n")
+
+    rebuilder = IndexRebuilder(
+        redis_client,
+        params,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        gc_grace_seconds=args.gc_grace,
+        resign=args.resign
+    )
+    try:
+        index = rebuilder.run()
+    except RebuildInProgress as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.warning("\n⚠️  Đã dừng - phiên bản đang dựng dở đã bị hủy, phiên bản cũ vẫn phục vụ")
+        sys.exit(1)
+
+    logger.info(f"\n✅ Hoàn tất! Chỉ mục đang phục vụ: v{index.version}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Script nạp lại chỉ mục corpus trong Redis từ chữ ký lưu trong PostgreSQL
+
+Dùng khi Redis mất dữ liệu (flush, đổi máy, khôi phục backup cũ): đọc tuần tự
+bảng document_signatures bằng server-side cursor và ghi lại doc:sig / doc:meta
+qua pipeline - không tách từ hay ký lại văn bản. Sự kiện add được phát vào
+luồng thay đổi corpus nên backend đang chạy nạp lại chỉ mục LSH mà không cần
+khởi động lại.
+
+Tài liệu chưa có chữ ký theo scheme của phiên bản (nhập trước khi có bảng
+document_signatures) cần chạy scripts/rebuild_index.py một lần - rebuild vừa
+ký vừa lưu chữ ký vào PostgreSQL.
+
+Cách sử dụng:
+    # Nạp lại phiên bản đang phục vụ
+    python scripts/restore_index.py
+
+    # Chỉ xem số tài liệu đã có chữ ký lưu trong PostgreSQL
+    python scripts/restore_index.py --status
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import engine
+from app.services import corpus_store, index_versions, signature_store
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Nạp lại chỉ mục corpus trong Redis từ PostgreSQL')
+    parser.add_argument('--version', type=str, default=None,
+                        help='Phiên bản chỉ mục cần nạp (mặc định: phiên bản đang phục vụ)')
+    parser.add_argument('--batch-size', type=int, default=corpus_store.REDIS_PIPELINE_SIZE,
+                        help=f'Số tài liệu mỗi lô (mặc định: {corpus_store.REDIS_PIPELINE_SIZE})')
+    parser.add_argument('--no-publish', action='store_true',
+                        help='Không phát sự kiện add (backend phải khởi động lại để thấy tài liệu)')
+    parser.add_argument('--status', action='store_true',
+                        help='Chỉ in số tài liệu đã có chữ ký trong PostgreSQL rồi thoát')
+    args = parser.parse_args()
+
+    redis_client = corpus_store.connect_redis()
+    if redis_client is None:
+        logger.error("❌ Không kết nối được Redis")
+        sys.exit(1)
+
+    if args.version is None:
+        index = index_versions.active_version(redis_client)
+    else:
+        index = index_versions.get_version(redis_client, args.version)
+    scheme = index.params.signature_scheme
+
+    stored, total = signature_store.count_signatures(engine, scheme)
+    logger.info(f"\n{'='*70}")
+    logger.info("📥 NẠP LẠI CHỈ MỤC CORPUS TỪ POSTGRESQL")
+    logger.info(f"   Phiên bản: v{index.version} (scheme {scheme})")
+    logger.info(f"   Chữ ký đã lưu: {stored}/{total} tài liệu đại diện")
+    logger.info(f"{'='*70}\n")
+    if stored < total:
+        logger.warning(
+            f"⚠️  {total - stored} tài liệu chưa có chữ ký {scheme} - "
+            f"chạy scripts/rebuild_index.py để ký và lưu"
+        )
+    if args.status:
+        return
+
+    started = time.time()
+    written = signature_store.restore_index(
+        redis_client, index, engine, batch_size=args.batch_size, publish=not args.no_publish
+    )
+    elapsed = time.time() - started
+    logger.info(f"\n✅ Hoàn tất! Đã nạp {written} chữ ký vào v{index.version} trong {elapsed:.1f}s\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Script huấn luyện dictionary zstd để nén văn bản tài liệu
+
+Lấy mẫu ngẫu nhiên văn bản trong corpus, huấn luyện dictionary và lưu vào
+text_dictionaries. Văn bản ghi sau đó (nhập corpus, upload, chuyển bằng
+scripts/migrate_document_texts.py) được nén bằng dictionary mới nhất; văn bản
+cũ vẫn giữ dictionary_id của mình nên không cần nén lại.
+
+Cần thư viện zstandard.
+
+Cách sử dụng:
+    python scripts/train_text_dictionary.py --samples 2000
+"""
+import os
+import sys
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.db.database import engine
+from app.services import text_store
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Mẫu lấy từ cả document_texts lẫn cột cũ (trước khi chuyển)
+_SAMPLE_SQL = f"""
+SELECT d.id, {text_store.TEXT_COLUMNS_SQL}
+FROM documents d
+{text_store.TEXT_JOIN_SQL}
+WHERE d.is_corpus = 1 AND {text_store.HAS_TEXT_SQL}
+ORDER BY random()
+LIMIT %s
+"""
+
+# Mỗi mẫu chỉ lấy phần đầu: dictionary học các cụm lặp lại, không cần cả văn bản
+MAX_SAMPLE_CHARS = 16_384
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Huấn luyện dictionary zstd cho văn bản tài liệu')
+    parser.add_argument('--samples', type=int, default=2000, help='Số văn bản mẫu (mặc định: 2000)')
+    parser.add_argument('--dict-size', type=int, default=settings.TEXT_DICTIONARY_SIZE,
+                        help=f'Kích thước dictionary, byte (mặc định: {settings.TEXT_DICTIONARY_SIZE})')
+    args = parser.parse_args()
+
+    if not text_store.ZSTD_AVAILABLE:
+        logger.error("❌ Cần cài zstandard: pip install zstandard")
+        sys.exit(1)
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_SAMPLE_SQL, (args.samples,))
+        rows = cur.fetchall()
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+    texts = (text_store.decode_columns(engine, *row[1:]) for row in rows)
+    samples = [text[:MAX_SAMPLE_CHARS] for text in texts if text]
+    logger.info(f"📚 Đã lấy {len(samples)} văn bản mẫu")
+    if len(samples) < 10:
+        logger.error("❌ Quá ít văn bản mẫu để huấn luyện dictionary")
+        sys.exit(1)
+
+    dictionary = text_store.train_dictionary(samples, args.dict_size)
+    plain = text_store.TextCodec()
+    trained = text_store.TextCodec(0, dictionary)
+    raw_size = sum(len(sample.encode("utf-8")) for sample in samples)
+    plain_size = sum(len(plain.compress(sample).content) for sample in samples)
+    trained_size = sum(len(trained.compress(sample).content) for sample in samples)
+    logger.info(
+        f"🗜️  Tỉ lệ nén trên mẫu: không dictionary {raw_size / plain_size:.1f}x, "
+        f"có dictionary {raw_size / trained_size:.1f}x"
+    )
+
+    dictionary_id = text_store.save_dictionary(engine, dictionary, len(samples))
+    logger.info(f"\n✅ Đã lưu dictionary #{dictionary_id} ({len(dictionary) / 1024:.0f} KB)\n")
+
+
+if __name__ == '__main__':
+    main()
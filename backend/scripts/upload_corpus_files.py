@@ -11,67 +11,63 @@ Cách sử dụng:
     # Upload kèm metadata tùy chỉnh
     python scripts/upload_corpus_files.py --dir /path/to/files --author "Nguyễn Văn A" --university "ĐH CNTT"
 
-    # Upload và đồng bộ ngay vào Redis
-    python scripts/upload_corpus_files.py --dir /path/to/files --sync-redis
-
     # Giới hạn số lượng file
     python scripts/upload_corpus_files.py --dir /path/to/files --limit 100
 
+    # Tiếp tục lần upload trước bị ngắt (bỏ qua các file đã xong theo checkpoint)
+    python scripts/upload_corpus_files.py --dir /path/to/files --resume
+
 Ví dụ:
     # Test nhanh: upload 100 file txt
-    python scripts/upload_corpus_files.py --dir /app/corpus_data --limit 100 --sync-redis
+    python scripts/upload_corpus_files.py --dir /app/corpus_data --limit 100
+
+Tài liệu mới xuất hiện trong LSH index của backend đang chạy trong khoảng một
+giây nhờ luồng thay đổi corpus (Redis Stream) - không cần restart.
 """
 import os
 import sys
-import uuid
-import hashlib
 import argparse
 from datetime import datetime
 import logging
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.config import settings
-from app.db.database import SessionLocal
-from app.db.models import Document
+from app.services import corpus_store
+from app.services.ingest import IngestCheckpoint, IngestEngine, IngestItem
 from app.services.minio_storage import get_minio_storage
-from app.services.preprocessing.vietnamese_nlp import preprocess_vietnamese
-from app.services.preprocessing.text_normalizer import normalize_text
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-SUPPORTED_EXTENSIONS = {'.txt', '.docx', '.pdf', '.doc'}
-
-
-def extract_text_from_file(filepath: str) -> str:
-    """Trích xuất nội dung văn bản từ file"""
-    ext = os.path.splitext(filepath)[1].lower()
-    
-    if ext == '.txt':
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            return f.read()
-    
-    elif ext == '.docx':
-        try:
-            import docx
-            doc = docx.Document(filepath)
-            return '\n'.join(p.text for p in doc.paragraphs if p.text.strip())
-        except ImportError:
-            logger.warning("python-docx chưa được cài đặt. Chạy lệnh: pip install python-docx")
-            return ""
-    
-    elif ext == '.pdf':
-        try:
-            import PyPDF2
-            with open(filepath, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                return '\n'.join(page.extract_text() or '' for page in reader.pages)
-        except ImportError:
-            logger.warning("PyPDF2 chưa được cài đặt. Chạy lệnh: pip install PyPDF2")
-            return ""
-    
-    return ""
+SUPPORTED_EXTENSIONS = {'.txt', '.docx', '.pdf'}
+
+
+def file_to_item(filepath: str, author: str = None, university: str = None, year: int = None) -> IngestItem:
+    """Tạo IngestItem cho một file (tiêu đề lấy từ tên file)"""
+    return IngestItem(
+        title=os.path.splitext(os.path.basename(filepath))[0].replace('_', ' ').replace('-', ' '),
+        path=filepath,
+        author=author or 'Unknown',
+        university=university or 'Unknown',
+        year=year or datetime.now().year,
+        original_filename=os.path.basename(filepath),
+        extraction_method='file_upload',
+    )
+
+
+def make_minio_uploader(minio, year: int):
+    """Callback on_indexed: lưu bản text của các tài liệu vừa được thêm lên MinIO"""
+    def upload_to_minio(docs):
+        for doc in docs:
+            minio.upload_corpus_document(
+                doc_id=str(doc.doc_id),
+                title=doc.item.title,
+                text=doc.text,
+                author=doc.item.author,
+                university=doc.item.university,
+                year=year
+            )
+    return upload_to_minio
 
 
 def upload_corpus(args):
@@ -95,125 +91,63 @@ def upload_corpus(args):
         logger.error(f"❌ Không tìm thấy file hỗ trợ nào trong thư mục {directory}")
         sys.exit(1)
     
+    # Checkpoint theo thư mục nguồn: --resume bỏ qua các file đã xử lý xong
+    checkpoint = IngestCheckpoint.open(
+        f"upload_corpus_files:{os.path.abspath(directory)}",
+        path=args.checkpoint,
+        resume=args.resume
+    )
+    if args.resume:
+        total = len(files)
+        files = [f for f in files if not checkpoint.is_done(f)]
+        logger.info(f"⏩ Tiếp tục từ checkpoint: bỏ qua {total - len(files)}/{total} file đã xử lý")
+        if not files:
+            logger.info("✅ Tất cả file đã được xử lý ở lần chạy trước")
+            return
+    
     logger.info(f"\n{'='*70}")
     logger.info(f"📤 ĐANG UPLOAD {len(files)} FILE CORPUS")
     logger.info(f"   Nguồn: {directory}")
     logger.info(f"{'='*70}\n")
     
-    db = SessionLocal()
     minio = get_minio_storage()
     minio_available = minio.is_available()
     
     if not minio_available:
         logger.warning("⚠️  MinIO chưa khả dụng. File sẽ chỉ được lưu vào PostgreSQL.")
     
-    uploaded = 0
-    skipped = 0
-    seen_hashes = set()
+    year = args.year or datetime.now().year
     
-    for i, filepath in enumerate(files, 1):
-        filename = os.path.basename(filepath)
-        try:
-            # Trích xuất văn bản
-            text = extract_text_from_file(filepath)
-            if not text or len(text.strip()) < 50:
-                logger.warning(f"⚠️  [{i}/{len(files)}] {filename} - Quá ngắn hoặc rỗng, bỏ qua")
-                skipped += 1
-                continue
-            
-            # Kiểm tra trùng lặp
-            text_hash = hashlib.sha256(text.encode()).hexdigest()
-            if text_hash in seen_hashes:
-                logger.warning(f"⚠️  [{i}/{len(files)}] {filename} - Trùng lặp trong batch, bỏ qua")
-                skipped += 1
-                continue
-            
-            existing = db.query(Document).filter(Document.file_hash_sha256 == text_hash).first()
-            if existing:
-                logger.warning(f"⚠️  [{i}/{len(files)}] {filename} - Đã tồn tại trong DB, bỏ qua")
-                seen_hashes.add(text_hash)
-                skipped += 1
-                continue
-            
-            # Xử lý văn bản
-            normalized = normalize_text(text)
-            tokens = preprocess_vietnamese(normalized)
-            word_count = len(tokens)
-            
-            # Tạo tiêu đề từ tên file
-            title = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ')
-            doc_id = uuid.uuid4()
-            year = args.year or datetime.now().year
-            
-            # Lưu vào PostgreSQL
-            doc = Document(
-                id=doc_id,
-                title=title[:500],
-                author=args.author or 'Unknown',
-                university=args.university or 'Unknown',
-                year=year,
-                original_filename=filename,
-                file_hash_sha256=text_hash,
-                file_size_bytes=os.path.getsize(filepath),
-                word_count=word_count,
-                language='vi',
-                extraction_method='file_upload',
-                extracted_text=text,
-                is_corpus=1,
-                status='indexed',
-                indexed_at=datetime.now()
-            )
-            
-            db.add(doc)
-            try:
-                db.commit()
-            except Exception as e:
-                db.rollback()
-                logger.warning(f"⚠️  [{i}/{len(files)}] {filename} - Lỗi database: {str(e)[:60]}")
-                skipped += 1
-                continue
-            
-            # Upload lên MinIO
-            if minio_available:
-                minio.upload_corpus_document(
-                    doc_id=str(doc_id),
-                    title=title,
-                    text=text,
-                    author=args.author or 'Unknown',
-                    university=args.university or 'Unknown',
-                    year=year
-                )
-            
-            seen_hashes.add(text_hash)
-            uploaded += 1
-            logger.info(f"✅ [{uploaded}/{len(files)}] {filename} - {word_count} từ")
-        
-        except Exception as e:
-            logger.error(f"❌ [{i}/{len(files)}] {filename} - Lỗi: {e}")
-            try:
-                db.rollback()
-            except Exception:
-                pass
-            skipped += 1
+    # Trích xuất văn bản (PDF/DOCX/TXT) được thực hiện song song trong process pool
+    items = (file_to_item(filepath, args.author, args.university, year) for filepath in files)
     
-    db.close()
+    engine = IngestEngine(
+        redis_client=corpus_store.connect_redis(),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        min_words=10,
+        on_indexed=make_minio_uploader(minio, year) if minio_available else None,
+        on_batch_done=checkpoint.batch_recorder(
+            key_of=lambda item: item.path,
+            cursor_of=lambda batch: {'last_file': batch[-1].path}
+        )
+    )
+    try:
+        stats = engine.run(items)
+        checkpoint.mark_finished()
+    finally:
+        checkpoint.close()
     
     logger.info(f"\n{'='*70}")
     logger.info(f"✅ Tóm tắt upload:")
-    logger.info(f"   • Đã upload: {uploaded} file")
-    logger.info(f"   • Bỏ qua: {skipped} file")
+    logger.info(f"   • Đã upload: {stats.inserted} file")
+    logger.info(f"   • Bỏ qua: {stats.duplicates + stats.too_short} file | Lỗi: {stats.failed} file")
+    logger.info(f"   • Tốc độ: {stats.docs_per_sec:.1f} file/s")
     logger.info(f"   • MinIO: {'✅' if minio_available else '❌ Không khả dụng'}")
     logger.info(f"{'='*70}\n")
-    
-    # Đồng bộ Redis
-    if args.sync_redis and uploaded > 0:
-        logger.info("🔄 Đang restart backend để đồng bộ Redis LSH index...")
-        import subprocess
-        try:
-            subprocess.run(['docker', 'restart', 'plagiarism-backend'], check=True, timeout=30)
-            logger.info("✅ Backend đã restart. Redis sẽ đồng bộ khi khởi động lại.")
-        except Exception:
-            logger.info("⚠️  Không thể restart tự động. Hãy chạy thủ công: docker restart plagiarism-backend")
+
+    if stats.inserted > 0:
+        logger.info("📡 Backend đang chạy sẽ nhận tài liệu mới qua luồng thay đổi corpus (~1 giây)")
 
 
 def main():
@@ -223,7 +157,12 @@ def main():
     parser.add_argument('--author', type=str, help='Tên tác giả áp dụng cho tất cả file')
     parser.add_argument('--university', type=str, help='Tên trường đại học áp dụng cho tất cả file')
     parser.add_argument('--year', type=int, help='Năm xuất bản')
-    parser.add_argument('--sync-redis', action='store_true', help='Đồng bộ vào Redis sau khi upload')
+    parser.add_argument('--sync-redis', action='store_true', help='(Không còn cần thiết) backend tự nhận tài liệu mới qua luồng thay đổi corpus')
+    parser.add_argument('--workers', type=int, default=None, help='Số process xử lý song song (mặc định: số CPU)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Số tài liệu mỗi lô ghi database')
+    parser.add_argument('--resume', action='store_true', help='Tiếp tục từ checkpoint của lần chạy trước')
+    parser.add_argument('--checkpoint', type=str, default='ingest_checkpoints.sqlite3',
+                        help='File SQLite lưu checkpoint (mặc định: ingest_checkpoints.sqlite3)')
     args = parser.parse_args()
     upload_corpus(args)
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Daemon nhập corpus liên tục từ thư mục dùng chung
+
+Theo dõi một hoặc nhiều thư mục (inotify qua watchdog, hoặc polling nếu chưa
+cài), chờ file ghi xong rồi gom các file mới thành lô và nhập qua ingest engine
+(process pool + COPY + Redis pipeline). Engine được giữ mở suốt vòng đời
+daemon nên hash / chỉ mục gần trùng chỉ nạp một lần.
+
+Các file đã nhập được ghi vào checkpoint (khóa = đường dẫn + size + mtime):
+khởi động lại daemon không nhập lại file cũ, file bị ghi đè sẽ được nhập lại.
+
+Cách sử dụng:
+    # Theo dõi một thư mục
+    python scripts/watch_corpus_folder.py --dir /srv/theses
+
+    # Nhiều thư mục, kèm metadata mặc định
+    python scripts/watch_corpus_folder.py --dir /srv/theses --dir /srv/reports --university "ĐH CNTT"
+
+    # Ép dùng polling (ví dụ thư mục mạng SMB/NFS không hỗ trợ inotify)
+    python scripts/watch_corpus_folder.py --dir /mnt/share --polling --poll-interval 15
+"""
+import os
+import sys
+import argparse
+import logging
+import signal
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import corpus_store
+from app.services.ingest import IngestCheckpoint, IngestEngine
+from app.services.ingest.engine import STATUS_FAILED
+from app.services.ingest.watcher import WATCHDOG_AVAILABLE, FolderWatcher
+from app.services.minio_storage import get_minio_storage
+from upload_corpus_files import SUPPORTED_EXTENSIONS, file_to_item, make_minio_uploader
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Daemon theo dõi thư mục và nhập file corpus mới')
+    parser.add_argument('--dir', action='append', required=True,
+                        help='Thư mục cần theo dõi (dùng nhiều lần cho nhiều thư mục)')
+    parser.add_argument('--author', type=str, help='Tác giả mặc định cho các file')
+    parser.add_argument('--university', type=str, help='Trường đại học mặc định cho các file')
+    parser.add_argument('--year', type=int, help='Năm mặc định (mặc định: năm hiện tại)')
+    parser.add_argument('--settle', type=float, default=10.0,
+                        help='Số giây file phải đứng yên trước khi nhập (mặc định: 10)')
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help='Chu kỳ kiểm tra thư mục (giây, mặc định: 5)')
+    parser.add_argument('--polling', action='store_true',
+                        help='Luôn dùng polling thay vì inotify')
+    parser.add_argument('--max-batch', type=int, default=200,
+                        help='Số file tối đa mỗi lô nhập (mặc định: 200)')
+    parser.add_argument('--max-wait', type=float, default=30.0,
+                        help='Thời gian tối đa giữ file chờ gom lô (giây, mặc định: 30)')
+    parser.add_argument('--max-retries', type=int, default=3,
+                        help='Số lần thử lại file nhập lỗi trước khi bỏ qua tới khi file thay đổi (mặc định: 3)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Số process xử lý song song (mặc định: số CPU)')
+    parser.add_argument('--checkpoint', type=str, default='ingest_checkpoints.sqlite3',
+                        help='File SQLite lưu các file đã nhập (mặc định: ingest_checkpoints.sqlite3)')
+    args = parser.parse_args()
+
+    for directory in args.dir:
+        if not os.path.isdir(directory):
+            logger.error(f"❌ Không tìm thấy thư mục: {directory}")
+            sys.exit(1)
+
+    watcher = FolderWatcher(
+        args.dir,
+        extensions=SUPPORTED_EXTENSIONS,
+        settle_seconds=args.settle,
+        poll_interval=args.poll_interval,
+        use_inotify=not args.polling
+    )
+    if not args.polling and not WATCHDOG_AVAILABLE:
+        logger.warning("⚠️  Chưa cài watchdog - chuyển sang polling (pip install watchdog)")
+
+    checkpoint = IngestCheckpoint.open(
+        "watch_corpus_folder:" + ",".join(sorted(os.path.abspath(d) for d in args.dir)),
+        path=args.checkpoint
+    )
+
+    minio = get_minio_storage()
+    minio_available = minio.is_available()
+    if not minio_available:
+        logger.warning("⚠️  MinIO chưa khả dụng. File sẽ chỉ được lưu vào PostgreSQL.")
+
+    # Dừng gọn khi nhận SIGTERM (docker stop / systemd)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    logger.info(f"\n{'='*70}")
+    logger.info(f"👀 ĐANG THEO DÕI {len(args.dir)} THƯ MỤC CORPUS")
+    for directory in args.dir:
+        logger.info(f"   • {directory}")
+    logger.info(f"   Chế độ: {'inotify' if watcher.use_inotify else 'polling'} | chờ ổn định: {args.settle}s")
+    logger.info(f"{'='*70}\n")
+
+    engine = IngestEngine(
+        redis_client=corpus_store.connect_redis(),
+        workers=args.workers,
+        batch_size=args.max_batch,
+        min_words=10,
+        on_indexed=make_minio_uploader(minio, args.year or datetime.now().year) if minio_available else None
+    )
+
+    attempts = {}  # khóa file -> số lần nhập lỗi liên tiếp
+    try:
+        engine.start()
+        for ready_files in watcher.batches(max_batch=args.max_batch, max_wait=args.max_wait):
+            new_files = [f for f in ready_files if not checkpoint.is_done(f.key)]
+            if not new_files:
+                continue
+
+            logger.info(f"📥 Phát hiện {len(new_files)} file mới")
+            keys = {f.path: f.key for f in new_files}
+            failed_paths = set()
+            record_batch = checkpoint.batch_recorder(key_of=lambda item: keys.get(item.path))
+
+            def on_batch_done(batch, statuses):
+                record_batch(batch, statuses)
+                failed_paths.update(item.path for item, status in zip(batch, statuses) if status == STATUS_FAILED)
+
+            engine.on_batch_done = on_batch_done
+            try:
+                stats = engine.run(
+                    file_to_item(f.path, args.author, args.university, args.year) for f in new_files
+                )
+                logger.info(f"✅ Lô file mới: thêm {stats.inserted}, trùng {stats.duplicates}, "
+                            f"quá ngắn {stats.too_short}, lỗi {stats.failed}")
+            except Exception as e:
+                # Kết nối database có thể đã hỏng - khởi tạo lại và thử lại lô này sau
+                logger.error(f"❌ Lỗi khi nhập lô file: {e}")
+                watcher.forget(new_files)
+                engine.close()
+                engine.start()
+                continue
+
+            # Lỗi ghi lô không raise (engine đánh dấu STATUS_FAILED) → trả file lỗi lại cho watcher
+            retry = []
+            for f in new_files:
+                if f.path not in failed_paths:
+                    attempts.pop(f.key, None)
+                    continue
+                attempts[f.key] = attempts.get(f.key, 0) + 1
+                if attempts[f.key] <= args.max_retries:
+                    retry.append(f)
+                else:
+                    logger.warning(f"⚠️  Bỏ qua {f.path} sau {args.max_retries} lần thử lại "
+                                   f"- sẽ nhập lại khi file thay đổi")
+                    attempts.pop(f.key)
+            if retry:
+                logger.warning(f"🔁 {len(retry)} file nhập lỗi - sẽ thử lại")
+                watcher.forget(retry)
+    except KeyboardInterrupt:
+        logger.info("\n⏹️  Đã dừng daemon")
+    finally:
+        engine.close()
+        checkpoint.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import React, { useState } from 'react';
+import { Button, Spin, Tag, Typography } from 'antd';
+import { getMatchSegments, MatchedSegment } from '../../services/api';
+
+const { Text } = Typography;
+
+// Số đoạn tải mỗi lần
+const PAGE_SIZE = 10;
+
+interface MatchSegmentsProps {
+  // ID kết quả kiểm tra và ID match (null nếu kết quả chưa được lưu)
+  resultId?: string;
+  matchId: string | null;
+
+  // Tổng số đoạn trùng khớp của match
+  segmentCount: number;
+
+  // Đoạn đã có sẵn trong response (có nội dung khi segments_included = true)
+  segments: MatchedSegment[];
+}
+
+/**
+ * Danh sách đoạn trùng khớp của một match, tải nội dung khi mở
+ * - Response kiểm tra chỉ chứa vị trí các đoạn; nội dung được tải theo trang
+ *   (PAGE_SIZE đoạn) khi người dùng mở danh sách và nhấn "Tải thêm"
+ * - Nếu response đã kèm nội dung thì hiển thị luôn, không gọi API
+ */
+export const MatchSegments: React.FC<MatchSegmentsProps> = ({ resultId, matchId, segmentCount, segments }) => {
+  const hasText = segments.length > 0 && segments[0].query_text !== undefined;
+  const [loaded, setLoaded] = useState<MatchedSegment[]>(hasText ? segments : []);
+  const [loading, setLoading] = useState(false);
+  const [failed, setFailed] = useState(false);
+
+  const loadMore = async () => {
+    if (!resultId || !matchId || loading) return;
+    setLoading(true);
+    setFailed(false);
+    try {
+      const page = await getMatchSegments(resultId, matchId, loaded.length, PAGE_SIZE);
+      setLoaded((current) => [...current, ...page.items]);
+    } catch (err) {
+      setFailed(true);
+      console.error('Failed to load segments:', err);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  // Mở lần đầu → tải trang đầu tiên
+  const handleToggle = (event: React.SyntheticEvent<HTMLDetailsElement>) => {
+    if (event.currentTarget.open && loaded.length === 0) {
+      loadMore();
+    }
+  };
+
+  if (segmentCount === 0) return null;
+
+  return (
+    <div style={{ marginTop: 12, marginLeft: 70 }}>
+      <details style={{ cursor: 'pointer' }} onToggle={handleToggle}>
+        <summary style={{ color: '#1890ff', marginBottom: 8 }}>
+          Xem {segmentCount} đoạn trùng khớp
+        </summary>
+        <div style={{ background: '#fafafa', padding: 16, borderRadius: 8, maxHeight: 300, overflowY: 'auto' }}>
+          {loaded.map((seg, segIdx) => (
+            <div key={segIdx} style={{ marginBottom: 16, padding: 12, background: 'white', borderRadius: 6, border: '1px solid #f0f0f0' }}>
+              <Tag color="blue" style={{ marginBottom: 4 }}>Đoạn {segIdx + 1}</Tag>
+              <div style={{ display: 'flex', gap: 16 }}>
+                <div style={{ flex: 1 }}>
+                  <Text strong style={{ color: '#ff4d4f', display: 'block', marginBottom: 4 }}>File của bạn:</Text>
+                  <Text style={{ background: '#fff2f0', padding: '4px 8px', borderRadius: 4, display: 'block', fontSize: 13 }}>
+                    {seg.query_text != null ? `"${seg.query_text}"` : <Text type="secondary">(không còn nội dung)</Text>}
+                  </Text>
+                </div>
+                <div style={{ flex: 1 }}>
+                  <Text strong style={{ color: '#52c41a', display: 'block', marginBottom: 4 }}>Nguồn trùng khớp:</Text>
+                  <Text style={{ background: '#f6ffed', padding: '4px 8px', borderRadius: 4, display: 'block', fontSize: 13 }}>
+                    {seg.source_text != null ? `"${seg.source_text}"` : <Text type="secondary">(không còn nội dung)</Text>}
+                  </Text>
+                </div>
+              </div>
+            </div>
+          ))}
+          {loading && <Spin size="small" />}
+          {failed && <Text type="danger">Không thể tải nội dung đoạn trùng khớp</Text>}
+          {!loading && loaded.length < segmentCount && resultId && matchId && (
+            <Button size="small" onClick={loadMore}>
+              Tải thêm ({segmentCount - loaded.length} đoạn)
+            </Button>
+          )}
+        </div>
+      </details>
+    </div>
+  );
+};
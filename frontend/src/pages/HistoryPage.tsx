@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Layout, Typography, Table, Button, Tag, Space, Popconfirm } from 'antd';
 import { EyeOutlined, DeleteOutlined, DownloadOutlined } from '@ant-design/icons';
 import { useNavigate } from 'react-router-dom';
@@ -26,6 +26,10 @@ export const HistoryPage: React.FC = () => {
   const [currentPage, setCurrentPage] = useState(1);
   // Số bản ghi mỗi trang (cố định)
   const [pageSize] = useState(10);
+  // Tổng số là số ước lượng (bảng lớn)
+  const [totalIsEstimate, setTotalIsEstimate] = useState(false);
+  // Cursor keyset của từng trang đã biết (trang → next_cursor của trang trước nó)
+  const cursors = useRef<Record<number, string>>({});
 
   const navigate = useNavigate();
   const { success, error } = useToast();
@@ -44,9 +48,13 @@ export const HistoryPage: React.FC = () => {
   const loadHistory = async () => {
     setLoading(true);
     try {
-      const response = await getComparisonHistory(currentPage, pageSize);
+      const response = await getComparisonHistory(currentPage, pageSize, cursors.current[currentPage]);
       setHistory(response.items);
       setTotal(response.total);
+      setTotalIsEstimate(response.total_is_estimate);
+      if (response.next_cursor) {
+        cursors.current[currentPage + 1] = response.next_cursor;
+      }
     } catch (err) {
       error('Không thể tải lịch sử');
       console.error('Failed to load history:', err);
@@ -211,7 +219,7 @@ export const HistoryPage: React.FC = () => {
             total: total,
             onChange: (page) => setCurrentPage(page),
             showSizeChanger: false, // Không cho thay đổi số lượng mỗi trang
-            showTotal: (total) => `Tổng ${total} kết quả`,
+            showTotal: (total) => `Tổng ${totalIsEstimate ? '~' : ''}${total} kết quả`,
           }}
         />
       </Content>
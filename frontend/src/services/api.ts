@@ -75,11 +75,13 @@ export interface HistoryItem {
   created_at: string;
 }
 
+// Nội dung đoạn (query_text / source_text) chỉ có khi segments_included = true
+// hoặc khi tải qua getMatchSegments; null khi không dựng lại được (vd. tài liệu nguồn đã bị xóa)
 export interface MatchedSegment {
-  query_text: string;
+  query_text?: string | null;
   query_start: number;
   query_end: number;
-  source_text: string;
+  source_text?: string | null;
   source_start: number;
   source_end: number;
 }
@@ -92,12 +94,16 @@ export interface PlagiarismCheckResult {
   word_count: number;
   processing_time_ms: number;
   corpus_size?: number;
+  id?: string;
+  segments_included?: boolean;
   matches: Array<{
+    id: string | null;
     title: string;
     author: string;
     university: string;
     year: number | null;
     similarity: number;
+    segment_count: number;
     matched_segments: MatchedSegment[];
   }>;
 }
@@ -144,6 +150,19 @@ export const uploadDocument = async (file: File): Promise<UploadResponse> => {
   };
 };
 
+/**
+ * Kiểm tra đạo văn cho văn bản dán trực tiếp (/plagiarism/check-text)
+ * - Không cần upload file
+ */
+export const checkText = async (text: string, title?: string): Promise<PlagiarismCheckResult> => {
+  const response = await apiClient.post<PlagiarismCheckResult>('/plagiarism/check-text', { text, title });
+
+  // Lưu kết quả vào localStorage để trang /result đọc (Demo flow)
+  localStorage.setItem('plagiarism_result', JSON.stringify(response.data));
+
+  return response.data;
+};
+
 /**
  * Lấy kết quả kiểm tra đạo văn từ localStorage (Dành cho Demo flow)
  */
@@ -183,13 +202,16 @@ export const getCheckHistory = async (
 
 /**
  * Lấy danh sách lịch sử kiểm tra (Legacy/Demo History)
+ * - cursor: next_cursor của trang trước (phân trang keyset); không có thì dùng page (OFFSET)
+ * - total là số ước lượng khi total_is_estimate = true
  */
 export const getComparisonHistory = async (
   page: number = 1,
-  pageSize: number = 10
-): Promise<{ items: HistoryItem[]; total: number }> => {
+  pageSize: number = 10,
+  cursor?: string | null
+): Promise<{ items: HistoryItem[]; total: number; total_is_estimate: boolean; next_cursor: string | null }> => {
   const response = await apiClient.get('/plagiarism/history', {
-    params: { page, page_size: pageSize },
+    params: cursor ? { cursor, page_size: pageSize } : { page, page_size: pageSize },
   });
   return response.data;
 };
@@ -202,6 +224,21 @@ export const getDocumentContent = async (documentId: string): Promise<{ content:
   return response.data;
 };
 
+/**
+ * Tải nội dung các đoạn trùng khớp của một match theo trang
+ */
+export const getMatchSegments = async (
+  resultId: string,
+  matchId: string,
+  offset: number = 0,
+  limit: number = 10
+): Promise<{ items: MatchedSegment[]; total: number }> => {
+  const response = await apiClient.get(`/plagiarism/history/${resultId}/matches/${matchId}/segments`, {
+    params: { offset, limit },
+  });
+  return response.data;
+};
+
 /**
  * Xóa một bản ghi lịch sử kiểm tra
  */